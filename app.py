@@ -2,14 +2,49 @@
 # Hourglass Workout Program by Joane Aristilde - Enhanced with Video Support
 
 import streamlit as st
+import streamlit.components.v1 as components
+
+# Must be the first Streamlit command; runs before the rest of the imports so
+# the page shell is sent as early as possible on a cold start.
+st.set_page_config(
+    page_title="Hourglass Fitness Transformation",
+    page_icon="💪",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
 from textwrap import dedent
 import re
 from datetime import date, datetime, timedelta
 import json
 import os
 from typing import Dict, Optional, List
-import pandas as pd
-import numpy as np
+
+import appcache
+import badges
+import challenges
+import chart_data
+import coach_cache
+import coach_context
+import community_chat
+import device_sync
+import forecast
+import fragments
+import leaderboard
+import lift_analytics
+import llm
+import llm_executor
+import macros
+import meal_planner
+import perf
+import retrieval
+import streaks
+import theme
+import timeseries
+import translations
+
+# pandas/numpy are imported inside the functions that need them so pages like
+# Home or Coach Jo never pay for them.
 
 
 # SAFE FLAGS
@@ -26,13 +61,16 @@ def _get_bool(name: str, default=False) -> bool:
 ADMIN_MODE = _get_bool("ADMIN_MODE", False)
 READ_ONLY = _get_bool("READ_ONLY", False)
 ADMIN_UI = ADMIN_MODE and not READ_ONLY
+COACH_STREAMING = _get_bool("COACH_STREAMING", True)
+COACH_HEDGE = _get_bool("COACH_HEDGE", True)
 
 # Import storage functions with error handling
 try:
     from storage import (
         init_storage, get_profile, save_profile, get_settings, save_settings,
-        save_daily_log, get_logs, delete_all_user_data, export_logs_csv,
+        save_daily_log, get_logs, delete_all_user_data, export_logs_csv, save_workout_set,
     )
+    import user_context
 
     STORAGE_AVAILABLE = True
 except ImportError:
@@ -65,6 +103,7 @@ except ImportError:
 
 
     def get_logs(user_id, start, end):
+        import pandas as pd
         return pd.DataFrame()
 
 
@@ -75,16 +114,13 @@ except ImportError:
     def export_logs_csv(user_id):
         return "export.csv"
 
+
+    def save_workout_set(**kwargs):
+        pass
+
 # ============================================================================
 # CONFIGURATION & CONSTANTS
 # ============================================================================
-st.set_page_config(
-    page_title="Hourglass Fitness Transformation",
-    page_icon="💪",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
 MAX_VIDEO_MB = 50
 UPLOAD_ROOT = "uploaded_content"
 MAIN_MEDIA_DIR = os.path.join(UPLOAD_ROOT, "main_media")
@@ -97,14 +133,8 @@ WORKOUT_LOG_CSV = "workout_log.csv"
 USER_PROGRESS_JSON = os.path.join(USER_DATA_DIR, "user_progress.json")
 VIDEOS_DB_JSON = os.path.join(EXERCISE_VIDEOS_DIR, "videos_db.json")
 
-# Badge definitions
-BADGES = [
-    {"key": "first_week", "label": "✅ 7-Day Starter", "rule": lambda s: s.get("longest", 0) >= 7},
-    {"key": "hydration_pro", "label": "💧 Hydration Pro", "rule": lambda s: s.get("hydration7", False)},
-    {"key": "glute_grind", "label": "🍑 Glute Grind", "rule": lambda s: s.get("glute_sets_2wk", 0) >= 12},
-    {"key": "consistency", "label": "🔥 21-Day Habit", "rule": lambda s: s.get("longest", 0) >= 21},
-    {"key": "early_bird", "label": "🌅 Early Bird", "rule": lambda s: s.get("morning_workouts", 0) >= 5},
-]
+# Badge definitions (rules and the metrics they read live in badges.py)
+BADGES = badges.BADGES
 
 # ============================================================================
 # WORKOUT DATA
@@ -255,7 +285,6 @@ def init_session_state():
         'coach_history': [],  # MUST be initialized
         'display_name': '',
         'community_chat': [],
-        'device_metrics': {},
         'a11y_scale': 1.0,
         'a11y_theme': 'auto',
         'a11y_reduced_motion': False,
@@ -288,117 +317,18 @@ def init_session_state():
     load_user_progress()
 
 
-def load_styles():
-    """Load custom CSS styles"""
-    st.markdown("""
-    <style>
-        .main {
-            background: linear-gradient(135deg, #ffeef8 0%, #fff5f8 50%, #f0f8ff 100%);
-        }
-        .main-header {
-            font-size: 3rem;
-            font-weight: 800;
-            text-align: center;
-            background: linear-gradient(45deg, #FF1493, #FF69B4, #DA70D6);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-            margin-bottom: .5rem;
-        }
-        .sub-header {
-            font-size: 1.1rem;
-            text-align: center;
-            color: #666;
-            margin-bottom: 1rem;
-            font-weight: 300;
-        }
-        .hero-section {
-            text-align: center;
-            padding: 2rem;
-            background: linear-gradient(135deg, rgba(255,20,147,.15), rgba(255,105,180,.15), rgba(218,112,214,.15));
-            border-radius: 18px;
-            margin-bottom: 20px;
-            backdrop-filter: blur(10px);
-            box-shadow: 0 8px 32px rgba(0,0,0,.08);
-            border: 1px solid rgba(255,255,255,.35);
-        }
-        .nav-button {
-            background: linear-gradient(135deg, #FF69B4, #DA70D6);
-            color: white;
-            padding: 1.5rem;
-            border-radius: 15px;
-            text-align: center;
-            font-size: 1.2rem;
-            font-weight: 600;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-            transition: transform 0.2s;
-            cursor: pointer;
-        }
-        .nav-button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px rgba(0,0,0,0.15);
-        }
-        .info-card {
-            background: white;
-            padding: 1.5rem;
-            border-radius: 12px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            margin-bottom: 1rem;
-        }
-        .weekly-box {
-            background: rgba(255,255,255,.96);
-            padding: 12px;
-            border-radius: 14px;
-            margin: 8px 0 14px 0;
-            box-shadow: 0 4px 15px rgba(0,0,0,.08);
-            border-left: 5px solid #FF1493;
-        }
-        .category-header {
-            background: linear-gradient(45deg,#FF69B4,#DA70D6);
-            color:#fff;
-            padding: 10px;
-            border-radius: 10px;
-            text-align:center;
-            font-weight:700;
-            margin: 12px 0 8px 0;
-        }
-        .exercise-card {
-            background: rgba(255,255,255,.98);
-            padding: 12px;
-            border-radius: 12px;
-            box-shadow: 0 4px 15px rgba(0,0,0,.08);
-            margin: 8px 0;
-            border-left: 5px solid #FF1493;
-        }
-        .completed-card {
-            background: rgba(232,245,232,.95);
-            border-left: 5px solid #4CAF50;
-        }
-        .badge {
-            display:inline-block;
-            padding:6px 10px;
-            border-radius:12px;
-            color:#fff;
-            font-weight:700;
-            margin:6px 0;
-        }
-    </style>
-    """, unsafe_allow_html=True)
-
-
 # ============================================================================
 # NEW: USER PROGRESS PERSISTENCE
 # ============================================================================
+@perf.traced
 def load_user_progress():
     """Load user progress data from JSON"""
     try:
-        if os.path.exists(USER_PROGRESS_JSON):
-            with open(USER_PROGRESS_JSON, 'r') as f:
-                data = json.load(f)
-                # Merge with session state
-                for key in ['prefs', 'ai_tuning', 'badges_earned', 'reminder_prefs']:
-                    if key in data:
-                        st.session_state[key] = data[key]
+        data = appcache.load_json(USER_PROGRESS_JSON, {})
+        # Merge with session state
+        for key in ['prefs', 'ai_tuning', 'badges_earned', 'reminder_prefs']:
+            if key in data:
+                st.session_state[key] = data[key]
     except Exception as e:
         # Silently fail and use defaults
         pass
@@ -418,6 +348,7 @@ def save_user_progress():
         }
         with open(USER_PROGRESS_JSON, 'w') as f:
             json.dump(data, f, indent=2)
+        appcache.invalidate(USER_PROGRESS_JSON)
     except Exception as e:
         # Silently fail
         pass
@@ -426,10 +357,32 @@ def save_user_progress():
 # ============================================================================
 # NEW: PERSONALIZATION HELPERS
 # ============================================================================
+def lift_summary():
+    """e1RMs, PRs and weekly volume from the stored set log (lift_analytics.py); None without storage"""
+    if not STORAGE_AVAILABLE:
+        return None
+    try:
+        return lift_analytics.summary("default")
+    except Exception:
+        return None
+
+
 def generate_smart_suggestions():
     """Generate personalized suggestions based on user data"""
     suggestions = []
 
+    # Progression from the set log (lift_analytics.py)
+    lifts = lift_summary()
+    if lifts:
+        week_ago = (date.today() - timedelta(days=7)).isoformat()
+        pr = next((p for p in lifts["prs"] if p["kind"] == "e1rm" and p["date"] >= week_ago), None)
+        if pr:
+            suggestions.append(f"🏆 New {pr['name']} PR: est. 1RM {pr['value']:.0f} lbs (was {pr['previous']:.0f})")
+        stalled = next((lift for lift in lifts["lifts"] if lift["stalled"]), None)
+        if stalled:
+            suggestions.append(f"📈 {stalled['name']} hasn't set a PR in {stalled['since_pr']} sessions - "
+                               "add a rep or 5 lbs, or deload 10% for a week")
+
     # Analyze last 7 days of data - FIXED with safe access
     weight_entries = st.session_state.get("weight_entries", [])
     if weight_entries:
@@ -462,6 +415,7 @@ def generate_smart_suggestions():
     return suggestions[:5]  # Return top 5 suggestions
 
 
+@perf.traced
 def render_personalization_card():
     """Render the personalization card with smart suggestions"""
     with st.expander("🎯 Smart Suggestions for You", expanded=True):
@@ -548,21 +502,23 @@ def render_personalization_card():
 # ============================================================================
 # NEW: STREAK & BADGE FUNCTIONS
 # ============================================================================
-def compute_streaks(entries):
-    """Compute workout streaks from entries"""
-    if not entries:
-        return {"current": 0, "longest": 0, "last_date": None}
+def compute_streaks(entries=None):
+    """Compute workout streaks (streaks.py) plus the badge inputs.
 
-    # Sort entries by date
-    sorted_entries = sorted(entries, key=lambda x: x.get("date", ""))
-
-    if not sorted_entries:
-        return {"current": 0, "longest": 0, "last_date": None}
-
-    # Simple streak calculation (mock for now)
-    current_streak = min(len(sorted_entries), 7)  # Mock current streak
-    longest_streak = min(len(sorted_entries), 21)  # Mock longest streak
-    last_date = sorted_entries[-1].get("date") if sorted_entries else None
+    With storage the streak comes from the stored, incrementally updated
+    row; ``entries`` (dicts with a "date") are only used without storage.
+    """
+    streak = None
+    if STORAGE_AVAILABLE:
+        try:
+            streak = streaks.get("default")
+        except Exception:
+            pass
+    if streak is None:
+        streak = streaks.as_of(streaks.compute(e["date"] for e in entries or [] if e.get("date")))
+    current_streak = streak["current"]
+    longest_streak = streak["longest"]
+    last_date = streak["last_date"]
 
     # Check hydration streak - FIXED with safe access
     hydration7 = False
@@ -589,26 +545,34 @@ def compute_streaks(entries):
 
 
 def check_badges(stats):
-    """Check which badges are earned based on stats"""
-    earned = []
-    for badge in BADGES:
+    """Earned badges as key -> ISO award time (None when not tracked).
+
+    With storage the awards come from badges.py, which evaluates them as
+    sets and check-ins are saved; ``stats`` is only used without storage.
+    """
+    if STORAGE_AVAILABLE:
         try:
-            if badge["rule"](stats):
-                earned.append(badge["key"])
-        except:
+            return badges.awarded("default")
+        except Exception:
             pass
-    return earned
+    values = {
+        "longest": stats.get("longest", 0),
+        "hydration_run": 7 if stats.get("hydration7") else 0,
+        "glute_sets_2wk": stats.get("glute_sets_2wk", 0),
+        "morning_workouts": stats.get("morning_workouts", 0),
+    }
+    return dict.fromkeys(badges.evaluate(values))
 
 
+@perf.traced
 def render_streaks_tab():
     """Render the streaks and badges tab"""
-    st.markdown("## ⭐ Streaks & Badges")
+    st.markdown(f"## {i18n('page.streaks')}")
 
-    # Calculate streaks - FIXED with safe access
-    progress_entries = st.session_state.get("progress_entries", [])
-    weight_entries = st.session_state.get("weight_entries", [])
-    all_entries = progress_entries + weight_entries
-    stats = compute_streaks(all_entries)
+    # Calculate streaks - session entries are only read when storage is unavailable
+    stats = compute_streaks(
+        None if STORAGE_AVAILABLE else
+        st.session_state.get("progress_entries", []) + st.session_state.get("weight_entries", []))
 
     # Display streak counters
     col1, col2, col3 = st.columns(3)
@@ -626,7 +590,7 @@ def render_streaks_tab():
     st.markdown("### 🏅 Your Badges")
 
     earned_badges = check_badges(stats)
-    st.session_state.badges_earned = earned_badges
+    st.session_state.badges_earned = list(earned_badges)
 
     # Display earned badges
     badge_cols = st.columns(4)
@@ -634,6 +598,8 @@ def render_streaks_tab():
         with badge_cols[i % 4]:
             if badge["key"] in earned_badges:
                 st.success(badge["label"])
+                if earned_badges[badge["key"]]:
+                    st.caption(f"Earned {earned_badges[badge['key']][:10]}")
             else:
                 st.info(f"🔒 {badge['label'].split(' ', 1)[1] if ' ' in badge['label'] else badge['label']}")
 
@@ -682,17 +648,27 @@ def render_streaks_tab():
 # ============================================================================
 # NEW: COMMUNITY FUNCTIONS
 # ============================================================================
+@perf.traced
 def render_community_tab():
     """Render the community tab"""
-    st.markdown("## 👥 Community")
+    import pandas as pd
+
+    st.markdown(f"## {i18n('page.community')}")
 
     # Weekly challenge section
     st.markdown("### 🎯 Weekly Challenge")
     challenge = st.selectbox(
         "This week's challenge",
-        ["8k steps/day", "3 workouts", "2 core days", "5L water challenge", "No skip week"]
+        list(challenges.CHALLENGES)
     )
 
+    if STORAGE_AVAILABLE:
+        # Progress and board come from the precomputed weekly aggregates (challenges.py)
+        mine = challenges.progress("default", challenge)
+        st.progress(min(1.0, mine["days"] / mine["target"]),
+                    text=f"{challenges.CHALLENGES[challenge].description}: {mine['days']}/{mine['target']} days"
+                         + (" ✅" if mine["done"] else ""))
+
     col1, col2 = st.columns(2)
     with col1:
         name = st.text_input(
@@ -705,220 +681,213 @@ def render_community_tab():
         if st.button("Join / Update Challenge"):
             st.session_state.display_name = name
             save_user_progress()
+            if STORAGE_AVAILABLE:
+                leaderboard.join("default", name or "You", challenge)
             st.success(f"Joined '{challenge}' as {name}!")
 
     st.markdown("---")
 
-    # Leaderboard
-    st.subheader("🏆 Leaderboard (local device demo)")
+    if STORAGE_AVAILABLE:
+        # Leaderboard - points from logged sets and streaks across all users (leaderboard.py)
+        st.subheader("🏆 Leaderboard")
+        scope = st.radio("Board", ["All time", f"This week: {challenge}"], horizontal=True,
+                         key="leaderboard_scope")
+        board = leaderboard.ALL if scope == "All time" else leaderboard.board_key(challenge)
+        leaderboard.ensure("default", st.session_state.get("display_name") or "You")
+        mine = leaderboard.rank(board, "default")
+        if mine:
+            st.metric("Your rank", f"#{mine['rank']} of {mine['members']}", f"{mine['score']} pts",
+                      delta_color="off")
+        elif board != leaderboard.ALL:
+            st.caption("Join this week's challenge to appear on its board.")
+        rows = leaderboard.top(board, 10)
+        if rows:
+            df = pd.DataFrame([{"Rank": r["rank"], "Name": r["name"], "Points": r["score"]} for r in rows])
+            st.dataframe(df, hide_index=True, use_container_width=True)
+        else:
+            st.info("No one is on this board yet.")
+        if board != leaderboard.ALL:
+            target = challenges.CHALLENGES[challenge].target
+            progress_rows = challenges.board(challenge)
+            if progress_rows:
+                st.caption("Challenge progress")
+                st.dataframe(pd.DataFrame([
+                    {"Name": r["name"], "Days": f"{r['days']}/{target}", "Done": "✅" if r["done"] else ""}
+                    for r in progress_rows]), hide_index=True, use_container_width=True)
+    else:
+        st.subheader("🏆 Leaderboard (local device demo)")
 
-    # Mock leaderboard data - FIXED with safe access
-    completed_exercises = st.session_state.get("completed_exercises", [])
-    leaderboard_data = [
-        {"Name": st.session_state.get("display_name", "You"),
-         "Points": len(completed_exercises) * 10, "Streak": "🔥 7 days"},
-        {"Name": "Sarah M.", "Points": 280, "Streak": "🔥 14 days"},
-        {"Name": "Jessica R.", "Points": 220, "Streak": "🔥 5 days"},
-        {"Name": "Emma L.", "Points": 190, "Streak": "🔥 3 days"},
-    ]
+        # Mock leaderboard data - FIXED with safe access
+        completed_exercises = st.session_state.get("completed_exercises", [])
+        leaderboard_data = [
+            {"Name": st.session_state.get("display_name", "You"),
+             "Points": len(completed_exercises) * 10, "Streak": "🔥 7 days"},
+            {"Name": "Sarah M.", "Points": 280, "Streak": "🔥 14 days"},
+            {"Name": "Jessica R.", "Points": 220, "Streak": "🔥 5 days"},
+            {"Name": "Emma L.", "Points": 190, "Streak": "🔥 3 days"},
+        ]
 
-    df = pd.DataFrame(leaderboard_data)
-    st.dataframe(df, hide_index=True, use_container_width=True)
+        df = pd.DataFrame(leaderboard_data)
+        st.dataframe(df, hide_index=True, use_container_width=True)
 
     st.markdown("---")
 
-    # Group chat placeholder
+    # Group chat - shared through storage when available (community_chat.py)
     st.markdown("### 💬 Community Chat")
 
-    # Display chat messages - FIXED with safe access
-    community_chat = st.session_state.get("community_chat", [])
-    for msg in community_chat[-10:]:
-        with st.chat_message(msg["role"]):
+    if STORAGE_AVAILABLE:
+        community_chat.poll(st.session_state)  # only messages past this session's cursor
+        if community_chat.has_older(st.session_state) and st.button("Load older messages"):
+            community_chat.older(st.session_state)
+        messages = community_chat.visible(st.session_state)
+    else:
+        messages = st.session_state.get("community_chat", [])[-10:]
+
+    for msg in messages:
+        with st.chat_message(msg.get("role", "user")):
             st.write(f"**{msg['name']}**: {msg['content']}")
 
     # Chat input
     chat_input = st.chat_input("Share your progress...")
     if chat_input and st.session_state.get("display_name"):
-        if "community_chat" not in st.session_state:
-            st.session_state.community_chat = []
-        st.session_state.community_chat.append({
-            "role": "user",
-            "name": st.session_state.display_name,
-            "content": chat_input,
-            "timestamp": datetime.now().isoformat()
-        })
+        if STORAGE_AVAILABLE:
+            community_chat.post(st.session_state, "default", st.session_state.display_name, chat_input)
+        else:
+            if "community_chat" not in st.session_state:
+                st.session_state.community_chat = []
+            st.session_state.community_chat.append({
+                "role": "user",
+                "name": st.session_state.display_name,
+                "content": chat_input,
+                "timestamp": datetime.now().isoformat()
+            })
         st.rerun()
     elif chat_input:
         st.warning("Please set your display name first!")
 
-    st.info("Multi-user sync is stubbed for now. Ready for Firebase/Supabase later.")
+    if not STORAGE_AVAILABLE:
+        st.info("Multi-user sync is stubbed for now. Ready for Firebase/Supabase later.")
 
 
 # ============================================================================
 # NEW: DEVICE SYNC FUNCTIONS
 # ============================================================================
-def fetch_fitbit_demo(client_id, client_secret):
-    """Mock Fitbit data fetch"""
-    # This is a demo - returns mock data
-    import random
-    return (
-        random.randint(5000, 12000),  # steps
-        random.randint(55, 75),  # resting HR
-        round(random.uniform(6.5, 8.5), 1)  # sleep hours
-    )
+TREND_RANGES = {"Day": timedelta(days=1), "Week": timedelta(days=7), "Month": timedelta(days=30),
+                "Year": timedelta(days=365)}
+TREND_POINTS = 700  # about the chart's width in pixels
 
 
+@perf.traced
 def render_devices_tab():
     """Render the devices sync tab"""
-    st.markdown("## 🔗 Devices")
-    st.caption("Read-only demo. Enter API keys to simulate sync.")
+    st.markdown(f"## {i18n('page.devices')}")
+    st.caption("Connect a wearable to sync daily steps and resting heart rate.")
 
-    provider = st.selectbox(
-        "Provider",
-        ["None", "Fitbit", "Apple Health (manual import)", "Google Fit", "Garmin"]
-    )
+    labels = {adapter.label: adapter for adapter in device_sync.adapters()}
+    provider = st.selectbox("Provider", ["None"] + list(labels))
+    adapter = labels.get(provider)
 
-    if provider == "Fitbit":
+    if adapter is not None and not STORAGE_AVAILABLE:
+        st.info("Device sync needs local storage, which is not available.")
+    elif adapter is not None and adapter.fetch is not None:
+        token = st.text_input(f"{adapter.label} access token", key=f"{adapter.name}_token", type="password")
         col1, col2 = st.columns(2)
         with col1:
-            client_id = st.text_input("FITBIT_CLIENT_ID", key="fitbit_client_id")
+            if st.button("Connect", key=f"{adapter.name}_connect"):
+                if token:
+                    device_sync.connect("default", adapter.name, token)
+                    st.success(f"{adapter.label} connected.")
+                else:
+                    st.warning("Please enter an access token")
         with col2:
-            client_secret = st.text_input("FITBIT_CLIENT_SECRET", key="fitbit_client_secret", type="password")
-
-        if st.button("Test fetch (demo)"):
-            if client_id and client_secret:
-                try:
-                    steps, hr, sleep = fetch_fitbit_demo(client_id, client_secret)
-
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Steps (yesterday)", f"{steps:,}")
-                    with col2:
-                        st.metric("Resting HR", f"{hr} bpm")
-                    with col3:
-                        st.metric("Sleep", f"{sleep} hrs")
-
-                    # Store in session state
-                    st.session_state.device_metrics = {
-                        "steps": steps,
-                        "hr": hr,
-                        "sleep": sleep,
-                        "timestamp": datetime.now().isoformat()
-                    }
-
-                    st.success("Demo data fetched! (Not real Fitbit data)")
-                except Exception as e:
-                    st.error(f"Demo fetch failed: {str(e)}")
-            else:
-                st.warning("Please enter both Client ID and Secret for demo")
+            if st.button("Sync now", key=f"{adapter.name}_sync"):
+                with st.spinner("Syncing..."):
+                    result = device_sync.sync_user("default")
+                if not result["accounts"]:
+                    st.warning("Connect an account first")
+                elif result["errors"]:
+                    st.error(f"Sync failed for {result['errors']} account(s); see the status below.")
+                else:
+                    st.success(f"Synced {result['rows']} daily totals.")
 
-    elif provider == "Apple Health (manual import)":
+    elif adapter is not None:
         uploaded_file = st.file_uploader(
             "Upload Apple Health export (CSV)",
             type=["csv"],
             key="apple_health_upload"
         )
-        if uploaded_file:
-            st.success("File uploaded! (Processing not implemented in demo)")
-
-    elif provider == "Google Fit":
-        st.info("Google Fit integration coming soon!")
-        st.text_input("Google API Key (demo)", key="google_fit_key", type="password")
-
-    elif provider == "Garmin":
-        st.info("Garmin Connect integration coming soon!")
+        if uploaded_file and st.session_state.get("apple_health_imported") != uploaded_file.file_id:
+            try:
+                stored = device_sync.import_apple_health("default", uploaded_file)
+                st.session_state.apple_health_imported = uploaded_file.file_id
+                st.success(f"Imported {stored} daily totals.")
+            except Exception as e:
+                st.error(f"Import failed: {str(e)}")
 
     st.markdown("---")
 
-    # Display stored metrics - FIXED with safe access
-    device_metrics = st.session_state.get("device_metrics", {})
-    if device_metrics:
-        st.markdown("### 📊 Last Sync")
-        col1, col2, col3 = st.columns(3)
+    if STORAGE_AVAILABLE:
+        accounts = device_sync.accounts("default")
+        latest = device_sync.latest("default")
+        if latest:
+            st.markdown("### 📊 Last Sync")
+            col1, col2 = st.columns(2)
+            with col1:
+                steps = latest.get("steps")
+                st.metric("Steps", f"{int(steps[1]):,}" if steps else "—", help=steps[0] if steps else None)
+            with col2:
+                hr = latest.get("resting_hr")
+                st.metric("Resting HR", f"{hr[1]:g} bpm" if hr else "—", help=hr[0] if hr else None)
+        for account in accounts:
+            known = device_sync.get(account["provider"])
+            st.caption(f"{known.label if known else account['provider']}: {account['status']} · "
+                       f"synced {account['synced_at'] or 'never'} · up to {account['cursor'] or '—'}")
+
+    stored = timeseries.metrics("default")
+    if stored:
+        st.markdown("### 📈 Trends")
+        col1, col2 = st.columns(2)
         with col1:
-            st.metric("Steps", f"{device_metrics.get('steps', 0):,}")
+            metric = st.selectbox("Metric", stored, key="trend_metric")
         with col2:
-            st.metric("Heart Rate", f"{device_metrics.get('hr', 0)} bpm")
-        with col3:
-            st.metric("Sleep", f"{device_metrics.get('sleep', 0)} hrs")
-        st.caption(f"Synced: {device_metrics.get('timestamp', 'Never')}")
+            span = st.radio("Range", list(TREND_RANGES), horizontal=True, key="trend_range")
+        samples = chart_data.device("default", metric, TREND_RANGES[span], TREND_POINTS)
+        if samples.empty:
+            st.caption("No samples in this range.")
+        else:
+            columns = ["value"] if metric in timeseries.SUM_METRICS else ["value", "min", "max"]
+            st.line_chart(samples.set_index("ts")[columns])
+            st.caption(f"{len(samples)} points, {samples.attrs['tier']} resolution")
 
-    st.info("Production OAuth wiring left as TODO; this tab accepts imports/keys and shows demo metrics.")
+    st.info("OAuth sign-in is not wired yet: paste an access token issued for your account.")
 
 
 # ============================================================================
 # NEW: ACCESSIBILITY FUNCTIONS
 # ============================================================================
-def apply_accessibility_css():
-    """Apply accessibility CSS based on user preferences"""
-    scale = st.session_state.get("a11y_scale", 1.0)
-    theme = st.session_state.get("a11y_theme", "auto")
-    reduced_motion = st.session_state.get("a11y_reduced_motion", False)
-
-    css = f"""
-    <style>
-    :root {{
-        --uifx-scale: {scale};
-    }}
-    .main * {{
-        font-size: calc(1rem * var(--uifx-scale));
-    }}
-    """
-
-    if theme == "high-contrast":
-        css += """
-        .main {
-            background: #000 !important;
-            color: #fff !important;
-        }
-        .stButton button {
-            background: #fff !important;
-            color: #000 !important;
-            border: 2px solid #fff !important;
-        }
-        """
-
-    if reduced_motion:
-        css += """
-        * {
-            animation-duration: 0.01ms !important;
-            transition-duration: 0.01ms !important;
-        }
-        """
-
-    css += "</style>"
-    st.markdown(css, unsafe_allow_html=True)
-
-
-def i18n(key, lang=None):
-    """Simple internationalization helper"""
+def i18n(key, lang=None, **params):
+    """Translate a UI string from the compiled catalogs (see translations.py)"""
     if lang is None:
         lang = st.session_state.get("language", "en")
+    return translations.gettext(key, lang, **params)
 
-    translations = {
-        "en": {
-            "welcome": "Welcome to Your Fitness Journey!",
-            "workout": "Workout",
-            "meal_plan": "Meal Plan",
-            "progress": "Progress",
-        },
-        "es": {
-            "welcome": "¡Bienvenido a tu viaje de fitness!",
-            "workout": "Entrenamiento",
-            "meal_plan": "Plan de comidas",
-            "progress": "Progreso",
-        },
-        "fr": {
-            "welcome": "Bienvenue dans votre parcours fitness!",
-            "workout": "Entraînement",
-            "meal_plan": "Plan de repas",
-            "progress": "Progrès",
-        }
-    }
 
-    return translations.get(lang, translations["en"]).get(key, key)
+def static_fragment(name, build):
+    """Cached markdown/HTML for a static page block (see fragments.py); ``name`` identifies the block"""
+    return fragments.get(
+        name,
+        st.session_state.get("language", "en"),
+        st.session_state.get("a11y_theme", "auto"),
+        build,
+    )
+
 
+def static_markdown(name, block, unsafe_allow_html=False):
+    """Render a static markdown/HTML block through the fragment cache"""
+    st.markdown(static_fragment(name, lambda: fragments.text(block)), unsafe_allow_html=unsafe_allow_html)
 
+
+@perf.traced
 def render_accessibility_settings():
     """Render accessibility settings in sidebar"""
     with st.expander("♿ Accessibility"):
@@ -966,12 +935,11 @@ def render_accessibility_settings():
 # ============================================================================
 # NEW: RICH VIDEO LIBRARY FUNCTIONS
 # ============================================================================
+@perf.traced
 def load_videos_db():
     """Load video library database"""
     try:
-        if os.path.exists(VIDEOS_DB_JSON):
-            with open(VIDEOS_DB_JSON, 'r') as f:
-                return json.load(f)
+        return appcache.load_json(VIDEOS_DB_JSON, [])
     except:
         pass
     return []
@@ -982,6 +950,7 @@ def save_videos_db(db):
     try:
         with open(VIDEOS_DB_JSON, 'w') as f:
             json.dump(db, f, indent=2)
+        appcache.invalidate(VIDEOS_DB_JSON)
         return True
     except:
         return False
@@ -1035,6 +1004,7 @@ def rate_video(exercise_key, path, delta):
     return False
 
 
+@perf.traced
 def render_video_library(exercise_name, exercise_key):
     """Render video library for an exercise"""
     with st.expander("📹 Video Library"):
@@ -1117,12 +1087,11 @@ def render_video_library(exercise_name, exercise_key):
 # ============================================================================
 # EXISTING VIDEO MANAGEMENT FUNCTIONS (UNCHANGED)
 # ============================================================================
+@perf.traced
 def load_videos_json():
     """Load video mappings from videos.json"""
     try:
-        if os.path.exists(VIDEOS_JSON):
-            with open(VIDEOS_JSON, 'r') as f:
-                return json.load(f)
+        return appcache.load_json(VIDEOS_JSON, {})
     except Exception as e:
         st.error(f"Error loading videos: {str(e)}")
     return {}
@@ -1136,6 +1105,7 @@ def save_videos_json(videos_dict):
     try:
         with open(VIDEOS_JSON, 'w') as f:
             json.dump(videos_dict, f, indent=2)
+        appcache.invalidate(VIDEOS_JSON)
         return True
     except Exception as e:
         st.error(f"Error saving videos: {str(e)}")
@@ -1147,6 +1117,7 @@ def get_exercise_id(exercise_name):
     return re.sub(r'[^a-z0-9]+', '_', exercise_name.lower()).strip('_')
 
 
+@perf.traced
 def render_admin_intro_video_manager():
     """Simplified admin interface for intro video only"""
     if not ADMIN_UI:
@@ -1196,6 +1167,7 @@ def render_admin_intro_video_manager():
             st.rerun()
 
 
+@perf.traced
 def render_admin_video_manager():
     """Render admin-only video management panel"""
     if not ADMIN_UI:
@@ -1320,6 +1292,10 @@ def render_admin_video_manager():
 
 def get_all_exercises():
     """Get list of all unique exercise names"""
+    return list(appcache.memoize("exercise_catalog", _build_exercise_catalog))
+
+
+def _build_exercise_catalog():
     exercises = set()
 
     # Add all exercises from workout data
@@ -1334,7 +1310,7 @@ def get_all_exercises():
     ]
     exercises.update(basic_exercises)
 
-    return sorted(list(exercises))
+    return tuple(sorted(exercises))
 
 
 # ============================================================================
@@ -1342,6 +1318,8 @@ def get_all_exercises():
 # ============================================================================
 def save_workout_log(date_str, exercise_id, exercise_name, set_num, reps, weight, completed):
     """Save workout data to CSV"""
+    import pandas as pd
+
     try:
         new_entry = pd.DataFrame([{
             'date': date_str,
@@ -1360,16 +1338,31 @@ def save_workout_log(date_str, exercise_id, exercise_name, set_num, reps, weight
             updated_df = new_entry
 
         updated_df.to_csv(WORKOUT_LOG_CSV, index=False)
+
+        # Mirror into storage so the coach context sees recent training
+        if STORAGE_AVAILABLE:
+            try:
+                init_storage()
+                save_workout_set(
+                    user_id="default", date=date_str, exercise_id=exercise_id, exercise_name=exercise_name,
+                    set_num=set_num, reps=reps, weight=weight, completed=completed,
+                )
+            except Exception:
+                pass
         return True
     except Exception as e:
         st.error(f"Error saving workout log: {str(e)}")
         return False
 
 
+@perf.traced
 def get_today_workout_log(date_str, exercise_id):
     """Get today's workout log for specific exercise"""
+    import pandas as pd
+
     try:
         if os.path.exists(WORKOUT_LOG_CSV):
+            perf.add_bytes(os.path.getsize(WORKOUT_LOG_CSV))
             df = pd.read_csv(WORKOUT_LOG_CSV)
             filtered = df[(df['date'] == date_str) & (df['exercise_id'] == exercise_id)]
             return filtered
@@ -1446,6 +1439,7 @@ def find_exercise_video(key_slug):
     return None
 
 
+@perf.traced
 def render_enhanced_exercise_card(exercise, idx, workout_date):
     """Enhanced exercise card with video and set tracking"""
     exercise_name = exercise['name']
@@ -1460,6 +1454,11 @@ def render_enhanced_exercise_card(exercise, idx, workout_date):
     with st.container():
         st.markdown(f"### {idx}. {exercise_name}")
         st.markdown(f"**Category:** {category} | **Sets:** {sets_info} | **Reps:** {reps_info}")
+        lifts = lift_summary() or {}
+        lift = next((lift for lift in lifts.get("lifts", []) if lift["exercise_id"] == exercise_id), None)
+        if lift:
+            st.caption(f"Est. 1RM {lift['e1rm']:.0f} lbs | Best {lift['best_weight']:g} lbs | "
+                       f"Last session {lift['last_e1rm']:.0f} lbs e1RM ({lift['last_date']})")
 
         # NEW: Exercise alternatives
         alternatives = EXERCISE_ALTERNATIVES.get(exercise_id, {})
@@ -1569,6 +1568,10 @@ def render_enhanced_exercise_card(exercise, idx, workout_date):
 
                     if saved_count > 0:
                         st.success(f"Saved {saved_count} sets!")
+                        for pr in (lift_summary() or {}).get("prs", []):
+                            if pr["exercise_id"] == exercise_id and pr["date"] == workout_date:
+                                what = "est. 1RM" if pr["kind"] == "e1rm" else "heaviest weight"
+                                st.success(f"🏆 New PR! {what} {pr['value']:.0f} lbs (previous {pr['previous']:.0f})")
 
                         today_log = get_today_workout_log(workout_date, exercise_id)
                         if not today_log.empty:
@@ -1691,6 +1694,7 @@ def render_enhanced_exercise_card(exercise, idx, workout_date):
                                     st.rerun()
 
 
+@perf.traced
 def render_homepage_intro_video():
     """Render intro video at bottom of homepage with admin controls."""
     videos = load_videos_json()
@@ -1762,250 +1766,372 @@ SYSTEM_PROMPT = (
     "Answer concisely and safely. This is not medical advice."
 )
 
+# Starter chips on the Coach Jo page: (button label, prompt)
+COACH_STARTERS = [
+    ("Swap salmon dinner → vegan (40g protein)",
+     "How can I swap a salmon dinner to a vegan dinner with ~40g protein?"),
+    ("Hip thrust progression (12 reps felt easy)",
+     "I hit 12 reps on hip thrusts; how should I progress weight and reps?"),
+    ("Alternative to Bulgarian split squats",
+     "What are alternatives to Bulgarian split squats that still hit glutes well?"),
+]
 
-def resolve_provider():
-    """Automatically detect which provider to use based on available API keys"""
-    import os
 
-    # Check for API keys in environment or secrets
-    openai_key = os.environ.get("OPENAI_API_KEY", "")
-    if not openai_key:
+def _get_secret(name: str) -> str:
+    """Read a setting from the environment, then Streamlit secrets"""
+    val = os.environ.get(name, "")
+    if not val:
         try:
-            openai_key = st.secrets.get("OPENAI_API_KEY", "")
-        except:
-            pass
+            val = st.secrets.get(name, "")
+        except Exception:
+            val = ""
+    return val
 
-    gemini_key = os.environ.get("GEMINI_API_KEY", "")
-    if not gemini_key:
-        try:
-            gemini_key = st.secrets.get("GEMINI_API_KEY", "")
-        except:
-            pass
+
+def _resolve_provider():
+    # An explicit COACH_PROVIDER (openai, gemini, mock or standin) wins
+    forced = _get_secret("COACH_PROVIDER").strip().lower()
+    if forced in llm.PROVIDERS:
+        return forced
 
     # Return the first available provider
-    if openai_key:
+    if _get_secret("OPENAI_API_KEY"):
         return "openai"
-    elif gemini_key:
+    elif _get_secret("GEMINI_API_KEY"):
         return "gemini"
     else:
         return None
 
 
-def _send_to_coach(user_text: str):
-    """Send message to coach - FIXED to auto-detect provider"""
-    # Ensure coach_history exists
-    if "coach_history" not in st.session_state:
-        st.session_state.coach_history = []
-
-    st.session_state.coach_history.append({"role": "user", "content": user_text})
+def resolve_provider():
+    """Automatically detect which provider to use based on available API keys.
 
-    provider = resolve_provider()
+    Resolved once per process; call invalidate_provider() after changing keys.
+    Until a key is found, every call looks again.
+    """
+    return appcache.memoize("coach_provider", _resolve_provider, cache_none=False)
 
-    if not provider:
-        answer = "AI assistant isn't configured yet. Please add OPENAI_API_KEY or GEMINI_API_KEY to environment variables or Streamlit secrets."
-    else:
-        try:
-            answer = ask_coach_llm(
-                messages=[{"role": "system", "content": SYSTEM_PROMPT}] + st.session_state.coach_history,
-                provider=provider
-            )
-        except Exception as e:
-            answer = f"Sorry, I couldn't get a response. Please check your API key configuration and try again."
 
-    st.session_state.coach_history.append({"role": "assistant", "content": answer})
-    st.rerun()
+def coach_api_key(provider):
+    """API key for ``provider``, or None when it is not set (cached like resolve_provider)"""
+    name = llm.get(provider).key_env
+    if not name:
+        return None
+    return appcache.memoize(("coach_api_key", name), lambda: _get_secret(name) or None, cache_none=False)
 
 
-def ask_coach_llm(messages: list, provider: str) -> str:
-    """Call the appropriate LLM provider"""
-    import os
+def coach_routes(provider):
+    """Provider routes for llm_executor: the resolved provider, then the other configured one for hedging"""
     provider = (provider or "").lower()
+    routes = [llm_executor.Route(provider, coach_api_key(provider))]
+    other = {"openai": "gemini", "gemini": "openai"}.get(provider)
+    if COACH_HEDGE and other and coach_api_key(other):
+        routes.append(llm_executor.Route(other, coach_api_key(other)))
+    return routes
 
-    if provider.startswith("gemini"):
-        # Google Generative AI
-        try:
-            import google.generativeai as genai
-        except ImportError:
-            return "Please install google-generativeai: pip install google-generativeai"
 
-        # Check environment variable first, then Streamlit secrets
-        key = os.environ.get("GEMINI_API_KEY", "")
-        if not key:
-            try:
-                key = st.secrets.get("GEMINI_API_KEY", "")
-            except:
-                pass
-        if not key:
-            raise RuntimeError("GEMINI_API_KEY not set. Please set it in environment variables or Streamlit secrets.")
+def invalidate_provider():
+    """Re-read provider settings and keys, and drop pooled LLM clients"""
+    appcache.forget("coach_provider")
+    for name in ("OPENAI_API_KEY", "GEMINI_API_KEY"):
+        appcache.forget(("coach_api_key", name))
+    llm.reset_clients()
 
-        genai.configure(api_key=key)
-        prompt = "\n\n".join([f"{m['role'].upper()}: {m['content']}" for m in messages])
-        model = genai.GenerativeModel("gemini-1.5-pro")
-        resp = model.generate_content(prompt)
-        return (getattr(resp, "text", None) or resp.candidates[0].content.parts[0].text).strip()
 
-    else:
-        # OpenAI
+def _send_to_coach(user_text: str, session=None):
+    """Queue a message for the coach; the reply is produced by _render_pending_reply.
+
+    ``session`` defaults to st.session_state; the load test passes plain dicts.
+    """
+    session = st.session_state if session is None else session
+    session.setdefault("coach_history", []).append({"role": "user", "content": user_text})
+    session["coach_pending"] = True
+
+
+def coach_user_context(session=None):
+    """Compact snapshot of the user's data and preferences for coach prompts (user_context.py)"""
+    session = st.session_state if session is None else session
+    lines = []
+    if STORAGE_AVAILABLE:
         try:
-            from openai import OpenAI
-        except ImportError:
-            return "Please install openai: pip install openai"
+            lines.append(user_context.snapshot("default"))
+        except Exception:
+            pass
+    prefs = session.get("prefs", {})
+    tuning = session.get("ai_tuning", {})
+    lines.append(
+        f"Plan: level {session.get('selected_level', 1)}, {prefs.get('experience', 'beginner')}, "
+        f"focus {', '.join(prefs.get('focus', [])) or 'general'}, {tuning.get('available_days', 4)} days/week")
+    diet = tuning.get("diet", "omnivore")
+    option = next((name for name in WEEKLY_MEALS if diet.lower() in name.lower()), None)
+    meals = WEEKLY_MEALS[option].get(date.today().strftime("%A"), []) if option else []
+    plan = session.get("generated_meal_plan")
+    if plan:
+        today = next((day for day in plan["week"] if day["day"] == date.today().strftime("%A")), None)
+        meals = [m["name"] for m in today["meals"]] if today else meals
+    line = f"Diet: {diet}, protein target {tuning.get('protein_target_g', 120)} g"
+    if meals:
+        line += "; today's meals: " + "; ".join(meals)
+    lines.append(line)
+    if tuning.get("injury_notes"):
+        lines.append(f"Injury notes: {tuning['injury_notes']}")
+    return "\n".join(line for line in lines if line)
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def coach_documents():
+    """Coach Jo's local knowledge: exercise alternatives, meal plans, nutrition tips and programmed exercises"""
+    docs = []
+    catalog = {_slug(name): name for name in get_all_exercises()}
+    for key, kinds in EXERCISE_ALTERNATIVES.items():
+        name = catalog.get(key, key.replace("_", " ").title())
+        docs.append(retrieval.Document(
+            f"alternatives:{key}", f"Alternatives to {name}",
+            f"Alternatives to {name}: " + "; ".join(
+                f"{kind.replace('_', ' ')}: {', '.join(options)}" for kind, options in kinds.items()) + ".",
+            "Workout Tracker › Exercise alternatives", "alternative low impact at home"))
+
+    for option, week in WEEKLY_MEALS.items():
+        diet = option.split(": ", 1)[-1]
+        for day, meals in week.items():
+            parts = [f"{label} {meal}" for label, meal in zip(("breakfast", "lunch", "dinner"), meals)]
+            docs.append(retrieval.Document(
+                f"meals:{_slug(diet)}:{day.lower()}", f"{diet}, {day}",
+                f"{diet} plan for {day}: " + "; ".join(parts) + ".", f"Meal Plans › {option}", "meal plan menu"))
+
+    for block, source in ((NUTRITION_KEY_POINTS, "Meal Plans › Nutrition Tips"),
+                          (NUTRITION_TIPS, "Meal Plans › Nutrition Tips tab")):
+        for section in block.split("### ")[1:]:
+            heading, _, body = section.partition("\n")
+            heading = heading.strip().rstrip(":")
+            lines = [line.strip("- ").replace("**", "") for line in body.splitlines() if line.strip()]
+            docs.append(retrieval.Document(
+                f"tips:{_slug(heading)}", heading, f"{heading}: " + "; ".join(lines), source, "nutrition tip"))
+
+    programmed = {}
+    for level in (1, 2):
+        for day, label in PROGRAM_SPLIT[f"Level {level}"].items():
+            if label == "REST":
+                continue
+            for ex in get_exercises_for_day(level, day, label):
+                name = re.sub(r"^[^\w(]+", "", ex["name"]).strip()
+                if ex["category"] in ("Rest", "Main", "Accessory") or name.startswith("Repeat"):
+                    continue
+                entry = programmed.setdefault(name, {"ex": ex, "when": []})
+                entry["when"].append(f"Level {level} {day}")
+    for name, entry in programmed.items():
+        ex = entry["ex"]
+        volume = ex["reps"] if ex["sets"] == "—" else f"{ex['sets']} sets, {ex['reps']}"
+        docs.append(retrieval.Document(
+            f"exercise:{_slug(name)}", name,
+            f"{name} ({ex['category']}): {volume}. Programmed on {', '.join(entry['when'])}.",
+            "Workout Overview", "sets reps how long duration program schedule"))
+    return docs
+
+
+def coach_index():
+    """Process-wide BM25 index over ``coach_documents``"""
+    return appcache.memoize("coach_index", lambda: retrieval.Index(coach_documents()))
+
+
+def coach_request(history: list, provider: str, state=None, hits=None, session=None):
+    """Messages for the next reply and its shared-cache key (None once a conversation has started).
+
+    Starter-chip questions are sent without user context so one cached answer
+    serves everyone; other opening questions are cached per user context.
+    ``hits`` from ``retrieval.route`` are sent as reference material.
+    """
+    opening = len(history) == 1 and history[0]["role"] == "user"
+    generic = opening and history[0]["content"] in {prompt for _, prompt in COACH_STARTERS}
+    session = st.session_state if session is None else session
+    context = None if generic else coach_user_context(session)
+    if state is None:
+        state = session.setdefault("coach_context", coach_context.new_state())
+    summarize = coach_context.llm_summarizer(
+        lambda msgs: llm_executor.complete(msgs, coach_routes(provider)))
+    messages, _ = coach_context.build(history, SYSTEM_PROMPT, state, summarize, context=context)
+    references = retrieval.snippets(hits or [])
+    if references:
+        messages.insert(len(messages) - 1, {
+            "role": "system", "content": f"Relevant content from the app (use it if it answers the question):\n{references}"})
+    key = coach_cache.make_key(history[0]["content"], SYSTEM_PROMPT, provider, context) if opening else None
+    return messages, key
+
+
+def stream_coach_llm(messages: list, provider: str, cache_key=None):
+    """Yield the coach reply as it arrives; errors become a short apology"""
+    provider = (provider or "").lower()
 
-        # Check environment variable first, then Streamlit secrets
-        key = os.environ.get("OPENAI_API_KEY", "")
-        if not key:
-            try:
-                key = st.secrets.get("OPENAI_API_KEY", "")
-            except:
-                pass
-        if not key:
-            raise RuntimeError("OPENAI_API_KEY not set. Please set it in environment variables or Streamlit secrets.")
-
-        client = OpenAI(api_key=key)
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": m["role"], "content": m["content"]} for m in messages],
-            temperature=0.5,
-            max_tokens=700,
-        )
-        return resp.choices[0].message.content.strip()
+    def produce():
+        return llm_executor.stream(messages, coach_routes(provider))
 
+    sent = False
+    try:
+        for chunk in (coach_cache.stream(cache_key, produce) if cache_key else produce()):
+            sent = True
+            yield chunk
+    except ImportError:
+        package = "google-generativeai" if provider.startswith("gemini") else "openai"
+        yield f"Please install {package}: pip install {package}"
+    except (llm_executor.DeadlineExceeded, llm_executor.Overloaded):
+        if sent:
+            yield "\n\n_(Response cut short. Please try again.)_"
+        else:
+            yield "Coach Jo is busy right now. Please try again in a moment."
+    except Exception:
+        if sent:
+            yield "\n\n_(Response interrupted. Please try again.)_"
+        else:
+            yield "Sorry, I couldn't get a response. Please check your API key configuration and try again."
+
+
+def ask_coach_llm(messages: list, provider: str, cache_key=None) -> str:
+    """Call the appropriate LLM provider and wait for the full reply"""
+    return "".join(stream_coach_llm(messages, provider, cache_key)).strip()
+
+
+def prewarm_coach_starters(provider: str):
+    """Fill the response cache with answers to the starter chips"""
+    def item(prompt):
+        _, hits = retrieval.route(coach_index(), prompt, record=False)
+        messages, key = coach_request([{"role": "user", "content": prompt}], provider, coach_context.new_state(), hits)
+        return key, lambda: llm_executor.stream(messages, coach_routes(provider))
+
+    prompts = [prompt for _, prompt in COACH_STARTERS
+               if retrieval.route(coach_index(), prompt, record=False)[0] != "direct"]
+    return coach_cache.prewarm(item(prompt) for prompt in prompts)
+
+
+def render_coach_cache_admin(provider: str):
+    """Admin-only response cache stats and pre-warm button"""
+    stats = coach_cache.stats()
+    c1, c2 = st.columns([3, 1])
+    c1.caption(
+        f"Response cache: {stats['hit_rate']:.0%} hit rate • {stats['hits']} hits, "
+        f"{stats['coalesced']} shared, {stats['misses']} misses • {stats['entries']} cached")
+    calls = llm_executor.stats()
+    c1.caption(
+        f"Upstream: {calls['in_flight']}/{llm_executor.MAX_IN_FLIGHT} in flight, {calls['queued']} queued • "
+        f"{calls['retries']} retries • {calls['hedges']} hedged ({calls['hedge_wins']} won), "
+        f"{calls['failovers']} failovers • {calls['timeouts']} timeouts, {calls['overloaded']} overloaded")
+    local = retrieval.stats()
+    c1.caption(
+        f"Local answers: {local['direct_rate']:.0%} answered from app content • {local['direct']} direct, "
+        f"{local['augment']} with snippets, {local['llm']} provider only")
+    if c2.button("Pre-warm chips", key="coach_prewarm", use_container_width=True):
+        with st.spinner("Pre-warming starter answers..."):
+            warmed = prewarm_coach_starters(provider)
+        st.success(f"Cached {sum(warmed.values())}/{len(warmed)} starter answers")
+
+
+def coach_reply(session, provider):
+    """Yield the reply to the last message in ``session``'s coach history.
+
+    No Streamlit calls, so the load test (benchmarks/bench_coach_load.py)
+    drives the same path as the page. The reply is appended to the history
+    and ``coach_pending`` cleared once the stream ends, or with whatever was
+    streamed if it is cut short (a rerun mid-stream closes the generator),
+    so the history never holds two user turns in a row.
+    """
+    history = session["coach_history"]
+    parts = []
+    try:
+        decision, hits = retrieval.route(coach_index(), history[-1]["content"])
+        if decision == "direct":
+            chunks = [retrieval.answer(hits[0])]
+        elif not provider:
+            chunks = ["AI assistant isn't configured yet. Please add OPENAI_API_KEY or GEMINI_API_KEY to environment variables or Streamlit secrets."]
+        else:
+            messages, key = coach_request(history, provider, hits=hits, session=session)
+            chunks = stream_coach_llm(messages, provider, key)
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+    finally:
+        history.append({"role": "assistant", "content": "".join(parts).strip()})
+        session["coach_pending"] = False
+
+
+def _render_pending_reply():
+    """Produce the reply to the last queued message below the transcript"""
+    if not st.session_state.get("coach_pending"):
+        return
+    reply = coach_reply(st.session_state, resolve_provider())
+    with st.chat_message("assistant"):
+        if COACH_STREAMING:
+            st.write_stream(reply)
+        else:
+            with st.spinner("Coach Jo is thinking..."):
+                answer = "".join(reply)
+            st.markdown(answer)
 
+
+@perf.traced
 def render_coach_jo_tab():
-    """Render the Coach Jo chatbot tab with LLM support - FIXED"""
+    """Render the Coach Jo chatbot tab with LLM support - streams replies"""
     # Ensure coach_history exists
     if 'coach_history' not in st.session_state:
         st.session_state.coach_history = []
 
-    st.subheader("💬 Coach Jo — Your Fitness Assistant")
+    st.subheader(i18n("page.coach_jo"))
     st.caption(
         "Powered by AI. Ask about meal swaps, protein targets, creatine, hydration, progressive overload, or substitutions. Not medical advice.")
 
     # Check if provider is available
     provider = resolve_provider()
 
+    if ADMIN_UI and st.button("🔄 Reload AI provider settings", key="coach_reload_provider"):
+        invalidate_provider()
+        st.rerun()
+
     if not provider:
         st.warning(
             "⚠️ AI assistant isn't configured yet. Add OPENAI_API_KEY or GEMINI_API_KEY to environment variables or Streamlit secrets to enable Coach Jo.")
         return
 
+    if ADMIN_UI:
+        render_coach_cache_admin(provider)
+
     # Starter chips
-    c1, c2, c3 = st.columns(3)
-    if c1.button("Swap salmon dinner → vegan (40g protein)", use_container_width=True):
-        _send_to_coach("How can I swap a salmon dinner to a vegan dinner with ~40g protein?")
-    if c2.button("Hip thrust progression (12 reps felt easy)", use_container_width=True):
-        _send_to_coach("I hit 12 reps on hip thrusts; how should I progress weight and reps?")
-    if c3.button("Alternative to Bulgarian split squats", use_container_width=True):
-        _send_to_coach("What are alternatives to Bulgarian split squats that still hit glutes well?")
+    for col, (label, prompt) in zip(st.columns(len(COACH_STARTERS)), COACH_STARTERS):
+        if col.button(label, use_container_width=True):
+            _send_to_coach(prompt)
+
+    # Chat input is pinned to the bottom of the page, so reading it before the
+    # transcript lets the new message show up in this run
+    user_msg = st.chat_input("Ask Coach Jo...")
+    if user_msg:
+        _send_to_coach(user_msg)
 
     # Chat transcript - FIXED with safe access
     for m in st.session_state.get('coach_history', []):
         with st.chat_message(m["role"]):
             st.markdown(m["content"])
 
-    # Chat input
-    user_msg = st.chat_input("Ask Coach Jo...")
-    if user_msg:
-        _send_to_coach(user_msg)
+    # Stream the reply to a just-sent message, then keep it in coach_history
+    _render_pending_reply()
+
+
 # ============================================================================
 # STYLES
 # ============================================================================
 def load_styles():
-    """Load custom CSS styles"""
-    st.markdown("""
-    <style>
-        .main {
-            background: linear-gradient(135deg, #ffeef8 0%, #fff5f8 50%, #f0f8ff 100%);
-        }
-        .main-header {
-            font-size: 3rem;
-            font-weight: 800;
-            text-align: center;
-            background: linear-gradient(45deg, #FF1493, #FF69B4, #DA70D6);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-            margin-bottom: .5rem;
-        }
-        .sub-header {
-            font-size: 1.1rem;
-            text-align: center;
-            color: #666;
-            margin-bottom: 1rem;
-            font-weight: 300;
-        }
-        .hero-section {
-            text-align: center;
-            padding: 2rem;
-            background: linear-gradient(135deg, rgba(255,20,147,.15), rgba(255,105,180,.15), rgba(218,112,214,.15));
-            border-radius: 18px;
-            margin-bottom: 20px;
-            backdrop-filter: blur(10px);
-            box-shadow: 0 8px 32px rgba(0,0,0,.08);
-            border: 1px solid rgba(255,255,255,.35);
-        }
-        .nav-button {
-            background: linear-gradient(135deg, #FF69B4, #DA70D6);
-            color: white;
-            padding: 1.5rem;
-            border-radius: 15px;
-            text-align: center;
-            font-size: 1.2rem;
-            font-weight: 600;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-            transition: transform 0.2s;
-            cursor: pointer;
-        }
-        .nav-button:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px rgba(0,0,0,0.15);
-        }
-        .info-card {
-            background: white;
-            padding: 1.5rem;
-            border-radius: 12px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            margin-bottom: 1rem;
-        }
-        .weekly-box {
-            background: rgba(255,255,255,.96);
-            padding: 12px;
-            border-radius: 14px;
-            margin: 8px 0 14px 0;
-            box-shadow: 0 4px 15px rgba(0,0,0,.08);
-            border-left: 5px solid #FF1493;
-        }
-        .category-header {
-            background: linear-gradient(45deg,#FF69B4,#DA70D6);
-            color:#fff;
-            padding: 10px;
-            border-radius: 10px;
-            text-align:center;
-            font-weight:700;
-            margin: 12px 0 8px 0;
-        }
-        .exercise-card {
-            background: rgba(255,255,255,.98);
-            padding: 12px;
-            border-radius: 12px;
-            box-shadow: 0 4px 15px rgba(0,0,0,.08);
-            margin: 8px 0;
-            border-left: 5px solid #FF1493;
-        }
-        .completed-card {
-            background: rgba(232,245,232,.95);
-            border-left: 5px solid #4CAF50;
-        }
-        .badge {
-            display:inline-block;
-            padding:6px 10px;
-            border-radius:12px;
-            color:#fff;
-            font-weight:700;
-            margin:6px 0;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    """Attach the compiled theme and accessibility stylesheets (see theme.py)"""
+    prefs = (
+        st.session_state.get("a11y_scale", 1.0),
+        st.session_state.get("a11y_theme", "auto"),
+        st.session_state.get("a11y_reduced_motion", False),
+    )
+    # The loader is a short reference to the hashed files; build it once per
+    # session and again only when the accessibility preferences change.
+    cached = st.session_state.get("_theme_loader")
+    if not cached or cached[0] != prefs:
+        cached = (prefs, theme.loader_html(theme.stylesheets(*prefs)))
+        st.session_state._theme_loader = cached
+    components.html(cached[1], height=0)
 
 
 # ============================================================================
@@ -2166,12 +2292,61 @@ WEEKLY_MEALS = {
 }
 
 
+# Shown on the Meal Plans page and indexed for Coach Jo (retrieval.py)
+NUTRITION_KEY_POINTS = """
+### Key Points for Success:
+- **Protein Priority:** Aim for 0.8-1g per pound of body weight
+- **Hydration:** Drink at least 2-3L of water daily
+- **Meal Timing:** Eat protein within 2 hours post-workout
+- **Consistency:** Stick to your plan 80% of the time
+- **Flexibility:** Allow for treats and social occasions
+
+### For Muscle Growth:
+- Slight caloric surplus (200-300 calories above maintenance)
+- Focus on whole foods
+- Don't skip carbs - they fuel your workouts!
+- Consider creatine supplementation (5g daily)
+"""
+
+NUTRITION_TIPS = """
+## 🥗 Nutrition Tips for Success
+
+### Pre-Workout (30-60 min before)
+- Banana + peanut butter
+- Rice cakes + honey
+- Oatmeal + berries
+- Coffee or green tea
+
+### Post-Workout (within 2 hours)
+- Protein shake + fruit
+- Greek yogurt + granola
+- Chicken + rice
+- Tuna sandwich
+
+### Supplements to Consider
+- **Creatine:** 5g daily for strength and muscle
+- **Protein Powder:** Convenient protein source
+- **Multivitamin:** Cover nutritional gaps
+- **Omega-3:** Anti-inflammatory benefits
+- **Vitamin D:** Especially if limited sun exposure
+
+### Hydration Goals
+- Minimum: 2-3 liters per day
+- During workout: 500-750ml
+- Add electrolytes for intense sessions
+
+### 80/20 Rule
+Eat nutritious whole foods 80% of the time, enjoy treats 20% of the time!
+"""
+
+
 # ============================================================================
 # PAGE COMPONENTS
 # ============================================================================
+@perf.traced
 def render_hero():
     """Render the hero section"""
-    st.markdown("""
+    static_markdown("home.hero", """
     <div class="hero-section">
         <h1 class="main-header">HOURGLASS FITNESS TRANSFORMATION</h1>
         <p class="sub-header">12-Week plan for Booty, Core, Back & Shoulders — by Joane Aristilde</p>
@@ -2179,6 +2354,7 @@ def render_hero():
     """, unsafe_allow_html=True)
 
 
+@perf.traced
 def render_homepage():
     """Render the main homepage - ENHANCED"""
     render_hero()
@@ -2219,7 +2395,7 @@ def render_homepage():
     col1, col2 = st.columns(2)
 
     with col1:
-        st.markdown("""
+        static_markdown("home.card_transform", """
         <div class="info-card">
             <h3>✨ Transform Your Body</h3>
             <p>This comprehensive 12-week program is designed specifically for building your booty,
@@ -2228,7 +2404,7 @@ def render_homepage():
         """, unsafe_allow_html=True)
 
     with col2:
-        st.markdown("""
+        static_markdown("home.card_goals", """
         <div class="info-card">
             <h3>🎯 Your Goals, Your Way</h3>
             <p>Choose between Level 1 (beginner-friendly) or Level 2 (advanced) workouts.
@@ -2237,40 +2413,40 @@ def render_homepage():
         """, unsafe_allow_html=True)
 
     st.markdown("---")
-    st.markdown("## 🚀 Quick Navigation")
+    st.markdown(f"## {i18n('home.quick_nav')}")
 
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        if st.button("📚 Workout Overview", use_container_width=True, type="primary"):
+        if st.button(i18n("home.workout_overview"), use_container_width=True, type="primary"):
             st.session_state.page = "workout_overview"
             st.rerun()
 
     with col2:
-        if st.button("💪 Today's Workout", use_container_width=True, type="primary"):
+        if st.button(i18n("home.todays_workout"), use_container_width=True, type="primary"):
             st.session_state.page = "workout_tracker"
             st.rerun()
 
     with col3:
-        if st.button("🍽️ Meal Plans", use_container_width=True, type="primary"):
+        if st.button(i18n("home.meal_plans"), use_container_width=True, type="primary"):
             st.session_state.page = "meal_plans"
             st.rerun()
 
     with col4:
-        if st.button("📊 Weight Tracker", use_container_width=True, type="primary"):
+        if st.button(i18n("home.weight_tracker"), use_container_width=True, type="primary"):
             st.session_state.page = "weight_tracker"
             st.rerun()
 
     st.markdown("---")
 
     # Getting Started Tabs
-    st.markdown("### 🎓 Getting Started")
+    st.markdown(f"### {i18n('home.getting_started')}")
 
     tab_guide, tab_video = st.tabs(["📖 How to Use This App", "🎥 Getting Started Video"])
 
     with tab_guide:
         with st.expander("How to Use This App", expanded=True):
-            st.markdown("""
+            static_markdown("home.how_to_use", """
             1. **Read the Workout Overview** - Understand the program structure and principles
             2. **Choose Your Level** - Start with Level 1 if you're new to this program
             3. **Follow Daily Workouts** - Use the workout tracker to log your exercises
@@ -2352,33 +2528,34 @@ def render_homepage():
 
     # Quick stats if user has data
     if st.session_state.get('progress_entries') or st.session_state.get('completed_exercises'):
-        st.markdown("### 📈 Your Quick Stats")
+        st.markdown(f"### {i18n('home.quick_stats')}")
         col1, col2, col3 = st.columns(3)
 
         with col1:
-            st.metric("Current Level", f"Level {st.session_state.selected_level}")
+            st.metric(i18n("sidebar.current_level"), i18n("sidebar.level", level=st.session_state.selected_level))
 
         with col2:
             completed = len([e for e in st.session_state.completed_exercises if e])
-            st.metric("Exercises Completed", completed)
+            st.metric(i18n("home.exercises_completed"), completed)
 
         with col3:
             entries = len(st.session_state.get('progress_entries', []))
-            st.metric("Progress Entries", entries)
+            st.metric(i18n("home.progress_entries"), entries)
 
     # Add intro video at bottom
     render_homepage_intro_video()
 
 
+@perf.traced
 def render_workout_overview():
     """Render the workout overview page"""
-    st.markdown("# 📚 Workout Overview")
+    st.markdown(f"# {i18n('page.workout_overview')}")
 
     tab1, tab2, tab3, tab4 = st.tabs(
         ["Program Structure", "Progressive Overload", "Exercise Guide", "About Your Coach"])
 
     with tab1:
-        st.markdown("""
+        static_markdown("overview.program", """
         ## Your Workout Journey Starts Here! 💪
 
         ### How Your Plan Works
@@ -2411,18 +2588,17 @@ def render_workout_overview():
 
         col1, col2 = st.columns(2)
 
-        with col1:
-            st.markdown("#### Level 1")
-            schedule_df = pd.DataFrame(list(PROGRAM_SPLIT["Level 1"].items()), columns=["Day", "Workout"])
-            st.table(schedule_df)
-
-        with col2:
-            st.markdown("#### Level 2")
-            schedule_df = pd.DataFrame(list(PROGRAM_SPLIT["Level 2"].items()), columns=["Day", "Workout"])
-            st.table(schedule_df)
+        for col, level in ((col1, "Level 1"), (col2, "Level 2")):
+            with col:
+                st.markdown(f"#### {level}")
+                schedule = PROGRAM_SPLIT[level]
+                st.markdown(static_fragment(
+                    f"overview.schedule.{level}",
+                    lambda: fragments.markdown_table(["Day", "Workout"], schedule.items()),
+                ))
 
     with tab2:
-        st.markdown("""
+        static_markdown("overview.progressive_overload", """
         ## 🚀 Progressive Overload: The Key to Growth
 
         ### What Is Progressive Overload?
@@ -2469,7 +2645,7 @@ def render_workout_overview():
         """)
 
     with tab3:
-        st.markdown("""
+        static_markdown("overview.exercise_guide", """
         ## 📖 Exercise Guide
 
         ### Key Exercise Categories:
@@ -2504,7 +2680,7 @@ def render_workout_overview():
         """)
 
     with tab4:
-        st.markdown("""
+        static_markdown("overview.coach_heading", """
         ## 👩‍🏫 About Your Coach - Joane Aristilde
         """)
 
@@ -2527,7 +2703,7 @@ def render_workout_overview():
                         st.rerun()
 
         with col2:
-            st.markdown("""
+            static_markdown("overview.coach_bio", """
             ### Your Transformation Partner
 
             Welcome! I'm Joane Aristilde, and I'm here to guide you through your fitness transformation journey.
@@ -2556,9 +2732,10 @@ def render_workout_overview():
         st.info("💡 **Pro Tip:** Take progress photos every week to see your amazing transformation!")
 
 
+@perf.traced
 def render_workout_tracker():
     """Render the workout tracker page - ENHANCED"""
-    st.markdown("# 💪 Workout Tracker")
+    st.markdown(f"# {i18n('page.workout_tracker')}")
 
     # Show admin mode status
     if ADMIN_UI:
@@ -2623,6 +2800,7 @@ def render_workout_tracker():
                     st.rerun()
 
     st.markdown("---")
+    render_lift_progress()
 
     # Display selected workout
     if st.session_state.selected_workout:
@@ -2647,6 +2825,49 @@ def render_workout_tracker():
         st.info("👆 Select a workout day above to see exercises")
 
 
+def render_lift_progress():
+    """Estimated 1RMs, recent PRs and weekly volume by category (lift_analytics.py)"""
+    import pandas as pd
+
+    found = lift_summary()
+    if not found or not (found["lifts"] or found["week"] or found["last_week"]):
+        return
+    with st.expander("📈 Progress & PRs"):
+        if found["lifts"]:
+            weeks = lift_analytics.PROGRESS_DAYS // 7
+            st.dataframe(pd.DataFrame([{
+                "Exercise": lift["name"],
+                "Est. 1RM (lbs)": round(lift["e1rm"]),
+                "Best Weight (lbs)": lift["best_weight"],
+                f"{weeks}-wk Change": None if lift["change"] is None else round(lift["change"]),
+                "Last Trained": lift["last_date"],
+            } for lift in found["lifts"]]), hide_index=True, use_container_width=True)
+            names = {lift["name"]: lift["exercise_id"] for lift in found["lifts"]}
+            name = st.selectbox("Progression", list(names), key="lift_progress_exercise")
+            sessions = lift_analytics.history("default", names[name])
+            if len(sessions) > 1:
+                chart = pd.DataFrame(sessions, columns=["date", "Est. 1RM", "Heaviest"])
+                st.line_chart(chart.assign(date=pd.to_datetime(chart["date"])).set_index("date"))
+
+        categories = sorted(set(found["week"]) | set(found["last_week"]))
+        if categories:
+            st.markdown("**Weekly Volume by Category**")
+            st.dataframe(pd.DataFrame([{
+                "Category": name,
+                "Sets": found["week"].get(name, (0, 0))[0],
+                "Volume (lbs)": round(found["week"].get(name, (0, 0))[1]),
+                "Last Week Sets": found["last_week"].get(name, (0, 0))[0],
+                "Last Week Volume (lbs)": round(found["last_week"].get(name, (0, 0))[1]),
+            } for name in categories]), hide_index=True, use_container_width=True)
+
+        if found["prs"]:
+            st.markdown("**Recent PRs**")
+            for pr in found["prs"][:5]:
+                what = "est. 1RM" if pr["kind"] == "e1rm" else "heaviest weight"
+                st.write(f"🏆 {pr['date']}: {pr['name']} {what} {pr['value']:.0f} lbs "
+                         f"(previous {pr['previous']:.0f})")
+
+
 def get_exercises_for_day(level, day_name, workout_label):
     """Get exercises for a specific day and workout"""
     # Handle REST days
@@ -2695,6 +2916,7 @@ def get_exercises_for_day(level, day_name, workout_label):
     ]
 
 
+@perf.traced
 def render_exercise_card(exercise, idx):
     """Render a single exercise card - ORIGINAL (kept for compatibility)"""
     with st.container():
@@ -2714,9 +2936,10 @@ def render_exercise_card(exercise, idx):
                 st.session_state.completed_exercises.append(key)
 
 
+@perf.traced
 def render_meal_plans():
     """Render the meal plans page"""
-    st.markdown("# 🍽️ Meal Plans")
+    st.markdown(f"# {i18n('page.meal_plans')}")
 
     tab1, tab2, tab3 = st.tabs(["Weekly Plans", "Macro Calculator", "Nutrition Tips"])
 
@@ -2732,39 +2955,13 @@ def render_meal_plans():
 
         # Display meal plan
         meals = WEEKLY_MEALS[diet_type]
+        st.markdown(static_fragment(f"meal_plans.week.{diet_type}", lambda: meal_plan_table(meals)))
 
-        # Create a properly formatted dataframe
-        meal_data = []
-        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-
-        for day in days:
-            if day in meals:
-                meal_data.append({
-                    "Day": day,
-                    "Breakfast": meals[day][0] if len(meals[day]) > 0 else "",
-                    "Lunch": meals[day][1] if len(meals[day]) > 1 else "",
-                    "Dinner": meals[day][2] if len(meals[day]) > 2 else ""
-                })
-
-        df = pd.DataFrame(meal_data)
-        st.table(df)
+        render_generated_meal_plan()
 
         # Nutrition tips
         with st.expander("💡 Nutrition Tips"):
-            st.markdown("""
-            ### Key Points for Success:
-            - **Protein Priority:** Aim for 0.8-1g per pound of body weight
-            - **Hydration:** Drink at least 2-3L of water daily
-            - **Meal Timing:** Eat protein within 2 hours post-workout
-            - **Consistency:** Stick to your plan 80% of the time
-            - **Flexibility:** Allow for treats and social occasions
-
-            ### For Muscle Growth:
-            - Slight caloric surplus (200-300 calories above maintenance)
-            - Focus on whole foods
-            - Don't skip carbs - they fuel your workouts!
-            - Consider creatine supplementation (5g daily)
-            """)
+            static_markdown("meal_plans.key_points", NUTRITION_KEY_POINTS)
 
     with tab2:
         st.markdown("## 🧮 Macro Calculator")
@@ -2785,34 +2982,18 @@ def render_meal_plans():
             st.markdown("### Your Goals")
             goal = st.selectbox("Goal", ["Lose Fat", "Maintain", "Build Muscle"])
 
-            # Simple calorie calculation
-            if activity == "Sedentary":
-                multiplier = 1.2
-            elif activity == "Lightly Active":
-                multiplier = 1.375
-            elif activity == "Moderately Active":
-                multiplier = 1.55
-            else:
-                multiplier = 1.725
-
-            # Basic BMR calculation (Mifflin-St Jeor)
-            bmr = (10 * weight * 0.453592) + (6.25 * height * 2.54) - (5 * age) - 161
-            tdee = bmr * multiplier
-
-            if goal == "Lose Fat":
-                calories = tdee - 300
-            elif goal == "Maintain":
-                calories = tdee
-            else:  # Build Muscle
-                calories = tdee + 300
+            goal_targets = macros.targets(weight * macros.LB_TO_KG, height * 2.54, age, "F", activity,
+                                          macros.GOAL_ADJUSTMENTS[goal])
+            calories = goal_targets["calories"]
 
             st.markdown("### Your Daily Targets")
             st.metric("Calories", f"{int(calories)} kcal")
 
-            # Macro split
-            protein_g = int(weight * 0.8)
-            fat_g = int(calories * 0.25 / 9)
-            carbs_g = int((calories - (protein_g * 4) - (fat_g * 9)) / 4)
+            # Whole grams, truncated; protein from the pound input so no lb -> kg -> lb round trip
+            protein_g = int(weight * macros.PROTEIN_G_PER_LB)
+            fat_g = int(goal_targets["fat_g"])
+            carbs_g = int((calories - protein_g * macros.KCAL_PER_G["protein"] - fat_g * macros.KCAL_PER_G["fat"])
+                          / macros.KCAL_PER_G["carbs"])
 
             col_a, col_b, col_c = st.columns(3)
             col_a.metric("Protein", f"{protein_g}g")
@@ -2820,41 +3001,65 @@ def render_meal_plans():
             col_c.metric("Fat", f"{fat_g}g")
 
     with tab3:
-        st.markdown("""
-        ## 🥗 Nutrition Tips for Success
-
-        ### Pre-Workout (30-60 min before)
-        - Banana + peanut butter
-        - Rice cakes + honey
-        - Oatmeal + berries
-        - Coffee or green tea
-
-        ### Post-Workout (within 2 hours)
-        - Protein shake + fruit
-        - Greek yogurt + granola
-        - Chicken + rice
-        - Tuna sandwich
-
-        ### Supplements to Consider
-        - **Creatine:** 5g daily for strength and muscle
-        - **Protein Powder:** Convenient protein source
-        - **Multivitamin:** Cover nutritional gaps
-        - **Omega-3:** Anti-inflammatory benefits
-        - **Vitamin D:** Especially if limited sun exposure
-
-        ### Hydration Goals
-        - Minimum: 2-3 liters per day
-        - During workout: 500-750ml
-        - Add electrolytes for intense sessions
-
-        ### 80/20 Rule
-        Eat nutritious whole foods 80% of the time, enjoy treats 20% of the time!
-        """)
+        static_markdown("meal_plans.nutrition_tips", NUTRITION_TIPS)
+
+
+def render_generated_meal_plan():
+    """A week built for the user's calorie and protein targets and diet (meal_planner.py)"""
+    st.markdown("### 🧩 Build My Week")
+    tuning = st.session_state.get("ai_tuning", {})
+    found = None
+    if STORAGE_AVAILABLE:
+        try:
+            found = macros.for_user("default")
+        except Exception:
+            found = None
+    col1, col2, col3 = st.columns(3)
+    diet = col1.selectbox("Diet", list(meal_planner.DIETS),
+                          index=list(meal_planner.DIETS).index(tuning.get("diet", "omnivore")),
+                          key="meal_planner_diet")
+    calories = col2.number_input("Calories per day", 1200, 4000,
+                                 min(max(int(found["calories"]), 1200), 4000) if found else 1800, 50,
+                                 key="meal_planner_calories")
+    protein_g = col3.number_input("Protein per day (g)", 40, 300, int(tuning.get("protein_target_g", 120)), 5,
+                                  key="meal_planner_protein")
+    if st.button("Generate plan", key="meal_planner_generate"):
+        st.session_state.generated_meal_plan = {
+            "diet": diet, "calories": calories, "protein_g": protein_g,
+            "week": meal_planner.plan_week(calories, protein_g, diet),
+        }
+    plan = st.session_state.get("generated_meal_plan")
+    if plan:
+        st.caption(f"{plan['diet'].title()}, {plan['calories']} kcal and {plan['protein_g']} g protein a day")
+        st.markdown(generated_meal_plan_table(plan["week"]))
 
 
+def generated_meal_plan_table(week):
+    """Markdown table of a meal_planner week, portions and daily totals included"""
+    rows = []
+    for day in week:
+        by_slot = {m["slot"]: m["name"] + (f" ×{m['portion']:g}" if m["portion"] != 1 else "") for m in day["meals"]}
+        rows.append([day["day"]] + [by_slot.get(slot, "") for slot in meal_planner.SLOTS]
+                    + [f"{day['kcal']:.0f}", f"{day['protein_g']:.0f}"])
+    return fragments.markdown_table(["Day", "Breakfast", "Lunch", "Dinner", "Snack", "kcal", "Protein (g)"], rows)
+
+
+def meal_plan_table(meals):
+    """Markdown table of one diet's week (Day / Breakfast / Lunch / Dinner)"""
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    rows = []
+    for day in days:
+        if day in meals:
+            rows.append([day] + [meals[day][i] if len(meals[day]) > i else "" for i in range(3)])
+    return fragments.markdown_table(["Day", "Breakfast", "Lunch", "Dinner"], rows)
+
+
+@perf.traced
 def render_weight_tracker():
     """Render the weight tracker page"""
-    st.markdown("# 📊 Weight Tracker")
+    import pandas as pd
+
+    st.markdown(f"# {i18n('page.weight_tracker')}")
 
     # Initialize weight tracker storage if available
     if STORAGE_AVAILABLE:
@@ -2926,7 +3131,7 @@ def render_weight_tracker():
                                 energy_1_10=energy,
                                 notes=notes,
                                 photo_path=None,
-                                on_target_flag="OK"
+                                on_target_flag=macros.on_target_flag("default", calories_in)
                             )
                         except:
                             pass  # Storage module might not be working
@@ -2947,11 +3152,16 @@ def render_weight_tracker():
             df['date'] = pd.to_datetime(df['date'])
             df = df.sort_values('date')
 
+            span = st.radio("Range", list(chart_data.RANGES), index=len(chart_data.RANGES) - 1,
+                            horizontal=True, key="weight_chart_range")
+            entries = df.assign(date=df['date'].dt.strftime('%Y-%m-%d'))
+
             # Weight trend
             st.markdown("### Weight Trend")
-            weight_data = df[['date', 'weight']].dropna()
+            weight_data = tracker_chart("weight", entries, span)
             if not weight_data.empty:
-                st.line_chart(weight_data.set_index('date')['weight'])
+                weight_data['date'] = pd.to_datetime(weight_data['date'])
+                st.line_chart(weight_data.set_index('date')[['weight', 'trend']])
 
             # Metrics
             col1, col2, col3, col4 = st.columns(4)
@@ -2975,12 +3185,14 @@ def render_weight_tracker():
                 avg_energy = df['energy'].mean() if 'energy' in df else 0
                 st.metric("Avg Energy", f"{avg_energy:.1f}/10")
 
+            render_weight_forecast()
+
             # Waist to Hip Ratio
             if 'waist' in df.columns and 'hips' in df.columns:
                 st.markdown("### Waist-to-Hip Ratio")
-                df['wh_ratio'] = df['waist'] / df['hips']
-                ratio_data = df[['date', 'wh_ratio']].dropna()
+                ratio_data = tracker_chart("waist_hip", entries, span)
                 if not ratio_data.empty:
+                    ratio_data['date'] = pd.to_datetime(ratio_data['date'])
                     st.line_chart(ratio_data.set_index('date')['wh_ratio'])
         else:
             st.info("📊 Start tracking to see your progress charts!")
@@ -3017,28 +3229,85 @@ def render_weight_tracker():
             st.info("📝 No entries yet. Start tracking above!")
 
 
+def tracker_chart(chart, entries, span):
+    """Chart-sized weight tracker series (chart_data.py) from the stored logs, or the session's entries
+    when storage is unavailable or has fewer days than the session"""
+    if STORAGE_AVAILABLE:
+        try:
+            found = getattr(chart_data, chart)("default", span)
+            if found.attrs["history"] >= entries['date'].nunique():
+                return found.copy()
+        except Exception:
+            pass
+    build = chart_data.weight_frame if chart == "weight" else chart_data.waist_hip_frame
+    return build(entries, span)
+
+
+def render_weight_forecast():
+    """Trend weight, adaptive TDEE and goal projection from the stored logs (forecast.py)"""
+    if not STORAGE_AVAILABLE:
+        return
+    try:
+        found = forecast.get("default")
+    except Exception:
+        return
+    if not found:
+        return
+    kg_to_lb = 1 / macros.LB_TO_KG
+    st.markdown("### Forecast")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Trend Weight", f"{found['trend_kg'] * kg_to_lb:.1f} lbs")
+    col2.metric("Weekly Rate", f"{found['rate_kg_week'] * kg_to_lb:+.2f} lbs")
+    col3.metric("Adaptive TDEE", f"{found['tdee']:.0f} kcal" if found["tdee"] else "N/A")
+    if found.get("goal_weight_kg") is None:
+        col4.metric("Goal Date", "N/A")
+        return
+    pending = "Not on pace" if found["logs"] >= forecast.MIN_LOGS else "Needs more logs"
+    col4.metric("Projected Goal Date", found["projected_date"] or pending,
+                help=f"Goal {found['goal_weight_kg'] * kg_to_lb:.1f} lbs by {found['goal_date']}")
+    if found["on_track"] is False and found["target_kcal"]:
+        st.caption(f"To reach {found['goal_weight_kg'] * kg_to_lb:.1f} lbs by {found['goal_date']}, "
+                   f"aim for about {found['target_kcal']:.0f} kcal a day.")
+    elif found["on_track"]:
+        st.caption(f"On pace for {found['goal_weight_kg'] * kg_to_lb:.1f} lbs by {found['goal_date']}.")
+
+
+def render_perf_panel():
+    """Admin-only p50/p95 timings collected by perf.py"""
+    with st.expander("⏱️ Performance"):
+        if not perf.ENABLED:
+            st.caption("Tracing is off. Start the app with PERF_TRACE=1 to collect timings.")
+            return
+        last = perf.last_rerun()
+        if last:
+            st.caption(f"Last rerun: {last['wall_ms']:.1f} ms • log: {perf.LOG_PATH}")
+        rows = perf.summary()
+        if not rows:
+            st.caption("No samples yet.")
+            return
+        st.markdown(fragments.markdown_table(
+            ["Function", "Calls", "p50 ms", "p95 ms", "Bytes"],
+            [(r["function"].split(".", 1)[-1], r["calls"], f"{r['p50_ms']:.2f}",
+              f"{r['p95_ms']:.2f}", r["bytes"]) for r in rows],
+        ))
+        if st.button("Reset timings", key="perf_reset", use_container_width=True):
+            perf.reset()
+            st.rerun()
+
+
 def sidebar_navigation():
     """Sidebar navigation - ENHANCED"""
     with st.sidebar:
-        st.markdown("# 🏋️ Navigation")
+        st.markdown(f"# {i18n('nav.title')}")
         st.caption(f"Admin UI: {'ON' if ADMIN_UI else 'OFF'} • Read-only: {'ON' if READ_ONLY else 'OFF'}")
 
         # Navigation buttons
-        pages = {
-            "home": "🏠 Home",
-            "workout_overview": "📚 Workout Overview",
-            "workout_tracker": "💪 Workout Tracker",
-            "meal_plans": "🍽️ Meal Plans",
-            "weight_tracker": "📊 Weight Tracker",
-            "coach_jo": "🤖 Coach Jo",
-            "streaks": "⭐ Streaks & Badges",
-            "community": "👥 Community",
-            "devices": "🔗 Devices"
-        }
+        pages = ["home", "workout_overview", "workout_tracker", "meal_plans", "weight_tracker",
+                 "coach_jo", "streaks", "community", "devices"]
 
-        for page_key, page_name in pages.items():
+        for page_key in pages:
             if st.button(
-                    page_name,
+                    i18n(f"nav.{page_key}"),
                     key=f"nav_{page_key}",
                     use_container_width=True,
                     type="primary" if st.session_state.page == page_key else "secondary"
@@ -3049,20 +3318,21 @@ def sidebar_navigation():
         st.markdown("---")
 
         # Quick Stats
-        st.markdown("### 📈 Quick Stats")
-        st.metric("Current Level", f"Level {st.session_state.selected_level}")
+        st.markdown(f"### {i18n('sidebar.quick_stats')}")
+        st.metric(i18n("sidebar.current_level"), i18n("sidebar.level", level=st.session_state.selected_level))
 
         completed = len(st.session_state.completed_exercises)
-        st.metric("Exercises Done", completed)
+        st.metric(i18n("sidebar.exercises_done"), completed)
 
         if st.session_state.get("weight_entries"):
             entries = len(st.session_state.weight_entries)
-            st.metric("Weight Entries", entries)
+            st.metric(i18n("sidebar.weight_entries"), entries)
 
         # Show admin mode indicator
         if ADMIN_UI:
             st.markdown("---")
-            st.success("🔧 Admin Mode Active")
+            st.success(i18n("sidebar.admin_active"))
+            render_perf_panel()
 
         st.markdown("---")
 
@@ -3070,9 +3340,9 @@ def sidebar_navigation():
         render_accessibility_settings()
 
         # Settings
-        with st.expander("⚙️ Settings"):
-            if st.button("🔄 Reset All Data", use_container_width=True):
-                if st.checkbox("Confirm reset"):
+        with st.expander(i18n("sidebar.settings")):
+            if st.button(i18n("sidebar.reset_all"), use_container_width=True):
+                if st.checkbox(i18n("sidebar.confirm_reset")):
                     for key in ["completed_exercises", "progress_entries", "weight_entries", "workout_sets",
                                 "coach_history", "community_chat"]:
                         if key in st.session_state:
@@ -3090,22 +3360,20 @@ def sidebar_navigation():
                         "protein_target_g": 120
                     }
                     save_user_progress()
-                    st.success("Data reset!")
+                    st.success(i18n("sidebar.data_reset"))
                     st.rerun()
 
 
 # ============================================================================
 # MAIN APP
 # ============================================================================
+@perf.traced(root=True)
 def main():
     """Main application"""
     # Initialize
     init_session_state()
     load_styles()
 
-    # Apply accessibility CSS
-    apply_accessibility_css()
-
     # Sidebar
     sidebar_navigation()
 
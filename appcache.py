@@ -0,0 +1,82 @@
+# appcache.py
+"""Process-wide caches shared by every session.
+
+Streamlit re-executes ``app.py`` on each rerun, so anything cached at module
+level there is rebuilt every time. Values kept here live as long as the
+server process.
+"""
+from __future__ import annotations
+import copy
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import perf
+
+_lock = threading.Lock()
+_json: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+_memo: Dict[Hashable, Any] = {}
+
+
+def _stamp(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    """Return the parsed JSON at ``path``, re-reading only when the file changes.
+
+    Callers get a private copy, so mutating the result never leaks into the
+    cache. A missing file yields ``default``.
+    """
+    try:
+        stamp = _stamp(path)
+    except OSError:
+        return copy.deepcopy(default)
+    cached = _json.get(path)
+    if cached is None or cached[0] != stamp:
+        with open(path, "r") as f:
+            data = json.load(f)
+        perf.add_bytes(stamp[1])
+        with _lock:
+            _json[path] = (stamp, data)
+    else:
+        data = cached[1]
+    return copy.deepcopy(data)
+
+
+def invalidate(path: str):
+    """Drop the cached copy of ``path`` (call after writing it)."""
+    with _lock:
+        _json.pop(path, None)
+
+
+def memoize(key: Hashable, build: Callable[[], Any], cache_none: bool = True) -> Any:
+    """Return the value cached under ``key``, building it once per process.
+
+    With ``cache_none=False`` a None result is not stored, so the next call
+    builds again (for lookups that may succeed later, like a secret added
+    after start).
+    """
+    try:
+        return _memo[key]
+    except KeyError:
+        pass
+    value = build()
+    if value is None and not cache_none:
+        return None
+    with _lock:
+        return _memo.setdefault(key, value)
+
+
+def forget(key: Hashable):
+    """Drop the value memoized under ``key`` so the next call rebuilds it."""
+    with _lock:
+        _memo.pop(key, None)
+
+
+def clear():
+    with _lock:
+        _json.clear()
+        _memo.clear()
@@ -0,0 +1,316 @@
+# badges.py
+"""Event-driven badge evaluation.
+
+Each badge rule declares the metrics it reads. Metrics are small per-user
+states kept up to date from the write events ``storage`` publishes
+(``events.py``): a check-in or a logged set updates only the metrics that
+listen to that topic, and only the badges that depend on a changed metric
+are evaluated. Awards are stored with the time they were earned and never
+taken back.
+
+A metric is a ``Metric``:
+
+* ``update(user_id, state, payload)`` returns the new state in O(1), the same
+  state when the event does not matter to it, or None when the event cannot
+  be applied incrementally (e.g. a backfilled date); the metric is then
+  rebuilt from stored history with ``rebuild(user_id)``;
+* ``value(state)`` is what the rules see.
+
+``evaluate_user`` rebuilds every metric for one user (first use, repair) and
+``evaluate_all`` does the same for every user in parallel worker processes,
+writing the results in one transaction.
+"""
+from __future__ import annotations
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import events
+import streaks
+
+HYDRATION_MIN_L = 2.0
+GLUTE_WINDOW_DAYS = 14
+GLUTE_WORDS = ("hip thrust", "kickback", "glute", "bridge", "abductor", "hyperextension")
+MORNING_BEFORE = "09:00"
+
+
+class Metric(NamedTuple):
+    name: str
+    topics: Tuple[str, ...]
+    update: Callable[[str, Dict, Dict], Optional[Dict]]
+    rebuild: Callable[[str], Dict]
+    value: Callable[[Dict], float]
+
+
+def _gap(day: str, last: str) -> int:
+    return (date.fromisoformat(day) - date.fromisoformat(last)).days
+
+
+# ---- longest streak (kept by streaks.py, which handles the same events first) ----
+def _streak_update(user_id, state, payload):
+    return {"longest": streaks.get(user_id)["longest"]}
+
+
+def _streak_rebuild(user_id):
+    import storage
+    return {"longest": streaks.compute(storage.get_activity_dates(user_id))["longest"]}
+
+
+# ---- consecutive check-in days with enough water ----
+def _hydration_update(user_id, state, payload):
+    day, ok = payload["date"], (payload.get("water_l") or 0) >= HYDRATION_MIN_L
+    last = state.get("last")
+    if last is not None and day <= last:
+        return None  # an edited or backfilled day changes runs we no longer have
+    run = state.get("run", 0) + 1 if last is not None and _gap(day, last) == 1 else 1
+    run = run if ok else 0
+    return {"last": day, "run": run, "best": max(state.get("best", 0), run)}
+
+
+def _hydration_rebuild(user_id):
+    import storage
+    rows = storage.get_log_series(user_id, "0000-01-01", "9999-12-31", ("water_l",))
+    state = {"last": None, "run": 0, "best": 0}
+    for day, water in rows:
+        if state["last"] is None or day > state["last"]:  # one check-in per day counts
+            state = _hydration_update(user_id, state, {"date": day, "water_l": water})
+    return state
+
+
+# ---- completed glute sets in a rolling two-week window ----
+def _is_glute(name: str) -> bool:
+    name = (name or "").lower()
+    return any(word in name for word in GLUTE_WORDS)
+
+
+def _glute_update(user_id, state, payload):
+    if not payload.get("completed") or not _is_glute(payload.get("exercise_name")):
+        return state
+    days = dict(state.get("days", {}))
+    day = payload["date"]
+    if day < max(days, default=day):
+        return None  # windows ending before the latest day include sets we no longer keep
+    days[day] = days.get(day, 0) + 1
+    latest = day
+    days = {d: n for d, n in days.items() if _gap(latest, d) < GLUTE_WINDOW_DAYS}
+    return {"days": days, "best": max(state.get("best", 0), sum(days.values()))}
+
+
+def _glute_rebuild(user_id):
+    import numpy as np
+    import storage
+    counts = defaultdict(int)
+    for day, name in storage.get_set_series(user_id, "0000-01-01", "9999-12-31", ("exercise_name",)):
+        if _is_glute(name):
+            counts[day] += 1
+    if not counts:
+        return {"days": {}, "best": 0}
+    days = np.array(sorted(counts), dtype="datetime64[D]")
+    per_day = np.zeros(int((days[-1] - days[0]).astype(int)) + 1, dtype=np.int64)
+    per_day[(days - days[0]).astype(int)] = [counts[d] for d in sorted(counts)]
+    windows = np.convolve(per_day, np.ones(GLUTE_WINDOW_DAYS, dtype=np.int64))[:per_day.size]
+    latest = str(days[-1])
+    return {
+        "days": {d: n for d, n in counts.items() if _gap(latest, d) < GLUTE_WINDOW_DAYS},
+        "best": int(windows.max()),
+    }
+
+
+# ---- days with a completed set logged before MORNING_BEFORE ----
+def _is_morning(payload) -> bool:
+    logged_at = payload.get("logged_at") or ""
+    return bool(payload.get("completed")) and logged_at[11:16] < MORNING_BEFORE
+
+
+def _morning_update(user_id, state, payload):
+    if not _is_morning(payload):
+        return state
+    day, last = payload["date"], state.get("last")
+    if last is not None and day <= last:
+        return state if day == last else None
+    return {"days": state.get("days", 0) + 1, "last": day}
+
+
+def _morning_rebuild(user_id):
+    import storage
+    rows = storage.get_set_series(user_id, "0000-01-01", "9999-12-31", ("logged_at",))
+    days = sorted({day for day, logged_at in rows if _is_morning({"completed": True, "logged_at": logged_at})})
+    return {"days": len(days), "last": days[-1] if days else None}
+
+
+METRICS: Dict[str, Metric] = {m.name: m for m in (
+    Metric("longest", ("daily_log", "workout_set"), _streak_update, _streak_rebuild, lambda s: s["longest"]),
+    Metric("hydration_run", ("daily_log",), _hydration_update, _hydration_rebuild, lambda s: s["best"]),
+    Metric("glute_sets_2wk", ("workout_set",), _glute_update, _glute_rebuild, lambda s: s["best"]),
+    Metric("morning_workouts", ("workout_set",), _morning_update, _morning_rebuild, lambda s: s["days"]),
+)}
+
+BADGES = [
+    {"key": "first_week", "label": "✅ 7-Day Starter", "metrics": ("longest",),
+     "rule": lambda m: m["longest"] >= 7},
+    {"key": "hydration_pro", "label": "💧 Hydration Pro", "metrics": ("hydration_run",),
+     "rule": lambda m: m["hydration_run"] >= 7},
+    {"key": "glute_grind", "label": "🍑 Glute Grind", "metrics": ("glute_sets_2wk",),
+     "rule": lambda m: m["glute_sets_2wk"] >= 12},
+    {"key": "consistency", "label": "🔥 21-Day Habit", "metrics": ("longest",),
+     "rule": lambda m: m["longest"] >= 21},
+    {"key": "early_bird", "label": "🌅 Early Bird", "metrics": ("morning_workouts",),
+     "rule": lambda m: m["morning_workouts"] >= 5},
+]
+
+_DEPENDENTS: Dict[str, List[Dict]] = defaultdict(list)
+for _badge in BADGES:
+    for _metric in _badge["metrics"]:
+        _DEPENDENTS[_metric].append(_badge)
+
+_lock = threading.RLock()  # the write handler rebuilds through evaluate_user
+_cache: Dict[str, Tuple[Dict[str, Dict], Dict[str, str]]] = {}  # user -> (metric states, awards)
+
+
+def evaluate(values: Dict[str, float], badges: Sequence[Dict] = BADGES, awarded=()) -> List[str]:
+    """Keys of ``badges`` (not already ``awarded``) whose rule holds for metric ``values``."""
+    earned = []
+    for badge in badges:
+        if badge["key"] in awarded:
+            continue
+        try:
+            if badge["rule"](values):
+                earned.append(badge["key"])
+        except (KeyError, TypeError):
+            pass  # a metric this badge needs is missing
+    return earned
+
+
+def _values(states: Dict[str, Dict]) -> Dict[str, float]:
+    return {name: METRICS[name].value(state) for name, state in states.items() if name in METRICS}
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _rebuild_user(user_id: str) -> Tuple[str, Dict[str, Dict], List[str]]:
+    """Read-only: every metric from history and the badges they earn."""
+    states = {name: metric.rebuild(user_id) for name, metric in METRICS.items()}
+    return user_id, states, evaluate(_values(states))
+
+
+def evaluate_user(user_id: str) -> Dict[str, str]:
+    """Rebuild the user's metrics, store them and award what they earn; returns new awards."""
+    import storage
+    _, states, earned = _rebuild_user(user_id)
+    with _lock:
+        _, awards = _load(user_id)
+        new = {key: _now() for key in earned if key not in awards}
+        storage.save_badge_state(user_id, states, new)
+        _cache[user_id] = (states, {**awards, **new})
+    return new
+
+
+def _load(user_id: str) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+    import storage
+    cached = _cache.get(user_id)
+    if cached is None:
+        cached = _cache[user_id] = storage.get_badge_state(user_id)
+    return cached
+
+
+def awarded(user_id: str) -> Dict[str, str]:
+    """Badge key -> ISO time it was earned; metrics are built from history on first use."""
+    import storage
+    storage.init_storage()
+    with _lock:
+        states, awards = _load(user_id)
+        if states:
+            return dict(awards)
+    evaluate_user(user_id)
+    with _lock:
+        return dict(_cache[user_id][1])
+
+
+def _on_write(topic: str):
+    metrics = [m for m in METRICS.values() if topic in m.topics]
+
+    def handler(user_id: str, **payload):
+        import storage
+        with _lock:
+            states, awards = _load(user_id)
+            if not states:
+                evaluate_user(user_id)  # first sight of this user
+                return
+            changed = {}
+            for metric in metrics:
+                state = states.get(metric.name)
+                new = metric.update(user_id, state, payload) if state is not None else None
+                if new is None:
+                    new = metric.rebuild(user_id)
+                if new != state:
+                    changed[metric.name] = new
+            if not changed:
+                return
+            states = {**states, **changed}
+            candidates = {b["key"]: b for name in changed for b in _DEPENDENTS[name]}.values()
+            new = {key: _now() for key in evaluate(_values(states), list(candidates), awards)}
+            storage.save_badge_state(user_id, changed, new)
+            _cache[user_id] = (states, {**awards, **new})
+    return handler
+
+
+def forget(user_id: str):
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def reset():
+    """Drop every cached user, e.g. after switching databases."""
+    with _lock:
+        _cache.clear()
+
+
+def _init_worker(db_path: str):
+    import storage
+    storage._DB_PATH = db_path
+    if storage.engine is not None:
+        storage.engine.dispose(close=False)  # connections inherited from the parent stay with it
+    storage.init_storage()
+
+
+def evaluate_all(user_ids: Optional[Sequence[str]] = None, workers: Optional[int] = None,
+                 processes: bool = True) -> Dict[str, List[str]]:
+    """Re-evaluate every user (or ``user_ids``) from stored history.
+
+    Metrics are rebuilt in ``workers`` processes (default: one per CPU;
+    threads with ``processes=False``); states and new awards are written by the caller in
+    one transaction. Returns user -> newly awarded badge keys.
+    """
+    import storage
+    storage.init_storage()
+    user_ids = list(user_ids) if user_ids is not None else storage.get_user_ids()
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        results = [_rebuild_user(u) for u in user_ids]
+    elif processes:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(storage._DB_PATH,)) as pool:
+            results = list(pool.map(_rebuild_user, user_ids, chunksize=max(1, len(user_ids) // (workers * 4))))
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            results = list(pool.map(_rebuild_user, user_ids))
+
+    rows, new_awards = [], {}
+    with _lock:
+        for user_id, states, earned in results:
+            _, awards = storage.get_badge_state(user_id)
+            new = {key: _now() for key in earned if key not in awards}
+            rows.append((user_id, states, new))
+            new_awards[user_id] = list(new)
+            _cache.pop(user_id, None)
+        storage.save_badge_states(rows)
+    return new_awards
+
+
+for _topic in ("daily_log", "workout_set"):
+    events.subscribe(_topic, _on_write(_topic))
+events.subscribe("user_deleted", lambda user_id, **_: forget(user_id))
@@ -0,0 +1,144 @@
+# benchmarks/bench_badges.py
+"""Badge engine on many users with synthetic history.
+
+Each user gets ``--days`` of check-ins (some with low water) and workout
+sets (glute and other exercises, morning and evening). Timed:
+
+* "full per render": rebuild every metric and evaluate every rule, the
+  recompute-on-every-page-view approach;
+* "event (incremental)": one new set or check-in through ``storage``,
+  including the streak and badge handlers and their writes;
+* ``evaluate_all`` over every user, in one process and in ``--workers``
+  worker processes.
+
+The awards after replaying events one at a time are checked against the
+batch re-evaluation::
+
+    python benchmarks/bench_badges.py --users 200 --days 180 --workers 4
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+import badges  # noqa: E402
+
+EXERCISES = ["Hip Thrust", "Glute Kickback", "Squat", "Romanian Deadlift", "Lat Pulldown"]
+
+
+def history(user: str, days: int, rng: random.Random):
+    """(daily_logs rows, workout_sets rows) for one user, oldest first."""
+    logs, sets = [], []
+    start = date.today() - timedelta(days=days)
+    for n in range(days):
+        day = (start + timedelta(days=n)).isoformat()
+        if rng.random() < 0.75:
+            logs.append(dict(user_id=user, date=day, weight_kg=70.0, water_l=rng.choice([1.5, 2.2, 2.5, 3.0]),
+                             cal_in=1800, cal_out=400, net_kcal=1400))
+        if rng.random() < 0.5:
+            hour = rng.choice(["06", "07", "12", "18"])
+            for i, name in enumerate(rng.sample(EXERCISES, 3)):
+                for s in range(3):
+                    sets.append(dict(user_id=user, date=day, logged_at=f"{day}T{hour}:{10 + i * 5}:{s:02d}",
+                                     exercise_id=str(i), exercise_name=name, set_num=s + 1, reps=10,
+                                     weight=40.0, completed=int(rng.random() < 0.9)))
+    return logs, sets
+
+
+def timed(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Badge engine benchmark")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--replay-users", type=int, default=5, help="users replayed event by event for the check")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    users = [f"user{n:05d}" for n in range(args.users)]
+    data = {u: history(u, args.days, rng) for u in users}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "bench.db")
+        storage.init_storage()
+
+        # Replay a few users through storage so every write goes through the handlers
+        replayed = users[:args.replay_users]
+        for u in replayed:
+            logs, sets = data[u]
+            rows = sorted([("log", r["date"], r) for r in logs] + [("set", r["date"], r) for r in sets],
+                          key=lambda x: (x[1], x[0]))
+            for kind, _, r in rows:
+                if kind == "log":
+                    storage.save_daily_log(u, r["date"], 70.0, r["water_l"], 1800, 400, 0, 0, 5, "", "", "")
+                else:
+                    storage.save_workout_set(u, r["date"], r["exercise_id"], r["exercise_name"], r["set_num"],
+                                             r["reps"], r["weight"], bool(r["completed"]), r["logged_at"])
+        incremental = {u: sorted(badges.awarded(u)) for u in replayed}
+
+        # Bulk seed the rest without events; evaluate_all builds them
+        with storage.engine.begin() as conn:
+            for u in users[args.replay_users:]:
+                logs, sets = data[u]
+                if logs:
+                    conn.execute(storage.daily_logs.insert(), logs)
+                if sets:
+                    conn.execute(storage.workout_sets.insert(), sets)
+        n_sets = sum(len(s) for _, s in data.values())
+        print(f"{args.users} users x {args.days} days: {n_sets} sets, "
+              f"{sum(len(l) for l, _ in data.values())} check-ins; {os.cpu_count()} CPUs")
+
+        t0 = time.perf_counter()
+        badges.evaluate_all(workers=1)
+        serial = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        badges.evaluate_all(workers=args.workers)
+        parallel = time.perf_counter() - t0
+
+        batch = {u: sorted(storage.get_badge_state(u)[1]) for u in replayed}
+        assert batch == incremental, (batch, incremental)
+        earned = sum(len(storage.get_badge_state(u)[1]) for u in users)
+        print(f"{earned} awards; incremental awards match batch re-evaluation for {len(replayed)} users")
+
+        user = replayed[0]
+        day = [date.today()]
+
+        def full():
+            badges._rebuild_user(user)
+
+        def next_set():
+            storage.save_workout_set(user, day[0].isoformat(), "0", "Hip Thrust", 1, 10, 40.0, True,
+                                     day[0].isoformat() + "T07:00:00")
+
+        def next_checkin():
+            day[0] += timedelta(days=1)
+            storage.save_daily_log(user, day[0].isoformat(), 70.0, 2.5, 1800, 400, 0, 0, 5, "", "", "")
+
+        print(f"{'case':<30}{'ms':>10}")
+        print(f"{'full per render':<30}{timed(full, args.repeat):>10.3f}")
+        print(f"{'event: check-in':<30}{timed(next_checkin, args.repeat):>10.3f}")
+        print(f"{'event: set':<30}{timed(next_set, args.repeat):>10.3f}")
+        print(f"{'awarded (cached)':<30}{timed(lambda: badges.awarded(user), args.repeat):>10.4f}")
+        print(f"{'evaluate_all, 1 process':<30}{serial * 1000:>10.1f}")
+        print(f"{f'evaluate_all, {args.workers} processes':<30}{parallel * 1000:>10.1f}")
+        storage.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
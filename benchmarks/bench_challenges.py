@@ -0,0 +1,150 @@
+# benchmarks/bench_challenges.py
+"""Weekly challenge aggregates for many users.
+
+``--users`` get ``--weeks`` of check-ins, completed sets and daily step
+totals, bulk-inserted without events; everyone joins this week's "3
+workouts" board. Timed:
+
+* ``challenges.rebuild`` over all users and weeks (pandas group-bys);
+* one entry through ``storage`` (all write handlers included) and the
+  challenge handler's own share of it;
+* rendering the challenge board from the aggregates vs scanning each
+  member's logs for the week (the per-user approach), top 10.
+
+A few users are replayed event by event; their rows must match the batch
+rebuild::
+
+    python benchmarks/bench_challenges.py --users 20000 --weeks 4
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+import challenges  # noqa: E402
+import leaderboard  # noqa: E402
+
+EXERCISES = ["Hip Thrust", "Squat", "Plank", "Russian Twists", "Lat Pulldown"]
+CHALLENGE = "3 workouts"
+
+
+def history(user: str, days, rng: random.Random):
+    logs, sets, steps = [], [], []
+    for day in days:
+        if rng.random() < 0.7:
+            logs.append(dict(user_id=user, date=day, weight_kg=70.0, water_l=rng.choice([1.0, 1.8, 2.0, 2.6]),
+                             cal_in=1800, cal_out=400, net_kcal=1400))
+        if rng.random() < 0.45:
+            for n, name in enumerate(rng.sample(EXERCISES, 2)):
+                sets.append(dict(user_id=user, date=day, logged_at=day + "T18:00:00", exercise_id=str(n),
+                                 exercise_name=name, set_num=1, reps=10, weight=40.0,
+                                 completed=int(rng.random() < 0.9)))
+        if rng.random() < 0.8:
+            steps.append(dict(user_id=user, date=day, metric="steps", value=float(rng.randint(3000, 14000)),
+                              source="bench"))
+    return logs, sets, steps
+
+
+def scan_progress(user_id: str, start: str, end: str) -> int:
+    """Workout days of one user by reading their sets: what a board without aggregates does per member."""
+    return len({s["date"] for s in storage.get_workout_sets(user_id, start, end) if s["completed"]})
+
+
+def timed(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Weekly challenge benchmark")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--replay-users", type=int, default=5)
+    parser.add_argument("--scan-members", type=int, default=300, help="members the per-user scan is timed on")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    this_week = leaderboard.week_of()
+    monday = date.fromisoformat(leaderboard.week_range(this_week)[0])
+    days = [(monday - timedelta(days=7 * (args.weeks - 1)) + timedelta(days=n)).isoformat()
+            for n in range(7 * args.weeks)]
+    weeks = sorted({leaderboard.week_of(d) for d in days})
+    board = leaderboard.board_key(CHALLENGE)
+    users = [f"user{n:06d}" for n in range(args.users)]
+    replayed = users[:args.replay_users]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "bench.db")
+        storage.init_storage()
+        logs, sets, steps = [], [], []
+        for u in users:
+            user_logs, user_sets, user_steps = history(u, days, rng)
+            if u in replayed:
+                for d in days:
+                    for r in (r for r in user_logs if r["date"] == d):
+                        storage.save_daily_log(u, d, 70.0, r["water_l"], 1800, 400, 0, 0, 5, "", "", "")
+                    for r in (r for r in user_sets if r["date"] == d):
+                        storage.save_workout_set(u, d, r["exercise_id"], r["exercise_name"], 1, 10, 40.0,
+                                                 bool(r["completed"]), r["logged_at"])
+                storage.save_device_daily(user_steps)
+                continue
+            logs += user_logs
+            sets += user_sets
+            steps += user_steps
+        with storage.engine.begin() as conn:
+            conn.execute(storage.daily_logs.insert(), logs)
+            conn.execute(storage.workout_sets.insert(), sets)
+            conn.execute(storage.device_daily.insert(), steps)
+            conn.execute(storage.leaderboard.insert(), [
+                dict(board=board, user_id=u, name=u, score=0, last_day=None) for u in users])
+        print(f"{args.users} users x {args.weeks} weeks: {len(logs)} check-ins, {len(sets)} sets, "
+              f"{len(steps)} step totals")
+
+        incremental = {u: {w: storage.get_challenge_week(u, w) for w in weeks} for u in replayed}
+        t0 = time.perf_counter()
+        written = challenges.rebuild(weeks)
+        rebuild_ms = (time.perf_counter() - t0) * 1000
+        for u in replayed:
+            for w in weeks:
+                batch = storage.get_challenge_week(u, w)
+                assert incremental[u][w] == batch, (u, w, incremental[u][w], batch)
+        print(f"rebuild wrote {written} rows; event-maintained rows match it for {len(replayed)} users")
+
+        start, end = leaderboard.week_range(this_week)
+        members = users[:args.scan_members]
+        scan_ms = timed(lambda: sorted((scan_progress(u, start, end) for u in members), reverse=True)[:10], 1)
+        user = replayed[0]
+        day = [date.fromisoformat(days[-1])]
+
+        def entry():
+            storage.save_workout_set(user, day[0].isoformat(), "2", "Plank", 1, 10, 0.0, True)
+
+        def handler_only():
+            challenges._on_workout_set(user, day[0].isoformat(), True, "Plank")
+            day[0] -= timedelta(days=1)  # a different weekday bit each call
+
+        print(f"{'case':<34}{'ms':>10}")
+        print(f"{f'rebuild {args.weeks} weeks, all users':<34}{rebuild_ms:>10.1f}")
+        print(f"{'set through storage (all handlers)':<34}{timed(entry, args.repeat):>10.3f}")
+        print(f"{'challenge handler alone':<34}{timed(handler_only, args.repeat):>10.3f}")
+        print(f"{f'board from aggregates ({args.users})':<34}"
+              f"{timed(lambda: challenges.board(CHALLENGE), args.repeat):>10.3f}")
+        print(f"{f'board by scanning ({args.scan_members} members)':<34}{scan_ms:>10.1f}")
+        print(f"{'  extrapolated to all members':<34}{scan_ms * args.users / len(members):>10.0f}")
+        storage.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
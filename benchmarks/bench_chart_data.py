@@ -0,0 +1,144 @@
+# benchmarks/bench_chart_data.py
+"""Chart payloads for long histories, raw vs ``chart_data`` downsampling.
+
+Series: ``--years`` of daily weigh-ins (weight tracker) and a year of minute
+heart rate (devices tab). For each chart, reported:
+
+* rows and Arrow bytes sent to the browser (what ``st.line_chart``
+  serializes), every point vs downsampled to ``--points``;
+* time to build the chart series, and to serve it again from the cache;
+* server-side render time: a script that only calls ``st.line_chart`` on
+  the frame, run through Streamlit's ``AppTest`` (browser drawing time,
+  which grows the same way with rows, is not measured here);
+* fidelity: the RMS error of the downsampled line, interpolated back onto
+  every point it was picked from, as a share of the series' range.
+
+The overall min and max must survive downsampling::
+
+    python benchmarks/bench_chart_data.py --years 10
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chart_data  # noqa: E402
+import storage  # noqa: E402
+import timeseries  # noqa: E402
+
+RENDER_SCRIPT = """
+import pandas as pd
+import streamlit as st
+st.line_chart(pd.read_parquet({path!r}).set_index("date"))
+"""
+
+
+def arrow_bytes(frame) -> int:
+    from streamlit import dataframe_util
+    return len(dataframe_util.convert_pandas_df_to_arrow_bytes(frame))
+
+
+def render_ms(frame, tmp: str, repeat: int) -> float:
+    from streamlit.testing.v1 import AppTest
+    path = os.path.join(tmp, "chart.parquet")
+    frame.to_parquet(path)
+    script = RENDER_SCRIPT.format(path=path)
+    AppTest.from_string(script, default_timeout=60).run()  # warm imports
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        at = AppTest.from_string(script, default_timeout=60)
+        at.run()
+        assert not at.exception
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    found = fn()
+    return found, (time.perf_counter() - t0) * 1000
+
+
+def report(label: str, raw, thin, x, y, thin_x, build: float, hit: float, tmp: str, repeat: int):
+    """One table row; ``raw``/``thin`` are chart frames (date + columns), ``x``/``y`` the series thinned."""
+    line = np.interp(x, thin_x, np.interp(thin_x, x, y))
+    rms = np.sqrt(np.mean((line - y) ** 2)) / (y.max() - y.min())
+    print(f"{label:<26}{len(raw):>9,}{arrow_bytes(raw):>12,}{render_ms(raw, tmp, repeat):>9.1f}"
+          f"{len(thin):>7,}{arrow_bytes(thin):>9,}{render_ms(thin, tmp, repeat):>8.1f}"
+          f"{build:>9.1f}{hit:>8.3f}{rms:>8.2%}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Chart downsampling benchmark")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--points", type=int, default=chart_data.POINTS)
+    parser.add_argument("--repeat", type=int, default=3, help="render runs per chart")
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    today = pd.Timestamp("2026-06-30")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "charts.db")
+        storage.init_storage()
+        timeseries.ROOT = os.path.join(tmp, "ts")
+        days = pd.date_range(end=today, periods=args.years * 365, freq="D").strftime("%Y-%m-%d")
+        weight_kg = 90 + np.cumsum(rng.normal(-0.004, 0.08, len(days))) + rng.normal(0, 0.5, len(days))
+        with storage.engine.begin() as conn:
+            conn.execute(storage.daily_logs.insert(), [
+                dict(user_id="bench", date=d, weight_kg=float(w), water_l=2.0, cal_in=1800, cal_out=300,
+                     net_kcal=1500, waist_in=32.0, hips_in=float(40 + rng.normal(0, 0.4)))
+                for d, w in zip(days, weight_kg)])
+
+        end = today.tz_localize("UTC")
+        minutes = pd.date_range(end=end, periods=365 * 1440, freq="min", inclusive="left")
+        awake = (minutes.hour >= 7) & (minutes.hour < 23)
+        hr = np.round(60 + 15 * awake + rng.normal(0, 4, len(minutes)) + 60 * (rng.random(len(minutes)) < 0.0005))
+        ts = minutes.as_unit("s").asi8
+        month = 31 * 1440
+        for start in range(0, len(ts), month):
+            timeseries.write("bench", "heart_rate", ts[start:start + month], hr[start:start + month])
+
+        print(f"{'chart':<26}{'all rows':>9}{'all bytes':>12}{'all ms':>9}{'rows':>7}{'bytes':>9}{'ms':>8}"
+              f"{'build ms':>9}{'hit ms':>8}{'rms':>8}")
+        logs = chart_data._stored_logs("bench")
+        as_of = today.date().isoformat()
+        for label, chart, build_frame, column in (
+                ("weight", chart_data.weight, chart_data.weight_frame, "weight"),
+                ("waist-to-hip", chart_data.waist_hip, chart_data.waist_hip_frame, "wh_ratio")):
+            full = build_frame(logs, "All", len(logs), as_of)
+            thin, build = timed(lambda: chart("bench", "All", args.points, as_of))
+            _, hit = timed(lambda: chart("bench", "All", args.points, as_of))
+            y = full[column].to_numpy()
+            assert y.max() in thin[column].to_numpy() and y.min() in thin[column].to_numpy(), label
+            x = full["date"].to_numpy(dtype="datetime64[D]").astype(np.float64)
+            thin_x = thin["date"].to_numpy(dtype="datetime64[D]").astype(np.float64)
+            report(f"{label}, {args.years}y", full.assign(date=pd.to_datetime(full["date"])),
+                   thin.assign(date=pd.to_datetime(thin["date"])), x, y, thin_x, build, hit, tmp, args.repeat)
+
+        for label, span in (("heart rate, day", pd.Timedelta(days=1)), ("heart rate, month", pd.Timedelta(days=30)),
+                            ("heart rate, year", pd.Timedelta(days=364))):
+            raw = timeseries.query("bench", "heart_rate", end - span, end, tier="minute")
+            tier = timeseries.query("bench", "heart_rate", end - span, end,
+                                    max_points=args.points * chart_data.MINMAX_RATIO)
+            thin, build = timed(lambda: chart_data.device("bench", "heart_rate", span, args.points, end))
+            _, hit = timed(lambda: chart_data.device("bench", "heart_rate", span, args.points, end))
+            assert thin["max"].max() == raw["value"].max() and thin["min"].min() == raw["value"].min(), label
+            x = tier["ts"].to_numpy(dtype="datetime64[s]").astype(np.float64)
+            thin_x = thin["ts"].to_numpy(dtype="datetime64[s]").astype(np.float64)
+            columns = ["value"] if thin.attrs["tier"] == "minute" else ["value", "min", "max"]
+            report(f"{label} ({thin.attrs['tier']})", raw.rename(columns={"ts": "date"})[["date", "value"]],
+                   thin.rename(columns={"ts": "date"})[["date"] + columns], x, tier["value"].to_numpy(), thin_x,
+                   build, hit, tmp, args.repeat)
+        storage.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# benchmarks/bench_chat.py
+"""Community chat fetch latency with a large history and many readers.
+
+``--messages`` are seeded straight into ``chat_messages``. Then
+``--readers`` threads, each with its own session dict, load the chat and
+poll it every ``--poll-ms`` (about one rerun each) while a writer posts
+``--post-rate`` messages a second through ``community_chat.post``. Some
+polls page back with ``older``. Reported, as p50/p95/p99:
+
+* the first load (newest page);
+* polls with nothing new (answered from the in-memory latest id) and polls
+  that fetched new messages past the cursor;
+* paging back, and a page deep in history by cursor vs by OFFSET;
+* posting.
+
+Every reader must end up having seen every posted message exactly once::
+
+    python benchmarks/bench_chat.py --messages 1000000 --readers 500 --seconds 10
+
+``--no-shortcut`` makes every poll query SQLite, to time the (room, id)
+index under the same concurrency.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import community_chat  # noqa: E402
+import storage  # noqa: E402
+
+WORDS = "great session today legs glutes tired proud water streak rest squat form coffee".split()
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else float("nan")
+
+
+def row(label: str, values) -> str:
+    ms = [v * 1000 for v in values]
+    return (f"{label:<28}{len(ms):>8}{percentile(ms, .50):>9.2f}{percentile(ms, .95):>9.2f}"
+            f"{percentile(ms, .99):>9.2f}")
+
+
+def seed(n: int, rng: random.Random):
+    now = datetime.now().isoformat(timespec="seconds")
+    chunk = 50_000
+    with storage.engine.begin() as conn:
+        for start in range(0, n, chunk):
+            conn.execute(storage.chat_messages.insert(), [
+                dict(room=community_chat.ROOM, user_id=f"user{i % 5000}", name=f"User {i % 5000}",
+                     content=" ".join(rng.choices(WORDS, k=8)), created_at=now)
+                for i in range(start, min(n, start + chunk))])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Community chat benchmark")
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--readers", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--poll-ms", type=float, default=500)
+    parser.add_argument("--post-rate", type=float, default=20, help="messages per second")
+    parser.add_argument("--older-rate", type=float, default=0.02, help="share of polls that also page back")
+    parser.add_argument("--no-shortcut", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+    if args.no_shortcut:
+        community_chat.LATEST_TTL_S = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "chat.db")
+        storage.init_storage()
+        t0 = time.perf_counter()
+        seed(args.messages, rng)
+        print(f"seeded {args.messages} messages in {time.perf_counter() - t0:.1f} s")
+
+        first_id = args.messages // 10
+        deep_cursor, deep_offset = [], []
+        for _ in range(20):
+            t = time.perf_counter()
+            storage.get_chat_messages(community_chat.ROOM, before_id=first_id, limit=community_chat.PAGE)
+            deep_cursor.append(time.perf_counter() - t)
+        from sqlalchemy import select
+        table = storage.chat_messages
+        for _ in range(3):
+            t = time.perf_counter()
+            with storage.engine.begin() as conn:
+                conn.execute(select(table).where(table.c.room == community_chat.ROOM).order_by(table.c.id.desc())
+                             .limit(community_chat.PAGE).offset(args.messages - first_id)).all()
+            deep_offset.append(time.perf_counter() - t)
+
+        lock = threading.Lock()
+        stats = {"first": [], "idle": [], "new": [], "older": [], "post": []}
+        seen = {}
+        stop = threading.Event()
+        start_id = storage.get_latest_chat_id(community_chat.ROOM)
+
+        def record(kind: str, value: float):
+            with lock:
+                stats[kind].append(value)
+
+        def reader(n: int):
+            r = random.Random(args.seed * 1000 + n)
+            session = {}
+            t = time.perf_counter()
+            community_chat.poll(session)
+            record("first", time.perf_counter() - t)
+            ids = []
+            while not stop.is_set():
+                time.sleep(args.poll_ms / 1000 * (0.5 + r.random()))
+                t = time.perf_counter()
+                new = community_chat.poll(session)
+                record("new" if new else "idle", time.perf_counter() - t)
+                ids.extend(m["id"] for m in new)
+                if r.random() < args.older_rate:
+                    t = time.perf_counter()
+                    community_chat.older(session)
+                    record("older", time.perf_counter() - t)
+            ids.extend(m["id"] for m in community_chat.poll(session))
+            seen[n] = ids
+
+        def writer():
+            session = {}
+            n = 0
+            while not stop.is_set():
+                t = time.perf_counter()
+                community_chat.post(session, "writer", "Writer", f"post {n}")
+                record("post", time.perf_counter() - t)
+                n += 1
+                time.sleep(max(0.0, 1 / args.post_rate - (time.perf_counter() - t)))
+
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+        for t in threads:
+            t.start()
+        time.sleep(1)  # let every reader load before posting starts
+        posting = threading.Thread(target=writer)
+        posting.start()
+        time.sleep(args.seconds)
+        stop.set()
+        posting.join()
+        for t in threads:
+            t.join()
+
+        posted = list(range(start_id + 1, storage.get_latest_chat_id(community_chat.ROOM) + 1))
+        assert all(ids == posted for ids in seen.values()), "a reader missed or repeated a message"
+        print(f"{args.readers} readers polling every ~{args.poll_ms:g} ms for {args.seconds:g} s, "
+              f"{len(posted)} messages posted; every reader saw each one exactly once"
+              f"{' (shortcut off)' if args.no_shortcut else ''}")
+        print(f"{'latency (ms)':<28}{'calls':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+        print(row("first load", stats["first"]))
+        print(row("poll, nothing new", stats["idle"]))
+        print(row("poll, new messages", stats["new"]))
+        print(row("older page", stats["older"]))
+        print(row("deep page by cursor", deep_cursor))
+        print(row("deep page by offset", deep_offset))
+        print(row("post", stats["post"]))
+        storage.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# benchmarks/bench_coach_context.py
+"""Coach Jo request size and latency at turn 5, 50 and 200.
+
+"full" sends the system prompt plus the whole history, as ``_send_to_coach``
+used to. "budgeted" replays the conversation turn by turn through
+``coach_context.build`` (offline extractive summarizer) so the summary is
+built incrementally, then sends the final payload. Latency is measured
+against ``llm_standin.StandinServer`` with a prompt-size dependent prefill
+delay::
+
+    python benchmarks/bench_coach_context.py --turns 5 50 200 --prefill-ms-per-1k 60
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import coach_context  # noqa: E402
+import llm  # noqa: E402
+from llm_standin import StandinServer  # noqa: E402
+
+SYSTEM_PROMPT = "You are Coach Jo, a practical fitness assistant. Answer concisely and safely."
+QUESTIONS = [
+    "How many sets of hip thrusts should I do this week?",
+    "Can I swap Bulgarian split squats for step-ups?",
+    "What's a good vegan dinner with about 40 g of protein?",
+    "Should I take creatine on rest days too?",
+    "My knee hurts a bit on lunges, what should I change?",
+]
+
+
+def conversation(turns: int):
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"{QUESTIONS[i % len(QUESTIONS)]} (turn {i + 1})"})
+        if i < turns - 1:
+            history.append({"role": "assistant", "content": llm.MOCK_REPLY})
+    return history
+
+
+def budgeted(history, budget: int):
+    calls = 0
+
+    def summarize(previous, messages):
+        nonlocal calls
+        calls += 1
+        return coach_context.extractive_summary(previous, messages)
+
+    state = coach_context.new_state()
+    t0 = time.perf_counter()
+    # Replay: build once per user turn, as the app does
+    for end in range(1, len(history) + 1, 2):
+        messages, state = coach_context.build(history[:end], SYSTEM_PROMPT, state, summarize, budget)
+    build_ms = (time.perf_counter() - t0) * 1000 / ((len(history) + 1) // 2)
+    return messages, calls, build_ms
+
+
+def ttft(messages) -> float:
+    t0 = time.perf_counter()
+    first = None
+    for _ in llm.stream_chat(messages, "openai", "standin-key"):
+        if first is None:
+            first = (time.perf_counter() - t0) * 1000
+    return first
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Coach Jo context size benchmark")
+    parser.add_argument("--turns", type=int, nargs="+", default=[5, 50, 200])
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=60)
+    parser.add_argument("--budget", type=int, default=coach_context.BUDGET_TOKENS)
+    args = parser.parse_args(argv)
+
+    server = StandinServer(ttft_ms=20, prefill_ms_per_1k=args.prefill_ms_per_1k).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    try:
+        ttft(conversation(1))  # connect and warm the client
+        print(f"budget {args.budget} tokens, prefill {args.prefill_ms_per_1k:g} ms per 1k prompt tokens")
+        print(f"{'turn':>5} {'mode':<9}{'messages':>9}{'tokens':>8}{'bytes':>9}{'ttft ms':>9}"
+              f"{'summaries':>10}{'build ms/turn':>14}")
+        for turns in args.turns:
+            history = conversation(turns)
+            full = [{"role": "system", "content": SYSTEM_PROMPT}] + history
+            small, calls, build_ms = budgeted(history, args.budget)
+            for mode, messages, extra in (("full", full, ("-", "-")),
+                                          ("budgeted", small, (calls, f"{build_ms:.3f}"))):
+                tokens = sum(coach_context.message_tokens(m) for m in messages)
+                size = len(json.dumps(messages).encode("utf-8"))
+                print(f"{turns:>5} {mode:<9}{len(messages):>9}{tokens:>8}{size:>9}{ttft(messages):>9.1f}"
+                      f"{extra[0]:>10}{extra[1]:>14}")
+    finally:
+        llm.reset_clients()
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# benchmarks/bench_coach_load.py
+"""Coach Jo load test against the offline stand-in.
+
+Each simulated session is a plain dict standing in for ``st.session_state``
+and runs in its own thread. A turn is ``app._send_to_coach`` followed by
+draining ``app.coach_reply``, the same path the page takes (local answers,
+user context, response cache, ``llm_executor``), minus Streamlit itself.
+The provider is ``llm_standin.StandinServer`` through the ``standin``
+provider, so no API credits are spent. Reported:
+
+* throughput in turns/s and streamed tokens/s;
+* time to first chunk and full-reply latency (p50/p95/p99), split into turns
+  answered from app content and turns that went to the provider;
+* failed turns (apology replies), cache, executor and stand-in counters.
+
+::
+
+    python benchmarks/bench_coach_load.py --sessions 100 --turns 4 --error-rate 0.03 --cut-rate 0.01
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+QUESTIONS = [
+    "What can I do instead of hip thrusts at home?",
+    "What's the vegan dinner on Friday?",
+    "How much water should I drink each day?",
+    "I hit 12 reps on hip thrusts; how should I progress weight and reps?",
+    "How can I swap a salmon dinner to a vegan dinner with ~40g protein?",
+    "Is it bad to train when I'm sick?",
+    "How do I stay motivated after a bad week?",
+    "My lower back gets tight after RDLs, what should I change?",
+    "Can I drink alcohol on the weekend and still lose fat?",
+    "How much sleep do I need for recovery?",
+]
+
+# Replies stream_coach_llm gives instead of an answer
+FAILURE_MARKERS = ("Sorry, I couldn't get a response", "Coach Jo is busy", "_(Response")
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else float("nan")
+
+
+def row(label: str, values) -> str:
+    ms = [v * 1000 for v in values]
+    return (f"{label:<24}{len(ms):>6}{percentile(ms, .50):>9.1f}{percentile(ms, .95):>9.1f}"
+            f"{percentile(ms, .99):>9.1f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Coach Jo load test")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--think-ms", type=float, default=300, help="max random pause between turns")
+    parser.add_argument("--ramp-s", type=float, default=1.0, help="spread session starts over this long")
+    parser.add_argument("--ttft-ms", type=float, default=250)
+    parser.add_argument("--token-ms", type=float, default=5)
+    parser.add_argument("--jitter-ms", type=float, default=200)
+    parser.add_argument("--handshake-ms", type=float, default=30)
+    parser.add_argument("--reply-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--cut-rate", type=float, default=0.01)
+    parser.add_argument("--max-in-flight", type=int, default=None)
+    parser.add_argument("--no-local", action="store_true", help="send every question to the provider")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    import storage
+
+    tmp = tempfile.TemporaryDirectory()
+    storage._DB_PATH = os.path.join(tmp.name, "load.db")
+
+    import app  # defines the coach path; main() only runs under streamlit
+    import coach_cache
+    import llm
+    import llm_executor
+    import retrieval
+    from llm_standin import StandinServer
+
+    if args.max_in_flight:
+        llm_executor.MAX_IN_FLIGHT = args.max_in_flight
+    if args.no_local:
+        retrieval.DIRECT_AT = retrieval.AUGMENT_AT = 2.0  # confidence never gets there
+    server = StandinServer(ttft_ms=args.ttft_ms, token_ms=args.token_ms, handshake_ms=args.handshake_ms,
+                           jitter_ms=args.jitter_ms, reply_tokens=args.reply_tokens,
+                           error_rate=args.error_rate, cut_rate=args.cut_rate, seed=args.seed).start()
+    llm.STANDIN_URL = server.base_url
+    index = app.coach_index()
+
+    results = []  # (kind, ttft, total, failed)
+    lock = threading.Lock()
+
+    def session_worker(n: int):
+        rng = random.Random(args.seed * 1000 + n)
+        time.sleep(rng.random() * args.ramp_s)
+        session = {"prefs": {"experience": "beginner", "focus": ["glutes"]},
+                   "ai_tuning": {"diet": rng.choice(["omnivore", "pescatarian", "vegan"]),
+                                 "protein_target_g": 120, "available_days": 4}}
+        for _ in range(args.turns):
+            question = rng.choice(QUESTIONS)
+            kind = "local" if retrieval.route(index, question, record=False)[0] == "direct" else "provider"
+            t0 = time.perf_counter()
+            ttft = None
+            app._send_to_coach(question, session)
+            for _chunk in app.coach_reply(session, "standin"):
+                if ttft is None:
+                    ttft = time.perf_counter() - t0
+            total = time.perf_counter() - t0
+            failed = any(marker in session["coach_history"][-1]["content"] for marker in FAILURE_MARKERS)
+            with lock:
+                results.append((kind, ttft or total, total, failed))
+            time.sleep(rng.random() * args.think_ms / 1000)
+
+    threads = [threading.Thread(target=session_worker, args=(n,)) for n in range(args.sessions)]
+    t0 = time.perf_counter()
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - t0
+    finally:
+        llm.reset_clients()
+        server.stop()
+        storage.engine.dispose()
+        tmp.cleanup()
+
+    ok = [r for r in results if not r[3]]
+    print(f"{args.sessions} sessions x {args.turns} turns; stand-in ttft {args.ttft_ms:g}+{args.jitter_ms:g} ms, "
+          f"{args.reply_tokens} tokens at {args.token_ms:g} ms, {args.error_rate:.0%} errors, "
+          f"{args.cut_rate:.0%} cut streams; local answers {'off' if args.no_local else 'on'}")
+    print(f"throughput: {len(results) / wall:.1f} turns/s, {server.completion_tokens / wall:.0f} tokens/s "
+          f"over {wall:.1f} s; {len(results) - len(ok)} failed turns")
+    print(f"{'latency (ms)':<24}{'turns':>6}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for kind in ("provider", "local"):
+        turns = [r for r in ok if r[0] == kind]
+        if turns:
+            print(row(f"{kind} first chunk", [r[1] for r in turns]))
+            print(row(f"{kind} full reply", [r[2] for r in turns]))
+    cache = coach_cache.stats()
+    print(f"cache: {cache['hits']} hits, {cache['coalesced']} shared, {cache['misses']} misses")
+    print("executor:", llm_executor.stats())
+    print(f"stand-in: {server.requests} requests on {server.connections} connections, "
+          f"peak {server.max_in_flight} in flight, {server.prompt_tokens} prompt / "
+          f"{server.completion_tokens} completion tokens")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
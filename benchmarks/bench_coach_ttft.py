@@ -0,0 +1,71 @@
+# benchmarks/bench_coach_ttft.py
+"""Time until Coach Jo shows something: blocking vs streaming.
+
+The blocking column is what the page used to wait for before it could
+render anything (the whole completion). The streaming column is the time to
+the first chunk, i.e. when ``st.write_stream`` starts painting. Defaults to
+the offline mock provider; pass ``--provider openai`` (with OPENAI_API_KEY
+set) to measure a real endpoint::
+
+    python benchmarks/bench_coach_ttft.py --runs 5 --ttft-ms 400 --token-ms 20
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm  # noqa: E402
+
+PROMPT = [
+    {"role": "system", "content": "You are Coach Jo."},
+    {"role": "user", "content": "I hit 12 reps on hip thrusts; how should I progress weight and reps?"},
+]
+
+
+def measure(provider: str, key: str):
+    t0 = time.perf_counter()
+    llm.complete(PROMPT, provider, key)
+    blocking = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    first = None
+    chunks = 0
+    for _ in llm.stream_chat(PROMPT, provider, key):
+        if first is None:
+            first = time.perf_counter() - t0
+        chunks += 1
+    total = time.perf_counter() - t0
+    return blocking, first, total, chunks
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Coach Jo time-to-first-token benchmark")
+    parser.add_argument("--provider", default="mock", choices=llm.PROVIDERS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ttft-ms", type=float, default=300, help="mock time to first token")
+    parser.add_argument("--token-ms", type=float, default=15, help="mock delay between chunks")
+    args = parser.parse_args(argv)
+
+    os.environ["COACH_MOCK_TTFT_MS"] = str(args.ttft_ms)
+    os.environ["COACH_MOCK_TOKEN_MS"] = str(args.token_ms)
+    key = os.environ.get("GEMINI_API_KEY" if args.provider == "gemini" else "OPENAI_API_KEY", "")
+
+    results = [measure(args.provider, key) for _ in range(args.runs)]
+    blocking = statistics.median(r[0] for r in results) * 1000
+    first = statistics.median(r[1] for r in results) * 1000
+    total = statistics.median(r[2] for r in results) * 1000
+    chunks = results[-1][3]
+    print(f"provider={args.provider} runs={args.runs} chunks/reply={chunks}")
+    print(f"{'blocking: first paint':<28}{blocking:>10.1f} ms")
+    print(f"{'streaming: first token':<28}{first:>10.1f} ms")
+    print(f"{'streaming: last token':<28}{total:>10.1f} ms")
+    print(f"first paint {blocking / first:.1f}x sooner")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# benchmarks/bench_device_sync.py
+"""Syncing many wearable accounts against local provider stand-ins.
+
+``--users`` accounts, spread over Fitbit, Google Fit and Garmin, sync
+against one ``device_standin`` server that sleeps ``--latency-ms`` per
+request and answers 429 above ``--server-rate`` requests a second per
+provider. The client side limits each provider to ``--client-rate`` a
+second with ``--concurrency`` requests in flight. Reported:
+
+* the first sync (``--backfill-days`` each; Garmin needs a request per day)
+  and a re-sync from the stored cursors;
+* a re-sync with the client limiter effectively off, to show what the
+  provider's 429s cost;
+* a serial sync of a sample of accounts, extrapolated, for comparison;
+* writing the first sync's rows in batches vs one transaction per account.
+
+Every stored total must equal the stand-in's value and every cursor must be
+today::
+
+    python benchmarks/bench_device_sync.py --users 3000 --latency-ms 30
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import device_standin  # noqa: E402
+import device_sync  # noqa: E402
+import storage  # noqa: E402
+
+PROVIDERS = ("fitbit", "googlefit", "garmin")
+
+
+def configure(server, rate: float, burst: int, concurrency: int):
+    for name in PROVIDERS:
+        adapter = device_sync.get(name)
+        device_sync.register(name, adapter.label, adapter.fetch, adapter.window_days, rate, burst, concurrency)
+        device_sync.BASE_URLS[name] = server.url(name)
+
+
+def run(label: str, server, accounts, workers: int, batch_rows: int = device_sync.BATCH_ROWS):
+    before = dict(server.requests), dict(server.throttled)
+    t0 = time.perf_counter()
+    stats = device_sync.sync(accounts, workers=workers, batch_rows=batch_rows)
+    seconds = time.perf_counter() - t0
+    requests = sum(server.requests.values()) - sum(before[0].values())
+    throttled = sum(server.throttled.values()) - sum(before[1].values())
+    print(f"{label:<30}{stats['accounts']:>9}{seconds:>9.2f}{stats['accounts'] / seconds:>11.0f}"
+          f"{requests:>10}{throttled:>7}{stats['rows']:>9}{stats['batches']:>8}{stats['errors']:>7}")
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Device sync benchmark")
+    parser.add_argument("--users", type=int, default=3000)
+    parser.add_argument("--backfill-days", type=int, default=7)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--server-rate", type=float, default=100, help="per provider, requests a second")
+    parser.add_argument("--client-rate", type=float, default=90, help="per provider, requests a second")
+    parser.add_argument("--concurrency", type=int, default=16, help="per provider, requests in flight")
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--serial-sample", type=int, default=60)
+    args = parser.parse_args(argv)
+    device_sync.BACKFILL_DAYS = args.backfill_days
+    today = date.today().isoformat()
+
+    server = device_standin.DeviceStandinServer(
+        latency_ms=args.latency_ms, rate_limits={p: args.server_rate for p in PROVIDERS}).start()
+    configure(server, args.client_rate, max(1, int(args.client_rate / 10)), args.concurrency)
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "sync.db")
+        storage.init_storage()
+        with storage.engine.begin() as conn:
+            conn.execute(storage.device_accounts.insert(), [
+                dict(user_id=f"user{n:06d}", provider=PROVIDERS[n % 3], token=f"token{n}", status="connected")
+                for n in range(args.users)])
+        print(f"{args.users} accounts, {args.backfill_days} days backfill, {args.latency_ms:g} ms a request, "
+              f"provider limit {args.server_rate:g}/s, client limit {args.client_rate:g}/s")
+        print(f"{'case':<30}{'accounts':>9}{'s':>9}{'accts/s':>11}{'requests':>10}{'429s':>7}{'rows':>9}"
+              f"{'batches':>8}{'errors':>7}")
+
+        first = run("first sync", server, None, args.workers)
+        run("re-sync from cursors", server, None, args.workers)
+
+        configure(server, 1e9, 10**9, args.concurrency)
+        run("re-sync, client limiter off", server, None, args.workers)
+        configure(server, args.client_rate, max(1, int(args.client_rate / 10)), args.concurrency)
+
+        sample = storage.get_device_accounts()[:args.serial_sample]
+        serial = [dict(a, cursor=None) for a in sample]
+        t0 = time.perf_counter()
+        device_sync.sync(serial, workers=1)
+        per_account = (time.perf_counter() - t0) / len(serial)
+        print(f"{'first sync, serial (extrap.)':<30}{args.users:>9}{per_account * args.users:>9.0f}"
+              f"{1 / per_account:>11.0f}")
+
+        accounts = {a["user_id"]: a for a in storage.get_device_accounts()}
+        assert all(a["cursor"] == today and a["status"] == "ok" for a in accounts.values()), "a cursor lags"
+        with storage.engine.begin() as conn:
+            stored = conn.execute(storage.device_daily.select()).mappings().all()
+        for r in stored:
+            expected = device_standin.value(accounts[r["user_id"]]["token"], r["date"], r["metric"])
+            assert r["value"] == expected, (dict(r), expected)
+        print(f"{len(stored)} stored totals match the stand-in; every cursor is {today}")
+
+        per_user = {}
+        for r in stored:
+            per_user.setdefault(r["user_id"], []).append(dict(r))
+        t0 = time.perf_counter()
+        for rows in per_user.values():
+            storage.save_device_daily(rows)
+        single = time.perf_counter() - t0
+        rows = [dict(r) for r in stored]
+        t0 = time.perf_counter()
+        for start in range(0, len(rows), device_sync.BATCH_ROWS):
+            storage.save_device_daily(rows[start:start + device_sync.BATCH_ROWS])
+        batched = time.perf_counter() - t0
+        print(f"writing {first['rows']} rows: {len(per_user)} transactions {single * 1000:.0f} ms, "
+              f"batches of {device_sync.BATCH_ROWS} {batched * 1000:.0f} ms")
+        storage.engine.dispose()
+    server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
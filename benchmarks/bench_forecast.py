@@ -0,0 +1,132 @@
+# benchmarks/bench_forecast.py
+"""Weight trend / adaptive TDEE forecasting over years of daily logs.
+
+Synthetic users each have a true TDEE and a steady calorie gap; their
+weight follows energy balance, weigh-ins carry +/-0.6 kg of day-to-day
+noise, about 70% of days are weighed and 80% of those have intake logged.
+Reported:
+
+* ``forecast.run`` over ``--users`` x ``--years`` in one pass (the batch
+  recompute), against ``forecast.compute`` one user at a time;
+* ``forecast.record`` for one new log (the incremental path the
+  ``daily_log`` event takes);
+* how close the estimated TDEE and weekly rate get to the true ones;
+* ``forecast.recompute_all`` end to end (storage reads, macro priors,
+  projections) for ``--db-users`` users in a temporary database.
+
+Sampled users must get the same state from the batch and the per-user
+paths::
+
+    python benchmarks/bench_forecast.py --users 10000 --years 3
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import forecast  # noqa: E402
+import storage  # noqa: E402
+
+FIRST_DAY = int(np.datetime64("2023-01-01", "D").astype(np.int64))
+
+
+def population(users: int, days: int, rng: np.random.Generator):
+    """(weights with NaN gaps, intake with 0 for unlogged days, true TDEE, true kcal gap)."""
+    tdee = rng.normal(2300, 300, users)
+    gap = rng.uniform(-600, 250, users)
+    intake = np.round(tdee[:, None] + gap[:, None] + rng.normal(0, 250, (users, days)))
+    weights = rng.uniform(60, 110, users)[:, None] + np.cumsum(intake - tdee[:, None], axis=1) / forecast.KCAL_PER_KG
+    weights += rng.normal(0, 0.6, (users, days))
+    weights[rng.random((users, days)) >= 0.7] = np.nan
+    intake[rng.random((users, days)) >= 0.8] = 0
+    return weights, intake, tdee, gap
+
+
+def iso(day: int) -> str:
+    return str(np.datetime64(FIRST_DAY + int(day), "D"))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Forecast engine benchmark")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--single", type=int, default=50, help="users timed one at a time")
+    parser.add_argument("--db-users", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    days = int(args.years * 365)
+
+    weights, intake, tdee, gap = population(args.users, days, rng)
+    logs = int((~np.isnan(weights)).sum())
+    prior = np.full(args.users, 2000.0)
+    print(f"{args.users:,} users x {days} days: {logs:,} logs")
+
+    t0 = time.perf_counter()
+    state = forecast.run(weights, intake, FIRST_DAY, prior)
+    batch = time.perf_counter() - t0
+
+    sample = rng.choice(args.users, min(args.single, args.users), replace=False)
+    t0 = time.perf_counter()
+    singles = {}
+    for user in sample:
+        seen = np.flatnonzero(~np.isnan(weights[user]))
+        singles[user] = forecast.compute([iso(d) for d in seen], weights[user, seen], intake[user, seen], 2000.0)
+    single = (time.perf_counter() - t0) / len(sample)
+    for user, (_, one) in singles.items():
+        assert all(np.isclose(one[k][0], state[k][user], equal_nan=True) for k in forecast.FIELDS), user
+    print(f"batch and per-user states agree for {len(sample)} sampled users")
+    print(f"{'full recompute, batch (run)':<40}{batch:>10.2f} s  ({batch * 1e9 / logs:.0f} ns per log)")
+    print(f"{'full recompute, per user (compute)':<40}{single * args.users:>10.2f} s  (extrapolated, "
+          f"{single * args.users / batch:.0f}x)")
+
+    user = int(sample[0])
+    forecast._states["bench"] = singles[user]
+    last = int(singles[user][1]["day"][0])
+    t0 = time.perf_counter()
+    for n in range(args.repeat):
+        forecast.record("bench", str(np.datetime64(last + 1 + n, "D")), 80.0, 1800)
+    record = (time.perf_counter() - t0) / args.repeat
+    print(f"{'record one new log':<40}{record * 1e6:>10.1f} us")
+
+    error = np.abs(state["tdee"] - tdee)
+    rate = np.abs(state["velocity"] * 7 - gap / forecast.KCAL_PER_KG * 7)
+    print(f"TDEE error: median {np.median(error):.0f} kcal, p90 {np.percentile(error, 90):.0f} kcal; "
+          f"rate error: median {np.median(rate):.3f} kg/week")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "forecast.db")
+        storage.init_storage()
+        users = min(args.db_users, args.users)
+        rows, profiles = [], []
+        for user in range(users):
+            user_id = f"user{user:05d}"
+            profiles.append(dict(user_id=user_id, age=35, sex="F", height_cm=165, start_weight_kg=80,
+                                 activity_level="moderate", weekly_pace_lb=0.5, goal_weight_kg=70,
+                                 goal_date=iso(days + 180)))
+            for day in np.flatnonzero(~np.isnan(weights[user])):
+                rows.append(dict(user_id=user_id, date=iso(day), weight_kg=float(weights[user, day]), water_l=2.0,
+                                 cal_in=int(intake[user, day]), cal_out=0, net_kcal=int(intake[user, day])))
+        with storage.engine.begin() as conn:
+            conn.execute(storage.profiles.insert(), profiles)
+            conn.execute(storage.daily_logs.insert(), rows)
+        t0 = time.perf_counter()
+        frame = forecast.recompute_all(today=iso(days - 1))
+        elapsed = time.perf_counter() - t0
+        found = forecast.get("user00000")
+        assert np.isclose(found["trend_kg"], frame["trend"][0]) and np.isclose(found["tdee"], frame["tdee"][0])
+        print(f"{'recompute_all, ' + f'{users} users from storage':<40}{elapsed:>10.2f} s  "
+              f"({len(rows):,} logs, {int(frame['on_track'].sum())} on track)")
+        storage.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# benchmarks/bench_i18n.py
+"""Full-page translation cost per language.
+
+A "page" translates every key in the English catalog once. The legacy column
+reproduces the old ``i18n()``: rebuild the per-language translation dicts on
+every call, then look the key up. The compiled column uses
+``translations.gettext`` on the shared, pre-merged tables::
+
+    python benchmarks/bench_i18n.py --pages 200
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import translations  # noqa: E402
+
+LANGS = ("en", "es", "fr")
+
+
+def legacy_i18n(key, lang, sources):
+    translations_by_lang = {name: dict(table) for name, table in sources.items()}
+    return translations_by_lang.get(lang, translations_by_lang["en"]).get(key, key)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="i18n full-page translation benchmark")
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    for lang in LANGS:
+        translations.catalog(lang)
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    sources = {lang: translations._read(lang) for lang in LANGS}
+    keys = list(translations.catalog("en"))
+    print(f"{len(keys)} keys per page, {args.pages} pages; cold compile of "
+          f"{len(LANGS)} catalogs: {compile_ms:.2f} ms")
+    print(f"{'lang':<6}{'legacy us/page':>16}{'compiled us/page':>18}{'speedup':>10}")
+    for lang in LANGS:
+        t0 = time.perf_counter()
+        for _ in range(args.pages):
+            for key in keys:
+                legacy_i18n(key, lang, sources)
+        legacy = (time.perf_counter() - t0) / args.pages * 1e6
+
+        gettext = translations.gettext
+        t0 = time.perf_counter()
+        for _ in range(args.pages):
+            for key in keys:
+                gettext(key, lang)
+        compiled = (time.perf_counter() - t0) / args.pages * 1e6
+        print(f"{lang:<6}{legacy:>16.1f}{compiled:>18.1f}{legacy / compiled:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# benchmarks/bench_import_time.py
+"""Cold-start import-time regression check for app.py.
+
+Runs ``python -X importtime -c "import app"`` in fresh interpreters and
+reports the median cumulative import time plus the slowest top-level
+dependencies. Exits non-zero when a deferred dependency (pandas, numpy,
+SQLAlchemy, ...) is imported eagerly again, or when the median exceeds the
+budget::
+
+    python benchmarks/bench_import_time.py --runs 5 --budget-ms 900
+"""
+from __future__ import annotations
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that must only be imported on first use, never by `import app`.
+DEFERRED = ("pandas", "numpy", "sqlalchemy", "pyarrow", "openai", "google.generativeai")
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def run_once(module: str) -> Dict[str, Tuple[int, int, int]]:
+    """Return {module: (self_us, cumulative_us, depth)} for one cold import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    out = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            depth = (len(m.group(3)) - 1) // 2
+            out[m.group(4)] = (int(m.group(1)), int(m.group(2)), depth)
+    return out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="import-time regression benchmark")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if the median cumulative import time exceeds this")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    runs: List[Dict[str, Tuple[int, int, int]]] = [run_once(args.module) for _ in range(args.runs)]
+    totals = [r[args.module][1] / 1000 for r in runs]
+    median = statistics.median(totals)
+
+    last = runs[-1]
+    top_level = sorted(
+        ((name, cum) for name, (_, cum, depth) in last.items() if depth == 1),
+        key=lambda kv: kv[1], reverse=True,
+    )[: args.top]
+
+    print(f"import {args.module}: median {median:.1f} ms "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}, runs {args.runs})")
+    for name, cum in top_level:
+        print(f"  {cum / 1000:9.1f} ms  {name}")
+
+    failed = False
+    eager = [m for m in DEFERRED if m in last]
+    if eager:
+        print("FAIL: imported eagerly: " + ", ".join(eager))
+        failed = True
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"FAIL: median {median:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
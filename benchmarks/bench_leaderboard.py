@@ -0,0 +1,125 @@
+# benchmarks/bench_leaderboard.py
+"""Leaderboard reads and writes at 100k users.
+
+The ``all`` board and one weekly challenge board are seeded with random
+scores straight into the table. Timed:
+
+* building the in-memory rank index from the table (first use per board);
+* "my rank" from the rank index vs ``COUNT(*) WHERE score > ?`` in SQLite;
+* top-10 from the (board, score, user_id) index, first page and a page halfway
+  down (keyset pagination);
+* one completed set through ``storage``, which moves the user's score on
+  both boards (streak, badge and leaderboard handlers included).
+
+Scores kept from events are checked against ``history_points`` and ranks
+against a sort of all scores::
+
+    python benchmarks/bench_leaderboard.py --users 100000 --repeat 200
+"""
+from __future__ import annotations
+import argparse
+import bisect
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+import leaderboard  # noqa: E402
+
+CHALLENGE = "3 workouts"
+
+
+def timed(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Leaderboard benchmark")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+    weekly = leaderboard.board_key(CHALLENGE)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "bench.db")
+        storage.init_storage()
+        rows = []
+        for n in range(args.users):
+            user = f"user{n:06d}"
+            rows.append(dict(board=leaderboard.ALL, user_id=user, name=user,
+                             score=int(rng.lognormvariate(6.5, 1.0)), last_day="2000-01-01"))
+            if n % 5 == 0:
+                rows.append(dict(board=weekly, user_id=user, name=user, score=rng.randrange(0, 800),
+                                 last_day="2000-01-01"))
+        with storage.engine.begin() as conn:
+            conn.execute(storage.leaderboard.insert(), rows)
+        print(f"{args.users} users on '{leaderboard.ALL}', {len(rows) - args.users} on '{weekly}'")
+
+        t0 = time.perf_counter()
+        leaderboard._index(leaderboard.ALL)
+        build = (time.perf_counter() - t0) * 1000
+
+        scores = sorted(r["score"] for r in rows if r["board"] == leaderboard.ALL)
+        sample = rng.sample(range(args.users), 50)
+        for n in sample:
+            user = f"user{n:06d}"
+            mine = leaderboard.rank(leaderboard.ALL, user)
+            assert mine["rank"] == len(scores) - bisect.bisect_right(scores, mine["score"]) + 1, mine
+        print(f"rank index matches a full sort for {len(sample)} sampled users")
+
+        from sqlalchemy import func, select, and_
+        users = [f"user{n:06d}" for n in sample]
+
+        def sql_rank():
+            user = rng.choice(users)
+            with storage.engine.begin() as conn:
+                score = conn.execute(select(storage.leaderboard.c.score).where(and_(
+                    storage.leaderboard.c.board == leaderboard.ALL, storage.leaderboard.c.user_id == user))).scalar()
+                conn.execute(select(func.count()).where(and_(
+                    storage.leaderboard.c.board == leaderboard.ALL, storage.leaderboard.c.score > score))).scalar()
+
+        # A new user: checks in, joins this week's board, then logs sets as events
+        user = "bench"
+        start = date.today() - timedelta(days=3)
+        for d in range(4):
+            day = (start + timedelta(days=d)).isoformat()
+            storage.save_daily_log(user, day, 70.0, 2.5, 1800, 400, 0, 0, 5, "", "", "")
+        leaderboard.join(user, "Bench", CHALLENGE)
+
+        def log_set():
+            storage.save_workout_set(user, date.today().isoformat(), "1", "Hip Thrust", 1, 10, 95.0, True)
+
+        print(f"{'case':<30}{'ms':>10}")
+        print(f"{'build rank index (first use)':<30}{build:>10.1f}")
+        print(f"{'my rank: rank index':<30}"
+              f"{timed(lambda: leaderboard.rank(leaderboard.ALL, rng.choice(users)), args.repeat):>10.4f}")
+        print(f"{'my rank: sql count':<30}{timed(sql_rank, max(1, args.repeat // 10)):>10.3f}")
+        print(f"{'top 10':<30}{timed(lambda: leaderboard.top(leaderboard.ALL, 10), args.repeat):>10.3f}")
+        middle = storage.get_board_top(leaderboard.ALL, 1, (scores[len(scores) // 2], "~"))[0]
+        print(f"{'top 10 halfway down':<30}"
+              f"{timed(lambda: leaderboard.top(leaderboard.ALL, 10, middle), args.repeat):>10.3f}")
+        print(f"{'top 10 weekly':<30}{timed(lambda: leaderboard.top(weekly, 10), args.repeat):>10.3f}")
+        print(f"{'event: completed set':<30}{timed(log_set, args.repeat):>10.3f}")
+
+        expected, _ = leaderboard.history_points(user, (leaderboard.ALL, weekly))
+        stored = {r["board"]: r["score"] for r in storage.get_leaderboard_rows(user)}
+        assert stored == expected, (stored, expected)
+        index = leaderboard._index(weekly)
+        assert leaderboard.rank(weekly, user)["rank"] == index.rank(stored[weekly])
+        print(f"event-maintained scores match history: {stored}")
+        storage.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
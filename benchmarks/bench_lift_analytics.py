@@ -0,0 +1,147 @@
+# benchmarks/bench_lift_analytics.py
+"""Progressive-overload analytics (``lift_analytics``) over years of sets.
+
+Synthetic users train three to four days a week for ``--years``, three
+exercises a session and three sets each, with loads that creep up with
+noise. Reported:
+
+* ``lift_analytics.compute`` over every user's sets in one pass (the batch
+  recompute), against computing one user at a time;
+* ``lift_analytics.record`` for one new set (the incremental path the
+  ``workout_set`` event takes) and ``summary`` from the kept state;
+* reading and scanning a user's whole set history from storage, which is
+  what answering "how are my hip thrusts going?" costs without the engine;
+* ``recompute_all`` end to end from storage for ``--db-users`` users.
+
+Sampled users must get the same state from the batch and from replaying
+their sets one at a time::
+
+    python benchmarks/bench_lift_analytics.py --users 2000 --years 3
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lift_analytics  # noqa: E402
+import storage  # noqa: E402
+
+EXERCISES = [("hip_thrust", "Hip Thrust"), ("rdls_romanian_deadlifts", "RDLs (Romanian Deadlifts)"),
+             ("kickbacks", "Kickbacks"), ("leg_press", "Leg Press"),
+             ("bulgarian_split_squats", "Bulgarian Split Squats"),
+             ("lat_pulldown_wide_grip", "Lat Pulldown Wide Grip"), ("overhead_press", "Overhead Press"),
+             ("plank", "Plank")]
+
+
+def population(users: int, days: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Completed sets (user_id, date, exercise_id, exercise_name, reps, weight) in logging order."""
+    trained = rng.random((users, days)) < 0.5
+    user, day = np.nonzero(trained)
+    picks = np.argsort(rng.random((len(user), len(EXERCISES))), axis=1)[:, :3]
+    user, day, exercise = np.repeat(user, 9), np.repeat(day, 9), np.repeat(picks, 3, axis=1).ravel()
+    start = rng.uniform(40, 120, (users, len(EXERCISES)))
+    gain = rng.uniform(0.0, 0.08, (users, len(EXERCISES)))  # lb per day
+    weight = np.round((start[user, exercise] + gain[user, exercise] * day + rng.normal(0, 4, len(day))) / 2.5) * 2.5
+    weight[exercise == len(EXERCISES) - 1] = 0.0
+    reps = rng.integers(6, 15, len(day))
+    ids, names = np.array([e[0] for e in EXERCISES]), np.array([e[1] for e in EXERCISES])
+    dates = (np.datetime64("2023-01-01") + day.astype("timedelta64[D]")).astype(str)
+    return pd.DataFrame({"user_id": np.char.add("user", user.astype(str)), "date": dates,
+                         "exercise_id": ids[exercise], "exercise_name": names[exercise], "reps": reps,
+                         "weight": weight})
+
+
+def replay(frame: pd.DataFrame) -> dict:
+    state = lift_analytics._empty()
+    for row in frame.itertuples(index=False):
+        lift_analytics._apply(state, row.date, row.exercise_id, row.exercise_name, int(row.reps), float(row.weight))
+    return state
+
+
+def same(a: dict, b: dict) -> bool:
+    return json.dumps(a, sort_keys=True, default=float) == json.dumps(b, sort_keys=True, default=float)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Lift analytics benchmark")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--single", type=int, default=50, help="users timed one at a time")
+    parser.add_argument("--db-users", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+
+    sets = population(args.users, int(args.years * 365), rng)
+    print(f"{args.users:,} users x {args.years:g} years: {len(sets):,} sets")
+
+    t0 = time.perf_counter()
+    states = lift_analytics.compute(sets)
+    batch = time.perf_counter() - t0
+
+    by_user = dict(tuple(sets.groupby("user_id", sort=False)))
+    sample = rng.choice(sorted(by_user), min(args.single, args.users), replace=False)
+    t0 = time.perf_counter()
+    for user_id in sample:
+        lift_analytics.compute(by_user[user_id])
+    single = (time.perf_counter() - t0) / len(sample)
+    for user_id in sample[:10]:
+        assert same(states[user_id], replay(by_user[user_id])), user_id
+    print(f"batch state matches a set-by-set replay for {min(len(sample), 10)} sampled users")
+    print(f"{'full recompute, batch (compute)':<40}{batch:>10.2f} s  ({batch * 1e9 / len(sets):.0f} ns per set)")
+    print(f"{'full recompute, one user at a time':<40}{single * args.users:>10.2f} s  (extrapolated, "
+          f"{single * args.users / batch:.1f}x)")
+
+    user_id = str(sample[0])
+    lift_analytics._states[user_id] = states[user_id]
+    last = np.datetime64(states[user_id]["last_date"])
+    t0 = time.perf_counter()
+    for n in range(args.repeat):
+        lift_analytics.record(user_id, str(last + n // 9 + 1), "hip_thrust", "Hip Thrust", 8, 100.0 + n % 9)
+    record = (time.perf_counter() - t0) / args.repeat
+    t0 = time.perf_counter()
+    for _ in range(args.repeat // 10):
+        lift_analytics.summary(user_id, str(last + args.repeat // 9 + 1))
+    summary = (time.perf_counter() - t0) / (args.repeat // 10)
+    print(f"{'record one set':<40}{record * 1e6:>10.1f} us")
+    print(f"{'summary from kept state':<40}{summary * 1e6:>10.1f} us")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "lifts.db")
+        storage.init_storage()
+        users = sorted(by_user)[:args.db_users]
+        rows = pd.concat([by_user[u] for u in users]).assign(logged_at="", set_num=1, completed=1)
+        with storage.engine.begin() as conn:
+            conn.execute(storage.workout_sets.insert(), rows.to_dict("records"))
+
+        t0 = time.perf_counter()
+        history = storage.get_workout_sets(users[0], "0000-01-01", "9999-12-31")
+        best = {}
+        for s in history:
+            est = float(lift_analytics.e1rm(s["reps"], s["weight"]))
+            best[s["exercise_name"]] = max(best.get(s["exercise_name"], 0.0), est)
+        scan = time.perf_counter() - t0
+        print(f"{'rescan one user history from storage':<40}{scan * 1e3:>10.1f} ms  ({len(history):,} sets)")
+
+        t0 = time.perf_counter()
+        frame = lift_analytics.recompute_all()
+        elapsed = time.perf_counter() - t0
+        assert same(lift_analytics.get(users[0]), states[users[0]])
+        print(f"{'recompute_all, ' + f'{len(users)} users from storage':<40}{elapsed:>10.2f} s  "
+              f"({len(rows):,} sets, {int((frame['since_pr'] >= lift_analytics.STALL_SESSIONS).sum())} "
+              "stalled lifts)")
+        storage.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
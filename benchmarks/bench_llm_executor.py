@@ -0,0 +1,112 @@
+# benchmarks/bench_llm_executor.py
+"""Coach Jo calls under overload: direct vs ``llm_executor``.
+
+Two ``llm_standin`` servers play the providers. The primary is degraded: a
+share of requests fail with HTTP 500 and another share stall before the
+first token. The secondary is healthy but a little slower. ``--clients``
+threads each send ``--requests`` messages back to back, well above the
+executor's in-flight limit.
+
+"direct" calls the primary with no deadline, retry or limit, as
+``ask_coach_llm`` used to. "executor" uses ``llm_executor.stream`` with both
+routes, so it gets deadlines, jittered retries, hedging and the semaphore.
+"server peak" counts requests the stand-ins are still working on, including
+ones the client already abandoned; the executor's own ``peak_in_flight``
+never exceeds the limit::
+
+    python benchmarks/bench_llm_executor.py --clients 48 --requests 4 --max-in-flight 16
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm  # noqa: E402
+import llm_executor  # noqa: E402
+from llm_standin import StandinServer  # noqa: E402
+
+PROMPT = [{"role": "user", "content": "How should I progress hip thrusts?"}]
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else float("nan")
+
+
+def load(call, clients: int, requests: int):
+    latencies, errors = [], {}
+    lock = threading.Lock()
+
+    def client():
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            try:
+                call()
+                with lock:
+                    latencies.append(time.perf_counter() - t0)
+            except Exception as e:
+                with lock:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors, time.perf_counter() - t0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="LLM executor overload test")
+    parser.add_argument("--clients", type=int, default=48)
+    parser.add_argument("--requests", type=int, default=4)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--deadline-s", type=float, default=6.0)
+    parser.add_argument("--hedge-after-ms", type=float, default=400)
+    parser.add_argument("--error-rate", type=float, default=0.15)
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    parser.add_argument("--slow-ms", type=float, default=8000)
+    args = parser.parse_args(argv)
+
+    llm_executor.MAX_IN_FLIGHT = args.max_in_flight
+    llm_executor.HEDGE_AFTER_S = args.hedge_after_ms / 1000
+    primary = StandinServer(ttft_ms=120, token_ms=1, error_rate=args.error_rate,
+                            slow_rate=args.slow_rate, slow_ms=args.slow_ms, seed=1).start()
+    secondary = StandinServer(ttft_ms=200, token_ms=1, seed=2).start()
+    routes = [llm_executor.Route("openai", "standin", primary.base_url),
+              llm_executor.Route("openai", "standin", secondary.base_url)]
+
+    modes = (
+        ("direct", lambda: llm.complete(PROMPT, *routes[0])),
+        ("executor", lambda: llm_executor.complete(PROMPT, routes, args.deadline_s)),
+    )
+    try:
+        llm.complete(PROMPT, *routes[1])  # import the SDK and open a connection first
+        print(f"{args.clients} clients x {args.requests} requests; primary: {args.error_rate:.0%} HTTP 500, "
+              f"{args.slow_rate:.0%} stall {args.slow_ms:g} ms; executor limit {args.max_in_flight}, "
+              f"deadline {args.deadline_s:g} s, hedge after {args.hedge_after_ms:g} ms")
+        print(f"{'mode':<10}{'ok':>5}{'failed':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+              f"{'server peak':>13}{'wall s':>8}  errors")
+        for label, call in modes:
+            for server in (primary, secondary):
+                server.max_in_flight = 0
+            latencies, errors, wall = load(call, args.clients, args.requests)
+            upstream = primary.max_in_flight + secondary.max_in_flight
+            print(f"{label:<10}{len(latencies):>5}{sum(errors.values()):>8}"
+                  f"{percentile(latencies, .50) * 1000:>9.0f}{percentile(latencies, .95) * 1000:>9.0f}"
+                  f"{percentile(latencies, .99) * 1000:>9.0f}{upstream:>13}{wall:>8.1f}  {errors or '-'}")
+        print("executor counters:", llm_executor.stats())
+    finally:
+        llm.reset_clients()
+        primary.stop()
+        secondary.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# benchmarks/bench_llm_pool.py
+"""Sequential Coach Jo messages: new client per message vs pooled client.
+
+Starts ``llm_standin.StandinServer`` on localhost with a per-connection
+handshake delay (standing in for TLS setup) and sends ``--messages``
+streamed requests through ``llm.stream_chat`` one after another. The
+"per message" run calls ``llm.reset_clients()`` before every request, which
+is what building ``OpenAI(api_key=...)`` inside each call used to do::
+
+    python benchmarks/bench_llm_pool.py --messages 20 --handshake-ms 80
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm  # noqa: E402
+from llm_standin import StandinServer  # noqa: E402
+
+PROMPT = [{"role": "user", "content": "Alternative to Bulgarian split squats?"}]
+
+
+def run(server: StandinServer, messages: int, pooled: bool):
+    llm.reset_clients()
+    server.connections = 0
+    first, total = [], []
+    for _ in range(messages):
+        if not pooled:
+            llm.reset_clients()
+        t0 = time.perf_counter()
+        ttft = None
+        for _chunk in llm.stream_chat(PROMPT, "openai", "standin-key"):
+            if ttft is None:
+                ttft = time.perf_counter() - t0
+        first.append(ttft)
+        total.append(time.perf_counter() - t0)
+    return first, total, server.connections
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="LLM client pooling benchmark")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--handshake-ms", type=float, default=80)
+    parser.add_argument("--ttft-ms", type=float, default=50)
+    parser.add_argument("--token-ms", type=float, default=0)
+    args = parser.parse_args(argv)
+
+    server = StandinServer(ttft_ms=args.ttft_ms, token_ms=args.token_ms,
+                           handshake_ms=args.handshake_ms).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    try:
+        print(f"{args.messages} sequential messages, handshake {args.handshake_ms:g} ms, "
+              f"server TTFT {args.ttft_ms:g} ms")
+        print(f"{'client':<14}{'p50 ttft ms':>12}{'p50 total ms':>14}{'sum s':>8}{'connections':>13}")
+        for label, pooled in (("per message", False), ("pooled", True)):
+            first, total, conns = run(server, args.messages, pooled)
+            print(f"{label:<14}{statistics.median(first) * 1000:>12.1f}"
+                  f"{statistics.median(total) * 1000:>14.1f}{sum(total):>8.2f}{conns:>13}")
+    finally:
+        llm.reset_clients()
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
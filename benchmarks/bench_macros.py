@@ -0,0 +1,134 @@
+# benchmarks/bench_macros.py
+"""Calorie/macro targets for many users and what-if grids.
+
+``--users`` profiles (half with a macro split in settings) are inserted in
+bulk. Timed:
+
+* ``macros.for_users`` (one query per table plus one vectorized pass) and
+  ``macros.compute`` alone, against the per-user Python arithmetic the Macro
+  Calculator used to run inline;
+* a what-if grid of ``--grid`` scenarios (weights x activity levels x
+  calorie adjustments) in one ``what_if`` call;
+* ``macros.for_user`` when memoized vs after a profile edit.
+
+A sample of users must get the same targets from the batch and the
+single-user paths::
+
+    python benchmarks/bench_macros.py --users 100000
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import macros  # noqa: E402
+import storage  # noqa: E402
+
+ACTIVITIES = ["sedentary", "light", "moderate", "Very Active", "Extra Active"]
+
+
+def inline(profile, split):
+    """The pre-engine arithmetic, one user at a time (for timing only)."""
+    mult = macros.multiplier(profile["activity_level"])
+    offset = 5 if profile["sex"] == "M" else -161
+    bmr = 10 * profile["start_weight_kg"] + 6.25 * profile["height_cm"] - 5 * profile["age"] + offset
+    calories = bmr * mult + macros.profile_adjustment(profile)
+    protein, carbs, fat = macros.parse_split(split)
+    if protein is not None:
+        return calories, calories * protein / 4, calories * carbs / 4, calories * fat / 9
+    protein = profile["start_weight_kg"] / macros.LB_TO_KG * 0.8
+    fat = calories * 0.25 / 9
+    return calories, protein, (calories - protein * 4 - fat * 9) / 4, fat
+
+
+def timed(fn, repeat: int = 1) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Macro engine benchmark")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--grid", type=int, default=1_000_000, help="what-if scenarios (about)")
+    parser.add_argument("--check", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "macros.db")
+        storage.init_storage()
+        profiles = [dict(user_id=f"user{n:06d}", age=rng.randint(18, 70), sex=rng.choice("FFFM"),
+                         height_cm=rng.uniform(150, 190), start_weight_kg=rng.uniform(50, 120),
+                         activity_level=rng.choice(ACTIVITIES), weekly_pace_lb=rng.choice([0.25, 0.5, 1.0]),
+                         goal_weight_kg=rng.uniform(50, 120), goal_date="2027-06-01") for n in range(args.users)]
+        splits = {p["user_id"]: {"protein": f"{rng.choice([25, 30, 35])}%", "carbs": "40%", "fat": "30%"}
+                  for p in profiles[::2]}
+        with storage.engine.begin() as conn:
+            conn.execute(storage.profiles.insert(), profiles)
+            conn.execute(storage.settings.insert(), [
+                dict(user_id=u, macro_split_json=json.dumps(s)) for u, s in splits.items()])
+
+        batch = macros.for_users()
+        by_user = batch.set_index("user_id")
+        for p in rng.sample(profiles, args.check):
+            one = macros.from_profile(p, splits.get(p["user_id"]))
+            row = by_user.loc[p["user_id"]]
+            assert all(np.isclose(one[k], row[k]) for k in one), p["user_id"]
+            assert np.isclose(inline(p, splits.get(p["user_id"]))[0], one["calories"])
+        print(f"{args.users} users; batch and single-user targets agree for {args.check} sampled users")
+
+        weights = np.array([p["start_weight_kg"] for p in profiles])
+        heights = np.array([p["height_cm"] for p in profiles])
+        ages = np.array([p["age"] for p in profiles], dtype=float)
+        offsets = np.array([macros.sex_offset(p["sex"]) for p in profiles])
+        mults = np.array([macros.multiplier(p["activity_level"]) for p in profiles])
+        adjust = np.array([macros.profile_adjustment(p) for p in profiles])
+
+        side = max(2, round((args.grid / 5) ** 0.5))
+        stats = {"weight_kg": 70, "height_cm": 165, "age": 34, "sex_offset": -161}
+        axes = dict(weight_kg=np.linspace(45, 130, side),
+                    activity_multiplier=sorted(set(macros.ACTIVITY_MULTIPLIERS.values())),
+                    adjust_kcal=np.linspace(-750, 750, side))
+        grid = [None]
+
+        def scenarios():
+            grid[0] = macros.what_if(stats, **axes)
+
+        print(f"{'case':<40}{'ms':>10}")
+        print(f"{'for_users (read + compute)':<40}{timed(macros.for_users):>10.1f}")
+        print(f"{'compute, arrays only':<40}"
+              f"{timed(lambda: macros.compute(weights, heights, ages, offsets, mults, adjust)):>10.1f}")
+        print(f"{'per-user Python loop':<40}"
+              f"{timed(lambda: [inline(p, splits.get(p['user_id'])) for p in profiles]):>10.1f}")
+        print(f"{'what_if grid':<40}{timed(scenarios):>10.1f}  ({len(grid[0]):,} scenarios)")
+
+        user = profiles[0]["user_id"]
+        macros.for_user(user)
+        hit = timed(lambda: macros.for_user(user), args.repeat)
+
+        def edited():
+            macros.forget(user)  # what a profile/settings event does
+            macros.targets.cache_clear()
+            macros.for_user(user)
+
+        miss = timed(edited, max(1, args.repeat // 10))
+        print(f"{'for_user, memoized':<40}{hit:>10.4f}")
+        print(f"{'for_user, after an edit':<40}{miss:>10.4f}")
+        storage.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
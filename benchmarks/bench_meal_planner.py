@@ -0,0 +1,88 @@
+# benchmarks/bench_meal_planner.py
+"""Weekly meal plans from ``meal_planner``.
+
+Reported:
+
+* time to plan one week per diet across a grid of calorie and protein
+  targets, with the median (over targets) of the week's worst daily
+  calorie miss and protein shortfall;
+* distinct recipes per week (variety);
+* ``plan_many`` for ``--users`` users with random targets and diets,
+  against planning the same targets one ``plan_week`` call at a time.
+
+Every planned meal must fit the diet and each day's totals must be the
+sum of its meals::
+
+    python benchmarks/bench_meal_planner.py --users 10000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import meal_planner  # noqa: E402
+
+RECIPES = {r.name: r for r in meal_planner.RECIPES}
+
+
+def check(week, diet: str):
+    level = meal_planner.DIETS.index(diet)
+    for day in week:
+        for meal in day["meals"]:
+            assert meal_planner.DIETS.index(RECIPES[meal["name"]].diet) <= level, (diet, meal["name"])
+        assert abs(sum(m["kcal"] for m in day["meals"]) - day["kcal"]) < 1.0, day
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Meal planner benchmark")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--single", type=int, default=100, help="targets timed one at a time")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{len(meal_planner.RECIPES)} recipes, {len(meal_planner._candidates().recipe)} candidate portions")
+    print(f"{'diet':<13}{'weeks':>6}{'ms/week p50':>13}{'max':>8}{'kcal miss':>11}{'prot short':>12}"
+          f"{'recipes/wk':>12}")
+    for diet in meal_planner.DIETS:
+        times, misses, shorts, variety = [], [], [], []
+        for calories in range(1400, 3001, 200):
+            for protein_g in (80, 110, 140, 170):
+                t0 = time.perf_counter()
+                week = meal_planner.plan_week(calories, protein_g, diet)
+                times.append((time.perf_counter() - t0) * 1000)
+                check(week, diet)
+                misses.append(max(abs(d["kcal"] - calories) / calories for d in week))
+                shorts.append(max(max(0.0, protein_g - d["protein_g"]) / protein_g for d in week))
+                variety.append(len({m["name"] for d in week for m in d["meals"]}))
+        print(f"{diet:<13}{len(times):>6}{np.median(times):>13.1f}{max(times):>8.1f}"
+              f"{np.median(misses):>10.1%}{np.median(shorts):>11.1%}{np.median(variety):>12.0f}")
+
+    requests = [(f"user{n}", float(c), float(p), str(d)) for n, (c, p, d) in enumerate(zip(
+        rng.normal(2100, 350, args.users).clip(1300, 3200), rng.normal(130, 30, args.users).clip(60, 220),
+        rng.choice(meal_planner.DIETS, args.users, p=[0.15, 0.2, 0.65])))]
+    distinct = {(d, round(c / meal_planner.ROUND_KCAL), round(p / meal_planner.ROUND_PROTEIN))
+                for _, c, p, d in requests}
+    t0 = time.perf_counter()
+    plans = meal_planner.plan_many(requests)
+    elapsed = time.perf_counter() - t0
+    print(f"plan_many {args.users:,} users: {elapsed:.2f} s for {len(distinct):,} distinct targets "
+          f"({elapsed * 1000 / len(distinct):.1f} ms each, {elapsed * 1e6 / args.users:.0f} us per user)")
+    t0 = time.perf_counter()
+    for _, c, p, d in requests[:args.single]:
+        meal_planner.plan_week(c, p, d)
+    single = (time.perf_counter() - t0) / args.single
+    print(f"plan_week one user at a time: {single * 1000:.1f} ms each, "
+          f"{single * len(distinct) / elapsed:.1f}x the batch cost for the same targets")
+    for user_id, _, _, diet in requests[:200]:
+        check(plans[user_id], diet)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# benchmarks/bench_page_render.py
+"""Server-side render time per page.
+
+Two measurements per page:
+
+* script: the full script through Streamlit's AppTest, one cold run and then
+  ``--reruns`` reruns of the same session (includes AppTest's own overhead);
+* function: the page's ``render_*`` function called directly with Streamlit
+  in bare mode, which isolates the page body.
+
+Use ``--app`` to compare revisions (see bench_rerun_bytes.py)::
+
+    python benchmarks/bench_page_render.py --pages meal_plans workout_overview
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RENDER_FUNCTIONS = {
+    "home": "render_homepage",
+    "workout_overview": "render_workout_overview",
+    "workout_tracker": "render_workout_tracker",
+    "meal_plans": "render_meal_plans",
+    "weight_tracker": "render_weight_tracker",
+    "coach_jo": "render_coach_jo_tab",
+    "streaks": "render_streaks_tab",
+    "community": "render_community_tab",
+    "devices": "render_devices_tab",
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="page render benchmark")
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--pages", nargs="*", default=["meal_plans", "workout_overview", "home"])
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    app_path = os.path.abspath(args.app)
+    os.chdir(os.path.dirname(app_path))
+    sys.path.insert(0, os.path.dirname(app_path))
+    from streamlit.testing.v1 import AppTest
+
+    print(f"{'page':<18}{'cold ms':>10}{'median ms':>11}{'p95 ms':>9}")
+    for page in args.pages:
+        at = AppTest.from_file(app_path, default_timeout=60)
+        at.session_state["page"] = page
+        t0 = time.perf_counter()
+        at.run()
+        cold = (time.perf_counter() - t0) * 1000
+        samples = []
+        for _ in range(args.reruns):
+            t0 = time.perf_counter()
+            at.run()
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{page:<18}{cold:>10.1f}{statistics.median(samples):>11.1f}{p95:>9.1f}")
+
+    import app
+    print(f"\n{'function':<26}{'median ms':>11}{'p95 ms':>9}")
+    for page in args.pages:
+        fn = getattr(app, RENDER_FUNCTIONS[page])
+        fn()
+        samples = []
+        for _ in range(args.calls):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{fn.__name__:<26}{statistics.median(samples):>11.2f}{p95:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
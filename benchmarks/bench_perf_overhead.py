@@ -0,0 +1,62 @@
+# benchmarks/bench_perf_overhead.py
+"""Per-call cost of ``perf.traced`` with tracing off and on.
+
+With tracing off the decorator returns the function itself, so the "off"
+column should match the bare call. The "on" column is the price of one span
+(two clock reads, the span stack and the percentile window)::
+
+    python benchmarks/bench_perf_overhead.py --calls 200000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import perf  # noqa: E402
+
+
+def work(x):
+    return x + 1
+
+
+def per_call_ns(fn, calls: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - t0) / calls * 1e9
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="perf.traced overhead benchmark")
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    perf.LOG_PATH = os.path.join(tempfile.mkdtemp(prefix="perf-bench-"), "perf.log")
+    perf.ENABLED = False
+    off = perf.traced(work)
+    perf.ENABLED = True
+    on = perf.traced(work)
+    root = perf.traced(lambda calls: [on(i) for i in range(calls)], name="rerun", root=True)
+
+    per_call_ns(work, args.calls)  # warm the interpreter
+    bare_ns = per_call_ns(work, args.calls)
+    off_ns = per_call_ns(off, args.calls)
+    on_ns = per_call_ns(on, args.calls)
+    t0 = time.perf_counter()
+    root(args.calls)
+    rerun_ns = (time.perf_counter() - t0) / args.calls * 1e9
+
+    print(f"{args.calls} calls; decorator returns the original when off: {off is work}")
+    print(f"{'bare':<22}{bare_ns:>10.1f} ns/call")
+    print(f"{'traced, off':<22}{off_ns:>10.1f} ns/call")
+    print(f"{'traced, on':<22}{on_ns:>10.1f} ns/call")
+    print(f"{'traced, on, in rerun':<22}{rerun_ns:>10.1f} ns/call")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
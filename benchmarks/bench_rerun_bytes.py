@@ -0,0 +1,85 @@
+# benchmarks/bench_rerun_bytes.py
+"""Bytes sent over the websocket per rerun, by page.
+
+Runs the app headless with Streamlit's AppTest and sums the serialized size of
+every ForwardMsg the script enqueues. "css" counts the messages that carry
+stylesheets (inline ``<style>`` blocks or the theme loader). Point ``--app`` at
+another checkout to compare revisions, e.g.::
+
+    git worktree add /tmp/before <rev>
+    python benchmarks/bench_rerun_bytes.py --app /tmp/before/app.py
+    python benchmarks/bench_rerun_bytes.py
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["home", "workout_overview", "workout_tracker", "meal_plans", "weight_tracker",
+         "coach_jo", "streaks", "community", "devices"]
+
+_CSS_MARKERS = (b"<style", b"data-hg")
+
+
+class _Counter:
+    def __init__(self):
+        self.total = 0
+        self.css = 0
+
+    def add(self, msg):
+        data = msg.SerializeToString()
+        self.total += len(data)
+        if any(m in data for m in _CSS_MARKERS):
+            self.css += len(data)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="websocket bytes per rerun")
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--pages", nargs="*", default=PAGES)
+    parser.add_argument("--reruns", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    app_path = os.path.abspath(args.app)
+    os.chdir(os.path.dirname(app_path))
+    sys.path.insert(0, os.path.dirname(app_path))
+
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    from streamlit.testing.v1 import AppTest
+
+    counter = _Counter()
+    original = ForwardMsgQueue.enqueue
+
+    def enqueue(self, msg):
+        counter.add(msg)
+        return original(self, msg)
+
+    ForwardMsgQueue.enqueue = enqueue
+
+    print(f"{'page':<18}{'first run':>12}{'rerun avg':>12}{'css/rerun':>12}")
+    sums = [0, 0, 0]
+    for page in args.pages:
+        at = AppTest.from_file(app_path, default_timeout=60)
+        at.session_state["page"] = page
+        counter.__init__()
+        at.run()
+        first = counter.total
+        rerun_total = rerun_css = 0
+        for _ in range(args.reruns):
+            counter.__init__()
+            at.run()
+            rerun_total += counter.total
+            rerun_css += counter.css
+        avg, css = rerun_total / args.reruns, rerun_css / args.reruns
+        sums[0] += first
+        sums[1] += avg
+        sums[2] += css
+        print(f"{page:<18}{first:>12,}{avg:>12,.0f}{css:>12,.0f}")
+    n = len(args.pages)
+    print(f"{'mean':<18}{sums[0] / n:>12,.0f}{sums[1] / n:>12,.0f}{sums[2] / n:>12,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
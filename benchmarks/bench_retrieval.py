@@ -0,0 +1,129 @@
+# benchmarks/bench_retrieval.py
+"""Coach Jo local retrieval: latency and hit rate on a fixture question set.
+
+Builds the index from the app's content (``app.coach_documents``), then runs
+``QUESTIONS`` through ``retrieval.route``. Each fixture pairs a question with
+the document that answers it, or ``None`` when the app has no answer and the
+question must go to the provider. Reported:
+
+* index build time and per-question routing latency;
+* hit@1 / hit@3 over the answerable questions;
+* how many questions are answered directly (no provider call), with snippets
+  or by the provider alone, and how many direct answers were wrong.
+
+::
+
+    python benchmarks/bench_retrieval.py --repeat 200 --show-misses
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+QUESTIONS = [
+    # exercise alternatives
+    ("What can I do instead of hip thrusts at home?", "alternatives:hip_thrust"),
+    ("Low impact alternative to RDLs?", "alternatives:rdls_romanian_deadlifts"),
+    ("What are alternatives to Bulgarian split squats that still hit glutes well?",
+     "alternatives:bulgarian_split_squats"),
+    ("My knees hurt on Bulgarian split squats, what can I swap them for?", "alternatives:bulgarian_split_squats"),
+    ("Substitute for romanian deadlifts without a barbell", "alternatives:rdls_romanian_deadlifts"),
+    ("Hip thrust replacement, I don't have a bench", "alternatives:hip_thrust"),
+    # meal plans
+    ("What's the vegan dinner on Friday?", "meals:vegan:friday"),
+    ("What's the pescatarian lunch on Tuesday?", "meals:pescatarian:tuesday"),
+    ("Omnivore breakfast for Sunday?", "meals:omnivore:sunday"),
+    ("What should I eat on Wednesday if I'm vegan?", "meals:vegan:wednesday"),
+    ("Pescatarian meal plan for Saturday", "meals:pescatarian:saturday"),
+    ("What's for dinner Monday on the omnivore plan?", "meals:omnivore:monday"),
+    # nutrition tips
+    ("What should I eat before a workout?", "tips:pre_workout_30_60_min_before"),
+    ("Best post-workout snack?", "tips:post_workout_within_2_hours"),
+    ("How much water should I drink each day?", "tips:hydration_goals"),
+    ("What supplements should I take?", "tips:supplements_to_consider"),
+    ("How much creatine should I take?", "tips:supplements_to_consider"),
+    ("What is the 80/20 rule?", "tips:80_20_rule"),
+    ("How much protein per pound of body weight?", "tips:key_points_for_success"),
+    ("Should I eat in a caloric surplus to build muscle?", "tips:for_muscle_growth"),
+    ("Do I need electrolytes during intense sessions?", "tips:hydration_goals"),
+    # programmed exercises
+    ("How many sets of hip thrusts should I do?", "exercise:hip_thrust"),
+    ("Sets and reps for kickbacks?", "exercise:kickbacks"),
+    ("How long is the stairmaster workout?", "exercise:stairmaster"),
+    ("How many reps of lateral raises?", "exercise:lateral_raises"),
+    ("Reps for leg press", "exercise:leg_press"),
+    ("How long should I hold the plank?", "exercise:plank"),
+    ("How many sets of face pulls?", "exercise:face_pulls"),
+    ("What day do I do abductors?", "exercise:abductors"),
+    # nothing in the app answers these
+    ("How can I swap a salmon dinner to a vegan dinner with ~40g protein?", None),
+    ("I hit 12 reps on hip thrusts; how should I progress weight and reps?", None),
+    ("Is it bad to train when I'm sick?", None),
+    ("How do I stay motivated after a bad week?", None),
+    ("Can I drink alcohol on the weekend and still lose fat?", None),
+    ("Why am I so sore two days after leg day?", None),
+    ("How do I fix my posture at my desk?", None),
+    ("Is intermittent fasting good for fat loss?", None),
+    ("How much sleep do I need for recovery?", None),
+]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Coach Jo retrieval benchmark")
+    parser.add_argument("--repeat", type=int, default=200, help="timed passes over the question set")
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    import app  # defines the content; main() only runs under streamlit
+    import retrieval
+
+    t0 = time.perf_counter()
+    docs = app.coach_documents()
+    index = retrieval.Index(docs)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    samples = []
+    for _ in range(args.repeat):
+        for question, _ in QUESTIONS:
+            t0 = time.perf_counter()
+            retrieval.route(index, question, record=False)
+            samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+
+    answerable = [(q, want) for q, want in QUESTIONS if want]
+    decisions, wrong_direct, hit1, hit3, misses = Counter(), 0, 0, 0, []
+    for question, want in QUESTIONS:
+        decision, _ = retrieval.route(index, question, record=False)
+        top = [h.doc.id for h in index.search(question, 3)]
+        decisions[decision] += 1
+        if want:
+            hit1 += top[:1] == [want]
+            hit3 += want in top
+        if decision == "direct" and top[0] != want:
+            wrong_direct += 1
+        if (want and top[:1] != [want]) or (decision == "direct" and top[0] != want):
+            misses.append((question, want, decision, top))
+
+    n = len(QUESTIONS)
+    print(f"index: {len(docs)} documents, {len(index.postings)} terms, built in {build_ms:.1f} ms")
+    print(f"route latency over {len(samples)} calls: p50 {samples[len(samples) // 2]:.0f} us, "
+          f"p95 {samples[int(len(samples) * .95)]:.0f} us, p99 {samples[int(len(samples) * .99)]:.0f} us")
+    print(f"answerable questions: {len(answerable)}/{n}; hit@1 {hit1 / len(answerable):.0%}, "
+          f"hit@3 {hit3 / len(answerable):.0%}")
+    print(f"decisions: {decisions['direct']} direct ({decisions['direct'] / n:.0%} of questions skip the provider), "
+          f"{decisions['augment']} with snippets, {decisions['llm']} provider only; "
+          f"{wrong_direct} wrong direct answers")
+    if args.show_misses:
+        for question, want, decision, top in misses:
+            print(f"  miss: {question!r} want {want} got {decision} {top}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
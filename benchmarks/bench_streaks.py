@@ -0,0 +1,128 @@
+# benchmarks/bench_streaks.py
+"""Streak engine on a 5-year synthetic history.
+
+The history has training blocks, missed days and a few vacations; most
+active days have a check-in and some completed sets. Timed:
+
+* "python full": sorted distinct dates and a Python loop, the obvious
+  recompute-on-every-render approach;
+* "numpy full": ``streaks.compute`` over the same dates (backfill path);
+* "advance": the in-memory O(1) update, per new date;
+* storage-backed: ``streaks.recompute`` (SQL union of both logs plus NumPy),
+  ``streaks.get`` on the stored row and ``streaks.record`` for a new date,
+  which writes the row.
+
+The incremental state after replaying every date is checked against the full
+recompute::
+
+    python benchmarks/bench_streaks.py --years 5 --repeat 50
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+import streaks  # noqa: E402
+
+USER = "bench"
+
+
+def history(years: int, seed: int = 3):
+    """(day, has_checkin, completed_sets) per active day, oldest first."""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=int(365.25 * years))
+    days, day = [], start
+    while day < date.today():
+        if rng.random() < 0.01:  # vacation
+            day += timedelta(days=rng.randint(5, 14))
+            continue
+        if rng.random() < 0.8:
+            days.append((day.isoformat(), rng.random() < 0.7, rng.randint(0, 18)))
+        day += timedelta(days=1)
+    return days
+
+
+def python_full(dates):
+    ordered = sorted(set(dates))
+    longest = current = 0
+    previous = None
+    for d in ordered:
+        d = date.fromisoformat(d)
+        current = current + 1 if previous is not None and (d - previous).days == 1 else 1
+        longest = max(longest, current)
+        previous = d
+    return {"current": current, "longest": longest}
+
+
+def timed(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Streak engine benchmark")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    days = history(args.years)
+    dates = [d for d, checkin, sets in days if checkin or sets]
+    print(f"{args.years} years: {len(days)} days with logs, {len(dates)} activity dates")
+
+    full = streaks.compute(dates)
+    state = streaks.empty()
+    for d in dates:
+        state = streaks.advance(state, d)
+    assert state == full, (state, full)
+    assert python_full(dates) == {k: full[k] for k in ("current", "longest")}
+    print(f"streak: current {full['current']}, longest {full['longest']} (incremental matches full recompute)")
+
+    def replay():
+        s = streaks.empty()
+        for d in dates:
+            s = streaks.advance(s, d)
+
+    print(f"{'case':<26}{'ms':>10}")
+    print(f"{'python full':<26}{timed(lambda: python_full(dates), args.repeat):>10.3f}")
+    print(f"{'numpy full':<26}{timed(lambda: streaks.compute(dates), args.repeat):>10.3f}")
+    print(f"{'advance (per date)':<26}{timed(replay, max(1, args.repeat // 10)) / len(dates):>10.4f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "bench.db")
+        storage.init_storage()
+        # Bulk seed without events; the benchmark times the engine, not the seeding
+        with storage.engine.begin() as conn:
+            conn.execute(storage.daily_logs.insert(), [
+                dict(user_id=USER, date=d, weight_kg=70.0, water_l=2.5, cal_in=1800, cal_out=400, net_kcal=1400)
+                for d, checkin, _ in days if checkin])
+            conn.execute(storage.workout_sets.insert(), [
+                dict(user_id=USER, date=d, logged_at=d + "T07:00:00", exercise_id="1", exercise_name="Hip Thrust",
+                     set_num=n + 1, reps=10, weight=95.0, completed=int(n % 6 != 5))
+                for d, _, sets in days for n in range(sets)])
+        stored = streaks.recompute(USER)
+        assert {k: stored[k] for k in full} == full, (stored, full)
+        print(f"{'recompute (sql + numpy)':<26}{timed(lambda: streaks.recompute(USER), args.repeat):>10.3f}")
+        print(f"{'get (stored row)':<26}{timed(lambda: streaks.get(USER), args.repeat):>10.3f}")
+
+        day = [date.today()]
+
+        def record_next():
+            day[0] += timedelta(days=1)
+            streaks.record(USER, day[0].isoformat())
+
+        print(f"{'record (new date)':<26}{timed(record_next, args.repeat):>10.3f}")
+        storage.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# benchmarks/bench_timeseries.py
+"""Minute-resolution wearable data in the ``timeseries`` store.
+
+``--users`` each get ``--days`` of minute heart rate and step counts,
+written one day at a time (as a daily sync would). Reported:
+
+* write time per daily batch (minute file merge plus hour/day roll-ups);
+* bytes per point on disk vs CSV, Parquet with default settings and raw
+  int64/float64 arrays;
+* range queries of a day, week, month and year for a chart ``--width``
+  points wide, cold (files decoded) and warm (cached), against reading the
+  same range at minute resolution.
+
+The hour and day tiers must equal a pandas resample of the raw minutes::
+
+    python benchmarks/bench_timeseries.py --users 3 --days 365
+"""
+from __future__ import annotations
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timeseries  # noqa: E402
+
+RANGES = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+
+def samples(days: int, end: pd.Timestamp, rng: np.random.Generator):
+    ts = pd.date_range(end - pd.Timedelta(days=days), end, freq="min", inclusive="left")
+    hours = ts.hour.to_numpy()
+    awake = (hours >= 7) & (hours < 23)
+    hr = np.round(58 + 14 * awake + rng.normal(0, 4, len(ts)) + 40 * (rng.random(len(ts)) < 0.01))
+    steps = np.where(awake & (rng.random(len(ts)) < 0.3), rng.integers(0, 120, len(ts)), 0)
+    return ts.as_unit("s").asi8, hr, steps.astype(np.float64)
+
+
+def folder_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time-series store benchmark")
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    end = pd.Timestamp.now(tz="UTC").floor("D")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timeseries.ROOT = os.path.join(tmp, "ts")
+        raw = {}
+        writes = []
+        for n in range(args.users):
+            user = f"user{n}"
+            ts, hr, steps = raw[user] = samples(args.days, end, rng)
+            for day in range(args.days):
+                part = slice(day * 1440, (day + 1) * 1440)
+                for metric, values in (("heart_rate", hr), ("steps", steps)):
+                    t0 = time.perf_counter()
+                    timeseries.write(user, metric, ts[part], values[part])
+                    writes.append(time.perf_counter() - t0)
+        points = 2 * args.users * args.days * 1440
+        writes_ms = np.array(writes) * 1000
+        print(f"{args.users} users x {args.days} days, 2 metrics: {points:,} minute points")
+        print(f"daily batch write: p50 {np.percentile(writes_ms, 50):.1f} ms, "
+              f"p95 {np.percentile(writes_ms, 95):.1f} ms, total {writes_ms.sum() / 1000:.1f} s")
+
+        ts, hr, steps = raw["user0"]
+        frame = pd.DataFrame({"ts": ts, "heart_rate": hr.astype(np.int64), "steps": steps.astype(np.int64)})
+        csv = len(frame.to_csv(index=False).encode())
+        plain = io.BytesIO()
+        frame.to_parquet(plain, index=False)
+        store = {tier: sum(folder_bytes(os.path.join(timeseries.ROOT, "user0", m, tier))
+                           for m in ("heart_rate", "steps")) for tier, _ in timeseries.TIERS}
+        per_user = len(frame) * 2
+        print(f"{'bytes per point (user0)':<34}{'B/pt':>8}")
+        for label, size in (("CSV", csv), ("raw int64 ts + float64 value", per_user * 16),
+                            ("Parquet, default settings", plain.tell()),
+                            ("store, minute tier", store["minute"]),
+                            ("store, all tiers", sum(store.values()))):
+            print(f"{label:<34}{size / per_user:>8.2f}")
+
+        for tier, resolution in timeseries.TIERS[1:]:
+            got = timeseries.query("user0", "heart_rate", int(ts[0]), int(ts[-1]) + 60, tier=tier)
+            series = pd.Series(hr, index=pd.to_datetime(ts, unit="s", utc=True))
+            want = series.resample(f"{resolution}s").agg(["mean", "min", "max"]).dropna()
+            assert np.allclose(got["value"], want["mean"]) and np.allclose(got["max"], want["max"]), tier
+        print("hour and day tiers match a pandas resample of the raw minutes")
+
+        print(f"{'range':<8}{'tier':>8}{'points':>8}{'cold ms':>10}{'warm ms':>10}"
+              f"{'minute pts':>12}{'minute ms':>11}")
+        for label, days in RANGES.items():
+            start, stop = end - pd.Timedelta(days=min(days, args.days)), end
+            timeseries._cache.clear()
+            t0 = time.perf_counter()
+            found = timeseries.query("user1" if args.users > 1 else "user0", "heart_rate", start, stop, args.width)
+            cold = (time.perf_counter() - t0) * 1000
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                timeseries.query("user0", "heart_rate", start, stop, args.width)
+            warm = (time.perf_counter() - t0) * 1000 / args.repeat
+            timeseries._cache.clear()
+            t0 = time.perf_counter()
+            minutes = timeseries.query("user0", "heart_rate", start, stop, tier="minute")
+            full = (time.perf_counter() - t0) * 1000
+            print(f"{label:<8}{found.attrs['tier']:>8}{len(found):>8}{cold:>10.2f}{warm:>10.2f}"
+                  f"{len(minutes):>12}{full:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# benchmarks/bench_user_context.py
+"""Cost of building the Coach Jo user-context snapshot.
+
+Seeds a temporary database with a profile, macro split, ``--days`` of daily
+check-ins and ``--sets-per-day`` logged sets, then times:
+
+* "cold": every section rebuilt (what each prompt would cost uncached)
+* "cached": ``user_context.snapshot`` with nothing changed
+* "after set": log a set (the insert is included), so only the training section reloads
+* "after check-in": save a check-in, so only the weight section reloads
+
+::
+
+    python benchmarks/bench_user_context.py --days 365 --sets-per-day 20
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+import user_context  # noqa: E402
+
+USER = "bench"
+EXERCISES = ["Hip Thrust", "Romanian Deadlift", "Bulgarian Split Squat", "Lat Pulldown", "Cable Kickback"]
+
+
+def seed(days: int, sets_per_day: int, today: date):
+    rng = random.Random(7)
+    storage.save_profile(user_id=USER, age=34, sex="F", height_cm=165, start_weight_kg=70,
+                         activity_level="moderate", weekly_pace_lb=0.5, goal_weight_kg=65,
+                         goal_date=(today + timedelta(days=120)).isoformat())
+    storage.save_settings(USER, {"protein": "30%", "carbs": "40%", "fat": "30%"})
+    for i in range(days, 0, -1):
+        day = (today - timedelta(days=i)).isoformat()
+        storage.save_daily_log(USER, day, 70 - i * 0.01 + rng.uniform(-0.3, 0.3), 2.5, 1800, 400,
+                               None, None, 7, "", "", "")
+        for n in range(sets_per_day):
+            storage.save_workout_set(USER, day, str(n % 5), EXERCISES[n % 5], n // 5 + 1,
+                                     rng.randint(6, 12), rng.choice([40, 50, 60, 80]), True)
+
+
+def timed(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="User context snapshot cost")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--sets-per-day", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        storage._DB_PATH = os.path.join(tmp, "bench.db")
+        storage.init_storage()
+        seed(args.days, args.sets_per_day, today)
+        day = today.isoformat()
+
+        def cold():
+            user_context.invalidate(USER)
+            return user_context.snapshot(USER, day)
+
+        def after_set():
+            storage.save_workout_set(USER, day, "0", EXERCISES[0], 1, 10, 60, True)
+            return user_context.snapshot(USER, day)
+
+        def after_checkin():
+            storage.save_daily_log(USER, day, 69.5, 2.5, 1750, 400, None, None, 7, "", "", "")
+            return user_context.snapshot(USER, day)
+
+        print(cold())
+        print(f"\n{args.days} days, {args.sets_per_day} sets/day; mean of {args.repeat} runs")
+        print(f"{'case':<16}{'ms':>9}")
+        for label, fn in (("cold", cold), ("cached", lambda: user_context.snapshot(USER, day)),
+                          ("after set", after_set), ("after check-in", after_checkin)):
+            print(f"{label:<16}{timed(fn, args.repeat):>9.3f}")
+        storage.engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+# challenges.py
+"""Weekly challenge progress from precomputed per-week aggregates.
+
+Every challenge counts the days of an ISO week that met one criterion:
+
+* ``steps``: a device total of ``STEPS_GOAL`` steps or more;
+* ``workout``: at least one completed set;
+* ``core``: a completed set of a core exercise;
+* ``water``: a check-in with ``WATER_GOAL_L`` or more water;
+* ``active``: a check-in or a completed set (a day not skipped).
+
+The ``challenge_weeks`` table holds, per user and week, a bitmask of those
+days for each criterion (bit 0 = Monday) and its popcount. The write events
+``storage`` publishes (``events.py``) set or clear one bit, so an entry
+costs one row update whatever its date (a synced batch of device totals,
+one per week it touches), and repeating or editing an entry stays correct.
+``rebuild`` recomputes whole weeks for every user at once with pandas
+group-bys over the raw logs (first run, repair).
+
+Challenge boards (``board``) read the members of the week's leaderboard
+partition joined with their aggregate row, so rendering never scans anyone's
+logs.
+"""
+from __future__ import annotations
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import events
+import leaderboard
+
+STEPS_GOAL = 8000
+WATER_GOAL_L = 2.0
+CORE_WORDS = ("plank", "crunch", "dead bug", "leg raise", "russian twist", "butterfly kick", "sit-up", "sit up",
+              "hollow", "mountain climber", "bicycle", "core", "ab wheel")
+CRITERIA = ("steps", "workout", "core", "water", "active")
+
+
+class Challenge(NamedTuple):
+    name: str  # as offered in the community tab
+    criterion: str  # one of CRITERIA
+    target: int  # days in the week
+    description: str
+
+
+CHALLENGES: Dict[str, Challenge] = {c.name: c for c in (
+    Challenge("8k steps/day", "steps", 7, f"{STEPS_GOAL:,}+ steps every day"),
+    Challenge("3 workouts", "workout", 3, "Train on 3 days"),
+    Challenge("2 core days", "core", 2, "Core work on 2 days"),
+    Challenge("5L water challenge", "water", 5, f"{WATER_GOAL_L:g} L+ water on 5 days"),
+    Challenge("No skip week", "active", 7, "Check in or train every day"),
+)}
+
+_lock = threading.Lock()
+_cache: Dict[Tuple[str, str], Dict] = {}  # (user, week) -> stored row
+
+
+def is_core(exercise_name: Optional[str]) -> bool:
+    name = (exercise_name or "").lower()
+    return any(word in name for word in CORE_WORDS)
+
+
+def empty(user_id: str, week: str) -> Dict:
+    row = {"user_id": user_id, "week": week}
+    for criterion in CRITERIA:
+        row[f"{criterion}_mask"] = row[f"{criterion}_days"] = 0
+    return row
+
+
+def _row(user_id: str, week: str) -> Dict:
+    import storage
+    key = (user_id, week)
+    row = _cache.get(key)
+    if row is None:
+        row = _cache[key] = storage.get_challenge_week(user_id, week) or empty(user_id, week)
+    return row
+
+
+def _apply(user_id: str, day: str, bits: Dict[str, bool]):
+    """Set (True) or clear (False) ``day``'s bit for each criterion in ``bits`` and store the row."""
+    _apply_days(user_id, {day: bits})
+
+
+def _apply_days(user_id: str, days: Dict[str, Dict[str, bool]]):
+    """``_apply`` for several days at once, storing every changed week in one write."""
+    import storage
+    with _lock:
+        changed = {}
+        for day, bits in days.items():
+            week = leaderboard.week_of(day)
+            bit = 1 << date.fromisoformat(day).weekday()
+            row = changed.get(week) or _row(user_id, week)
+            updated = dict(row)
+            for criterion, on in bits.items():
+                mask = row[f"{criterion}_mask"] | bit if on else row[f"{criterion}_mask"] & ~bit
+                updated[f"{criterion}_mask"] = mask
+                updated[f"{criterion}_days"] = bin(mask).count("1")
+            if updated != row:
+                changed[week] = updated
+        if changed:
+            storage.save_challenge_weeks(list(changed.values()))
+            for week, row in changed.items():
+                _cache[(user_id, week)] = row
+
+
+def _on_daily_log(user_id: str, date: str, water_l: float = 0.0, **_):
+    _apply(user_id, date, {"water": (water_l or 0) >= WATER_GOAL_L, "active": True})
+
+
+def _on_workout_set(user_id: str, date: str, completed: bool = True, exercise_name: str = "", **_):
+    if completed:
+        bits = {"workout": True, "active": True}
+        if is_core(exercise_name):
+            bits["core"] = True
+        _apply(user_id, date, bits)
+
+
+def _on_device_daily(user_id: str, entries: List[Tuple[str, str, float]], **_):
+    days = {day: {"steps": value >= STEPS_GOAL} for day, metric, value in entries if metric == "steps"}
+    if days:
+        _apply_days(user_id, days)
+
+
+def progress(user_id: str, challenge: str, day: Optional[str] = None) -> Dict:
+    """{"days", "target", "done", "mask"} for ``challenge`` in the week of ``day`` (default today)."""
+    import storage
+    storage.init_storage()
+    spec = CHALLENGES[challenge]
+    with _lock:
+        row = _row(user_id, leaderboard.week_of(day))
+    days = row[f"{spec.criterion}_days"]
+    return {"days": days, "target": spec.target, "done": days >= spec.target, "mask": row[f"{spec.criterion}_mask"]}
+
+
+def board(challenge: str, day: Optional[str] = None, k: int = 10) -> List[Dict]:
+    """Top ``k`` members of this week's ``challenge`` board by days met (user_id, name, days, done)."""
+    import storage
+    storage.init_storage()
+    spec = CHALLENGES[challenge]
+    rows = storage.get_challenge_board(leaderboard.board_key(challenge, day), leaderboard.week_of(day),
+                                       f"{spec.criterion}_days", k)
+    for row in rows:
+        row["done"] = row["days"] >= spec.target
+    return rows
+
+
+_EPOCH_MONDAY = "1970-01-05"  # a Monday; converted to datetime64 where numpy is loaded
+
+
+def _weekly_masks(frame, criterion: str):
+    """Per (user_id, monday) bitmask of the weekdays present in ``frame`` (user_id, date columns)."""
+    import numpy as np
+    import pandas as pd
+    days = frame["date"].to_numpy(dtype="datetime64[D]")
+    weekday = (days - np.datetime64(_EPOCH_MONDAY, "D")).astype(np.int64) % 7
+    keyed = pd.DataFrame({
+        "user_id": frame["user_id"].to_numpy(),
+        "monday": days - weekday.astype("timedelta64[D]"),
+        "bit": np.left_shift(1, weekday),
+    }).drop_duplicates()
+    return keyed.groupby(["user_id", "monday"])["bit"].sum().rename(f"{criterion}_mask")
+
+
+def rebuild(weeks: Iterable[str]) -> int:
+    """Recompute ``weeks`` for every user from the raw logs in one pass; returns rows written."""
+    import numpy as np
+    import pandas as pd
+    import storage
+    storage.init_storage()
+    weeks = sorted(set(weeks))
+    if not weeks:
+        return 0
+    start, end = leaderboard.week_range(weeks[0])[0], leaderboard.week_range(weeks[-1])[1]
+
+    logs = pd.DataFrame(storage.get_all_log_series(start, end, ("water_l",)), columns=["user_id", "date", "water_l"])
+    sets = pd.DataFrame(storage.get_all_set_series(start, end, ("exercise_name",)),
+                        columns=["user_id", "date", "exercise_name"])
+    steps = pd.DataFrame(storage.get_device_daily(start, end, "steps"), columns=["user_id", "date", "value"])
+    names = sets["exercise_name"].unique()
+    core = sets[sets["exercise_name"].isin([n for n in names if is_core(n)])]
+
+    masks = pd.concat([
+        _weekly_masks(steps[steps["value"] >= STEPS_GOAL], "steps"),
+        _weekly_masks(sets, "workout"),
+        _weekly_masks(core, "core"),
+        _weekly_masks(logs[logs["water_l"] >= WATER_GOAL_L], "water"),
+        _weekly_masks(pd.concat([logs[["user_id", "date"]], sets[["user_id", "date"]]]), "active"),
+    ], axis=1).fillna(0).astype(np.int64).reset_index()
+    mondays = {m: leaderboard.week_of(str(m)[:10]) for m in masks["monday"].unique()}
+    masks.insert(1, "week", masks.pop("monday").map(mondays))
+    masks = masks[masks["week"].isin(weeks)]
+
+    for criterion in CRITERIA:
+        bits = masks[f"{criterion}_mask"].to_numpy(dtype=np.uint8)  # 7 weekday bits fit a byte
+        masks[f"{criterion}_days"] = np.unpackbits(bits[:, None], axis=1).sum(axis=1)
+    columns = list(masks.columns)
+    rows = [dict(zip(columns, values)) for values in zip(*(masks[c].tolist() for c in columns))]
+    storage.save_challenge_weeks(rows)
+    with _lock:
+        for key in [key for key in _cache if key[1] in weeks]:
+            del _cache[key]
+    return len(rows)
+
+
+def forget(user_id: str):
+    with _lock:
+        for key in [key for key in _cache if key[0] == user_id]:
+            del _cache[key]
+
+
+def reset():
+    """Drop every cached row, e.g. after switching databases."""
+    with _lock:
+        _cache.clear()
+
+
+events.subscribe("daily_log", _on_daily_log)
+events.subscribe("workout_set", _on_workout_set)
+events.subscribe("device_daily", _on_device_daily)
+events.subscribe("user_deleted", lambda user_id, **_: forget(user_id))
@@ -0,0 +1,215 @@
+# chart_data.py
+"""Chart-sized series for long histories.
+
+A line chart cannot show more points than it has pixels, so sending every
+daily log (or every minute of device data) only grows the payload and the
+browser's work. ``downsample`` picks at most about ``points`` indices that
+keep the shape of a series: min/max per bucket narrows a long series to a
+few candidates per pixel, Largest-Triangle-Three-Buckets (LTTB) picks the
+visually significant one per bucket, and the overall minimum and maximum are
+always kept so peaks never disappear at a coarse zoom.
+
+``weight`` and ``waist_hip`` build the weight tracker's charts from the
+stored daily logs for one of ``RANGES`` and ``device`` does the same for a
+``timeseries`` metric, each cached per (user, chart, range, points) until
+the user's next write (``events.py``) or the day or display bucket rolls
+over. ``weight_frame`` and ``waist_hip_frame`` do the same work on a frame
+already in memory (the session's entries when storage is unavailable or behind).
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+import events
+
+if TYPE_CHECKING:
+    import numpy as np
+
+RANGES: Dict[str, Optional[int]] = {"1M": 30, "3M": 91, "6M": 182, "1Y": 365, "All": None}  # days
+POINTS = 500  # about the chart's width in pixels
+MINMAX_RATIO = 4  # min/max candidates per output point before LTTB
+CACHE_ENTRIES = 256
+KG_TO_LB = 2.20462
+
+_lock = threading.Lock()
+_cache: "OrderedDict[Tuple, object]" = OrderedDict()  # (user, chart, range, points, as_of) -> frame
+
+
+def minmax(y: np.ndarray, buckets: int) -> np.ndarray:
+    """Sorted indices of the minimum and maximum of each of ``buckets`` equal runs of ``y``."""
+    import numpy as np
+    size = len(y)
+    width = -(-size // buckets)
+    padded = np.full(buckets * width, np.nan)
+    padded[:size] = y
+    rows = padded.reshape(buckets, width)
+    filled = ~np.isnan(rows).all(axis=1)
+    offsets = np.arange(buckets)[filled] * width
+    rows = rows[filled]
+    found = np.concatenate(([0, size - 1], offsets + np.nanargmin(rows, axis=1), offsets + np.nanargmax(rows, axis=1)))
+    return np.unique(found)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Indices of ``points`` samples chosen by Largest-Triangle-Three-Buckets (first and last kept)."""
+    import numpy as np
+    size = len(x)
+    if points >= size or points < 3:
+        return np.arange(size)
+    edges = np.linspace(1, size - 1, points - 1).astype(np.int64)  # points - 2 buckets between the ends
+    sums_x, sums_y = np.add.reduceat(x[:-1], edges[:-1]), np.add.reduceat(y[:-1], edges[:-1])
+    counts = np.diff(edges)
+    mean_x = np.append(sums_x[1:] / counts[1:], x[-1])  # the next bucket's average, the last point at the end
+    mean_y = np.append(sums_y[1:] / counts[1:], y[-1])
+    chosen = np.empty(points, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, size - 1
+    a = 0
+    for n in range(points - 2):
+        lo, hi = edges[n], edges[n + 1]
+        area = np.abs((x[a] - mean_x[n]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y[n] - y[a]))
+        a = lo + int(np.argmax(area))
+        chosen[n + 1] = a
+    return chosen
+
+
+def downsample(x, y, points: int = POINTS, low=None, high=None) -> np.ndarray:
+    """Sorted indices of about ``points`` samples of (x, y) keeping its shape and extremes.
+
+    ``low`` and ``high`` are an optional envelope (per-sample min and max of
+    a pre-aggregated series) whose overall extremes are kept instead of y's.
+    """
+    import numpy as np
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if len(y) <= points:
+        return np.arange(len(y))
+    candidates = minmax(y, points * MINMAX_RATIO // 2) if len(y) > points * MINMAX_RATIO else np.arange(len(y))
+    chosen = candidates[lttb(x[candidates], y[candidates], points)]
+    low = y if low is None else np.asarray(low, dtype=np.float64)
+    high = y if high is None else np.asarray(high, dtype=np.float64)
+    return np.union1d(chosen, [np.nanargmin(low), np.nanargmax(high)])
+
+
+def _since(span: str, today: str) -> Optional[str]:
+    days = RANGES[span]
+    return None if days is None else (date.fromisoformat(today) - timedelta(days=days)).isoformat()
+
+
+def _thin(frame, column: str, points: int):
+    """``frame`` (a date column and ``column``) cut to ``points`` rows by ``downsample``."""
+    import numpy as np
+    x = frame["date"].to_numpy(dtype="datetime64[D]").astype(np.float64)
+    return frame.iloc[downsample(x, frame[column].to_numpy(), points)].reset_index(drop=True)
+
+
+def weight_frame(logs, span: str = "All", points: int = POINTS, today: Optional[str] = None):
+    """Chart rows (date, weight, trend) from a frame of ISO date and weight (lb), one row per day.
+
+    The trend runs over the whole history before the range is cut, so it
+    starts the range where it really was. ``attrs["history"]`` is the number
+    of days with a weight, in or out of the range.
+    """
+    import forecast
+    today = today or date.today().isoformat()
+    logs = logs.dropna(subset=["weight"]).sort_values("date").drop_duplicates("date", keep="last")
+    logs = logs.assign(trend=forecast.trend_series(logs["weight"].to_numpy(), logs["date"].tolist()))
+    history = len(logs)
+    since = _since(span, today)
+    if since is not None:
+        logs = logs[logs["date"] >= since]
+    found = _thin(logs[["date", "weight", "trend"]].reset_index(drop=True), "weight", points)
+    found.attrs["history"] = history
+    return found
+
+
+def waist_hip_frame(logs, span: str = "All", points: int = POINTS, today: Optional[str] = None):
+    """Chart rows (date, wh_ratio) from a frame of ISO date, waist and hips."""
+    today = today or date.today().isoformat()
+    logs = logs.dropna(subset=["waist", "hips"]).sort_values("date").drop_duplicates("date", keep="last")
+    history = len(logs)
+    since = _since(span, today)
+    if since is not None:
+        logs = logs[logs["date"] >= since]
+    ratio = logs.assign(wh_ratio=logs["waist"] / logs["hips"])[["date", "wh_ratio"]].reset_index(drop=True)
+    found = _thin(ratio, "wh_ratio", points)
+    found.attrs["history"] = history
+    return found
+
+
+def _cached(key: Tuple, build):
+    with _lock:
+        found = _cache.get(key)
+        if found is not None:
+            _cache.move_to_end(key)
+            return found
+    found = build()
+    with _lock:
+        _cache[key] = found
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return found
+
+
+def _stored_logs(user_id: str):
+    import pandas as pd
+    import storage
+    storage.init_storage()
+    rows = storage.get_log_series(user_id, "0000-01-01", "9999-12-31", ("weight_kg", "waist_in", "hips_in"))
+    logs = pd.DataFrame(rows, columns=["date", "weight", "waist", "hips"])
+    logs["weight"] = logs["weight"] * KG_TO_LB
+    return logs
+
+
+def weight(user_id: str, span: str = "All", points: int = POINTS, today: Optional[str] = None):
+    """``weight_frame`` of the user's stored logs (cached)."""
+    today = today or date.today().isoformat()
+    return _cached((user_id, "weight", span, points, today),
+                   lambda: weight_frame(_stored_logs(user_id), span, points, today))
+
+
+def waist_hip(user_id: str, span: str = "All", points: int = POINTS, today: Optional[str] = None):
+    """``waist_hip_frame`` of the user's stored logs (cached)."""
+    today = today or date.today().isoformat()
+    return _cached((user_id, "waist_hip", span, points, today),
+                   lambda: waist_hip_frame(_stored_logs(user_id), span, points, today))
+
+
+def device(user_id: str, metric: str, span: timedelta, points: int = POINTS, end=None):
+    """A ``timeseries`` metric over the ``span`` before ``end`` (now), about ``points`` rows of ts/value/min/max.
+
+    Reads the finest tier with at most ``MINMAX_RATIO`` x ``points`` buckets
+    and thins it with ``downsample``, so a day shows minute detail instead
+    of 24 hourly averages. Cached until ``end`` crosses into the next
+    display bucket (``span`` / ``points``).
+    """
+    import numpy as np
+    import pandas as pd
+    import timeseries
+    step = max(int(span.total_seconds() // points), 60)
+    end = pd.Timestamp.now(tz="UTC") if end is None else pd.Timestamp(end)
+    end = pd.Timestamp((end.value // 10 ** 9 // step + 1) * step, unit="s", tz="UTC")
+
+    def build():
+        samples = timeseries.query(user_id, metric, end - span, end, max_points=points * MINMAX_RATIO)
+        if samples.empty:
+            return samples
+        x = samples["ts"].to_numpy(dtype="datetime64[s]").astype(np.float64)
+        keep = downsample(x, samples["value"].to_numpy(), points, samples["min"].to_numpy(), samples["max"].to_numpy())
+        thinned = samples.iloc[keep].reset_index(drop=True)
+        thinned.attrs["tier"] = samples.attrs["tier"]
+        return thinned
+
+    return _cached((user_id, f"device:{metric}", span, points, int(end.value)), build)
+
+
+def forget(user_id: str, *charts: str):
+    """Drop the user's cached charts (those starting with one of ``charts``, or all)."""
+    with _lock:
+        for key in [k for k in _cache if k[0] == user_id and (not charts or k[1].startswith(charts))]:
+            del _cache[key]
+
+
+events.subscribe("daily_log", lambda user_id, **_: forget(user_id, "weight", "waist_hip"))
+events.subscribe("device_daily", lambda user_id, **_: forget(user_id, "device:"))
+events.subscribe("user_deleted", lambda user_id, **_: forget(user_id))
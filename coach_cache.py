@@ -0,0 +1,156 @@
+# coach_cache.py
+"""Shared Coach Jo response cache.
+
+Opening questions (the starter chips, and the same first question typed by
+many users) get the same answer, so replies are cached process-wide in an
+LRU with a TTL. The key is the normalized prompt plus a version of
+everything else that shapes the answer: the system prompt, the provider and
+a fingerprint of any user context sent along with the prompt.
+
+Identical requests that arrive while the first one is still streaming wait
+for it instead of calling the provider again (single flight). Failed or
+abandoned streams are never cached; waiting callers then make their own call.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from cachetools import TTLCache
+
+MAX_ENTRIES = int(os.environ.get("COACH_CACHE_SIZE", "256"))
+TTL_SECONDS = float(os.environ.get("COACH_CACHE_TTL_S", str(6 * 3600)))
+FLIGHT_TIMEOUT = 120.0  # seconds a waiting caller gives the leader
+
+Key = Tuple[str, str, str]
+
+_lock = threading.Lock()
+_cache: TTLCache = TTLCache(maxsize=MAX_ENTRIES, ttl=TTL_SECONDS)
+_flights: Dict[Key, "_Flight"] = {}
+_stats = {"hits": 0, "coalesced": 0, "misses": 0, "stored": 0}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+
+
+def normalize(prompt: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive prompt text."""
+    text = re.sub(r"\s+", " ", prompt or "").strip().lower()
+    return text.rstrip("?!. ")
+
+
+def _digest(value: Any) -> str:
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:12]
+
+
+def make_key(prompt: str, system_prompt: str, provider: str = "", context: Any = None) -> Key:
+    """Cache key for an opening question."""
+    return normalize(prompt), _digest([system_prompt, provider]), _digest(context or "")
+
+
+def lookup(key: Key) -> Optional[str]:
+    with _lock:
+        return _cache.get(key)
+
+
+def stream(key: Key, produce: Callable[[], Iterable[str]]) -> Iterator[str]:
+    """Yield the cached reply for ``key``, or stream ``produce()`` and cache it.
+
+    Exceptions from ``produce`` propagate to the caller and nothing is stored.
+    """
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _stats["hits"] += 1
+        else:
+            flight = _flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _flights[key] = _Flight()
+    if cached is not None:
+        yield cached
+        return
+
+    if not leader:
+        flight.done.wait(FLIGHT_TIMEOUT)
+        if flight.result is not None:
+            with _lock:
+                _stats["coalesced"] += 1
+            yield flight.result
+            return
+        # The leader failed or was abandoned; answer this request directly
+        with _lock:
+            _stats["misses"] += 1
+        yield from produce()
+        return
+
+    with _lock:
+        _stats["misses"] += 1
+    parts = []
+    try:
+        for chunk in produce():
+            parts.append(chunk)
+            yield chunk
+        text = "".join(parts).strip()
+        if text:
+            with _lock:
+                _cache[key] = text
+                _stats["stored"] += 1
+            flight.result = text
+    finally:
+        with _lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def complete(key: Key, produce: Callable[[], Iterable[str]]) -> str:
+    """Blocking variant of ``stream``."""
+    return "".join(stream(key, produce)).strip()
+
+
+def prewarm(items: Iterable[Tuple[Key, Callable[[], Iterable[str]]]], workers: int = 4) -> Dict[Key, bool]:
+    """Fill the cache for ``(key, produce)`` pairs concurrently.
+
+    Returns whether each key ended up cached; failures are swallowed so one
+    bad prompt does not stop the rest.
+    """
+    def warm(item):
+        key, produce = item
+        try:
+            complete(key, produce)
+        except Exception:
+            pass
+        return key, lookup(key) is not None
+
+    items = list(items)
+    if not items:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return dict(pool.map(warm, items))
+
+
+def stats() -> Dict[str, float]:
+    """Counters plus ``hit_rate`` (hits and coalesced waits over lookups)."""
+    with _lock:
+        out = dict(_stats)
+        out["entries"] = len(_cache)
+    lookups = out["hits"] + out["coalesced"] + out["misses"]
+    out["lookups"] = lookups
+    out["hit_rate"] = (out["hits"] + out["coalesced"]) / lookups if lookups else 0.0
+    return out
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+        for name in _stats:
+            _stats[name] = 0
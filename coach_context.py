@@ -0,0 +1,128 @@
+# coach_context.py
+"""Token-budgeted Coach Jo conversation context.
+
+``build`` turns the chat history into the messages sent to the provider:
+the system prompt, a running summary of older turns and the most recent
+turns verbatim, within ``BUDGET_TOKENS``.
+
+Once the verbatim turns go over budget, the oldest ones are folded into the
+summary until only ``LOW_WATER`` of the budget is left. New turns then fit
+again for a while, so the summarizer runs every few turns instead of every
+turn, and each run only sees the previous summary plus the newly folded
+turns. The summary state is a small dict kept in the session.
+
+Token counts use ``tiktoken`` when it is installed, otherwise an estimate of
+four characters per token.
+"""
+from __future__ import annotations
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+BUDGET_TOKENS = int(os.environ.get("COACH_CONTEXT_TOKENS", "1500"))
+SUMMARY_TOKENS = int(os.environ.get("COACH_SUMMARY_TOKENS", "250"))
+LOW_WATER = 0.6
+MESSAGE_OVERHEAD = 4  # role and separators, per message
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a fitness coaching chat. Keep the user's goals, "
+    "constraints, injuries, preferences, numbers and any advice already given. "
+    f"Plain text, at most {SUMMARY_TOKENS} tokens."
+)
+
+Summarizer = Callable[[str, List[Dict]], str]
+
+_encoder = None
+
+
+def count_tokens(text: str) -> int:
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = False
+    if _encoder:
+        return len(_encoder.encode(text or ""))
+    return (len(text or "") + 3) // 4
+
+
+def message_tokens(message: Dict) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to roughly ``max_tokens``, keeping the end (the newest facts)."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    return "…" + text[-max_tokens * 4:]
+
+
+def extractive_summary(previous: str, messages: List[Dict]) -> str:
+    """Offline summarizer: first sentence of each folded turn."""
+    lines = [previous] if previous else []
+    for m in messages:
+        first = re.split(r"(?<=[.!?])\s", m["content"].strip(), maxsplit=1)[0]
+        lines.append(f"{'User' if m['role'] == 'user' else 'Coach'}: {first}")
+    return truncate("\n".join(lines), SUMMARY_TOKENS)
+
+
+def llm_summarizer(complete: Callable[[List[Dict]], str]) -> Summarizer:
+    """Summarizer backed by a provider call; falls back to ``extractive_summary``."""
+    def summarize(previous: str, messages: List[Dict]) -> str:
+        transcript = "\n".join(f"{m['role'].upper()}: {m['content']}" for m in messages)
+        prompt = f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"
+        try:
+            text = complete([{"role": "system", "content": SUMMARY_PROMPT},
+                             {"role": "user", "content": prompt}])
+        except Exception:
+            text = ""
+        return truncate(text.strip(), SUMMARY_TOKENS) if text.strip() else extractive_summary(previous, messages)
+    return summarize
+
+
+def new_state() -> Dict:
+    """Summary state: ``upto`` history messages are folded into ``summary``."""
+    return {"upto": 0, "summary": ""}
+
+
+def build(
+    history: List[Dict],
+    system_prompt: str,
+    state: Optional[Dict] = None,
+    summarize: Summarizer = extractive_summary,
+    budget: int = BUDGET_TOKENS,
+    context: Optional[str] = None,
+) -> Tuple[List[Dict], Dict]:
+    """Return ``(messages, state)`` for the next provider call.
+
+    ``state`` is updated in place (and returned) when turns are folded.
+    ``context`` (the user snapshot) is sent as its own system message and
+    does not count against ``budget``.
+    """
+    state = new_state() if state is None else state
+    if state["upto"] > len(history):  # history was reset
+        state.update(new_state())
+
+    upto = state["upto"]
+    sizes = [message_tokens(m) for m in history[upto:]]
+    if sum(sizes) > budget:
+        # Fold the oldest verbatim turns until the rest fit under the low-water mark,
+        # always keeping the newest message.
+        target = int(budget * LOW_WATER)
+        kept = sum(sizes)
+        cut = upto
+        while cut < len(history) - 1 and kept > target:
+            kept -= sizes[cut - upto]
+            cut += 1
+        state["summary"] = summarize(state["summary"], history[upto:cut])
+        state["upto"] = cut
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if context:
+        messages.append({"role": "system", "content": f"About this user:\n{context}"})
+    if state["summary"]:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{state['summary']}"})
+    messages.extend({"role": m["role"], "content": m["content"]} for m in history[state["upto"]:])
+    return messages, state
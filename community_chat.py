@@ -0,0 +1,129 @@
+# community_chat.py
+"""Shared community chat with per-session read cursors.
+
+Messages live in the ``chat_messages`` table, where ids only grow. Each
+session keeps a small window of messages in its state (``session["chat"]``)
+together with two cursors: the newest id it has seen and the oldest id in
+its window.
+
+* ``poll`` runs on every rerun and fetches only messages newer than the
+  cursor through the (room, id) index. When the room's latest id (kept
+  in memory from ``chat_message`` events and re-read at most every
+  ``LATEST_TTL_S``) is not past the cursor, it does not query at all, so
+  hundreds of idle readers cost nothing.
+* ``older`` shows ``PAGE`` more messages on demand, fetching the page
+  before the oldest id in the window once the window runs out.
+
+``session`` is any mutable mapping, usually ``st.session_state``.
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Dict, List, MutableMapping, Tuple
+
+import events
+
+ROOM = "community"
+PAGE = 30  # messages per fetch: the first load and each older page
+KEEP = 200  # newest messages a session window holds onto as new ones arrive
+SHOWN = 10  # messages rendered before the user pages back
+LATEST_TTL_S = 1.0  # how stale the in-memory latest id may get (writes by other processes)
+
+_lock = threading.Lock()
+_latest: Dict[str, Tuple[int, float]] = {}  # room -> (latest id, monotonic time it was known)
+
+
+def latest_id(room: str = ROOM) -> int:
+    """Newest message id in ``room`` (0 when empty)."""
+    import storage
+    with _lock:
+        known = _latest.get(room)
+    if known is not None and time.monotonic() - known[1] < LATEST_TTL_S:
+        return known[0]
+    found = storage.get_latest_chat_id(room)
+    _seen(room, found)
+    return found
+
+
+def _seen(room: str, message_id: int):
+    with _lock:
+        known = _latest.get(room)
+        _latest[room] = (max(message_id, known[0] if known else 0), time.monotonic())
+
+
+def _load_latest(session: MutableMapping, room: str) -> List[Dict]:
+    import storage
+    messages = storage.get_chat_messages(room, limit=PAGE)
+    session["chat"] = {
+        "room": room,
+        "messages": messages,
+        "last_id": messages[-1]["id"] if messages else 0,
+        "first_id": messages[0]["id"] if messages else None,
+        "has_older": len(messages) == PAGE,
+        "shown": SHOWN,
+    }
+    return messages
+
+
+def poll(session: MutableMapping, room: str = ROOM) -> List[Dict]:
+    """Bring the session's window up to date; returns the messages that are new to it."""
+    import storage
+    storage.init_storage()
+    chat = session.get("chat")
+    if not chat or chat.get("room") != room:
+        return _load_latest(session, room)
+    if latest_id(room) <= chat["last_id"]:
+        return []
+    new = storage.get_chat_messages(room, after_id=chat["last_id"], limit=KEEP)
+    if len(new) == KEEP:  # fell far behind: start again from the newest page
+        return _load_latest(session, room)
+    if new:
+        messages = chat["messages"] + new
+        keep = max(KEEP, chat["shown"])  # never drop what the user paged back to
+        if len(messages) > keep:
+            messages = messages[-keep:]
+            chat["has_older"] = True
+        chat["messages"] = messages
+        chat["last_id"] = new[-1]["id"]
+        chat["first_id"] = messages[0]["id"]
+    return new
+
+
+def older(session: MutableMapping, room: str = ROOM, limit: int = PAGE):
+    """Show ``limit`` more messages, fetching the page before the window when it runs out."""
+    import storage
+    chat = session.get("chat")
+    if not chat or chat.get("room") != room:
+        poll(session, room)
+        chat = session["chat"]
+    hidden = len(chat["messages"]) - chat["shown"]
+    if hidden < limit and chat["has_older"] and chat["first_id"] is not None:
+        page = storage.get_chat_messages(room, before_id=chat["first_id"], limit=limit)
+        chat["has_older"] = len(page) == limit
+        if page:
+            chat["messages"] = page + chat["messages"]
+            chat["first_id"] = page[0]["id"]
+    chat["shown"] = min(len(chat["messages"]), chat["shown"] + limit)
+
+
+def has_older(session: MutableMapping) -> bool:
+    chat = session.get("chat") or {}
+    return bool(chat.get("has_older")) or len(chat.get("messages", [])) > chat.get("shown", SHOWN)
+
+
+def post(session: MutableMapping, user_id: str, name: str, content: str, room: str = ROOM) -> Dict:
+    """Store a message and pull it (and anything before it) into the session."""
+    import storage
+    storage.init_storage()
+    message = storage.save_chat_message(room, user_id, name, content)
+    poll(session, room)
+    return message
+
+
+def visible(session: MutableMapping) -> List[Dict]:
+    """The messages the page renders: the newest ``shown`` of the window."""
+    chat = session.get("chat") or {}
+    return chat.get("messages", [])[-chat.get("shown", SHOWN):]
+
+
+events.subscribe("chat_message", lambda **message: _seen(message["room"], message["id"]))
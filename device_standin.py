@@ -0,0 +1,237 @@
+# device_standin.py
+"""Local stand-ins for the wearable APIs, for device-sync benchmarks.
+
+One HTTP/1.1 keep-alive server answers the three provider shapes
+``device_sync`` speaks, under a path prefix each:
+
+* ``GET /fitbit/1/user/-/activities/{steps|heart}/date/{start}/{end}.json``
+  (Fitbit Web API time series);
+* ``POST /googlefit/fitness/v1/users/me/dataset:aggregate`` with daily
+  buckets of ``com.google.step_count.delta`` (Google Fit);
+* ``GET /garmin/wellness-api/rest/dailies?uploadStartTimeInSeconds=..&
+  uploadEndTimeInSeconds=..`` for windows of at most a day (Garmin Health).
+
+Values are a deterministic function of the bearer token and the date, so a
+re-sync returns the same numbers and results can be checked. Dates after
+today are never returned. ``latency_ms`` (plus up to ``jitter_ms``) is slept
+per request; ``rate_limits`` maps a provider to requests per second above
+which it answers 429 with ``Retry-After``, like the real APIs; ``error_rate``
+answers that share of requests with HTTP 500::
+
+    python device_standin.py --port 8766 --latency-ms 40 --rate fitbit=50 --rate garmin=100
+    DEVICE_FITBIT_URL=http://127.0.0.1:8766/fitbit streamlit run app.py
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def value(token: str, day: str, metric: str) -> int:
+    """The stand-in's number for ``metric`` on ``day`` for the account behind ``token``."""
+    h = int.from_bytes(hashlib.blake2b(f"{token}|{day}|{metric}".encode(), digest_size=4).digest(), "big")
+    if metric == "steps":
+        return 2000 + h % 12000
+    if metric == "resting_hr":
+        return 52 + h % 24
+    return 300 + h % 240  # sleep minutes
+
+
+def _days(start: str, end: str):
+    first, last = date.fromisoformat(start), min(date.fromisoformat(end), date.today())
+    return [(first + timedelta(days=n)).isoformat() for n in range((last - first).days + 1)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # keep benchmark output clean
+        pass
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, header in (headers or {}).items():
+            self.send_header(name, header)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._handle(None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._handle(json.loads(self.rfile.read(length) or b"{}"))
+
+    def _handle(self, body):
+        server = self.server
+        url = urlparse(self.path)
+        provider, _, rest = url.path.lstrip("/").partition("/")
+        token = (self.headers.get("Authorization") or "").removeprefix("Bearer ").strip()
+        server.count(provider)
+        if not token:
+            self._send_json(401, {"errors": [{"message": "missing bearer token"}]})
+            return
+        retry_after = server.throttle(provider)
+        if retry_after:
+            server.count(provider, throttled=True)
+            self._send_json(429, {"errors": [{"message": "rate limit exceeded"}]},
+                            {"Retry-After": f"{retry_after:.2f}"})
+            return
+        server.pause()
+        if server.roll(server.error_rate):
+            self._send_json(500, {"errors": [{"message": "stand-in injected failure"}]})
+            return
+        handler = {"fitbit": self._fitbit, "googlefit": self._googlefit, "garmin": self._garmin}.get(provider)
+        if handler is None:
+            self._send_json(404, {"errors": [{"message": f"unknown path {self.path}"}]})
+            return
+        handler(token, rest, parse_qs(url.query), body)
+
+    def _fitbit(self, token, rest, query, body):
+        # 1/user/-/activities/steps/date/2026-10-01/2026-10-19.json
+        parts = rest.removesuffix(".json").split("/")
+        if len(parts) != 8 or parts[5] != "date" or parts[4] not in ("steps", "heart"):
+            self._send_json(404, {"errors": [{"message": f"unknown path {self.path}"}]})
+            return
+        kind, start, end = parts[4], parts[6], parts[7]
+        if kind == "steps":
+            series = [{"dateTime": d, "value": str(value(token, d, "steps"))} for d in _days(start, end)]
+            self._send_json(200, {"activities-steps": series})
+        else:
+            series = [{"dateTime": d, "value": {"restingHeartRate": value(token, d, "resting_hr")}}
+                      for d in _days(start, end)]
+            self._send_json(200, {"activities-heart": series})
+
+    def _googlefit(self, token, rest, query, body):
+        start = datetime.fromtimestamp(body["startTimeMillis"] / 1000, timezone.utc).date().isoformat()
+        end = datetime.fromtimestamp((body["endTimeMillis"] - 1) / 1000, timezone.utc).date().isoformat()
+        buckets = []
+        for d in _days(start, end):
+            millis = int(datetime.fromisoformat(d).replace(tzinfo=timezone.utc).timestamp() * 1000)
+            buckets.append({"startTimeMillis": str(millis), "endTimeMillis": str(millis + 86_400_000),
+                            "dataset": [{"point": [{"value": [{"intVal": value(token, d, "steps")}]}]}]})
+        self._send_json(200, {"bucket": buckets})
+
+    def _garmin(self, token, rest, query, body):
+        start = int(query.get("uploadStartTimeInSeconds", ["0"])[0])
+        end = int(query.get("uploadEndTimeInSeconds", ["0"])[0])
+        if end - start > 86_400:
+            self._send_json(400, {"errorMessage": "time range exceeds 86400 seconds"})
+            return
+        d = datetime.fromtimestamp(start, timezone.utc).date().isoformat()
+        dailies = [] if d > date.today().isoformat() else [{
+            "calendarDate": d, "steps": value(token, d, "steps"),
+            "restingHeartRateInBeatsPerMinute": value(token, d, "resting_hr"),
+        }]
+        self._send_json(200, dailies)
+
+
+class DeviceStandinServer(ThreadingHTTPServer):
+    """The stand-in; ``start()`` serves from a daemon thread."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 rate_limits: Optional[Dict[str, float]] = None, error_rate: float = 0.0, seed: int = None):
+        super().__init__((host, port), _Handler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limits = dict(rate_limits or {})
+        self.error_rate = error_rate
+        self.requests: Dict[str, int] = {}
+        self.throttled: Dict[str, int] = {}
+        self._windows: Dict[str, list] = {}  # provider -> [window start, requests in it]
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    def count(self, provider: str, throttled: bool = False):
+        with self._lock:
+            counts = self.throttled if throttled else self.requests
+            counts[provider] = counts.get(provider, 0) + 1
+
+    def throttle(self, provider: str) -> float:
+        """Seconds to wait when ``provider`` is over its rate in the current one-second window, else 0."""
+        limit = self.rate_limits.get(provider)
+        if not limit:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(provider, [now, 0])
+            if now - window[0] >= 1.0:
+                window[0], window[1] = now, 0
+            if window[1] >= limit:
+                return max(0.01, 1.0 - (now - window[0]))
+            window[1] += 1
+        return 0.0
+
+    def pause(self):
+        delay = self.latency_ms
+        if self.jitter_ms > 0:
+            with self._lock:
+                delay += self._random.random() * self.jitter_ms
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def url(self, provider: str) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/{provider}"
+
+    def start(self) -> "DeviceStandinServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="device-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Wearable API stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate", action="append", default=[], metavar="PROVIDER=RPS",
+                        help="server-side rate limit, e.g. fitbit=50")
+    args = parser.parse_args(argv)
+    limits = {k: float(v) for k, v in (r.split("=", 1) for r in args.rate)}
+    server = DeviceStandinServer(args.host, args.port, args.latency_ms, args.jitter_ms, limits, args.error_rate)
+    for provider in ("fitbit", "googlefit", "garmin"):
+        print(f"{provider}: {server.url(provider)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
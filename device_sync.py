@@ -0,0 +1,393 @@
+# device_sync.py
+"""Wearable sync: provider adapters, per-user cursors, rate-limited fetching.
+
+Every connected account is a ``device_accounts`` row (user, provider,
+token) with a cursor, the last date it has totals for. A sync fetches from
+the cursor date (re-read, because that day's total was still growing when
+it was fetched) through today, or the last ``BACKFILL_DAYS`` on the first
+sync, so a re-sync costs one or two days per account instead of the whole
+history. Totals land in ``device_daily`` (steps, resting_hr, ...).
+
+Providers are registered with ``register`` and looked up with ``get``:
+
+* ``fitbit``, ``googlefit``, ``garmin``: the providers' REST APIs at
+  ``BASE_URLS`` (``DEVICE_<PROVIDER>_URL``; point them at a
+  ``device_standin`` server to test without accounts);
+* ``apple_health``: no API, totals come from a CSV export through
+  ``import_apple_health``.
+
+An adapter's ``fetch`` covers at most ``window_days`` per request (Garmin
+answers one day at a time). Requests to one provider share a token bucket of
+``rate`` a second (``burst`` at once) and at most ``concurrency`` in flight,
+whatever thread sends them; a 429 pauses the whole provider for its
+``Retry-After``, and 5xx or connection errors are retried with backoff.
+
+``sync`` runs many accounts on a thread pool and writes the rows with their
+cursors in batches of ``BATCH_ROWS`` (one transaction each), so the database
+sees a handful of writes however many accounts there are, and a cursor is
+never stored ahead of its rows.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+BACKFILL_DAYS = 30
+BATCH_ROWS = 2000
+WORKERS = 32
+MAX_RETRIES = 4
+TIMEOUT_S = 20.0
+
+BASE_URLS = {
+    "fitbit": os.environ.get("DEVICE_FITBIT_URL", "https://api.fitbit.com"),
+    "googlefit": os.environ.get("DEVICE_GOOGLEFIT_URL", "https://www.googleapis.com"),
+    "garmin": os.environ.get("DEVICE_GARMIN_URL", "https://apis.garmin.com"),
+}
+
+Row = Tuple[str, str, float]  # (ISO date, metric, value)
+
+
+class SyncError(Exception):
+    pass
+
+
+class RateLimiter:
+    """Token bucket (``rate`` a second, ``burst`` at once) plus a cap on requests in flight."""
+
+    def __init__(self, rate: float, burst: int, concurrency: int):
+        self.rate = rate
+        self.burst = burst
+        self.requests = 0
+        self.throttled = 0
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        self._slots.acquire()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self.requests += 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def release(self):
+        self._slots.release()
+
+    def pause(self, seconds: float):
+        """Hold every request to the provider for ``seconds`` (a 429's Retry-After)."""
+        with self._lock:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+# ---- HTTP ----
+_local = threading.local()
+
+
+def _session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+        session = _local.session = requests.Session()
+    return session
+
+
+def _request(provider: str, method: str, url: str, token: str, **kwargs):
+    """JSON body of one provider request, under its rate limit and with retries."""
+    import requests
+    limiter = limiter_for(provider)
+    error = "no attempt"
+    for attempt in range(MAX_RETRIES + 1):
+        delay = 0.0
+        limiter.acquire()
+        try:
+            resp = _session().request(method, url, headers={"Authorization": f"Bearer {token}"},
+                                      timeout=TIMEOUT_S, **kwargs)
+        except requests.RequestException as e:
+            error, delay = str(e), 0.25 * 2 ** attempt
+        else:
+            if resp.status_code == 429:
+                error = "rate limited"
+                limiter.pause(float(resp.headers.get("Retry-After") or 1))
+            elif resp.status_code >= 500:
+                error, delay = f"HTTP {resp.status_code}", 0.25 * 2 ** attempt
+            elif resp.status_code >= 400:
+                raise SyncError(f"HTTP {resp.status_code}")  # bad or expired token: retrying will not help
+            else:
+                return resp.json()
+        finally:
+            limiter.release()
+        time.sleep(delay)
+    raise SyncError(error)
+
+
+def _windows(start: str, end: str, days: int) -> Iterator[Tuple[str, str]]:
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    while first <= last:
+        stop = min(last, first + timedelta(days=days - 1))
+        yield first.isoformat(), stop.isoformat()
+        first = stop + timedelta(days=1)
+
+
+def _epoch(day: str) -> int:
+    return int(datetime.fromisoformat(day).replace(tzinfo=timezone.utc).timestamp())
+
+
+# ---- Adapters ----
+def _fetch_fitbit(base_url: str, token: str, start: str, end: str) -> List[Row]:
+    path = f"{base_url}/1/user/-/activities/{{}}/date/{start}/{end}.json"
+    steps = _request("fitbit", "GET", path.format("steps"), token)["activities-steps"]
+    heart = _request("fitbit", "GET", path.format("heart"), token)["activities-heart"]
+    rows = [(d["dateTime"], "steps", float(d["value"])) for d in steps]
+    rows += [(d["dateTime"], "resting_hr", float(d["value"]["restingHeartRate"]))
+             for d in heart if "restingHeartRate" in d.get("value", {})]
+    return rows
+
+
+def _fetch_googlefit(base_url: str, token: str, start: str, end: str) -> List[Row]:
+    body = {
+        "aggregateBy": [{"dataTypeName": "com.google.step_count.delta"}],
+        "bucketByTime": {"durationMillis": 86_400_000},
+        "startTimeMillis": _epoch(start) * 1000,
+        "endTimeMillis": (_epoch(end) + 86_400) * 1000,
+    }
+    found = _request("googlefit", "POST", f"{base_url}/fitness/v1/users/me/dataset:aggregate", token, json=body)
+    rows = []
+    for bucket in found.get("bucket", []):
+        day = datetime.fromtimestamp(int(bucket["startTimeMillis"]) / 1000, timezone.utc).date().isoformat()
+        points = [p for ds in bucket.get("dataset", []) for p in ds.get("point", [])]
+        if points:
+            rows.append((day, "steps", float(sum(v.get("intVal", 0) for p in points for v in p["value"]))))
+    return rows
+
+
+def _fetch_garmin(base_url: str, token: str, start: str, end: str) -> List[Row]:
+    params = {"uploadStartTimeInSeconds": _epoch(start), "uploadEndTimeInSeconds": _epoch(start) + 86_400}
+    rows = []
+    for daily in _request("garmin", "GET", f"{base_url}/wellness-api/rest/dailies", token, params=params):
+        rows.append((daily["calendarDate"], "steps", float(daily.get("steps", 0))))
+        if daily.get("restingHeartRateInBeatsPerMinute"):
+            rows.append((daily["calendarDate"], "resting_hr", float(daily["restingHeartRateInBeatsPerMinute"])))
+    return rows
+
+
+Fetcher = Callable[[str, str, str, str], List[Row]]
+
+
+class Adapter(NamedTuple):
+    name: str
+    label: str  # as offered in the devices tab
+    fetch: Optional[Fetcher]  # (base_url, token, start, end) -> rows; None for file imports
+    window_days: int = 30  # most days one fetch may cover
+    rate: float = 10.0  # requests a second, across all of the provider's accounts
+    burst: int = 10
+    concurrency: int = 8  # requests in flight at once
+
+
+_ADAPTERS: Dict[str, Adapter] = {}
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def register(name: str, label: str, fetch: Optional[Fetcher], window_days: int = 30, rate: float = 10.0,
+             burst: int = 10, concurrency: int = 8) -> Adapter:
+    """Add (or replace) the adapter for ``name``; its rate limiter starts afresh."""
+    adapter = Adapter(name, label, fetch, window_days, rate, burst, concurrency)
+    with _limiters_lock:
+        _ADAPTERS[name] = adapter
+        _limiters.pop(name, None)
+    return adapter
+
+
+def get(name: str) -> Optional[Adapter]:
+    return _ADAPTERS.get(name)
+
+
+def adapters() -> List[Adapter]:
+    return list(_ADAPTERS.values())
+
+
+def limiter_for(name: str) -> RateLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            adapter = _ADAPTERS[name]
+            limiter = _limiters[name] = RateLimiter(adapter.rate, adapter.burst, adapter.concurrency)
+        return limiter
+
+
+register("fitbit", "Fitbit", _fetch_fitbit, window_days=30, rate=2.0, burst=10, concurrency=4)
+register("apple_health", "Apple Health (manual import)", None)
+register("googlefit", "Google Fit", _fetch_googlefit, window_days=30, rate=5.0, burst=10, concurrency=4)
+register("garmin", "Garmin", _fetch_garmin, window_days=1, rate=5.0, burst=10, concurrency=4)
+
+
+# ---- Sync ----
+def connect(user_id: str, provider: str, token: str):
+    import storage
+    storage.init_storage()
+    storage.save_device_account(user_id, provider, token)
+
+
+def accounts(user_id: str) -> List[Dict]:
+    import storage
+    storage.init_storage()
+    return storage.get_device_accounts(user_id=user_id)
+
+
+def sync_account(account: Dict, today: Optional[str] = None) -> Tuple[List[Dict], Dict]:
+    """Fetch one account from its cursor through ``today``: (device_daily rows, updated cursor row)."""
+    adapter = _ADAPTERS[account["provider"]]
+    today = today or date.today().isoformat()
+    cursor = account.get("cursor")
+    start = cursor or (date.fromisoformat(today) - timedelta(days=BACKFILL_DAYS - 1)).isoformat()
+    base_url = BASE_URLS.get(adapter.name, "")
+    found: List[Row] = []
+    status = "ok"
+    try:
+        for first, last in _windows(start, today, adapter.window_days):
+            found += adapter.fetch(base_url, account["token"], first, last)
+    except (SyncError, KeyError, TypeError, ValueError) as e:
+        found, status = [], f"error: {e}"
+    rows = [dict(user_id=account["user_id"], date=day, metric=metric, value=value, source=adapter.name)
+            for day, metric, value in found if start <= day <= today]
+    state = {
+        "user_id": account["user_id"], "provider": adapter.name,
+        "cursor": max([cursor or ""] + [r["date"] for r in rows]) or None,
+        "synced_at": datetime.now().isoformat(timespec="seconds"), "status": status,
+    }
+    return rows, state
+
+
+def sync(accounts: Optional[Sequence[Dict]] = None, workers: int = WORKERS, batch_rows: int = BATCH_ROWS,
+         today: Optional[str] = None) -> Dict:
+    """Sync ``accounts`` (default: every connected API account) concurrently.
+
+    Returns counts: accounts, rows, errors and batches written.
+    """
+    import storage
+    storage.init_storage()
+    if accounts is None:
+        accounts = storage.get_device_accounts()
+    accounts = [a for a in accounts if a["provider"] in _ADAPTERS and _ADAPTERS[a["provider"]].fetch and a["token"]]
+    stats = {"accounts": len(accounts), "rows": 0, "errors": 0, "batches": 0}
+    rows: List[Dict] = []
+    cursors: List[Dict] = []
+
+    def flush():
+        if rows or cursors:
+            storage.save_device_daily(rows, cursors)
+            stats["rows"] += len(rows)
+            stats["batches"] += 1
+            rows.clear()
+            cursors.clear()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="device-sync") as pool:
+        for future in as_completed([pool.submit(sync_account, a, today) for a in accounts]):
+            found, state = future.result()
+            rows.extend(found)
+            cursors.append(state)
+            stats["errors"] += state["status"] != "ok"
+            if len(rows) >= batch_rows:
+                flush()
+    flush()
+    return stats
+
+
+def sync_user(user_id: str, today: Optional[str] = None) -> Dict:
+    import storage
+    storage.init_storage()
+    return sync(storage.get_device_accounts(user_id=user_id), workers=4, today=today)
+
+
+# ---- Apple Health import ----
+APPLE_TYPES = {
+    "HKQuantityTypeIdentifierStepCount": ("steps", "sum"),
+    "HKQuantityTypeIdentifierRestingHeartRate": ("resting_hr", "mean"),
+}
+APPLE_SAMPLES = {
+    "HKQuantityTypeIdentifierHeartRate": "heart_rate",
+    "HKQuantityTypeIdentifierStepCount": "steps",
+}
+DAILY_METRICS = ("steps", "resting_hr", "sleep_h")
+
+
+def parse_apple_health(frame) -> List[Row]:
+    """Daily totals from an Apple Health CSV.
+
+    Either per-sample records (``type``, ``startDate``, ``value``, as the
+    usual export converters write them) or one row per day with a ``date``
+    column and any of ``DAILY_METRICS``.
+    """
+    import pandas as pd
+    if "type" in frame.columns:
+        frame = frame[frame["type"].isin(list(APPLE_TYPES))]
+        frame = pd.DataFrame({
+            "date": frame["startDate"].astype(str).str[:10],
+            "metric": frame["type"].map(lambda t: APPLE_TYPES[t][0]),
+            "how": frame["type"].map(lambda t: APPLE_TYPES[t][1]),
+            "value": pd.to_numeric(frame["value"], errors="coerce"),
+        }).dropna()
+        rows = []
+        for (day, metric, how), values in frame.groupby(["date", "metric", "how"])["value"]:
+            rows.append((day, metric, float(values.sum() if how == "sum" else round(values.mean(), 1))))
+        return rows
+    if "date" not in frame.columns:
+        raise ValueError("expected a 'type' column (sample records) or a 'date' column (daily totals)")
+    long = frame.melt(id_vars=["date"], value_vars=[m for m in DAILY_METRICS if m in frame.columns],
+                      var_name="metric").dropna()
+    return [(str(d)[:10], m, float(v)) for d, m, v in zip(long["date"], long["metric"], long["value"])]
+
+
+def import_apple_health(user_id: str, source) -> int:
+    """Store the daily totals in an Apple Health CSV (path or file object); returns the rows stored.
+
+    Per-sample records also go to the ``timeseries`` store at minute resolution.
+    """
+    import pandas as pd
+    import storage
+    import timeseries
+    storage.init_storage()
+    frame = pd.read_csv(source)
+    found = parse_apple_health(frame)
+    if "type" in frame.columns:
+        for kind, metric in APPLE_SAMPLES.items():
+            samples = frame[frame["type"] == kind]
+            values = pd.to_numeric(samples["value"], errors="coerce")
+            samples = samples[values.notna()]
+            if len(samples):
+                timeseries.write(user_id, metric, samples["startDate"].astype(str).to_numpy(),
+                                 values[values.notna()].to_numpy())
+    rows = [dict(user_id=user_id, date=day, metric=metric, value=value, source="apple_health")
+            for day, metric, value in found]
+    storage.save_device_account(user_id, "apple_health", None)
+    state = {"user_id": user_id, "provider": "apple_health", "cursor": max((r["date"] for r in rows), default=None),
+             "synced_at": datetime.now().isoformat(timespec="seconds"), "status": "ok"}
+    storage.save_device_daily(rows, [state])
+    return len(rows)
+
+
+def latest(user_id: str, days: int = 14) -> Dict[str, Tuple[str, float]]:
+    """metric -> (date, value) of the user's most recent stored total within ``days``."""
+    import storage
+    storage.init_storage()
+    start = (date.today() - timedelta(days=days)).isoformat()
+    found = {}
+    for day, metric, value in storage.get_device_history(user_id, start, date.today().isoformat()):
+        found[metric] = (day, value)  # rows come oldest first
+    return found
@@ -0,0 +1,55 @@
+# events.py
+"""In-process publish/subscribe for data changes.
+
+``storage`` publishes a topic after each committed write so caches built
+from stored data can drop just the affected part instead of expiring on a
+timer. Handlers run synchronously in the writer's thread; a failing handler
+is skipped so it can never fail the write.
+
+Topics (payload always includes ``user_id``):
+
+* ``profile``, ``settings``: the user's row was saved
+* ``daily_log``: a daily check-in was saved (``date``, ``water_l``,
+  ``weight_kg``, ``cal_in``)
+* ``workout_set``: a set was logged (``date``, ``completed``,
+  ``exercise_id``, ``exercise_name``, ``reps``, ``weight``, ``logged_at``)
+* ``device_daily``: daily device totals were saved, one event per user and
+  batch (``entries``: a list of (date, metric, value))
+* ``chat_message``: a community chat message was posted (``id``, ``room``,
+  ``name``, ``content``, ``created_at``)
+* ``user_deleted``: all of the user's data was removed
+"""
+from __future__ import annotations
+import logging
+import threading
+from typing import Callable, Dict, List
+
+_lock = threading.Lock()
+_subscribers: Dict[str, List[Callable[..., None]]] = {}
+_log = logging.getLogger(__name__)
+
+
+def subscribe(topic: str, handler: Callable[..., None]) -> Callable[..., None]:
+    """Call ``handler(**payload)`` on every ``publish(topic, ...)``."""
+    with _lock:
+        handlers = _subscribers.setdefault(topic, [])
+        if handler not in handlers:
+            handlers.append(handler)
+    return handler
+
+
+def unsubscribe(topic: str, handler: Callable[..., None]):
+    with _lock:
+        handlers = _subscribers.get(topic, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+
+def publish(topic: str, **payload):
+    with _lock:
+        handlers = list(_subscribers.get(topic, ()))
+    for handler in handlers:
+        try:
+            handler(**payload)
+        except Exception:
+            _log.exception("events: %s handler failed for %r", topic, handler)
@@ -0,0 +1,280 @@
+# forecast.py
+"""Weight trend, adaptive TDEE and goal-date projection from daily logs.
+
+The trend is an exponentially smoothed weight (``TREND_ALPHA`` per day, as
+in The Hacker's Diet), so one salty dinner moves it a tenth as much as the
+scale. Days without a weigh-in decay the old trend by the whole gap at once,
+so irregular logging needs no filling in.
+
+The trend's daily change, smoothed again (``RATE_BETA``), is the current
+rate. TDEE comes from energy balance: on a day with logged intake, intake
+minus the rate times ``KCAL_PER_KG`` is that day's expenditure, averaged
+the same way starting from the Mifflin-St Jeor TDEE of the profile
+(``macros``). The rate projects the day the trend reaches
+``goal_weight_kg`` and, against ``goal_date``, the intake that would get
+there on time.
+
+``advance`` is the whole model as NumPy array arithmetic over any number of
+users, so ``run`` recomputes everyone by stepping through the calendar
+once. Per user, ``record`` applies just the new log to the stored state
+(kept for the latest and the previous log, so re-saving today's check-in is
+O(1) too) and falls back to ``recompute`` for backfilled dates, the way
+``streaks`` does; the ``daily_log`` event calls it.
+"""
+from __future__ import annotations
+import math
+import threading
+from datetime import date
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+import events
+
+if TYPE_CHECKING:
+    import numpy as np
+
+KCAL_PER_KG = 7700.0  # energy in a kilogram of body weight change
+TREND_ALPHA = 0.1  # weight trend smoothing per day
+RATE_BETA = 0.05  # rate and TDEE smoothing per day (~3 weeks of memory)
+MIN_LOGS = 10  # weigh-ins before a projection is made
+MIN_RATE_KG_WEEK = 0.05  # slower than this is "not moving" rather than a very late date
+GOAL_REACHED_KG = 0.25
+HORIZON_DAYS = 730  # projections further out than this are not reported
+FIELDS = ("day", "trend", "velocity", "tdee", "intake", "logs")
+
+_lock = threading.Lock()
+_states: Dict[str, Tuple[Dict, Dict]] = {}  # user -> (state before the latest log, state after it)
+
+
+def _day(iso: str) -> int:
+    import numpy as np
+    return int(np.datetime64(iso[:10], "D").astype(np.int64))
+
+
+def _iso(day) -> Optional[str]:
+    import numpy as np
+    return None if day is None or np.isnan(day) else str(np.datetime64(int(day), "D"))
+
+
+def empty(users: int = 1, tdee_prior=math.nan) -> Dict[str, np.ndarray]:
+    """State of ``users`` with no logs; ``tdee_prior`` seeds the TDEE estimate (NaN: first logged intake)."""
+    import numpy as np
+    state = {name: np.zeros(users) for name in FIELDS}
+    state["day"][:] = np.nan
+    state["tdee"] = np.broadcast_to(np.asarray(tdee_prior, dtype=np.float64), (users,)).copy()
+    state["intake"][:] = np.nan
+    return state
+
+
+def advance(state: Dict[str, np.ndarray], day, weight_kg, cal_in) -> Dict[str, np.ndarray]:
+    """State after a log on ``day`` (epoch days) for every user whose ``weight_kg`` is not NaN.
+
+    Arrays broadcast against the state; ``cal_in`` of 0 or NaN means no intake was logged.
+    """
+    import numpy as np
+    day, weight, cal_in = (np.asarray(x, dtype=np.float64) for x in (day, weight_kg, cal_in))
+    seen = ~np.isnan(weight)
+    first = state["logs"] == 0
+    gap = np.where(first, 1.0, np.maximum(day - state["day"], 1.0))
+    keep = (1 - TREND_ALPHA) ** gap
+    trend = np.where(first, weight, state["trend"] * keep + weight * (1 - keep))
+    change = np.where(first, 0.0, (trend - state["trend"]) / gap)  # kg per day over the gap
+    slow = (1 - RATE_BETA) ** gap
+    velocity = np.where(first, 0.0, state["velocity"] * slow + change * (1 - slow))
+    ate = seen & (np.nan_to_num(cal_in) > 0)
+    burned = cal_in - velocity * KCAL_PER_KG
+    tdee = np.where(np.isnan(state["tdee"]), burned, state["tdee"] * slow + burned * (1 - slow))
+    intake = np.where(np.isnan(state["intake"]), cal_in, state["intake"] * slow + cal_in * (1 - slow))
+    return {
+        "day": np.where(seen, day, state["day"]),
+        "trend": np.where(seen, trend, state["trend"]),
+        "velocity": np.where(seen, velocity, state["velocity"]),
+        "tdee": np.where(ate, tdee, state["tdee"]),
+        "intake": np.where(ate, intake, state["intake"]),
+        "logs": state["logs"] + seen,
+    }
+
+
+def run(weights: np.ndarray, cal_in: np.ndarray, first_day: int, tdee_prior=math.nan) -> Dict[str, np.ndarray]:
+    """States of every user from (users x days) matrices of weights (NaN: no log) and intake from ``first_day``."""
+    import numpy as np
+    state = empty(weights.shape[0], tdee_prior)
+    for n in range(weights.shape[1]):
+        column = weights[:, n]
+        if not np.isnan(column).all():
+            state = advance(state, first_day + n, column, cal_in[:, n])
+    return state
+
+
+def compute(days: Iterable[str], weights_kg: Iterable[float], cal_in: Iterable[float],
+            tdee_prior: float = math.nan) -> Tuple[Dict, Dict]:
+    """(state before the last log, state after it) of one user's logs in date order."""
+    import numpy as np
+    state = previous = empty(1, tdee_prior)
+    for day, weight, intake in zip(days, weights_kg, cal_in):
+        previous, state = state, advance(state, _day(day), weight, intake if intake is not None else np.nan)
+    return previous, state
+
+
+def trend_series(weights_kg: Iterable[float], days: Iterable[str]) -> np.ndarray:
+    """The trend at each of one user's logs (date order), for charts."""
+    import numpy as np
+    found, trend, last = [], np.nan, None
+    for weight, day in zip(weights_kg, days):
+        day = _day(day)
+        keep = 0.0 if last is None else (1 - TREND_ALPHA) ** max(day - last, 1)
+        trend = weight if last is None else trend * keep + weight * (1 - keep)
+        last = day
+        found.append(trend)
+    return np.array(found)
+
+
+def project(state: Dict[str, np.ndarray], goal_weight_kg, goal_day=math.nan) -> Dict[str, np.ndarray]:
+    """Goal projection for each user of ``state`` (``goal_day`` in epoch days, NaN when unset).
+
+    Returns arrays: rate_kg_week, days_to_goal and projected_day (NaN when
+    the trend is not heading to the goal fast enough, or too few logs),
+    on_track (projected_day <= goal_day) and target_kcal (the intake that
+    reaches the goal on ``goal_day``).
+    """
+    import numpy as np
+    goal, goal_day = (np.asarray(x, dtype=np.float64) for x in (goal_weight_kg, goal_day))
+    remaining = goal - state["trend"]
+    velocity = state["velocity"]
+    reached = np.abs(remaining) <= GOAL_REACHED_KG
+    moving = (np.sign(remaining) == np.sign(velocity)) & (np.abs(velocity) * 7 >= MIN_RATE_KG_WEEK)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_to_goal = np.where(reached, 0.0, np.where(moving, np.ceil(remaining / velocity), np.nan))
+        needed = remaining / np.maximum(goal_day - state["day"], 1.0)
+    days_to_goal = np.where((state["logs"] >= MIN_LOGS) & (days_to_goal <= HORIZON_DAYS), days_to_goal, np.nan)
+    projected = state["day"] + days_to_goal
+    return {
+        "rate_kg_week": velocity * 7,
+        "days_to_goal": days_to_goal,
+        "projected_day": projected,
+        "on_track": projected <= goal_day,
+        "target_kcal": np.where(np.isnan(goal_day) | reached, np.nan, state["tdee"] + needed * KCAL_PER_KG),
+    }
+
+
+def summary(state: Dict, profile: Optional[Dict] = None) -> Optional[Dict]:
+    """One user's state (and projection, given a profile) as plain values; None without logs."""
+    import numpy as np
+    if not state["logs"].item():
+        return None
+    found = {
+        "last_date": _iso(state["day"].item()),
+        "trend_kg": float(state["trend"].item()),
+        "rate_kg_week": float(state["velocity"].item() * 7),
+        "tdee": None if np.isnan(state["tdee"].item()) else float(state["tdee"].item()),
+        "intake": None if np.isnan(state["intake"].item()) else float(state["intake"].item()),
+        "logs": int(state["logs"].item()),
+    }
+    if profile:
+        goal_day = _day(profile["goal_date"]) if profile.get("goal_date") else np.nan
+        projection = project(state, profile["goal_weight_kg"], goal_day)
+        target = projection["target_kcal"].item()
+        found.update({
+            "goal_weight_kg": float(profile["goal_weight_kg"]),
+            "goal_date": profile.get("goal_date"),
+            "projected_date": _iso(projection["projected_day"].item()),
+            "on_track": None if np.isnan(goal_day) else bool(projection["on_track"].item()),
+            "target_kcal": None if np.isnan(target) else float(target),
+        })
+    return found
+
+
+def _prior(user_id: str) -> float:
+    import macros
+    found = macros.for_user(user_id)
+    return found["tdee"] if found else math.nan
+
+
+def recompute(user_id: str) -> Tuple[Dict, Dict]:
+    """Rebuild the user's state from all of their logs."""
+    import storage
+    rows = storage.get_log_series(user_id, "0000-01-01", "9999-12-31", ("weight_kg", "cal_in"))
+    states = compute([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows], _prior(user_id))
+    with _lock:
+        _states[user_id] = states
+    return states
+
+
+def record(user_id: str, day: str, weight_kg: float, cal_in: Optional[float]) -> Dict:
+    """Apply a saved log; O(1) unless ``day`` is older than the user's latest log."""
+    day_n = _day(day)
+    with _lock:
+        entry = _states.get(user_id)
+        if entry is not None:
+            previous, state = entry
+            last = state["day"].item()
+            if math.isnan(last) or day_n > last:
+                base = state
+            else:
+                base = previous if day_n == last else None
+            if base is not None:
+                entry = (base, advance(base, day_n, weight_kg, cal_in if cal_in is not None else math.nan))
+                _states[user_id] = entry
+                return entry[1]
+    return recompute(user_id)[1]  # first sight of this user, or a backfilled date
+
+
+def get(user_id: str) -> Optional[Dict]:
+    """The user's trend, TDEE and goal projection (``summary``); None without logs."""
+    import storage
+    storage.init_storage()
+    with _lock:
+        entry = _states.get(user_id)
+    state = (entry or recompute(user_id))[1]
+    return summary(state, storage.get_profile(user_id))
+
+
+def recompute_all(today: Optional[str] = None):
+    """Every user's forecast in one vectorized pass over all logs, as a DataFrame."""
+    import numpy as np
+    import pandas as pd
+    import macros
+    import storage
+    storage.init_storage()
+    today = today or date.today().isoformat()
+    logs = pd.DataFrame(storage.get_all_log_series("0000-01-01", today, ("weight_kg", "cal_in")),
+                        columns=["user_id", "date", "weight_kg", "cal_in"])
+    users, codes = np.unique(logs["user_id"].to_numpy(dtype=str), return_inverse=True)
+    days = logs["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    first = int(days.min()) if len(days) else _day(today)
+    weights = np.full((len(users), _day(today) - first + 1), np.nan)
+    intake = np.zeros_like(weights)
+    weights[codes, days - first] = logs["weight_kg"].to_numpy(dtype=np.float64)
+    intake[codes, days - first] = logs["cal_in"].fillna(0).to_numpy(dtype=np.float64)
+    priors = macros.for_users(users.tolist()).set_index("user_id")["tdee"].reindex(users).to_numpy()
+    state = run(weights, intake, first, priors)
+    profiles = pd.DataFrame(storage.get_all_profiles(("goal_weight_kg", "goal_date")),
+                            columns=["user_id", "goal_weight_kg", "goal_date"]).set_index("user_id").reindex(users)
+    goal_date = pd.to_datetime(profiles["goal_date"], errors="coerce")
+    goal_day = (goal_date - pd.Timestamp(0)).dt.days.to_numpy(dtype=np.float64, na_value=np.nan)
+    projection = project(state, profiles["goal_weight_kg"].to_numpy(dtype=np.float64), goal_day)
+    frame = pd.DataFrame({"user_id": users, **state, **projection})
+    for column in ("day", "projected_day"):
+        frame[column] = pd.to_datetime(frame[column], unit="D")
+    return frame
+
+
+def forget(user_id: str):
+    with _lock:
+        _states.pop(user_id, None)
+
+
+def reset():
+    """Drop every cached state, e.g. after switching databases."""
+    with _lock:
+        _states.clear()
+
+
+def _on_daily_log(user_id: str, date: str, weight_kg: Optional[float] = None, cal_in: Optional[float] = None,
+                  **_):
+    if weight_kg is not None:
+        record(user_id, date, weight_kg, cal_in)
+
+
+events.subscribe("daily_log", _on_daily_log)
+events.subscribe("profile", lambda user_id, **_: forget(user_id))  # a new TDEE prior
+events.subscribe("user_deleted", lambda user_id, **_: forget(user_id))
@@ -0,0 +1,37 @@
+# fragments.py
+"""Static page fragments rendered once per process.
+
+Meal plans, schedules and long copy blocks don't depend on user data, so
+their markdown/HTML is built once per (name, language, theme) and reused by
+every session. The blocks are constants in app.py, so the name alone
+identifies the content; nothing is hashed per rerun. After editing a block
+in a running process, ``appcache.clear()`` (or a restart) rebuilds it.
+"""
+from __future__ import annotations
+from textwrap import dedent
+from typing import Any, Callable, Iterable, Sequence
+
+import appcache
+
+
+def get(name: str, lang: str, theme: str, build: Callable[[], str]) -> str:
+    """Return the cached fragment, calling ``build`` on the first request."""
+    return appcache.memoize(("fragment", name, lang, theme), build)
+
+
+def text(block: str) -> str:
+    """Normalize an indented triple-quoted markdown/HTML block."""
+    return dedent(block).strip("\n")
+
+
+def markdown_table(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> str:
+    """Render rows as a GitHub-flavored markdown table."""
+    def cell(value):
+        return str(value).replace("|", "\\|").replace("\n", " ")
+
+    lines = [
+        "| " + " | ".join(cell(c) for c in columns) + " |",
+        "|" + " --- |" * len(columns),
+    ]
+    lines.extend("| " + " | ".join(cell(v) for v in row) + " |" for row in rows)
+    return "\n".join(lines)
@@ -0,0 +1,290 @@
+# leaderboard.py
+"""Cross-user leaderboards with an incrementally maintained rank index.
+
+Points come from the activity ``storage`` records: every completed set
+earns ``SET_POINTS`` and every activity date earns a streak bonus of
+``STREAK_POINTS`` per day of the streak it extends, capped at
+``STREAK_CAP`` days. They are added as the write events arrive
+(``events.py``); a backfilled date rebuilds the user's scores from history.
+
+Boards are partitions of the ``leaderboard`` table: ``"all"`` holds everyone
+with activity, and each weekly challenge has its own board per ISO week
+(``board_key``) holding the members who joined it, scored on that week's
+activity only.
+
+Top-k reads the (board, score, user_id) index in SQLite. "My rank" uses a
+``RankIndex`` per board, a Fenwick tree over score values kept in memory
+and moved on every score change, so both stay O(log n) however many users
+a board has. Rank indexes are built from the table on first use; they assume
+this process is the only writer, as the app is.
+"""
+from __future__ import annotations
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import events
+import streaks
+
+SET_POINTS = 10
+STREAK_POINTS = 5
+STREAK_CAP = 7
+ALL = "all"
+
+
+class RankIndex:
+    """Member counts per score in a Fenwick tree.
+
+    ``rank`` (1 + members with a higher score) and ``add``/``move`` are
+    O(log S) for scores up to S; the tree doubles when a score outgrows it.
+    """
+
+    def __init__(self, scores: Iterable[int] = ()):
+        import numpy as np
+        counts = np.bincount(np.maximum(np.fromiter(scores, dtype=np.int64), 0))
+        self.counts: Dict[int, int] = {int(s): int(counts[s]) for s in np.flatnonzero(counts)}
+        self.size = 1
+        while self.size < counts.size:
+            self.size *= 2
+        self._build()
+
+    def _build(self):
+        import numpy as np
+        # tree[i] holds the counts of scores i - lowbit(i) .. i - 1: a difference of prefix sums
+        dense = np.zeros(self.size + 1, dtype=np.int64)
+        if self.counts:
+            dense[np.fromiter(self.counts, dtype=np.int64) + 1] = list(self.counts.values())
+        prefix = np.cumsum(dense)
+        i = np.arange(self.size + 1)
+        self.tree = prefix - prefix[i - (i & -i)]
+        self.members = int(prefix[-1])
+
+    def add(self, score: int, delta: int = 1):
+        score = max(0, int(score))
+        if score >= self.size:
+            while self.size <= score:
+                self.size *= 2
+            self.counts[score] = self.counts.get(score, 0) + delta
+            self._build()
+            return
+        count = self.counts.get(score, 0) + delta
+        if count:
+            self.counts[score] = count
+        else:
+            self.counts.pop(score, None)
+        self.members += delta
+        i = score + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def move(self, old: Optional[int], new: int):
+        if old is not None:
+            self.add(old, -1)
+        self.add(new)
+
+    def at_most(self, score: int) -> int:
+        """Members with a score <= ``score``."""
+        i, total = min(max(0, int(score)) + 1, self.size), 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return int(total)
+
+    def rank(self, score: int) -> int:
+        return self.members - self.at_most(score) + 1
+
+
+_lock = threading.RLock()
+_indexes: Dict[str, RankIndex] = {}
+_rows: Dict[str, Dict[str, Dict]] = {}  # user -> board -> stored row
+
+
+def week_of(day: Optional[str] = None) -> str:
+    """ISO week of ``day`` (default today), e.g. ``2026-W43``."""
+    year, week, _ = (date.fromisoformat(day) if day else date.today()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def board_key(challenge: Optional[str] = None, day: Optional[str] = None) -> str:
+    """``"all"``, or the board of ``challenge`` for the ISO week containing ``day`` (default today)."""
+    return f"{week_of(day)}/{challenge}" if challenge else ALL
+
+
+def week_range(week: str) -> Tuple[str, str]:
+    """First and last ISO date (Monday, Sunday) of ``week``."""
+    year, number = week.split("-W")
+    monday = date.fromisocalendar(int(year), int(number), 1)
+    return monday.isoformat(), date.fromordinal(monday.toordinal() + 6).isoformat()
+
+
+def _board_range(board: str) -> Tuple[str, str]:
+    return ("0000-01-01", "9999-12-31") if board == ALL else week_range(board.split("/", 1)[0])
+
+
+def day_points(run_day: int) -> int:
+    """Streak bonus for an activity date that is day ``run_day`` of its streak."""
+    return STREAK_POINTS * min(run_day, STREAK_CAP)
+
+
+def history_points(user_id: str, boards: Iterable[str] = (ALL,)) -> Tuple[Dict[str, int], Optional[str]]:
+    """Board -> points from the user's stored history, and their latest activity date."""
+    import numpy as np
+    import storage
+    days = np.asarray(storage.get_activity_dates(user_id), dtype="datetime64[D]")
+    bonus = np.zeros(0, dtype=np.int64)
+    if days.size:
+        starts = np.concatenate(([True], np.diff(days) != np.timedelta64(1, "D")))
+        run_start = np.flatnonzero(starts)[np.cumsum(starts) - 1]
+        bonus = STREAK_POINTS * np.minimum(np.arange(days.size) - run_start + 1, STREAK_CAP)
+    set_days = np.asarray([r[0] for r in storage.get_set_series(user_id, "0000-01-01", "9999-12-31", ())],
+                          dtype="datetime64[D]")
+    points = {}
+    for board in boards:
+        start, end = (np.datetime64(d, "D") for d in _board_range(board))
+        in_days = (days >= start) & (days <= end)
+        in_sets = (set_days >= start) & (set_days <= end)
+        points[board] = int(bonus[in_days].sum()) + SET_POINTS * int(in_sets.sum())
+    return points, (str(days[-1]) if days.size else None)
+
+
+def _index(board: str) -> RankIndex:
+    import storage
+    index = _indexes.get(board)
+    if index is None:
+        index = _indexes[board] = RankIndex(storage.get_board_scores(board))
+    return index
+
+
+def _moved(board: str, old: Optional[int], new: int):
+    index = _indexes.get(board)
+    if index is not None:  # not loaded yet: built from the table when first needed
+        index.move(old, new)
+
+
+def _user_rows(user_id: str) -> Dict[str, Dict]:
+    import storage
+    rows = _rows.get(user_id)
+    if rows is None:
+        rows = _rows[user_id] = {r["board"]: r for r in storage.get_leaderboard_rows(user_id)}
+    return rows
+
+
+def _save(user_id: str, board: str, name: str, score: int, last_day: Optional[str]):
+    import storage
+    old = storage.save_board_row(board, user_id, name, score, last_day)
+    _moved(board, old, score)
+    _user_rows(user_id)[board] = {"board": board, "user_id": user_id, "name": name,
+                                  "score": score, "last_day": last_day}
+
+
+def rebuild(user_id: str, name: Optional[str] = None, boards: Iterable[str] = ()) -> Dict[str, int]:
+    """Recompute the user's score on ``"all"``, every board they joined and ``boards`` from history."""
+    with _lock:
+        rows = _user_rows(user_id)
+        boards = set(rows) | {ALL} | set(boards)
+        points, last_day = history_points(user_id, boards)
+        for board in boards:
+            member_name = name or rows.get(board, rows.get(ALL, {})).get("name") or user_id
+            _save(user_id, board, member_name, points[board], last_day)
+        return points
+
+
+def join(user_id: str, name: str, challenge: str, day: Optional[str] = None) -> str:
+    """Put the user on this week's ``challenge`` board (and ``"all"``) under ``name``."""
+    import storage
+    storage.init_storage()
+    board = board_key(challenge, day)
+    with _lock:
+        rows = _user_rows(user_id)
+        if ALL not in rows or board not in rows:
+            rebuild(user_id, name, (board,))
+        storage.set_board_name(user_id, name)
+        for row in rows.values():
+            row["name"] = name
+    return board
+
+
+def ensure(user_id: str, name: Optional[str] = None):
+    """Make sure the user is on ``"all"`` (built from history the first time)."""
+    import storage
+    storage.init_storage()
+    with _lock:
+        if ALL not in _user_rows(user_id):
+            rebuild(user_id, name)
+
+
+def rank(board: str, user_id: str) -> Optional[Dict]:
+    """{"rank", "score", "members"} for the user on ``board``, or None when not on it."""
+    import storage
+    storage.init_storage()
+    with _lock:
+        row = _user_rows(user_id).get(board)
+        if row is None:
+            return None
+        index = _index(board)
+        return {"rank": index.rank(row["score"]), "score": row["score"], "members": index.members}
+
+
+def top(board: str, k: int = 10, after: Optional[Dict] = None) -> List[Dict]:
+    """The ``k`` best rows of ``board`` with their rank (ties share a rank).
+
+    Pass the last row of a page as ``after`` for the next one.
+    """
+    import storage
+    storage.init_storage()
+    rows = storage.get_board_top(board, k, (after["score"], after["user_id"]) if after else None)
+    with _lock:
+        index = _index(board)
+        for row in rows:
+            row["rank"] = index.rank(row["score"])
+    return rows
+
+
+def _on_activity(topic: str):
+    def handler(user_id: str, date: str, completed: bool = True, **_):
+        import storage
+        if not completed:
+            return
+        with _lock:
+            rows = _user_rows(user_id)
+            if ALL not in rows:
+                rebuild(user_id)  # first activity: history already includes this event
+                return
+            last_day = rows[ALL].get("last_day")
+            if last_day is not None and date < last_day:
+                rebuild(user_id)  # backfilled date: later streak bonuses change
+                return
+            points = SET_POINTS if topic == "workout_set" else 0
+            new_day = last_day is None or date > last_day
+            if new_day:
+                points += day_points(streaks.get(user_id, today=date)["current"])
+            if not points:
+                return
+            week = week_of(date)
+            deltas = {board: points for board in rows if board == ALL or board.split("/", 1)[0] == week}
+            changed = storage.add_board_scores(user_id, deltas, date if new_day else None)
+            for board, (old, new) in changed.items():
+                _moved(board, old, new)
+                rows[board]["score"] = new
+                if new_day:
+                    rows[board]["last_day"] = date
+    return handler
+
+
+def forget(user_id: str):
+    with _lock:
+        _rows.pop(user_id, None)
+        _indexes.clear()  # the user's scores are gone from every board they were on
+
+
+def reset():
+    """Drop every cached row and rank index, e.g. after switching databases."""
+    with _lock:
+        _rows.clear()
+        _indexes.clear()
+
+
+for _topic in ("daily_log", "workout_set"):
+    events.subscribe(_topic, _on_activity(_topic))
+events.subscribe("user_deleted", lambda user_id, **_: forget(user_id))
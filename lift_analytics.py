@@ -0,0 +1,324 @@
+# lift_analytics.py
+"""Progressive-overload analytics over the set log.
+
+Per exercise (``exercise_id``): the estimated one-rep max of each completed
+set (Epley, from sets of ``MAX_REPS`` or fewer with weight), the best per
+session (date), and personal records: a session whose best e1RM or
+heaviest weight beats every earlier session of that exercise. Per training
+week (starting Monday) and ``category``: completed sets and volume
+(reps x lb).
+
+The set log has no category column, so ``category`` maps an exercise id
+with the keyword rules in ``CATEGORY_WORDS``, the way ``badges`` recognises
+glute work; renamed or new exercises still land in a group.
+
+``compute`` derives every user's state from one frame of sets with
+vectorized pandas (per-session maxima, running maxima per exercise), which
+``recompute_all`` uses for a full rebuild. Per user, ``record`` folds one
+saved set into the stored state in O(1) and falls back to ``recompute``
+for a backfilled date, like ``forecast``; the ``workout_set`` event calls
+it. The tracker, the coach context and the suggestions read ``get`` and
+``summary``, so none of them scans the set history.
+"""
+from __future__ import annotations
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import events
+
+MAX_REPS = 12  # Epley overestimates from longer sets; they count for volume only
+SESSIONS_KEPT = 26  # per-exercise session bests kept for progress charts
+WEEKS_KEPT = 8  # weekly volume kept per user, counting back from the latest set
+RECENT_PRS = 10
+PROGRESS_DAYS = 56  # e1RM change is reported over this window
+STALL_SESSIONS = 4  # sessions without a new best e1RM before a lift counts as stalled
+CATEGORY_WORDS = (  # first match wins, against the exercise id (``app.get_exercise_id``)
+    ("Warm-up", ("jumping_jack", "high_kick", "high_knee", "leg_swing", "activation", "knee_drive", "squat_walk",
+                 "bridge_march")),
+    ("Booty", ("hip_thrust", "kickback", "glute", "bridge", "abductor", "hyperextension", "rdl", "romanian")),
+    ("Legs", ("squat", "lunge", "leg_press", "leg_curl", "leg_extension", "step_up", "deadlift", "calf")),
+    ("Core", ("plank", "crunch", "twist", "leg_raise", "dead_bug", "butterfly_kick", "sit_up", "hollow")),
+    ("Back", ("pulldown", "row", "pull_up", "chin_up", "pullover")),
+    ("Shoulders", ("press", "raise", "delt", "face_pull", "shrug")),
+    ("Cardio", ("stair", "treadmill", "bike", "elliptical", "walk", "run")),
+    ("Recovery", ("stretch", "foam", "mobility")),
+)
+CATEGORY_NAMES = [name for name, _ in CATEGORY_WORDS] + ["Other"]
+
+_lock = threading.Lock()
+_states: Dict[str, Dict] = {}  # user -> {"last_date", "exercises", "weeks", "prs"}
+
+
+def category(exercise_id: str) -> str:
+    """The exercise's group (``CATEGORY_WORDS``), or "Other"."""
+    exercise_id = str(exercise_id).lower()
+    for name, words in CATEGORY_WORDS:
+        if any(word in exercise_id for word in words):
+            return name
+    return "Other"
+
+
+def e1rm(reps, weight):
+    """Epley estimated one-rep max (lb); 0 where the set has no weight or more than ``MAX_REPS`` reps."""
+    import numpy as np
+    reps, weight = np.asarray(reps, dtype=np.float64), np.asarray(weight, dtype=np.float64)
+    valid = (reps >= 1) & (reps <= MAX_REPS) & (weight > 0)
+    return np.where(valid, np.where(reps == 1, weight, weight * (1 + reps / 30)), 0.0)
+
+
+def week_of(day: str) -> str:
+    d = date.fromisoformat(day)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+def _empty() -> Dict:
+    return {"last_date": None, "exercises": {}, "weeks": {}, "prs": []}
+
+
+def _add_pr(state: Dict, day: str, exercise_id: str, lift: Dict, kind: str, value: float, previous: float):
+    """Record (or raise, for another set the same day) the session's PR of ``kind``."""
+    prs = state["prs"]
+    for pr in prs:
+        if pr["date"] == day and pr["exercise_id"] == exercise_id and pr["kind"] == kind:
+            pr["value"] = value
+            return
+    prs.append(dict(date=day, exercise_id=exercise_id, name=lift["name"], kind=kind, value=value, previous=previous))
+    prs.sort(key=lambda pr: (pr["date"], pr["exercise_id"], pr["kind"]))
+    del prs[:-RECENT_PRS]
+
+
+def _apply(state: Dict, day: str, exercise_id: str, exercise_name: str, reps: int, weight: float):
+    """Fold one completed set dated on or after ``state["last_date"]`` into ``state``."""
+    exercise_id = str(exercise_id)
+    est = float(e1rm(reps, weight))
+    heaviest = float(weight) if reps >= 1 and weight > 0 else 0.0
+    lift = state["exercises"].get(exercise_id)
+    if lift is None:
+        lift = state["exercises"][exercise_id] = dict(
+            name=exercise_name, category=category(exercise_id), e1rm=0.0, best_weight=0.0, prior_e1rm=0.0,
+            prior_weight=0.0, last_date=None, sessions=[], since_pr=-1)
+    lift["name"] = exercise_name
+    if lift["last_date"] != day:  # a new session
+        lift["prior_e1rm"], lift["prior_weight"] = lift["e1rm"], lift["best_weight"]
+        lift["last_date"] = day
+        lift["sessions"].append([day, 0.0, 0.0])
+        del lift["sessions"][:-SESSIONS_KEPT]
+        lift["since_pr"] += 1
+    session = lift["sessions"][-1]
+    session[1], session[2] = max(session[1], est), max(session[2], heaviest)
+    lift["e1rm"], lift["best_weight"] = max(lift["e1rm"], est), max(lift["best_weight"], heaviest)
+    if 0 < lift["prior_e1rm"] < session[1]:
+        _add_pr(state, day, exercise_id, lift, "e1rm", session[1], lift["prior_e1rm"])
+        lift["since_pr"] = 0
+    if 0 < lift["prior_weight"] < session[2]:
+        _add_pr(state, day, exercise_id, lift, "weight", session[2], lift["prior_weight"])
+
+    week = week_of(day)
+    totals = state["weeks"].setdefault(week, {}).setdefault(lift["category"], [0, 0.0])
+    totals[0] += 1
+    totals[1] += float(reps) * float(weight)
+    oldest = (date.fromisoformat(week) - timedelta(weeks=WEEKS_KEPT - 1)).isoformat()
+    for stale in [w for w in state["weeks"] if w < oldest]:
+        del state["weeks"][stale]
+    state["last_date"] = day if state["last_date"] is None else max(state["last_date"], day)
+
+
+def _codes(column):
+    """(sorted distinct values, integer code of each row)."""
+    import numpy as np
+    import pandas as pd
+    codes, values = pd.factorize(column, sort=True)
+    return np.asarray(values, dtype=object), codes
+
+
+def compute(sets) -> Dict[str, Dict]:
+    """Every user's state from a frame of completed sets (user_id, date, exercise_id, exercise_name, reps, weight).
+
+    Rows must be in logging order within a day; the result matches applying
+    them one at a time with ``record``. Users, exercises and dates are
+    grouped as integer codes, so the string columns are read once.
+    """
+    import numpy as np
+    import pandas as pd
+    if sets.empty:
+        return {}
+    user_ids, user = _codes(sets["user_id"])
+    exercise_ids, exercise = _codes(sets["exercise_id"].astype(str))
+    dates, day = _codes(sets["date"])
+    names = sets["exercise_name"].to_numpy(dtype=object)
+    reps, weight = sets["reps"].to_numpy(dtype=np.float64), sets["weight"].to_numpy(dtype=np.float64)
+    frame = pd.DataFrame({"user": user, "exercise": exercise, "day": day, "row": np.arange(len(sets)),
+                          "e1rm": e1rm(reps, weight), "heaviest": np.where((reps >= 1) & (weight > 0), weight, 0.0)})
+
+    keys = ["user", "exercise"]
+    sessions = frame.groupby(keys + ["day"], sort=True).agg(
+        row=("row", "max"), e1rm=("e1rm", "max"), weight=("heaviest", "max")).reset_index()
+    by_lift = sessions.groupby(keys, sort=False)
+    for column in ("e1rm", "weight"):
+        sessions["best_" + column] = by_lift[column].cummax()
+        sessions["prior_" + column] = by_lift["best_" + column].shift(fill_value=0.0)
+        sessions["pr_" + column] = (sessions["prior_" + column] > 0) & (sessions[column] > sessions["prior_" + column])
+    sessions["n"] = by_lift.cumcount()
+    reset = sessions["n"].where(sessions["pr_e1rm"] | (sessions["n"] == 0))
+    sessions["since_pr"] = sessions["n"] - reset.groupby([sessions["user"], sessions["exercise"]]).ffill()
+
+    lifts = sessions.groupby(keys, sort=False).tail(1)  # sessions are sorted, so lifts and kept share an order
+    kept = sessions.groupby(keys, sort=False).tail(SESSIONS_KEPT)
+    rows = [list(r) for r in zip(dates[kept["day"]].tolist(), kept["e1rm"].tolist(), kept["weight"].tolist())]
+    ends = np.append(np.flatnonzero(np.diff(kept.groupby(keys, sort=False).ngroup().to_numpy())) + 1, len(kept))
+    categories = [category(e) for e in exercise_ids]
+    states: Dict[str, Dict] = {user_id: _empty() for user_id in user_ids[np.unique(user)]}
+    start = 0
+    for row, end in zip(lifts.itertuples(index=False), ends.tolist()):
+        states[user_ids[row.user]]["exercises"][exercise_ids[row.exercise]] = dict(
+            name=names[row.row], category=categories[row.exercise], e1rm=row.best_e1rm, best_weight=row.best_weight,
+            prior_e1rm=row.prior_e1rm, prior_weight=row.prior_weight, last_date=dates[row.day],
+            sessions=rows[start:end], since_pr=int(row.since_pr))
+        start = end
+
+    for user_code, day_code in frame.groupby("user")["day"].max().items():
+        states[user_ids[user_code]]["last_date"] = dates[day_code]
+
+    prs = []
+    for kind in ("e1rm", "weight"):  # columns from the filtered rows: assigning to an empty frame takes their index
+        found = sessions[sessions["pr_" + kind]]
+        prs.append(found.assign(kind=kind, value=found[kind], previous=found["prior_" + kind]))
+    prs = pd.concat(prs)
+    prs = prs.assign(exercise_id=exercise_ids[prs["exercise"]]).sort_values(["user", "day", "exercise_id", "kind"])
+    for row in prs.groupby("user", sort=False).tail(RECENT_PRS).itertuples(index=False):
+        states[user_ids[row.user]]["prs"].append(dict(
+            date=dates[row.day], exercise_id=row.exercise_id, name=names[row.row], kind=row.kind,
+            value=float(row.value), previous=float(row.previous)))
+
+    day_n = dates.astype("datetime64[D]").astype(np.int64)
+    weeks = day_n - (day_n + 3) % 7  # days since 1970-01-01 (a Thursday) of each date's Monday
+    week_names = dict(zip(weeks.tolist(), weeks.astype("datetime64[D]").astype(str).tolist()))
+    frame = frame.assign(week=weeks[day], category=np.array([CATEGORY_NAMES.index(c) for c in categories])[exercise],
+                         volume=reps * weight)
+    latest = frame.groupby("user")["week"].transform("max").to_numpy()
+    recent = frame[frame["week"].to_numpy() > latest - 7 * WEEKS_KEPT]
+    totals = recent.groupby(["user", "week", "category"], sort=True)["volume"].agg(["size", "sum"])
+    for (user_code, week, group), sets_done, volume in zip(totals.index, totals["size"].tolist(),
+                                                           totals["sum"].tolist()):
+        states[user_ids[user_code]]["weeks"].setdefault(week_names[week], {})[CATEGORY_NAMES[group]] = [
+            sets_done, volume]
+    return states
+
+
+def _frame(rows, with_user: bool):
+    import pandas as pd
+    columns = ["date", "exercise_id", "exercise_name", "reps", "weight"]
+    return pd.DataFrame(rows, columns=["user_id"] + columns if with_user else columns)
+
+
+def recompute(user_id: str) -> Dict:
+    """Rebuild the user's state from all of their completed sets."""
+    import storage
+    rows = storage.get_set_series(user_id, "0000-01-01", "9999-12-31",
+                                  ("exercise_id", "exercise_name", "reps", "weight"))
+    state = compute(_frame(rows, False).assign(user_id=user_id)).get(user_id, _empty())
+    with _lock:
+        _states[user_id] = state
+    return state
+
+
+def record(user_id: str, day: str, exercise_id: str, exercise_name: str, reps: int, weight: float) -> Dict:
+    """Apply a saved completed set; O(1) unless ``day`` is older than the user's latest set."""
+    with _lock:
+        state = _states.get(user_id)
+        if state is not None and (state["last_date"] is None or day >= state["last_date"]):
+            _apply(state, day, exercise_id, exercise_name, int(reps), float(weight))
+            return state
+    return recompute(user_id)  # first sight of this user, or a backfilled date
+
+
+def get(user_id: str) -> Dict:
+    """The user's state (computed on first use); treat it as read-only."""
+    with _lock:
+        state = _states.get(user_id)
+    if state is None:
+        import storage
+        storage.init_storage()
+        state = recompute(user_id)
+    return state
+
+
+def summary(user_id: str, today: Optional[str] = None) -> Dict:
+    """What the tracker, coach context and suggestions show.
+
+    ``lifts``: weighted exercises, latest first, each with e1RM, best
+    weight, latest session best, change over ``PROGRESS_DAYS`` and whether
+    it has stalled; ``week`` / ``last_week``: {category: (sets, volume)};
+    ``prs``: recent records, newest first.
+    """
+    today = today or date.today().isoformat()
+    state = get(user_id)
+    since = (date.fromisoformat(today) - timedelta(days=PROGRESS_DAYS)).isoformat()
+    with _lock:
+        lifts: List[Dict] = []
+        for exercise_id, lift in state["exercises"].items():
+            if not lift["e1rm"]:
+                continue
+            window = [s for s in lift["sessions"] if s[0] >= since and s[1]]
+            lifts.append(dict(
+                exercise_id=exercise_id, name=lift["name"], category=lift["category"], e1rm=lift["e1rm"],
+                best_weight=lift["best_weight"], last_date=lift["last_date"], last_e1rm=lift["sessions"][-1][1],
+                change=window[-1][1] - window[0][1] if len(window) > 1 else None,
+                stalled=lift["since_pr"] >= STALL_SESSIONS, since_pr=lift["since_pr"]))
+        this_week = week_of(today)
+        previous_week = (date.fromisoformat(this_week) - timedelta(weeks=1)).isoformat()
+        weeks = {w: {c: tuple(v) for c, v in state["weeks"].get(w, {}).items()} for w in (this_week, previous_week)}
+        prs = [dict(pr) for pr in reversed(state["prs"])]
+    lifts.sort(key=lambda lift: lift["last_date"], reverse=True)
+    return dict(lifts=lifts, week=weeks[this_week], last_week=weeks[previous_week], prs=prs)
+
+
+def history(user_id: str, exercise_id: str) -> List[Tuple[str, float, float]]:
+    """The exercise's kept sessions as (date, best e1RM, heaviest weight), oldest first."""
+    state = get(user_id)
+    with _lock:
+        lift = state["exercises"].get(str(exercise_id))
+        return [tuple(s) for s in lift["sessions"]] if lift else []
+
+
+def recompute_all():
+    """Every user's state in one vectorized pass over all sets; a (user, exercise) DataFrame of the results."""
+    import pandas as pd
+    import storage
+    storage.init_storage()
+    rows = storage.get_all_set_series("0000-01-01", "9999-12-31", ("exercise_id", "exercise_name", "reps", "weight"))
+    states = compute(_frame(rows, True))
+    with _lock:
+        _states.clear()
+        _states.update(states)
+    return pd.DataFrame(
+        [dict(user_id=u, exercise_id=e, name=x["name"], category=x["category"], e1rm=x["e1rm"],
+              best_weight=x["best_weight"], last_date=x["last_date"], since_pr=x["since_pr"])
+         for u, s in states.items() for e, x in s["exercises"].items()],
+        columns=["user_id", "exercise_id", "name", "category", "e1rm", "best_weight", "last_date", "since_pr"])
+
+
+def forget(user_id: str):
+    with _lock:
+        _states.pop(user_id, None)
+
+
+def reset():
+    """Drop every cached state, e.g. after switching databases."""
+    with _lock:
+        _states.clear()
+
+
+def _on_workout_set(user_id: str, date: str, completed: bool = True, exercise_id: Optional[str] = None,
+                    exercise_name: str = "", reps: Optional[int] = None, weight: Optional[float] = None, **_):
+    if not completed:
+        return
+    if exercise_id is None or reps is None or weight is None:
+        forget(user_id)  # an older payload; rebuilt on next use
+        return
+    record(user_id, date, exercise_id, exercise_name, reps, weight)
+
+
+events.subscribe("workout_set", _on_workout_set)
+events.subscribe("user_deleted", lambda user_id, **_: forget(user_id))
@@ -0,0 +1,211 @@
+# llm.py
+"""Coach Jo LLM providers.
+
+``stream_chat`` yields the reply as text chunks as the provider produces
+them, so the page can render tokens immediately instead of waiting for the
+full completion. ``complete`` joins the stream for callers that want a
+single string.
+
+Providers are registered with ``register`` (a name, a streaming function
+and the setting that holds its API key) and looked up with ``get``:
+
+* ``openai`` and ``gemini``: the real APIs;
+* ``mock``: no key or network, replays a canned answer in-process with a
+  configurable time-to-first-token (``COACH_MOCK_TTFT_MS``) and per-chunk
+  delay (``COACH_MOCK_TOKEN_MS``);
+* ``standin``: the OpenAI protocol against a local ``llm_standin`` server at
+  ``COACH_STANDIN_URL``, no key needed. Use it to load-test the real HTTP
+  path without spending API credits.
+
+Select one with ``COACH_PROVIDER``.
+
+Clients are process-wide singletons per (provider, key): the OpenAI client
+keeps its HTTP connection pool alive between messages and Gemini is
+configured once, so only the first message pays connection/TLS setup.
+``reset_clients`` drops them (e.g. after a key rotation).
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+OPENAI_MODEL = "gpt-4o-mini"
+GEMINI_MODEL = "gemini-1.5-pro"
+TEMPERATURE = 0.5
+MAX_TOKENS = 700
+
+STANDIN_URL = os.environ.get("COACH_STANDIN_URL", "http://127.0.0.1:8765/v1")
+
+MOCK_REPLY = (
+    "Great question! Here's how I'd approach it. Keep protein high at every meal, "
+    "aim for roughly 0.8-1 g per pound of goal body weight, and spread it over "
+    "three or four meals. For training, use progressive overload: once you hit "
+    "the top of your rep range with good form for two sessions in a row, add "
+    "5-10% load and drop back to the bottom of the range. Prioritize sleep, "
+    "hydration (around 2-3 L a day) and consistency over perfection. If anything "
+    "hurts beyond normal muscle fatigue, swap the movement for a pain-free "
+    "alternative and check in with a professional. You've got this! 💪"
+)
+
+
+_clients_lock = threading.Lock()
+_clients: Dict[Tuple[str, str, Optional[str]], Any] = {}
+
+# Retries and deadlines are handled by llm_executor; the SDK timeout only
+# bounds a worker thread stuck on a dead connection.
+CLIENT_TIMEOUT_S = 120.0
+
+
+def client(provider: str, key: str, base_url: Optional[str] = None) -> Any:
+    """Return the shared client for ``provider``, ``key`` and ``base_url``, creating it once."""
+    cache_key = (provider, key, base_url)
+    found = _clients.get(cache_key)
+    if found is not None:
+        return found
+    with _clients_lock:
+        found = _clients.get(cache_key)
+        if found is None:
+            if provider == "gemini":
+                import google.generativeai as genai
+
+                genai.configure(api_key=key)
+                found = genai.GenerativeModel(GEMINI_MODEL)
+            else:
+                from openai import OpenAI
+
+                # Without base_url the SDK uses OPENAI_BASE_URL when set
+                found = OpenAI(api_key=key, base_url=base_url, max_retries=0, timeout=CLIENT_TIMEOUT_S)
+            _clients[cache_key] = found
+    return found
+
+
+def reset_clients():
+    """Close and forget every pooled client."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for c in clients:
+        close = getattr(c, "close", None)
+        if close is not None:
+            close()
+
+
+def _chat_messages(messages: List[Dict]) -> List[Dict]:
+    return [{"role": m["role"], "content": m["content"]} for m in messages]
+
+
+def _gemini_prompt(messages: List[Dict]) -> str:
+    return "\n\n".join([f"{m['role'].upper()}: {m['content']}" for m in messages])
+
+
+def _stream_openai(messages: List[Dict], key: str, base_url: Optional[str] = None) -> Iterator[str]:
+    # The SSE body is read to the end ourselves: some SDK versions close the
+    # response as soon as they see [DONE], before the final HTTP chunk, which
+    # throws the keep-alive connection away after every streamed reply.
+    raw = client("openai", key, base_url).chat.completions.with_raw_response.create(
+        model=OPENAI_MODEL,
+        messages=_chat_messages(messages),
+        temperature=TEMPERATURE,
+        max_tokens=MAX_TOKENS,
+        stream=True,
+    )
+    response = raw.http_response
+    try:
+        for line in response.iter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                continue
+            chunk = json.loads(data)
+            if chunk.get("error"):
+                raise RuntimeError(chunk["error"].get("message") or "An error occurred during streaming")
+            choices = chunk.get("choices") or []
+            delta = choices[0].get("delta", {}).get("content") if choices else None
+            if delta:
+                yield delta
+    finally:
+        response.close()
+
+
+def _stream_gemini(messages: List[Dict], key: str, base_url: Optional[str] = None) -> Iterator[str]:
+    model = client("gemini", key)
+    for chunk in model.generate_content(_gemini_prompt(messages), stream=True):
+        try:
+            text = chunk.text
+        except ValueError:  # chunk without text parts (e.g. safety stop)
+            continue
+        if text:
+            yield text
+
+
+def _stream_mock(messages: List[Dict], key: Optional[str] = None, base_url: Optional[str] = None) -> Iterator[str]:
+    ttft = float(os.environ.get("COACH_MOCK_TTFT_MS", "300")) / 1000
+    per_token = float(os.environ.get("COACH_MOCK_TOKEN_MS", "15")) / 1000
+    time.sleep(ttft)
+    words = MOCK_REPLY.split(" ")
+    for i, word in enumerate(words):
+        if i:
+            time.sleep(per_token)
+        yield word if i == len(words) - 1 else word + " "
+
+
+Streamer = Callable[[List[Dict], Optional[str], Optional[str]], Iterator[str]]
+
+
+class Provider(NamedTuple):
+    name: str
+    stream: Streamer  # (messages, key, base_url) -> text chunks
+    key_env: Optional[str] = None  # setting that holds the API key; None when no key is needed
+
+
+_PROVIDERS: Dict[str, Provider] = {}
+PROVIDERS: Tuple[str, ...] = ()
+
+
+def register(name: str, stream: Streamer, key_env: Optional[str] = None) -> Provider:
+    """Add (or replace) a provider under ``name``."""
+    global PROVIDERS
+    provider = Provider(name, stream, key_env)
+    _PROVIDERS[name] = provider
+    PROVIDERS = tuple(_PROVIDERS)
+    return provider
+
+
+def get(name: Optional[str]) -> Provider:
+    """The provider for ``name``; ``gemini-*`` means Gemini and anything unknown means OpenAI."""
+    name = (name or "").lower()
+    if name.startswith("gemini"):
+        name = "gemini"
+    return _PROVIDERS.get(name) or _PROVIDERS["openai"]
+
+
+def _stream_standin(messages: List[Dict], key: Optional[str] = None, base_url: Optional[str] = None) -> Iterator[str]:
+    return _stream_openai(messages, key or "standin", base_url or STANDIN_URL)
+
+
+register("openai", _stream_openai, "OPENAI_API_KEY")
+register("gemini", _stream_gemini, "GEMINI_API_KEY")
+register("mock", _stream_mock)
+register("standin", _stream_standin)
+
+
+def stream_chat(messages: List[Dict], provider: str, key: Optional[str] = None,
+                base_url: Optional[str] = None) -> Iterator[str]:
+    """Yield the reply to ``messages`` chunk by chunk.
+
+    ``provider`` is resolved with ``get``. ``base_url`` points an
+    OpenAI-protocol provider at a compatible server.
+    """
+    spec = get(provider)
+    if spec.key_env and not key:
+        raise RuntimeError(f"{spec.key_env} not set. Please set it in environment variables or Streamlit secrets.")
+    return spec.stream(messages, key, base_url)
+
+
+def complete(messages: List[Dict], provider: str, key: Optional[str] = None,
+             base_url: Optional[str] = None) -> str:
+    """Blocking variant of ``stream_chat``."""
+    return "".join(stream_chat(messages, provider, key, base_url)).strip()
@@ -0,0 +1,310 @@
+# llm_executor.py
+"""Deadline-bound, retried, hedged and rate-limited Coach Jo provider calls.
+
+Upstream calls run on an asyncio loop in a background thread. The provider
+SDK iterators are blocking, so each chunk is pulled on a small worker pool.
+The Streamlit script thread only waits on a queue, and only until the
+call's deadline. Each pull from the provider is bounded by the same
+deadline, and abandoned once the caller goes away or the other route wins,
+so a hung provider gives its upstream slot back on time; the stream is then
+closed, which frees the worker blocked on it.
+
+* **Deadline**: ``stream`` raises ``DeadlineExceeded`` once ``deadline_s``
+  (``COACH_DEADLINE_S``) has passed without the reply finishing.
+* **Concurrency**: a process-wide semaphore allows ``MAX_IN_FLIGHT``
+  (``COACH_MAX_IN_FLIGHT``) upstream calls. Calls that cannot get a slot
+  before their deadline fail fast with ``Overloaded``.
+* **Retries**: tenacity retries connection errors, 408/409/429 and 5xx with
+  exponential backoff and full jitter (``COACH_RETRIES`` extra attempts),
+  but only until the first chunk has been shown.
+* **Hedging**: with a second route, the same request goes to it when the
+  first has produced nothing after ``HEDGE_AFTER_S`` (``COACH_HEDGE_AFTER_MS``;
+  0 turns hedging off but keeps failover), or as soon as the first route
+  fails. The first route to produce a chunk wins and the other stops.
+"""
+from __future__ import annotations
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, stop_after_delay, wait_random_exponential
+
+import llm
+
+MAX_IN_FLIGHT = int(os.environ.get("COACH_MAX_IN_FLIGHT", "16"))
+DEADLINE_S = float(os.environ.get("COACH_DEADLINE_S", "45"))
+RETRIES = int(os.environ.get("COACH_RETRIES", "2"))
+HEDGE_AFTER_S = float(os.environ.get("COACH_HEDGE_AFTER_MS", "2500")) / 1000
+
+_RETRYABLE_NAMES = {
+    "APIConnectionError", "APITimeoutError", "InternalServerError", "RateLimitError",  # openai
+    "ServiceUnavailable", "ResourceExhausted", "DeadlineExceeded",  # google
+}
+
+
+class Route(NamedTuple):
+    provider: str
+    key: Optional[str] = None
+    base_url: Optional[str] = None
+
+
+class DeadlineExceeded(TimeoutError):
+    """The reply did not finish before the call's deadline."""
+
+
+class Overloaded(RuntimeError):
+    """No upstream slot freed up before the call's deadline."""
+
+
+class _MidStream(Exception):
+    """A route failed after its output was shown; never retried."""
+
+
+_END = object()
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_pool: Optional[ThreadPoolExecutor] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_stats = {
+    "calls": 0, "in_flight": 0, "queued": 0, "retries": 0, "hedges": 0, "failovers": 0,
+    "hedge_wins": 0, "timeouts": 0, "overloaded": 0, "errors": 0, "peak_in_flight": 0,
+}
+
+
+def _bump(name: str, delta: int = 1):
+    with _lock:
+        _stats[name] += delta
+        if name == "in_flight" and _stats[name] > _stats["peak_in_flight"]:
+            _stats["peak_in_flight"] = _stats[name]
+
+
+def _ensure_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _pool, _semaphore
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-executor", daemon=True).start()
+            # Two routes per call can be active while hedging
+            _pool = ThreadPoolExecutor(max_workers=2 * MAX_IN_FLIGHT + 4, thread_name_prefix="llm-call")
+            _semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+            _loop = loop
+        return _loop
+
+
+def _retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (_MidStream, Overloaded, DeadlineExceeded, ImportError)):
+        return False
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    return isinstance(exc, (ConnectionError, TimeoutError)) or type(exc).__name__ in _RETRYABLE_NAMES
+
+
+class _Call:
+    def __init__(self, messages: List[Dict], deadline_s: float):
+        self.messages = messages
+        self.deadline_at = time.monotonic() + deadline_s
+        self.out: "queue.Queue" = queue.Queue()
+        self.cancel = threading.Event()
+        self.winner: Optional[int] = None
+        self.won: Optional[asyncio.Event] = None  # created on the loop
+        self.started: Optional[asyncio.Event] = None  # primary got an upstream slot
+        self.stopped: Optional[asyncio.Event] = None  # ``cancel``, seen from the loop
+
+    def remaining(self) -> float:
+        return self.deadline_at - time.monotonic()
+
+    def claim(self, index: int) -> bool:
+        """First route to produce output wins (runs on the loop thread only)."""
+        if self.winner is None:
+            self.winner = index
+            self.won.set()
+        return self.winner == index
+
+    def stop(self):
+        """Wake routes waiting on upstream once ``cancel`` is set (runs on the loop thread only)."""
+        if self.stopped is not None:
+            self.stopped.set()
+
+
+def _close_late(pending):
+    """Close a stream that arrived after its caller gave up on it."""
+    if not pending.cancelled() and pending.exception() is None:
+        close = getattr(pending.result(), "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+
+async def _upstream(call: _Call, index: int, fn, *args):
+    """``fn(*args)`` on the worker pool, waited for at most until the call's deadline.
+
+    Returns ``_END`` instead when the caller goes away or the other route wins
+    first; raises ``DeadlineExceeded`` when the deadline passes. Either way the
+    worker may still be blocked in ``fn``; whatever it returns late is closed.
+    """
+    pending = _pool.submit(fn, *args)
+    future = asyncio.wrap_future(pending)
+    waiters = [asyncio.ensure_future(call.stopped.wait())]
+    if call.winner != index:
+        waiters.append(asyncio.ensure_future(call.won.wait()))
+    try:
+        await asyncio.wait({future, *waiters}, timeout=max(call.remaining(), 0),
+                           return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+    if future.done():
+        return future.result()
+    future.cancel()
+    pending.add_done_callback(_close_late)
+    if call.cancel.is_set() or call.winner not in (None, index):
+        return _END
+    raise DeadlineExceeded("Coach Jo provider did not answer in time")
+
+
+async def _stream_once(call: _Call, route: Route, index: int):
+    _bump("queued")
+    try:
+        await asyncio.wait_for(_semaphore.acquire(), timeout=max(call.remaining(), 0.001))
+    except asyncio.TimeoutError:
+        _bump("overloaded")
+        raise Overloaded("too many Coach Jo requests in flight") from None
+    finally:
+        _bump("queued", -1)
+    _bump("in_flight")
+    if index == 0:
+        call.started.set()
+    chunks = None
+    try:
+        chunks = await _upstream(
+            call, index, lambda: iter(llm.stream_chat(call.messages, route.provider, route.key, route.base_url)))
+        while chunks is not _END and not call.cancel.is_set():
+            if call.winner is not None and call.winner != index:
+                return  # the other route won
+            try:
+                chunk = await _upstream(call, index, next, chunks, _END)
+            except Exception as e:
+                if call.winner == index:
+                    raise _MidStream(e) from e
+                raise
+            if call.cancel.is_set() or not call.claim(index):
+                return
+            if chunk is _END:
+                call.out.put(("done", None))
+                return
+            call.out.put(("chunk", chunk))
+    finally:
+        # The slot goes back first: closing a stream whose worker is still
+        # blocked in ``next`` may itself wait on the provider
+        _semaphore.release()
+        _bump("in_flight", -1)
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            _pool.submit(close)
+
+
+async def _first(task: asyncio.Future, event: asyncio.Event, timeout: float):
+    """Wait until ``task`` finishes or ``event`` is set, at most ``timeout`` seconds."""
+    waiter = asyncio.ensure_future(event.wait())
+    try:
+        await asyncio.wait({task, waiter}, timeout=max(timeout, 0), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+
+
+async def _attempt(call: _Call, route: Route, index: int):
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(RETRIES + 1) | stop_after_delay(max(call.remaining(), 0)),
+        wait=wait_random_exponential(multiplier=0.2, max=2.0),
+        retry=retry_if_exception(
+            lambda e: _retryable(e) and call.winner is None and not call.cancel.is_set()),
+        reraise=True,
+    )
+    async for attempt in retrying:
+        with attempt:
+            if attempt.retry_state.attempt_number > 1:
+                _bump("retries")
+            await _stream_once(call, route, index)
+
+
+async def _run(call: _Call, routes: List[Route]):
+    call.won = asyncio.Event()
+    call.started = asyncio.Event()
+    call.stopped = asyncio.Event()
+    if call.cancel.is_set():
+        call.stopped.set()
+    tasks = [asyncio.ensure_future(_attempt(call, routes[0], 0))]
+    if len(routes) > 1:
+        # The hedge timer starts once the primary is actually upstream, not
+        # while it waits for a slot, so queueing alone never triggers a hedge.
+        await _first(tasks[0], call.started, call.remaining())
+        if not tasks[0].done():
+            wait_s = call.remaining() if HEDGE_AFTER_S <= 0 else min(HEDGE_AFTER_S, call.remaining())
+            await _first(tasks[0], call.won, wait_s)
+        hedge = not tasks[0].done()
+        if call.winner is None and not call.cancel.is_set() and call.remaining() > 0:
+            _bump("hedges" if hedge else "failovers")
+            tasks.append(asyncio.ensure_future(_attempt(call, routes[1], 1)))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    if call.winner is None:
+        errors = [r for r in results if isinstance(r, BaseException)]
+        call.out.put(("error", errors[-1] if errors else RuntimeError("no reply from any provider")))
+    else:
+        if call.winner == 1 and len(tasks) > 1:
+            _bump("hedge_wins")
+        failure = results[call.winner]
+        if isinstance(failure, BaseException):
+            call.out.put(("error", failure.__cause__ if isinstance(failure, _MidStream) else failure))
+
+
+def _drain(call: _Call) -> Iterator[str]:
+    try:
+        while True:
+            try:
+                kind, value = call.out.get(timeout=max(call.remaining(), 0))
+            except queue.Empty:
+                _bump("timeouts")
+                raise DeadlineExceeded("Coach Jo did not answer in time") from None
+            if kind == "chunk":
+                yield value
+            elif kind == "done":
+                return
+            else:
+                _bump("timeouts" if isinstance(value, DeadlineExceeded) else "errors")
+                raise value
+    finally:
+        call.cancel.set()
+        _loop.call_soon_threadsafe(call.stop)
+
+
+def stream(messages: List[Dict], routes: Iterable, deadline_s: Optional[float] = None) -> Iterator[str]:
+    """Start the call now and return an iterator over its chunks.
+
+    ``routes`` are ``Route``s (or ``(provider, key[, base_url])`` tuples) in
+    preference order; only the first two are used.
+    """
+    routes = [r if isinstance(r, Route) else Route(*r) for r in routes][:2]
+    if not routes:
+        raise ValueError("no provider routes")
+    loop = _ensure_loop()
+    call = _Call(messages, DEADLINE_S if deadline_s is None else deadline_s)
+    _bump("calls")
+    asyncio.run_coroutine_threadsafe(_run(call, routes), loop)
+    return _drain(call)
+
+
+def complete(messages: List[Dict], routes: Iterable, deadline_s: Optional[float] = None) -> str:
+    """Blocking variant of ``stream``."""
+    return "".join(stream(messages, routes, deadline_s)).strip()
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats)
@@ -0,0 +1,252 @@
+# llm_standin.py
+"""Local OpenAI-compatible stand-in for Coach Jo benchmarks.
+
+Serves ``POST /v1/chat/completions`` (plain JSON and ``stream=True`` SSE)
+over HTTP/1.1 keep-alive. ``handshake_ms`` is slept once per new TCP
+connection to model the TLS setup a real provider charges, so pooled and
+per-message clients can be told apart on localhost. ``prefill_ms_per_1k``
+adds time proportional to the prompt size (about four characters per
+token), like a real model reading a long context; ``jitter_ms`` adds a
+uniformly random share of that on top. ``error_rate`` answers that share of
+requests with HTTP 500, ``slow_rate`` adds ``slow_ms`` to that share before
+the first token and ``cut_rate`` ends that share of streams half way with an
+error event, to model a degraded provider.
+
+Replies are ``reply_tokens`` long (one word per token, the canned reply
+repeated or cut to size; 0 keeps the reply as is). Token usage is returned
+like the real API: in the JSON body, and as a final stream chunk when the
+request sets ``stream_options.include_usage``. ``prompt_tokens`` and
+``completion_tokens`` count the totals served::
+
+    python llm_standin.py --port 8765 --handshake-ms 80 --ttft-ms 200
+    COACH_PROVIDER=standin COACH_STANDIN_URL=http://127.0.0.1:8765/v1 streamlit run app.py
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import llm
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.count_connection()
+        if self.server.handshake_ms:
+            time.sleep(self.server.handshake_ms / 1000)
+
+    def log_message(self, format, *args):  # keep benchmark output clean
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _write_event(self, payload: dict):
+        self._write_chunk(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+
+    def do_POST(self):
+        self.server.track(+1)
+        try:
+            self._complete()
+        finally:
+            self.server.track(-1)
+
+    def _complete(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        server = self.server
+        if server.roll(server.error_rate):
+            time.sleep(server.ttft_ms / 1000)
+            self._send_json(500, {"error": {"message": "stand-in injected failure", "type": "server_error"}})
+            return
+        if server.roll(server.slow_rate):
+            time.sleep(server.slow_ms / 1000)
+        model = request.get("model", llm.OPENAI_MODEL)
+        words = server.words
+        created = int(time.time())
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in request.get("messages", [])) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                 "total_tokens": prompt_tokens + len(words)}
+        time.sleep((server.ttft_ms + server.prefill_ms_per_1k * prompt_tokens / 1000
+                    + server.jitter() * server.jitter_ms) / 1000)
+
+        if not request.get("stream"):
+            time.sleep(server.token_ms * (len(words) - 1) / 1000)
+            self._send_json(200, {
+                "id": "chatcmpl-standin", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": " ".join(words)}}],
+                "usage": usage,
+            })
+            server.count_tokens(prompt_tokens, len(words))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        cut_at = len(words) // 2 if server.roll(server.cut_rate) else None
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(server.token_ms / 1000)
+            if i == cut_at:
+                server.count_tokens(prompt_tokens, i)
+                self._write_event({"error": {"message": "stand-in injected stream failure", "type": "server_error"}})
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+                return
+            self._write_event({
+                "id": "chatcmpl-standin", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": None,
+                             "delta": {"content": word if i == len(words) - 1 else word + " "}}],
+            })
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self._write_event({"id": "chatcmpl-standin", "object": "chat.completion.chunk", "created": created,
+                               "model": model, "choices": [], "usage": usage})
+        server.count_tokens(prompt_tokens, len(words))
+        # [DONE] and the terminating chunk go out together so the client can
+        # return the connection to its pool as soon as it sees [DONE]
+        done = b"data: [DONE]\n\n"
+        self.wfile.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(done), done))
+        self.wfile.flush()
+
+
+class StandinServer(ThreadingHTTPServer):
+    """The stand-in; ``start()`` serves from a daemon thread."""
+
+    daemon_threads = True
+    request_queue_size = 128  # load tests open many connections at once
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, ttft_ms: float = 0.0,
+                 token_ms: float = 0.0, handshake_ms: float = 0.0, reply: str = llm.MOCK_REPLY,
+                 prefill_ms_per_1k: float = 0.0, error_rate: float = 0.0, slow_rate: float = 0.0,
+                 slow_ms: float = 0.0, seed: int = None, reply_tokens: int = 0, jitter_ms: float = 0.0,
+                 cut_rate: float = 0.0):
+        super().__init__((host, port), _Handler)
+        self.ttft_ms = ttft_ms
+        self.token_ms = token_ms
+        self.handshake_ms = handshake_ms
+        self.reply = reply
+        self.reply_tokens = reply_tokens
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.cut_rate = cut_rate
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._random = random.Random(seed)
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-stream is expected (cancelled or timed-out calls)
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    def count_connection(self):
+        with self._count_lock:
+            self.connections += 1
+
+    def track(self, delta: int):
+        with self._count_lock:
+            self.in_flight += delta
+            if delta > 0:
+                self.requests += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    @property
+    def words(self):
+        words = self.reply.split(" ")
+        if self.reply_tokens > 0:
+            words = (words * (self.reply_tokens // len(words) + 1))[:self.reply_tokens]
+        return words
+
+    def count_tokens(self, prompt: int, completion: int):
+        with self._count_lock:
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+
+    def jitter(self) -> float:
+        if self.jitter_ms <= 0:
+            return 0.0
+        with self._count_lock:
+            return self._random.random()
+
+    def roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._count_lock:
+            return self._random.random() < rate
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StandinServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="llm-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft-ms", type=float, default=200)
+    parser.add_argument("--token-ms", type=float, default=15)
+    parser.add_argument("--handshake-ms", type=float, default=80)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--slow-rate", type=float, default=0)
+    parser.add_argument("--slow-ms", type=float, default=0)
+    parser.add_argument("--cut-rate", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--reply-tokens", type=int, default=0)
+    args = parser.parse_args(argv)
+    server = StandinServer(args.host, args.port, args.ttft_ms, args.token_ms, args.handshake_ms,
+                           prefill_ms_per_1k=args.prefill_ms_per_1k, error_rate=args.error_rate,
+                           slow_rate=args.slow_rate, slow_ms=args.slow_ms, reply_tokens=args.reply_tokens,
+                           jitter_ms=args.jitter_ms, cut_rate=args.cut_rate)
+    print(f"stand-in listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
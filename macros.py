@@ -0,0 +1,220 @@
+# macros.py
+"""Calorie and macro targets (Mifflin-St Jeor BMR x activity multiplier).
+
+``compute`` is the engine: it takes NumPy arrays (or scalars) of body
+stats, activity multipliers, daily calorie adjustments and macro shares and
+returns arrays of BMR, TDEE, calories and grams of protein, carbs and fat,
+so one call covers every user (``for_users``) or a grid of what-if scenarios
+(``what_if``). Where no macro split is given (None or NaN shares), protein is
+``PROTEIN_G_PER_LB`` of body weight, fat ``DEFAULT_FAT_SHARE`` of calories
+and carbs the rest, as the Macro Calculator has always done.
+
+``for_user`` builds targets from the ``profiles`` row and the
+``settings.macro_split_json`` split, memoized per profile version: the
+``profile`` and ``settings`` events bump the user's version, so targets are
+recomputed once per edit instead of on every rerun. ``on_target_flag``
+grades a day's intake against them for ``save_daily_log``.
+"""
+from __future__ import annotations
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, Iterable, Mapping, Optional, Tuple
+
+import events
+
+if TYPE_CHECKING:
+    import numpy as np
+
+LB_TO_KG = 0.453592
+KCAL_PER_LB_WEEK = 500  # daily kcal gap for 1 lb a week (3500 kcal / 7)
+KCAL_PER_G = {"protein": 4, "carbs": 4, "fat": 9}
+PROTEIN_G_PER_LB = 0.8
+DEFAULT_FAT_SHARE = 0.25
+ON_TARGET_TOLERANCE = 0.10  # intake within +/-10% of the calorie target is "OK"
+
+ACTIVITY_MULTIPLIERS = {
+    "sedentary": 1.2,
+    "lightly active": 1.375,
+    "light": 1.375,
+    "moderately active": 1.55,
+    "moderate": 1.55,
+    "very active": 1.725,
+    "extra active": 1.9,
+}
+GOAL_ADJUSTMENTS = {"Lose Fat": -300, "Maintain": 0, "Build Muscle": 300}  # Macro Calculator goals, kcal/day
+SEX_OFFSETS = {"M": 5.0, "F": -161.0}
+
+_lock = threading.Lock()
+_versions: Dict[str, int] = {}
+_memo: Dict[str, Tuple[int, Optional[Dict[str, float]]]] = {}  # user -> (profile version, targets)
+
+
+def multiplier(activity: Optional[str]) -> float:
+    return ACTIVITY_MULTIPLIERS.get((activity or "").strip().lower(), ACTIVITY_MULTIPLIERS["sedentary"])
+
+
+def sex_offset(sex: Optional[str]) -> float:
+    return SEX_OFFSETS["M"] if (sex or "").strip().upper().startswith("M") else SEX_OFFSETS["F"]
+
+
+def parse_split(split: Optional[Dict]) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    """(protein, carbs, fat) shares of calories from a settings split; Nones when missing or unusable.
+
+    Values may be fractions (0.3), percentages (30) or strings ("30%").
+    """
+    try:
+        shares = [float(str(split[k]).strip().rstrip("%")) for k in ("protein", "carbs", "fat")]
+    except (TypeError, KeyError, ValueError):
+        return (None, None, None)
+    total = sum(shares)
+    if total <= 0:
+        return (None, None, None)
+    return tuple(s / total for s in shares)
+
+
+def compute(weight_kg, height_cm, age, sex_offset, activity_multiplier, adjust_kcal=0.0,
+            protein_share=None, carbs_share=None, fat_share=None) -> Dict[str, np.ndarray]:
+    """Targets for every element of the (broadcast) inputs; a None or NaN share means no split.
+
+    Returns float arrays: bmr, tdee, calories (TDEE plus ``adjust_kcal``),
+    protein_g, carbs_g and fat_g.
+    """
+    import numpy as np
+    weight_kg, height_cm, age, sex_offset, activity_multiplier, adjust_kcal = (
+        np.asarray(x, dtype=np.float64) for x in (weight_kg, height_cm, age, sex_offset, activity_multiplier,
+                                                  adjust_kcal))
+    protein_share, carbs_share, fat_share = (np.asarray(np.nan if x is None else x, dtype=np.float64)
+                                             for x in (protein_share, carbs_share, fat_share))
+    bmr = 10 * weight_kg + 6.25 * height_cm - 5 * age + sex_offset
+    tdee = bmr * activity_multiplier
+    calories = tdee + adjust_kcal
+
+    split = ~np.isnan(protein_share)
+    default_protein = weight_kg / LB_TO_KG * PROTEIN_G_PER_LB
+    default_fat = calories * DEFAULT_FAT_SHARE / KCAL_PER_G["fat"]
+    protein_g = np.where(split, calories * np.nan_to_num(protein_share) / KCAL_PER_G["protein"], default_protein)
+    fat_g = np.where(split, calories * np.nan_to_num(fat_share) / KCAL_PER_G["fat"], default_fat)
+    carbs_g = np.where(split, calories * np.nan_to_num(carbs_share) / KCAL_PER_G["carbs"],
+                       (calories - protein_g * KCAL_PER_G["protein"] - fat_g * KCAL_PER_G["fat"])
+                       / KCAL_PER_G["carbs"])
+    return {"bmr": bmr, "tdee": tdee, "calories": calories, "protein_g": protein_g, "carbs_g": carbs_g,
+            "fat_g": fat_g}
+
+
+@lru_cache(maxsize=1024)
+def targets(weight_kg: float, height_cm: float, age: float, sex: str = "F", activity: str = "sedentary",
+            adjust_kcal: float = 0.0, protein_share: Optional[float] = None, carbs_share: Optional[float] = None,
+            fat_share: Optional[float] = None) -> Mapping[str, float]:
+    """``compute`` for one person, as plain floats; cached by arguments (e.g. Macro Calculator inputs).
+
+    The cached mapping is shared by every caller with the same arguments, so it is read-only.
+    """
+    found = compute(weight_kg, height_cm, age, sex_offset(sex), multiplier(activity), adjust_kcal,
+                    protein_share, carbs_share, fat_share)
+    return MappingProxyType({k: float(v) for k, v in found.items()})
+
+
+def profile_adjustment(profile: Dict) -> float:
+    """Daily kcal change for the profile's weekly pace, toward its goal weight."""
+    import numpy as np
+    direction = np.sign(profile["goal_weight_kg"] - profile["start_weight_kg"])
+    return float(direction * profile["weekly_pace_lb"] * KCAL_PER_LB_WEEK)
+
+
+def from_profile(profile: Dict, split: Optional[Dict] = None) -> Mapping[str, float]:
+    return targets(profile["start_weight_kg"], profile["height_cm"], profile["age"], profile["sex"],
+                   profile["activity_level"], profile_adjustment(profile), *parse_split(split))
+
+
+def for_user(user_id: str) -> Optional[Mapping[str, float]]:
+    """The user's targets (read-only) from their stored profile and macro split; None without a profile."""
+    import storage
+    storage.init_storage()
+    with _lock:
+        version = _versions.get(user_id, 0)
+        cached = _memo.get(user_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    profile = storage.get_profile(user_id)
+    found = from_profile(profile, storage.get_settings(user_id)) if profile else None
+    with _lock:
+        if _versions.get(user_id, 0) == version:  # not edited meanwhile
+            _memo[user_id] = (version, found)
+    return found
+
+
+def for_users(user_ids: Optional[Iterable[str]] = None):
+    """Targets of every user with a profile (or of ``user_ids``) in one vectorized pass, as a DataFrame."""
+    import numpy as np
+    import pandas as pd
+    import storage
+    storage.init_storage()
+    columns = ["age", "sex", "height_cm", "start_weight_kg", "activity_level", "weekly_pace_lb", "goal_weight_kg"]
+    frame = pd.DataFrame(storage.get_all_profiles(columns), columns=["user_id"] + columns)
+    if user_ids is not None:
+        frame = frame[frame["user_id"].isin(set(user_ids))].reset_index(drop=True)
+    parsed: Dict[str, Tuple[Optional[float], ...]] = {}  # splits repeat a lot: parse each distinct one once
+    shares = np.full((len(frame), 3), np.nan)
+    index = {u: n for n, u in enumerate(frame["user_id"].tolist())}
+    for user_id, split in storage.get_all_settings().items():
+        n = index.get(user_id)
+        if n is not None:
+            key = repr(split)
+            if key not in parsed:
+                parsed[key] = parse_split(split)
+            if parsed[key][0] is not None:
+                shares[n] = parsed[key]
+    sexes = frame["sex"].fillna("").str.strip().str.upper().str.startswith("M").to_numpy(dtype=bool)
+    activity = frame["activity_level"].fillna("").str.strip().str.lower().map(ACTIVITY_MULTIPLIERS)
+    direction = np.sign(frame["goal_weight_kg"].to_numpy() - frame["start_weight_kg"].to_numpy())
+    found = compute(frame["start_weight_kg"].to_numpy(), frame["height_cm"].to_numpy(), frame["age"].to_numpy(),
+                    np.where(sexes, SEX_OFFSETS["M"], SEX_OFFSETS["F"]),
+                    activity.fillna(ACTIVITY_MULTIPLIERS["sedentary"]).to_numpy(),
+                    direction * frame["weekly_pace_lb"].to_numpy() * KCAL_PER_LB_WEEK,
+                    shares[:, 0], shares[:, 1], shares[:, 2])
+    return pd.DataFrame({"user_id": frame["user_id"], **found})
+
+
+def what_if(base: Dict, **axes):
+    """Targets for every combination of the values in ``axes`` around the ``base`` inputs.
+
+    ``base`` and ``axes`` use ``compute``'s argument names, e.g.
+    ``what_if(stats, activity_multiplier=[1.2, 1.55], adjust_kcal=range(-500, 501, 100))``.
+    Returns a DataFrame with one row per combination.
+    """
+    import numpy as np
+    import pandas as pd
+    names = list(axes)
+    grids = np.meshgrid(*[np.asarray(list(axes[n]), dtype=np.float64) for n in names], indexing="ij")
+    inputs = dict(base)
+    inputs.update({n: g.ravel() for n, g in zip(names, grids)})
+    found = compute(**inputs)
+    return pd.DataFrame({**{n: inputs[n] for n in names}, **{k: np.broadcast_to(v, grids[0].size)
+                                                            for k, v in found.items()}})
+
+
+def flags(calories_target, cal_in) -> np.ndarray:
+    """"Under", "OK" or "Over" for each intake against its calorie target (vectorized)."""
+    import numpy as np
+    ratio = np.asarray(cal_in, dtype=np.float64) / np.asarray(calories_target, dtype=np.float64)
+    return np.where(ratio < 1 - ON_TARGET_TOLERANCE, "Under",
+                    np.where(ratio > 1 + ON_TARGET_TOLERANCE, "Over", "OK"))
+
+
+def on_target_flag(user_id: str, cal_in: float) -> Optional[str]:
+    """The daily log's ``on_target_flag``: None when the user has no targets or logged no intake."""
+    found = for_user(user_id)
+    if not found or not cal_in or found["calories"] <= 0:
+        return None
+    return str(flags(found["calories"], cal_in))
+
+
+def forget(user_id: str):
+    with _lock:
+        _versions[user_id] = _versions.get(user_id, 0) + 1
+        _memo.pop(user_id, None)
+
+
+for _topic in ("profile", "settings", "user_deleted"):
+    events.subscribe(_topic, lambda user_id, **_: forget(user_id))
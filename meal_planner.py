@@ -0,0 +1,330 @@
+# meal_planner.py
+"""Weekly meal plans that hit calorie and protein targets under a diet.
+
+``RECIPES`` is a small recipe database (the dishes of the static weekly
+plans plus snacks) with per-serving calories, protein, carbs and fat and
+the most restrictive diet each fits (vegan < pescatarian < omnivore). On
+first use (``_candidates``) every recipe is expanded into candidate portions
+for its meal slots, giving one nutrient matrix (candidates x nutrients) with
+slot, recipe and diet columns alongside, so planning is array arithmetic.
+
+A day is breakfast, lunch, dinner and an optional snack. ``plan_days``
+starts from the candidate closest to each slot's share of the targets, then
+does a pairwise local search: for every pair of slots it scores all
+combinations of their candidates at once (the other slots fixed) and takes
+the best if it improves the day, until a whole round finds nothing. The
+score is the relative calorie miss, a protein shortfall (weighted higher
+than an excess), a small penalty for unusual portions and a variety penalty
+for recipes already eaten this week. It works on arrays of targets, so many
+users' days are searched together: ``plan_week`` chains seven days for one
+user and ``plan_many`` plans for many, solving each distinct (rounded)
+target and diet once, ``BATCH`` at a time.
+"""
+from __future__ import annotations
+import zlib
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DIETS = ("vegan", "pescatarian", "omnivore")  # each allows everything the previous ones do
+SLOTS = ("breakfast", "lunch", "dinner", "snack")
+SLOT_SHARES = (0.25, 0.33, 0.32, 0.10)  # starting split of the day's targets
+PORTIONS = {"breakfast": (0.75, 1.0, 1.25, 1.5), "lunch": (0.75, 1.0, 1.25, 1.5),
+            "dinner": (0.75, 1.0, 1.25, 1.5), "snack": (1.0, 2.0)}
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+PROTEIN_SHORT_WEIGHT = 1.0  # per unit of relative protein shortfall
+PROTEIN_OVER_WEIGHT = 0.15  # per unit of relative protein excess
+PORTION_WEIGHT = 0.03  # per unit of distance from a single serving
+VARIETY_WEIGHT = 0.03  # per earlier serving of the same recipe this week
+SAME_DAY_WEIGHT = 1.0  # the same recipe twice in one day
+ROUND_KCAL = 50  # plan_many solves targets rounded to these steps
+ROUND_PROTEIN = 10
+BATCH = 64  # targets solved together by plan_many
+
+
+class Recipe(NamedTuple):
+    name: str
+    slots: Tuple[str, ...]
+    kcal: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    diet: str  # most restrictive diet it fits
+
+
+_B, _M, _S = ("breakfast",), ("lunch", "dinner"), ("snack",)
+RECIPES: Tuple[Recipe, ...] = (
+    Recipe("Greek yogurt + berries + oats", _B, 350, 25, 45, 8, "pescatarian"),
+    Recipe("Omelet + toast + fruit", _B, 420, 26, 35, 19, "pescatarian"),
+    Recipe("Protein smoothie + banana + PB", _B, 430, 32, 45, 13, "pescatarian"),
+    Recipe("Overnight oats + chia + berries", _B, 380, 14, 58, 11, "vegan"),
+    Recipe("Eggs + avocado toast", _B, 410, 20, 30, 23, "pescatarian"),
+    Recipe("Protein pancakes + fruit", _B, 400, 30, 50, 8, "pescatarian"),
+    Recipe("Cottage cheese + pineapple + granola", _B, 360, 28, 45, 7, "pescatarian"),
+    Recipe("Tofu scramble + toast + fruit", _B, 380, 24, 40, 14, "vegan"),
+    Recipe("Pea-protein smoothie + banana + PB", _B, 410, 30, 45, 12, "vegan"),
+    Recipe("Buckwheat pancakes + fruit", _B, 380, 12, 68, 7, "vegan"),
+    Recipe("Tofu scramble burrito", _B, 450, 26, 48, 16, "vegan"),
+    Recipe("Oatmeal + seeds + berries", _B, 370, 13, 55, 12, "vegan"),
+    Recipe("Soy yogurt + granola + fruit", _B, 340, 14, 52, 9, "vegan"),
+    Recipe("Smoked salmon bagel", ("breakfast", "lunch"), 430, 28, 50, 12, "pescatarian"),
+    Recipe("Chicken, rice & broccoli", _M, 520, 45, 55, 10, "omnivore"),
+    Recipe("Salmon, sweet potato, asparagus", _M, 560, 38, 45, 24, "pescatarian"),
+    Recipe("Turkey wrap + mixed greens", _M, 450, 35, 40, 15, "omnivore"),
+    Recipe("Beef stir-fry + jasmine rice", _M, 600, 38, 62, 20, "omnivore"),
+    Recipe("Chicken fajita bowl", _M, 550, 42, 55, 16, "omnivore"),
+    Recipe("Shrimp tacos + slaw", _M, 480, 32, 48, 16, "pescatarian"),
+    Recipe("Sushi bowl (salmon, rice, edamame)", _M, 580, 34, 70, 16, "pescatarian"),
+    Recipe("Lean beef chili + quinoa", _M, 540, 40, 50, 18, "omnivore"),
+    Recipe("Grilled chicken Caesar", _M, 480, 42, 20, 25, "omnivore"),
+    Recipe("Baked cod + potatoes + green beans", _M, 450, 38, 50, 8, "pescatarian"),
+    Recipe("Turkey burger + salad", _M, 500, 36, 35, 22, "omnivore"),
+    Recipe("Steak + rice + vegetables", _M, 650, 45, 55, 25, "omnivore"),
+    Recipe("Chicken pesto pasta + veggies", _M, 620, 42, 65, 20, "omnivore"),
+    Recipe("Roast chicken + couscous + salad", _M, 560, 44, 52, 18, "omnivore"),
+    Recipe("Tuna salad wrap + greens", _M, 430, 34, 38, 14, "pescatarian"),
+    Recipe("Shrimp quinoa bowl", _M, 480, 34, 52, 12, "pescatarian"),
+    Recipe("Garlic shrimp pasta + salad", _M, 560, 34, 68, 15, "pescatarian"),
+    Recipe("Miso salmon + rice + bok choy", _M, 580, 38, 58, 20, "pescatarian"),
+    Recipe("Veggie chili + avocado toast", _M, 520, 22, 70, 18, "vegan"),
+    Recipe("Mediterranean tuna pasta", _M, 560, 36, 66, 15, "pescatarian"),
+    Recipe("Seared tuna + rice + edamame", _M, 540, 44, 58, 12, "pescatarian"),
+    Recipe("Baked halibut + quinoa + veg", _M, 500, 42, 45, 14, "pescatarian"),
+    Recipe("Shrimp stir-fry + brown rice", _M, 520, 34, 62, 13, "pescatarian"),
+    Recipe("Lentil quinoa bowl + veggies", _M, 520, 24, 80, 12, "vegan"),
+    Recipe("Tempeh stir-fry + rice", _M, 580, 30, 70, 20, "vegan"),
+    Recipe("Chickpea wrap + greens", _M, 480, 18, 66, 16, "vegan"),
+    Recipe("Black bean pasta + broccoli", _M, 520, 34, 72, 8, "vegan"),
+    Recipe("Buddha bowl", _M, 540, 20, 72, 20, "vegan"),
+    Recipe("Lentil curry + basmati rice", _M, 560, 24, 88, 12, "vegan"),
+    Recipe("Hummus + falafel bowl", _M, 600, 20, 70, 26, "vegan"),
+    Recipe("Tofu poke bowl", _M, 520, 28, 62, 16, "vegan"),
+    Recipe("Pea-protein pasta + marinara", _M, 540, 36, 70, 10, "vegan"),
+    Recipe("Tempeh fajitas + tortillas", _M, 560, 32, 58, 22, "vegan"),
+    Recipe("Chickpea quinoa bowl", _M, 520, 22, 78, 14, "vegan"),
+    Recipe("Tofu steak + potatoes + veg", _M, 500, 30, 52, 18, "vegan"),
+    Recipe("Vegan sushi + edamame", _M, 480, 20, 80, 9, "vegan"),
+    Recipe("Lentil bolognese + pasta", _M, 560, 28, 90, 9, "vegan"),
+    Recipe("Protein shake", _S, 160, 30, 5, 2, "pescatarian"),
+    Recipe("Pea-protein shake", _S, 150, 25, 4, 3, "vegan"),
+    Recipe("Apple + peanut butter", _S, 270, 7, 30, 16, "vegan"),
+    Recipe("Greek yogurt cup", _S, 130, 17, 8, 3, "pescatarian"),
+    Recipe("Hard-boiled eggs", _S, 155, 13, 1, 11, "pescatarian"),
+    Recipe("Edamame", _S, 190, 17, 14, 8, "vegan"),
+    Recipe("Jerky + fruit", _S, 210, 18, 25, 3, "omnivore"),
+    Recipe("Hummus + veggies", _S, 200, 7, 20, 11, "vegan"),
+    Recipe("Cottage cheese + berries", _S, 180, 24, 12, 3, "pescatarian"),
+    Recipe("Trail mix", _S, 280, 8, 24, 18, "vegan"),
+    Recipe("Roasted chickpeas", _S, 180, 9, 27, 4, "vegan"),
+)
+NUTRIENTS = ("kcal", "protein_g", "carbs_g", "fat_g")
+
+
+class _Candidates(NamedTuple):
+    """Candidate (recipe, slot, portion) rows; the last row is the empty snack."""
+    recipe: np.ndarray
+    slot: np.ndarray
+    portion: np.ndarray
+    nutrients: np.ndarray  # candidates x NUTRIENTS
+    diet: np.ndarray  # index into DIETS
+    portion_cost: np.ndarray
+
+
+@lru_cache(maxsize=None)
+def _candidates() -> _Candidates:
+    import numpy as np
+    recipe, slot, portion = [], [], []
+    for r, spec in enumerate(RECIPES):
+        for s in spec.slots:
+            for p in PORTIONS[s]:
+                recipe.append(r)
+                slot.append(SLOTS.index(s))
+                portion.append(p)
+    recipe.append(len(RECIPES))  # no snack: a recipe id no variety count ever reaches
+    slot.append(SLOTS.index("snack"))
+    portion.append(0.0)
+    recipe, slot, portion = np.array(recipe), np.array(slot), np.array(portion)
+    per_serving = np.array([[getattr(r, n) for n in NUTRIENTS] for r in RECIPES] + [[0.0] * len(NUTRIENTS)])
+    level = np.array([DIETS.index(r.diet) for r in RECIPES] + [0])
+    portion_cost = PORTION_WEIGHT * np.where(portion > 0, np.abs(portion - 1.0), 0.0)
+    return _Candidates(recipe, slot, portion, per_serving[recipe] * portion[:, None], level[recipe], portion_cost)
+
+
+@lru_cache(maxsize=None)
+def _slot_candidates(diet: str) -> Tuple[np.ndarray, ...]:
+    import numpy as np
+    c = _candidates()
+    allowed = c.diet <= DIETS.index(diet)
+    return tuple(np.flatnonzero(allowed & (c.slot == s)) for s in range(len(SLOTS)))
+
+
+def _score(kcal, protein, calories, protein_g):
+    """Target miss of day totals (arrays broadcast)."""
+    import numpy as np
+    short = np.maximum(0.0, protein_g - protein) / protein_g
+    over = np.maximum(0.0, protein - protein_g) / protein_g
+    return np.abs(kcal - calories) / calories + PROTEIN_SHORT_WEIGHT * short + PROTEIN_OVER_WEIGHT * over
+
+
+def _repeats(recipes: np.ndarray) -> np.ndarray:
+    """Recipes served twice within each row of ``recipes``."""
+    import numpy as np
+    ordered = np.sort(recipes, axis=-1)
+    return (ordered[..., 1:] == ordered[..., :-1]).sum(axis=-1)
+
+
+def _outer_add(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """users x len(a) x len(b) sums of two per-user row vectors, in float32."""
+    import numpy as np
+    return a.astype(np.float32)[:, :, None] + b.astype(np.float32)[:, None, :]
+
+
+def _best_pair(picks, a: int, b: int, slots, calories, protein_g, variety):
+    """Best (cost, row for slot a, row for slot b) per user with the other slots' picks fixed."""
+    import numpy as np
+    c = _candidates()
+    rest = [s for s in range(len(SLOTS)) if s not in (a, b)]
+    others = picks[:, rest]
+    rows_a, rows_b = slots[a], slots[b]
+    base = c.nutrients[others].sum(axis=1)
+    rec_a, rec_b, rec_o = c.recipe[rows_a], c.recipe[rows_b], c.recipe[others]
+    # The score is separable into per-row terms of a and b before abs/max, so the
+    # users x a x b arrays only see a few adds, one abs and one maximum
+    kcal_a = (base[:, 0, None] - calories[:, None] + c.nutrients[rows_a, 0]) / calories[:, None]
+    kcal_b = c.nutrients[rows_b, 0] / calories[:, None]
+    protein_a = (base[:, 1, None] - protein_g[:, None] + c.nutrients[rows_a, 1]) / protein_g[:, None]
+    protein_b = c.nutrients[rows_b, 1] / protein_g[:, None]
+    extra_a = (c.portion_cost[rows_a] + variety[:, rec_a]
+               + SAME_DAY_WEIGHT * (rec_a[None, :, None] == rec_o[:, None, :]).sum(axis=2))
+    extra_b = (c.portion_cost[rows_b] + variety[:, rec_b]
+               + SAME_DAY_WEIGHT * (rec_b[None, :, None] == rec_o[:, None, :]).sum(axis=2))
+    fixed = ((c.portion_cost[others] + np.take_along_axis(variety, rec_o, axis=1)).sum(axis=1)
+             + SAME_DAY_WEIGHT * _repeats(rec_o))
+    cost = np.abs(_outer_add(kcal_a, kcal_b))
+    cost += np.maximum(_outer_add(-PROTEIN_SHORT_WEIGHT * protein_a, -PROTEIN_SHORT_WEIGHT * protein_b),
+                       _outer_add(PROTEIN_OVER_WEIGHT * protein_a, PROTEIN_OVER_WEIGHT * protein_b))
+    cost += _outer_add(extra_a + fixed[:, None], extra_b)
+    cost += SAME_DAY_WEIGHT * (rec_a[:, None] == rec_b[None, :]).astype(np.float32)
+    flat = cost.reshape(len(picks), -1)
+    best = np.argmin(flat, axis=1)
+    i, j = np.divmod(best, len(rows_b))
+    return flat[np.arange(len(picks)), best], rows_a[i], rows_b[j]
+
+
+def plan_days(calories, protein_g, diet: str = "omnivore", eaten: Optional[np.ndarray] = None,
+              max_rounds: int = 20) -> np.ndarray:
+    """Candidate row per slot (users x slots) for one day of each user's targets.
+
+    ``calories`` and ``protein_g`` are arrays with one entry per user;
+    ``eaten`` (users x recipes + 1) counts the servings of each recipe so far
+    this week.
+    """
+    import numpy as np
+    if diet not in DIETS:
+        raise ValueError(f"unknown diet {diet!r}; expected one of {DIETS}")
+    c = _candidates()
+    calories, protein_g = (np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in (calories, protein_g))
+    users = np.arange(len(calories))
+    eaten = np.zeros((len(users), len(RECIPES) + 1)) if eaten is None else eaten
+    variety = VARIETY_WEIGHT * eaten
+    slots = _slot_candidates(diet)
+
+    picks = np.empty((len(users), len(SLOTS)), dtype=np.int64)
+    for s, rows in enumerate(slots):
+        share = SLOT_SHARES[s]
+        cost = _score(c.nutrients[rows, 0], c.nutrients[rows, 1],
+                      calories[:, None] * share, protein_g[:, None] * share)
+        cost += c.portion_cost[rows] + variety[:, c.recipe[rows]]
+        picks[:, s] = rows[np.argmin(cost, axis=1)]
+
+    totals = c.nutrients[picks].sum(axis=1)
+    current = (_score(totals[:, 0], totals[:, 1], calories, protein_g)
+               + (c.portion_cost[picks] + np.take_along_axis(variety, c.recipe[picks], axis=1)).sum(axis=1)
+               + SAME_DAY_WEIGHT * _repeats(c.recipe[picks]))
+    pairs = [(a, b) for a in range(len(SLOTS)) for b in range(a + 1, len(SLOTS))]
+    live = users
+    for _ in range(max_rounds):
+        moved = np.zeros(len(users), dtype=bool)
+        for a, b in pairs:
+            cost, row_a, row_b = _best_pair(picks[live], a, b, slots, calories[live], protein_g[live],
+                                            variety[live])
+            better = cost < current[live] - 1e-5  # float32 costs
+            changed = live[better]
+            picks[changed, a], picks[changed, b] = row_a[better], row_b[better]
+            current[changed] = cost[better]
+            moved[changed] = True
+        live = np.flatnonzero(moved)  # a user with no improving swap in a whole round is done
+        if not len(live):
+            break
+    return picks
+
+
+def _describe(day: str, picks) -> Dict:
+    c = _candidates()
+    meals = []
+    for row in picks:
+        if c.portion[row] == 0:
+            continue
+        nutrients = c.nutrients[row]
+        meals.append({"slot": SLOTS[c.slot[row]], "name": RECIPES[c.recipe[row]].name,
+                      "portion": float(c.portion[row]),
+                      **{n: round(float(v), 1) for n, v in zip(NUTRIENTS, nutrients)}})
+    totals = c.nutrients[picks].sum(axis=0)
+    return {"day": day, "meals": meals, **{n: round(float(v), 1) for n, v in zip(NUTRIENTS, totals)}}
+
+
+def plan_weeks(calories, protein_g, diet: str = "omnivore", days: int = 7) -> List[List[Dict]]:
+    """``plan_week`` for arrays of targets sharing one diet, solved together."""
+    import numpy as np
+    c = _candidates()
+    calories, protein_g = (np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in (calories, protein_g))
+    eaten = np.zeros((len(calories), len(RECIPES) + 1))
+    users = np.arange(len(calories))[:, None]
+    weeks: List[List[Dict]] = [[] for _ in range(len(calories))]
+    for n in range(days):
+        picks = plan_days(calories, protein_g, diet, eaten)
+        np.add.at(eaten, (users, c.recipe[picks]), 1)
+        eaten[:, -1] = 0  # skipping the snack is never repetitive
+        for week, chosen in zip(weeks, picks):
+            week.append(_describe(DAYS[n % len(DAYS)], chosen))
+    return weeks
+
+
+def plan_week(calories: float, protein_g: float, diet: str = "omnivore", days: int = 7) -> List[Dict]:
+    """One plan per day: {"day", "meals": [{"slot", "name", "portion", *NUTRIENTS}], *NUTRIENTS totals}."""
+    return plan_weeks([calories], [protein_g], diet, days)[0]
+
+
+def plan_many(requests: Iterable[Tuple[str, float, float, str]], days: int = 7) -> Dict[str, List[Dict]]:
+    """Plans for (user_id, calories, protein_g, diet) requests.
+
+    Targets are rounded to ``ROUND_KCAL`` / ``ROUND_PROTEIN``; each distinct
+    (targets, diet) is planned once, ``BATCH`` of them per solve. Users
+    sharing one get its days in a different order (by user id) so their
+    weeks do not all start alike.
+    """
+    wanted: Dict[Tuple[str, float, float], List[str]] = {}
+    for user_id, calories, protein_g, diet in requests:
+        if diet not in DIETS:
+            raise ValueError(f"unknown diet {diet!r} for {user_id!r}; expected one of {DIETS}")
+        key = (diet, float(round(calories / ROUND_KCAL) * ROUND_KCAL),
+               float(max(round(protein_g / ROUND_PROTEIN) * ROUND_PROTEIN, ROUND_PROTEIN)))
+        wanted.setdefault(key, []).append(user_id)
+    solved: Dict[Tuple[str, float, float], List[Dict]] = {}
+    for diet in DIETS:
+        keys = [k for k in wanted if k[0] == diet]
+        for n in range(0, len(keys), BATCH):
+            chunk = keys[n:n + BATCH]
+            weeks = plan_weeks([k[1] for k in chunk], [k[2] for k in chunk], diet, days)
+            solved.update(zip(chunk, weeks))
+    plans = {}
+    for key, user_ids in wanted.items():
+        week = solved[key]
+        for user_id in user_ids:
+            shift = zlib.crc32(user_id.encode()) % days
+            plans[user_id] = [dict(day, day=DAYS[n % len(DAYS)])
+                              for n, day in enumerate(week[shift:] + week[:shift])]
+    return plans
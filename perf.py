@@ -0,0 +1,168 @@
+# perf.py
+"""Lightweight per-rerun tracing.
+
+Enable with the ``PERF_TRACE`` environment variable (``1``/``true``). When it
+is off, ``traced`` returns the function unchanged and ``add_bytes`` returns
+immediately, so the disabled cost is one flag check at most.
+
+When enabled, every traced call records wall time (inclusive of nested traced
+calls), the call count and bytes read from disk. The function marked
+``root=True`` (``main``) closes a rerun: the rerun's totals are appended as
+one JSON line to a rotating log (``PERF_LOG``, default ``logs/perf.log``) and
+per-call durations feed the process-wide p50/p95 shown in the admin panel.
+"""
+from __future__ import annotations
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Deque, Dict, List, Optional
+
+ENABLED = os.environ.get("PERF_TRACE", "").strip().lower() in ("1", "true", "yes", "on")
+LOG_PATH = os.environ.get("PERF_LOG", os.path.join("logs", "perf.log"))
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUPS = 3
+WINDOW = 1000  # per-function samples kept for percentiles
+
+_local = threading.local()
+_lock = threading.Lock()
+_samples: Dict[str, Deque[float]] = {}
+_totals: Dict[str, List[float]] = {}  # name -> [calls, seconds, bytes]
+_last_rerun: Optional[Dict] = None
+_logger: Optional[logging.Logger] = None
+
+
+def _span_name(fn: Callable) -> str:
+    module = "app" if fn.__module__ == "__main__" else fn.__module__
+    return f"{module}.{fn.__qualname__}"
+
+
+def _get_logger() -> logging.Logger:
+    global _logger
+    if _logger is None:
+        logger = logging.getLogger("hourglass.perf")
+        logger.propagate = False
+        if not logger.handlers:
+            os.makedirs(os.path.dirname(LOG_PATH) or ".", exist_ok=True)
+            handler = RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+        _logger = logger
+    return _logger
+
+
+def _record(name: str, seconds: float, nbytes: int):
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        stats = rerun.setdefault(name, [0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] += nbytes
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=WINDOW)
+            _totals[name] = [0, 0.0, 0]
+        samples.append(seconds)
+        totals = _totals[name]
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += nbytes
+
+
+def _flush_rerun(name: str, seconds: float):
+    global _last_rerun
+    rerun = _local.rerun
+    _local.rerun = None
+    entry = {
+        "ts": round(time.time(), 3),
+        "root": name,
+        "wall_ms": round(seconds * 1000, 3),
+        "functions": {
+            fn: {"calls": c, "ms": round(s * 1000, 3), "bytes": b}
+            for fn, (c, s, b) in sorted(rerun.items(), key=lambda kv: -kv[1][1])
+        },
+    }
+    _last_rerun = entry
+    try:
+        _get_logger().info(json.dumps(entry, separators=(",", ":")))
+    except OSError:
+        pass
+
+
+def traced(fn: Optional[Callable] = None, *, name: Optional[str] = None, root: bool = False):
+    """Decorator recording wall time, calls and bytes read for ``fn``.
+
+    ``root=True`` marks the function whose call spans a whole rerun.
+    """
+    if fn is None:
+        return functools.partial(traced, name=name, root=root)
+    if not ENABLED:
+        return fn
+
+    span = name or _span_name(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        if root:
+            _local.rerun = {}
+        stack.append(0)
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            nbytes = stack.pop()
+            _record(span, elapsed, nbytes)
+            if root:
+                _flush_rerun(span, elapsed)
+
+    return wrapper
+
+
+def add_bytes(n: int):
+    """Attribute ``n`` bytes read to the innermost traced call."""
+    if not ENABLED:
+        return
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1] += n
+
+
+def summary() -> List[Dict]:
+    """Per-function calls, p50/p95 (ms) and bytes, slowest p95 first."""
+    rows = []
+    with _lock:
+        items = [(name, sorted(samples), list(_totals[name])) for name, samples in _samples.items()]
+    for name, ordered, (calls, seconds, nbytes) in items:
+        n = len(ordered)
+        rows.append({
+            "function": name,
+            "calls": calls,
+            "p50_ms": ordered[(n - 1) // 2] * 1000,
+            "p95_ms": ordered[min(n - 1, int(n * 0.95))] * 1000,
+            "total_ms": seconds * 1000,
+            "bytes": nbytes,
+        })
+    rows.sort(key=lambda r: r["p95_ms"], reverse=True)
+    return rows
+
+
+def last_rerun() -> Optional[Dict]:
+    return _last_rerun
+
+
+def reset():
+    global _last_rerun
+    with _lock:
+        _samples.clear()
+        _totals.clear()
+    _last_rerun = None
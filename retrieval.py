@@ -0,0 +1,197 @@
+# retrieval.py
+"""Local BM25 index over the app's own coaching content.
+
+Many Coach Jo questions ("what can I do instead of hip thrusts at home?",
+"what's the vegan dinner on Friday?") are answered by content the app
+already ships: exercise alternatives, the weekly meal plans, the nutrition
+tips and the programmed exercises. ``Index`` is a small inverted index with
+BM25 scoring built once per process from ``Document``s (``app.py`` builds
+them from its constants).
+
+``route`` decides what to do with a question:
+
+* ``"direct"``: the best document covers the question well and clearly beats
+  the runner-up, so its text is the answer and no provider call is made;
+* ``"augment"``: the top snippets are relevant enough to send along with the
+  prompt as reference material;
+* ``"llm"``: nothing useful was found.
+
+A hit's ``confidence`` is the share of the question's IDF weight that the
+document contains, so it is comparable across questions, unlike raw BM25
+scores.
+"""
+from __future__ import annotations
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DIRECT_AT = float(os.environ.get("COACH_DIRECT_AT", "0.8"))
+AUGMENT_AT = float(os.environ.get("COACH_AUGMENT_AT", "0.4"))
+MARGIN = 1.25  # top score over the runner-up needed for a direct answer
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2  # title terms count this many times
+TITLE_BONUS = 1.5  # score multiplier when the question names every title term
+
+STOPWORDS = frozenset("""
+a about also am an and any are as at be best can could did do does doing for from get give good have how
+i if in into is it its just know like make many me much my need of on or over please really should so
+some take tell than that the their them there these this to try up us use want was way we what when
+where which while who why will with would you your
+""".split())
+
+# Spelling variants and phrasings folded onto the word the content uses
+SYNONYMS = {
+    "substitute": "alternative", "substitution": "alternative", "swap": "alternative",
+    "replace": "alternative", "replacement": "alternative", "instead": "alternative",
+    "option": "alternative", "alternate": "alternative",
+    "rdl": "romanian",
+    "hydrate": "water", "hydration": "water", "drink": "water", "fluid": "water",
+    "supp": "supplement",
+    "preworkout": "pre", "postworkout": "post",
+    "glute": "booty", "butt": "booty",
+    "abs": "core", "ab": "core",
+    "joint": "impact", "knee": "impact",
+    "eat": "meal", "food": "meal",
+}
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 5 and word.endswith("ing"):
+        return word[:-3]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    terms = []
+    for word in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        word = _stem(word)
+        terms.append(SYNONYMS.get(word, word))
+    return terms
+
+
+class Document(NamedTuple):
+    id: str
+    title: str
+    text: str  # shown as the answer or the snippet
+    source: str  # where it lives in the app, e.g. "Meal Plans"
+    keywords: str = ""  # extra indexed terms that are not shown
+
+
+class Hit(NamedTuple):
+    doc: Document
+    score: float
+    confidence: float
+
+
+class Index:
+    def __init__(self, docs: Iterable[Document], k1: float = K1, b: float = B):
+        self.docs: List[Document] = list(docs)
+        self.k1, self.b = k1, b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.terms: List[frozenset] = []
+        self.title_terms: List[frozenset] = []
+        lengths = []
+        for i, doc in enumerate(self.docs):
+            self.title_terms.append(frozenset(tokenize(doc.title)))
+            terms = tokenize(doc.title) * TITLE_WEIGHT + tokenize(doc.text) + tokenize(doc.keywords)
+            counts = Counter(terms)
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+            self.terms.append(frozenset(counts))
+            lengths.append(len(terms))
+        n = len(self.docs)
+        self.lengths = lengths
+        self.avg_length = (sum(lengths) / n) if n else 0.0
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+        self.unknown_idf = math.log(1 + (n + 0.5) / 0.5)  # a term no document contains
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def search(self, query: str, k: int = 3) -> List[Hit]:
+        """Top ``k`` documents for ``query`` by BM25, best first."""
+        terms = set(tokenize(query))
+        if not terms or not self.docs:
+            return []
+        scores: Dict[int, float] = defaultdict(float)
+        for term in terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg_length)
+                scores[i] += idf * tf * (self.k1 + 1) / norm
+        for i in scores:
+            if self.title_terms[i] and self.title_terms[i] <= terms:
+                scores[i] *= TITLE_BONUS
+        weight = {t: self.idf.get(t, self.unknown_idf) for t in terms}
+        total = sum(weight.values())
+        best = sorted(scores.items(), key=lambda kv: -kv[1])[:k]
+        return [
+            Hit(self.docs[i], score, sum(w for t, w in weight.items() if t in self.terms[i]) / total)
+            for i, score in best
+        ]
+
+
+_lock = threading.Lock()
+_stats = {"queries": 0, "direct": 0, "augment": 0, "llm": 0}
+
+
+def route(index: Index, question: str, k: int = 3, record: bool = True) -> Tuple[str, List[Hit]]:
+    """``(decision, hits)``; ``hits`` holds only the relevant documents.
+
+    ``record=False`` leaves the counters alone (pre-warming, benchmarks).
+    """
+    hits = [h for h in index.search(question, k) if h.confidence >= AUGMENT_AT]
+    if not hits:
+        decision = "llm"
+    elif hits[0].confidence >= DIRECT_AT and (len(hits) == 1 or hits[0].score >= MARGIN * hits[1].score):
+        decision = "direct"
+    else:
+        decision = "augment"
+    if not record:
+        return decision, hits
+    with _lock:
+        _stats["queries"] += 1
+        _stats[decision] += 1
+    return decision, hits
+
+
+def answer(hit: Hit) -> str:
+    """Reply text for a direct answer."""
+    return f"{hit.doc.text}\n\n_From {hit.doc.source}. Ask a follow-up for advice tailored to you._"
+
+
+def snippets(hits: List[Hit], max_chars: int = 1200) -> Optional[str]:
+    """Reference text for the prompt, best hit first, within ``max_chars``."""
+    parts, used = [], 0
+    for hit in hits:
+        part = f"[{hit.doc.source}] {hit.doc.title}: {hit.doc.text}"
+        if parts and used + len(part) > max_chars:
+            break
+        parts.append(part[:max_chars])
+        used += len(part)
+    return "\n".join(parts) or None
+
+
+def stats() -> Dict[str, float]:
+    with _lock:
+        out = dict(_stats)
+    out["direct_rate"] = out["direct"] / out["queries"] if out["queries"] else 0.0
+    return out
+
+
+def reset_stats():
+    with _lock:
+        for name in _stats:
+            _stats[name] = 0
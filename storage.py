@@ -1,66 +1,197 @@
 # storage.py
 from __future__ import annotations
 import json
-from typing import Dict, Optional
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
-import pandas as pd
-from sqlalchemy import (
-    Column, Integer, Float, String, create_engine, MetaData, Table,
-    select, and_, insert, update, delete
-)
-from sqlalchemy.engine import Engine
+import events
+import perf
+
+# SQLAlchemy and pandas are imported on first use so that importing this
+# module stays cheap for pages that never touch the database.
+if find_spec("sqlalchemy") is None:
+    raise ImportError("storage requires SQLAlchemy")
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from sqlalchemy import MetaData, Table
+    from sqlalchemy.engine import Engine
 
 _DB_PATH = "data.db"
 engine: Optional[Engine] = None
-metadata = MetaData()
-
-# ---- Tables ----
-profiles = Table(
-    "profiles", metadata,
-    Column("user_id", String, primary_key=True),
-    Column("age", Integer, nullable=False),
-    Column("sex", String, nullable=False),
-    Column("height_cm", Float, nullable=False),
-    Column("start_weight_kg", Float, nullable=False),
-    Column("activity_level", String, nullable=False),
-    Column("weekly_pace_lb", Float, nullable=False),
-    Column("goal_weight_kg", Float, nullable=False),
-    Column("goal_date", String, nullable=False),  # ISO date string
-)
-
-daily_logs = Table(
-    "daily_logs", metadata,
-    Column("id", Integer, primary_key=True, autoincrement=True),
-    Column("user_id", String, nullable=False, index=True),
-    Column("date", String, nullable=False, index=True),  # ISO date string
-    Column("weight_kg", Float, nullable=False),
-    Column("water_l", Float, nullable=False),
-    Column("cal_in", Integer, nullable=False),
-    Column("cal_out", Integer, nullable=False),
-    Column("net_kcal", Integer, nullable=False),
-    Column("waist_in", Float, nullable=True),
-    Column("hips_in", Float, nullable=True),
-    Column("energy_1_10", Integer, nullable=True),
-    Column("notes", String, nullable=True),
-    Column("photo_path", String, nullable=True),
-    Column("on_target_flag", String, nullable=True),
-)
-
-settings = Table(
-    "settings", metadata,
-    Column("user_id", String, primary_key=True),
-    Column("macro_split_json", String, nullable=False),
-)
+metadata: Optional[MetaData] = None
+
+# ---- Tables (defined by init_storage) ----
+profiles: Optional[Table] = None
+daily_logs: Optional[Table] = None
+settings: Optional[Table] = None
+workout_sets: Optional[Table] = None
+streaks: Optional[Table] = None
+badge_metrics: Optional[Table] = None
+badge_awards: Optional[Table] = None
+leaderboard: Optional[Table] = None
+chat_messages: Optional[Table] = None
+device_daily: Optional[Table] = None
+device_accounts: Optional[Table] = None
+challenge_weeks: Optional[Table] = None
+
+
+def _define_tables():
+    global metadata, profiles, daily_logs, settings, workout_sets, streaks, badge_metrics, badge_awards, leaderboard
+    global chat_messages, device_daily, device_accounts, challenge_weeks
+    from sqlalchemy import Column, Integer, Float, String, MetaData, Table, Index
+
+    metadata = MetaData()
+
+    profiles = Table(
+        "profiles", metadata,
+        Column("user_id", String, primary_key=True),
+        Column("age", Integer, nullable=False),
+        Column("sex", String, nullable=False),
+        Column("height_cm", Float, nullable=False),
+        Column("start_weight_kg", Float, nullable=False),
+        Column("activity_level", String, nullable=False),
+        Column("weekly_pace_lb", Float, nullable=False),
+        Column("goal_weight_kg", Float, nullable=False),
+        Column("goal_date", String, nullable=False),  # ISO date string
+    )
+
+    daily_logs = Table(
+        "daily_logs", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("user_id", String, nullable=False, index=True),
+        Column("date", String, nullable=False, index=True),  # ISO date string
+        Column("weight_kg", Float, nullable=False),
+        Column("water_l", Float, nullable=False),
+        Column("cal_in", Integer, nullable=False),
+        Column("cal_out", Integer, nullable=False),
+        Column("net_kcal", Integer, nullable=False),
+        Column("waist_in", Float, nullable=True),
+        Column("hips_in", Float, nullable=True),
+        Column("energy_1_10", Integer, nullable=True),
+        Column("notes", String, nullable=True),
+        Column("photo_path", String, nullable=True),
+        Column("on_target_flag", String, nullable=True),
+    )
+
+    settings = Table(
+        "settings", metadata,
+        Column("user_id", String, primary_key=True),
+        Column("macro_split_json", String, nullable=False),
+    )
+
+    workout_sets = Table(
+        "workout_sets", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("user_id", String, nullable=False, index=True),
+        Column("date", String, nullable=False, index=True),  # ISO date string
+        Column("logged_at", String, nullable=False),  # ISO timestamp
+        Column("exercise_id", String, nullable=False),
+        Column("exercise_name", String, nullable=False),
+        Column("set_num", Integer, nullable=False),
+        Column("reps", Integer, nullable=False),
+        Column("weight", Float, nullable=False),  # lbs, as entered
+        Column("completed", Integer, nullable=False),
+    )
+
+    # Derived from the activity dates above (see streaks.py)
+    streaks = Table(
+        "streaks", metadata,
+        Column("user_id", String, primary_key=True),
+        Column("current", Integer, nullable=False),  # run ending on last_date
+        Column("longest", Integer, nullable=False),
+        Column("last_date", String, nullable=True),  # ISO date string
+        Column("active_days", Integer, nullable=False),
+    )
+
+    # Incrementally maintained badge inputs and the awards (see badges.py)
+    badge_metrics = Table(
+        "badge_metrics", metadata,
+        Column("user_id", String, primary_key=True),
+        Column("metric", String, primary_key=True),
+        Column("state_json", String, nullable=False),
+    )
+
+    badge_awards = Table(
+        "badge_awards", metadata,
+        Column("user_id", String, primary_key=True),
+        Column("badge_key", String, primary_key=True),
+        Column("awarded_at", String, nullable=False),  # ISO timestamp
+    )
+
+    # One row per (board, member); "all" plus weekly challenge boards (see leaderboard.py)
+    leaderboard = Table(
+        "leaderboard", metadata,
+        Column("board", String, primary_key=True),
+        Column("user_id", String, primary_key=True),
+        Column("name", String, nullable=False),
+        Column("score", Integer, nullable=False),
+        Column("last_day", String, nullable=True),  # latest activity date credited a streak bonus
+        Index("ix_leaderboard_board_score", "board", "score", "user_id"),
+    )
+
+    # Shared community chat; ids only grow, so they double as read cursors (see community_chat.py)
+    chat_messages = Table(
+        "chat_messages", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("room", String, nullable=False),
+        Column("user_id", String, nullable=False),
+        Column("name", String, nullable=False),
+        Column("content", String, nullable=False),
+        Column("created_at", String, nullable=False),  # ISO timestamp
+        Index("ix_chat_messages_room_id", "room", "id"),
+        sqlite_autoincrement=True,  # never reuse the id of a deleted message
+    )
+
+    # Daily totals from wearables and imports (steps, resting_hr, sleep_h, ...)
+    device_daily = Table(
+        "device_daily", metadata,
+        Column("user_id", String, primary_key=True),
+        Column("date", String, primary_key=True),  # ISO date string
+        Column("metric", String, primary_key=True),
+        Column("value", Float, nullable=False),
+        Column("source", String, nullable=True),
+    )
+
+    # Connected wearable accounts and their sync cursors (see device_sync.py)
+    device_accounts = Table(
+        "device_accounts", metadata,
+        Column("user_id", String, primary_key=True),
+        Column("provider", String, primary_key=True),
+        Column("token", String, nullable=True),
+        Column("cursor", String, nullable=True),  # last ISO date synced; None until the first sync
+        Column("synced_at", String, nullable=True),  # ISO timestamp
+        Column("status", String, nullable=False, default="connected"),  # connected, ok or error: <reason>
+    )
+
+    # Per-user weekly challenge aggregates (see challenges.py): a bit per
+    # weekday (Monday = 1) that met each criterion, and how many bits are set
+    challenge_weeks = Table(
+        "challenge_weeks", metadata,
+        Column("user_id", String, primary_key=True),
+        Column("week", String, primary_key=True),  # ISO week, e.g. 2026-W43
+        *[Column(f"{name}_{part}", Integer, nullable=False, default=0)
+          for name in ("steps", "workout", "core", "water", "active") for part in ("mask", "days")],
+    )
+
 
 # ---- Init ----
+@perf.traced
 def init_storage():
     global engine
     if engine is None:
+        from sqlalchemy import create_engine
+        _define_tables()
         engine = create_engine(f"sqlite:///{_DB_PATH}", future=True)
+        # WAL lets the many readers (chat polls, leaderboards) run while a write commits
+        with engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
         metadata.create_all(engine)
 
 # ---- Profiles ----
+@perf.traced
 def save_profile(**kwargs):
+    from sqlalchemy import select, insert, update
     with engine.begin() as conn:
         exists = conn.execute(
             select(profiles.c.user_id).where(profiles.c.user_id == kwargs["user_id"])
@@ -69,16 +200,31 @@ def save_profile(**kwargs):
             conn.execute(update(profiles).where(profiles.c.user_id == kwargs["user_id"]).values(**kwargs))
         else:
             conn.execute(insert(profiles).values(**kwargs))
+    events.publish("profile", user_id=kwargs["user_id"])
 
+@perf.traced
 def get_profile(user_id: str) -> Optional[Dict]:
+    from sqlalchemy import select
     with engine.begin() as conn:
         row = conn.execute(
             select(profiles).where(profiles.c.user_id == user_id)
         ).mappings().first()
         return dict(row) if row else None
 
+@perf.traced
+def get_all_profiles(columns: Sequence[str] = ("age", "sex", "height_cm", "start_weight_kg")) -> List[Tuple]:
+    """(user_id, *columns) rows of every profile, ordered by user."""
+    from sqlalchemy import select
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(profiles.c.user_id, *[profiles.c[name] for name in columns]).order_by(profiles.c.user_id)
+        ).all()
+    return [tuple(r) for r in rows]
+
 # ---- Settings ----
+@perf.traced
 def save_settings(user_id: str, settings_dict: Dict):
+    from sqlalchemy import select, insert, update
     payload = json.dumps(settings_dict)
     with engine.begin() as conn:
         exists = conn.execute(
@@ -88,19 +234,32 @@ def save_settings(user_id: str, settings_dict: Dict):
             conn.execute(update(settings).where(settings.c.user_id == user_id).values(macro_split_json=payload))
         else:
             conn.execute(insert(settings).values(user_id=user_id, macro_split_json=payload))
+    events.publish("settings", user_id=user_id)
 
+@perf.traced
 def get_settings(user_id: str) -> Optional[Dict]:
+    from sqlalchemy import select
     with engine.begin() as conn:
         row = conn.execute(
             select(settings.c.macro_split_json).where(settings.c.user_id == user_id)
         ).first()
     return json.loads(row[0]) if row else None
 
+@perf.traced
+def get_all_settings() -> Dict[str, Dict]:
+    """user_id -> parsed macro split, for every user with settings."""
+    from sqlalchemy import select
+    with engine.begin() as conn:
+        rows = conn.execute(select(settings.c.user_id, settings.c.macro_split_json)).all()
+    return {user_id: json.loads(payload) for user_id, payload in rows}
+
 # ---- Daily logs ----
+@perf.traced
 def save_daily_log(
     user_id: str, date: str, weight_kg: float, water_l: float, cal_in: int, cal_out: int,
     waist_in: float, hips_in: float, energy_1_10: int, notes: str, photo_path: str, on_target_flag: str
 ):
+    from sqlalchemy import select, insert, update, and_
     net = int(cal_in - cal_out)
     payload = dict(
         user_id=user_id, date=date, weight_kg=weight_kg, water_l=water_l,
@@ -116,8 +275,12 @@ def save_daily_log(
             conn.execute(update(daily_logs).where(daily_logs.c.id == existing[0]).values(**payload))
         else:
             conn.execute(insert(daily_logs).values(**payload))
+    events.publish("daily_log", user_id=user_id, date=date, water_l=water_l, weight_kg=weight_kg, cal_in=cal_in)
 
+@perf.traced
 def get_logs(user_id: str, start: str, end: str) -> pd.DataFrame:
+    import pandas as pd
+    from sqlalchemy import select, and_
     with engine.begin() as conn:
         rows = conn.execute(
             select(daily_logs).where(
@@ -130,13 +293,426 @@ def get_logs(user_id: str, start: str, end: str) -> pd.DataFrame:
     df["date"] = pd.to_datetime(df["date"])
     return df.sort_values("date")
 
+@perf.traced
+def get_log_series(
+    user_id: str, start: str, end: str, columns: Sequence[str] = ("weight_kg",)
+) -> List[Tuple]:
+    """(date, *columns) rows ordered by date, without building a DataFrame."""
+    from sqlalchemy import select, and_
+    cols = [daily_logs.c[name] for name in columns]
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(daily_logs.c.date, *cols).where(
+                and_(daily_logs.c.user_id == user_id, daily_logs.c.date >= start, daily_logs.c.date <= end)
+            ).order_by(daily_logs.c.date)
+        ).all()
+    return [tuple(r) for r in rows]
+
+# ---- Workout sets ----
+@perf.traced
+def save_workout_set(
+    user_id: str, date: str, exercise_id: str, exercise_name: str, set_num: int, reps: int,
+    weight: float, completed: bool, logged_at: Optional[str] = None
+):
+    from datetime import datetime
+    from sqlalchemy import insert
+    payload = dict(
+        user_id=user_id, date=date, logged_at=logged_at or datetime.now().isoformat(timespec="seconds"),
+        exercise_id=str(exercise_id), exercise_name=exercise_name, set_num=int(set_num),
+        reps=int(reps), weight=float(weight), completed=int(bool(completed)),
+    )
+    with engine.begin() as conn:
+        conn.execute(insert(workout_sets).values(**payload))
+    events.publish("workout_set", user_id=user_id, date=date, completed=bool(completed),
+                   exercise_id=payload["exercise_id"], exercise_name=exercise_name, reps=payload["reps"],
+                   weight=payload["weight"], logged_at=payload["logged_at"])
+
+@perf.traced
+def get_workout_sets(user_id: str, start: str, end: str) -> List[Dict]:
+    from sqlalchemy import select, and_
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(workout_sets).where(
+                and_(workout_sets.c.user_id == user_id, workout_sets.c.date >= start, workout_sets.c.date <= end)
+            ).order_by(workout_sets.c.date, workout_sets.c.id)
+        ).mappings().all()
+    return [dict(r) for r in rows]
+
+@perf.traced
+def get_set_series(
+    user_id: str, start: str, end: str, columns: Sequence[str] = ("exercise_name",)
+) -> List[Tuple]:
+    """(date, *columns) rows of completed sets ordered by date and id, without the full rows."""
+    from sqlalchemy import select, and_
+    cols = [workout_sets.c[name] for name in columns]
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(workout_sets.c.date, *cols).where(
+                and_(workout_sets.c.user_id == user_id, workout_sets.c.completed == 1,
+                     workout_sets.c.date >= start, workout_sets.c.date <= end)
+            ).order_by(workout_sets.c.date, workout_sets.c.id)
+        ).all()
+    return [tuple(r) for r in rows]
+
+@perf.traced
+def get_activity_dates(user_id: str) -> List[str]:
+    """Distinct dates with a daily check-in or a completed set, ascending."""
+    from sqlalchemy import select, union, and_
+    query = union(
+        select(daily_logs.c.date).where(daily_logs.c.user_id == user_id),
+        select(workout_sets.c.date).where(and_(workout_sets.c.user_id == user_id, workout_sets.c.completed == 1)),
+    ).order_by("date")
+    with engine.begin() as conn:
+        return [r[0] for r in conn.execute(query)]
+
+# ---- Streaks ----
+@perf.traced
+def get_streak(user_id: str) -> Optional[Dict]:
+    from sqlalchemy import select
+    with engine.begin() as conn:
+        row = conn.execute(select(streaks).where(streaks.c.user_id == user_id)).mappings().first()
+    return dict(row) if row else None
+
+@perf.traced
+def save_streak(user_id: str, current: int, longest: int, last_date: Optional[str], active_days: int):
+    from sqlalchemy import select, insert, update
+    payload = dict(current=current, longest=longest, last_date=last_date, active_days=active_days)
+    with engine.begin() as conn:
+        exists = conn.execute(select(streaks.c.user_id).where(streaks.c.user_id == user_id)).first()
+        if exists:
+            conn.execute(update(streaks).where(streaks.c.user_id == user_id).values(**payload))
+        else:
+            conn.execute(insert(streaks).values(user_id=user_id, **payload))
+
+# ---- Badges ----
+@perf.traced
+def get_badge_state(user_id: str) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+    """(metric -> state, badge key -> awarded_at) for one user."""
+    from sqlalchemy import select
+    with engine.begin() as conn:
+        metrics = conn.execute(
+            select(badge_metrics.c.metric, badge_metrics.c.state_json).where(badge_metrics.c.user_id == user_id)
+        ).all()
+        awards = conn.execute(
+            select(badge_awards.c.badge_key, badge_awards.c.awarded_at).where(badge_awards.c.user_id == user_id)
+        ).all()
+    return {m: json.loads(state) for m, state in metrics}, dict(awards)
+
+@perf.traced
+def save_badge_state(user_id: str, metrics: Dict[str, Dict], awards: Dict[str, str]):
+    """Upsert metric states and add awards (existing awards keep their timestamp)."""
+    save_badge_states([(user_id, metrics, awards)])
+
+@perf.traced
+def save_badge_states(rows: Sequence[Tuple[str, Dict[str, Dict], Dict[str, str]]]):
+    """``save_badge_state`` for many users in one transaction (batch re-evaluation)."""
+    from sqlalchemy.dialects.sqlite import insert
+    with engine.begin() as conn:
+        for user_id, metrics, awards in rows:
+            for metric, state in metrics.items():
+                stmt = insert(badge_metrics).values(user_id=user_id, metric=metric, state_json=json.dumps(state))
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=["user_id", "metric"], set_={"state_json": stmt.excluded.state_json}))
+            for key, awarded_at in awards.items():
+                conn.execute(insert(badge_awards).values(
+                    user_id=user_id, badge_key=key, awarded_at=awarded_at).on_conflict_do_nothing())
+
+@perf.traced
+def get_user_ids() -> List[str]:
+    """Users with any logged activity."""
+    from sqlalchemy import select, union
+    with engine.begin() as conn:
+        return [r[0] for r in conn.execute(
+            union(select(daily_logs.c.user_id), select(workout_sets.c.user_id)).order_by("user_id"))]
+
+# ---- Device metrics ----
+@perf.traced
+def save_device_daily(rows: Sequence[Dict], cursors: Sequence[Dict] = ()):
+    """Upsert daily device totals (dicts of user_id, date, metric, value, source) in one transaction.
+
+    ``cursors`` (dicts of user_id, provider, cursor, synced_at, status) are
+    updated in the same transaction, so a sync cursor never gets ahead of
+    the rows it covers. One ``device_daily`` event is published per user.
+    """
+    from sqlalchemy import update, bindparam
+    from sqlalchemy.dialects.sqlite import insert
+    if not rows and not cursors:
+        return
+    stmt = insert(device_daily)
+    with engine.begin() as conn:
+        if rows:
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=["user_id", "date", "metric"],
+                set_={"value": stmt.excluded.value, "source": stmt.excluded.source}), list(rows))
+        if cursors:
+            conn.execute(
+                update(device_accounts)
+                .where(device_accounts.c.user_id == bindparam("b_user_id"),
+                       device_accounts.c.provider == bindparam("b_provider"))
+                .values(cursor=bindparam("b_cursor"), synced_at=bindparam("b_synced_at"),
+                        status=bindparam("b_status")),
+                [{f"b_{k}": c[k] for k in ("user_id", "provider", "cursor", "synced_at", "status")}
+                 for c in cursors])
+    by_user: Dict[str, List[Tuple]] = {}
+    for r in rows:
+        by_user.setdefault(r["user_id"], []).append((r["date"], r["metric"], r["value"]))
+    for user_id, entries in by_user.items():
+        events.publish("device_daily", user_id=user_id, entries=entries)
+
+@perf.traced
+def get_device_daily(start: str, end: str, metric: str, user_id: Optional[str] = None) -> List[Tuple]:
+    """(user_id, date, value) rows for ``metric``, one user or everyone."""
+    from sqlalchemy import select, and_
+    where = [device_daily.c.metric == metric, device_daily.c.date >= start, device_daily.c.date <= end]
+    if user_id is not None:
+        where.append(device_daily.c.user_id == user_id)
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(device_daily.c.user_id, device_daily.c.date, device_daily.c.value).where(and_(*where))
+        ).all()
+    return [tuple(r) for r in rows]
+
+@perf.traced
+def get_device_history(user_id: str, start: str, end: str) -> List[Tuple]:
+    """(date, metric, value) rows of one user's device totals, oldest first."""
+    from sqlalchemy import select, and_
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(device_daily.c.date, device_daily.c.metric, device_daily.c.value)
+            .where(and_(device_daily.c.user_id == user_id, device_daily.c.date >= start, device_daily.c.date <= end))
+            .order_by(device_daily.c.date, device_daily.c.metric)
+        ).all()
+    return [tuple(r) for r in rows]
+
+@perf.traced
+def save_device_account(user_id: str, provider: str, token: Optional[str]):
+    """Connect (or re-connect with a new token) ``provider`` for the user; the sync cursor is kept."""
+    from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(device_accounts).values(user_id=user_id, provider=provider, token=token, status="connected")
+    with engine.begin() as conn:
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=["user_id", "provider"], set_={"token": token, "status": "connected"}))
+
+@perf.traced
+def get_device_accounts(provider: Optional[str] = None, user_id: Optional[str] = None) -> List[Dict]:
+    from sqlalchemy import select, and_
+    where = []
+    if provider is not None:
+        where.append(device_accounts.c.provider == provider)
+    if user_id is not None:
+        where.append(device_accounts.c.user_id == user_id)
+    query = select(device_accounts).order_by(device_accounts.c.user_id, device_accounts.c.provider)
+    if where:
+        query = query.where(and_(*where))
+    with engine.begin() as conn:
+        rows = conn.execute(query).mappings().all()
+    return [dict(r) for r in rows]
+
+@perf.traced
+def delete_device_account(user_id: str, provider: str):
+    from sqlalchemy import delete
+    with engine.begin() as conn:
+        conn.execute(delete(device_accounts).where(
+            device_accounts.c.user_id == user_id, device_accounts.c.provider == provider))
+
+# ---- Cross-user reads (batch jobs) ----
+@perf.traced
+def get_all_log_series(start: str, end: str, columns: Sequence[str] = ("weight_kg",)) -> List[Tuple]:
+    """(user_id, date, *columns) daily-log rows of every user, ordered by user and date."""
+    from sqlalchemy import select, and_
+    cols = [daily_logs.c[name] for name in columns]
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(daily_logs.c.user_id, daily_logs.c.date, *cols)
+            .where(and_(daily_logs.c.date >= start, daily_logs.c.date <= end))
+            .order_by(daily_logs.c.user_id, daily_logs.c.date)
+        ).all()
+    return [tuple(r) for r in rows]
+
+@perf.traced
+def get_all_set_series(start: str, end: str, columns: Sequence[str] = ("exercise_name",)) -> List[Tuple]:
+    """(user_id, date, *columns) completed-set rows of every user, ordered by user, date and id."""
+    from sqlalchemy import select, and_
+    cols = [workout_sets.c[name] for name in columns]
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(workout_sets.c.user_id, workout_sets.c.date, *cols)
+            .where(and_(workout_sets.c.completed == 1, workout_sets.c.date >= start, workout_sets.c.date <= end))
+            .order_by(workout_sets.c.user_id, workout_sets.c.date, workout_sets.c.id)
+        ).all()
+    return [tuple(r) for r in rows]
+
+# ---- Challenges ----
+@perf.traced
+def get_challenge_week(user_id: str, week: str) -> Optional[Dict]:
+    from sqlalchemy import select, and_
+    with engine.begin() as conn:
+        row = conn.execute(select(challenge_weeks).where(
+            and_(challenge_weeks.c.user_id == user_id, challenge_weeks.c.week == week))).mappings().first()
+    return dict(row) if row else None
+
+@perf.traced
+def save_challenge_weeks(rows: Sequence[Dict]):
+    """Upsert full ``challenge_weeks`` rows in one transaction."""
+    from sqlalchemy.dialects.sqlite import insert
+    if not rows:
+        return
+    stmt = insert(challenge_weeks)
+    columns = [c.name for c in challenge_weeks.columns if c.name not in ("user_id", "week")]
+    with engine.begin() as conn:
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=["user_id", "week"], set_={c: stmt.excluded[c] for c in columns}), list(rows))
+
+@perf.traced
+def get_challenge_board(board: str, week: str, column: str, k: int = 10) -> List[Dict]:
+    """Members of leaderboard ``board`` with their ``column`` for ``week``, highest first."""
+    from sqlalchemy import select, and_, func
+    days = func.coalesce(challenge_weeks.c[column], 0).label("days")
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(leaderboard.c.user_id, leaderboard.c.name, days)
+            .select_from(leaderboard.outerjoin(challenge_weeks, and_(
+                challenge_weeks.c.user_id == leaderboard.c.user_id, challenge_weeks.c.week == week)))
+            .where(leaderboard.c.board == board)
+            .order_by(days.desc(), leaderboard.c.user_id)
+            .limit(k)
+        ).mappings().all()
+    return [dict(r) for r in rows]
+
+# ---- Leaderboard ----
+@perf.traced
+def get_leaderboard_rows(user_id: str) -> List[Dict]:
+    """The user's row on every board they are on."""
+    from sqlalchemy import select
+    with engine.begin() as conn:
+        rows = conn.execute(select(leaderboard).where(leaderboard.c.user_id == user_id)).mappings().all()
+    return [dict(r) for r in rows]
+
+@perf.traced
+def get_board_scores(board: str) -> List[int]:
+    from sqlalchemy import select
+    with engine.begin() as conn:
+        return [r[0] for r in conn.execute(select(leaderboard.c.score).where(leaderboard.c.board == board))]
+
+@perf.traced
+def get_board_top(board: str, k: int, after: Optional[Tuple[int, str]] = None) -> List[Dict]:
+    """Highest (score, user_id) first, walking the (board, score, user_id) index.
+
+    ``after`` is the (score, user_id) of the previous page's last row, so a
+    deep page costs the same as the first.
+    """
+    from sqlalchemy import select, tuple_
+    query = select(leaderboard.c.user_id, leaderboard.c.name, leaderboard.c.score).where(leaderboard.c.board == board)
+    if after is not None:
+        query = query.where(tuple_(leaderboard.c.score, leaderboard.c.user_id) < tuple_(*after))
+    with engine.begin() as conn:
+        rows = conn.execute(
+            query.order_by(leaderboard.c.score.desc(), leaderboard.c.user_id.desc()).limit(k)
+        ).mappings().all()
+    return [dict(r) for r in rows]
+
+@perf.traced
+def add_board_scores(user_id: str, deltas: Dict[str, int], last_day: Optional[str] = None) -> Dict[str, Tuple[int, int]]:
+    """Add ``deltas`` (board -> points) to existing rows in one transaction.
+
+    ``last_day`` is stored on the boards that changed. Returns board ->
+    (old score, new score) for the boards the user is on.
+    """
+    from sqlalchemy import select, update, and_
+    changed = {}
+    with engine.begin() as conn:
+        for board, delta in deltas.items():
+            where = and_(leaderboard.c.board == board, leaderboard.c.user_id == user_id)
+            row = conn.execute(select(leaderboard.c.score).where(where)).first()
+            if row is None:
+                continue
+            values = {"score": row[0] + delta}
+            if last_day is not None:
+                values["last_day"] = last_day
+            conn.execute(update(leaderboard).where(where).values(**values))
+            changed[board] = (row[0], row[0] + delta)
+    return changed
+
+@perf.traced
+def save_board_row(board: str, user_id: str, name: str, score: int, last_day: Optional[str] = None) -> Optional[int]:
+    """Insert or replace one board row; returns the previous score (None for a new row)."""
+    from sqlalchemy import select, insert, update, and_
+    with engine.begin() as conn:
+        where = and_(leaderboard.c.board == board, leaderboard.c.user_id == user_id)
+        row = conn.execute(select(leaderboard.c.score).where(where)).first()
+        values = dict(name=name, score=int(score), last_day=last_day)
+        if row:
+            conn.execute(update(leaderboard).where(where).values(**values))
+        else:
+            conn.execute(insert(leaderboard).values(board=board, user_id=user_id, **values))
+    return row[0] if row else None
+
+@perf.traced
+def set_board_name(user_id: str, name: str):
+    from sqlalchemy import update
+    with engine.begin() as conn:
+        conn.execute(update(leaderboard).where(leaderboard.c.user_id == user_id).values(name=name))
+
+# ---- Community chat ----
+@perf.traced
+def save_chat_message(room: str, user_id: str, name: str, content: str) -> Dict:
+    from datetime import datetime
+    from sqlalchemy import insert
+    payload = dict(room=room, user_id=user_id, name=name, content=content,
+                   created_at=datetime.now().isoformat(timespec="seconds"))
+    with engine.begin() as conn:
+        payload["id"] = conn.execute(insert(chat_messages).values(**payload)).inserted_primary_key[0]
+    events.publish("chat_message", **payload)
+    return payload
+
+@perf.traced
+def get_chat_messages(
+    room: str, after_id: Optional[int] = None, before_id: Optional[int] = None, limit: int = 50
+) -> List[Dict]:
+    """Messages of ``room`` in id order, from the (room, id) index.
+
+    ``after_id`` returns up to ``limit`` messages newer than it (oldest
+    first); otherwise the ``limit`` newest messages older than ``before_id``
+    (or the newest overall).
+    """
+    from sqlalchemy import select, and_
+    query = select(chat_messages).where(chat_messages.c.room == room)
+    if after_id is not None:
+        query = query.where(chat_messages.c.id > after_id).order_by(chat_messages.c.id)
+    else:
+        if before_id is not None:
+            query = query.where(chat_messages.c.id < before_id)
+        query = query.order_by(chat_messages.c.id.desc())
+    with engine.begin() as conn:
+        rows = [dict(r) for r in conn.execute(query.limit(limit)).mappings()]
+    return rows if after_id is not None else rows[::-1]
+
+@perf.traced
+def get_latest_chat_id(room: str) -> int:
+    from sqlalchemy import select, func
+    with engine.begin() as conn:
+        return conn.execute(select(func.max(chat_messages.c.id)).where(chat_messages.c.room == room)).scalar() or 0
+
 # ---- Admin ----
+@perf.traced
 def delete_all_user_data(user_id: str):
+    from sqlalchemy import delete
     with engine.begin() as conn:
         conn.execute(delete(daily_logs).where(daily_logs.c.user_id == user_id))
         conn.execute(delete(profiles).where(profiles.c.user_id == user_id))
         conn.execute(delete(settings).where(settings.c.user_id == user_id))
+        conn.execute(delete(workout_sets).where(workout_sets.c.user_id == user_id))
+        conn.execute(delete(streaks).where(streaks.c.user_id == user_id))
+        conn.execute(delete(badge_metrics).where(badge_metrics.c.user_id == user_id))
+        conn.execute(delete(badge_awards).where(badge_awards.c.user_id == user_id))
+        conn.execute(delete(leaderboard).where(leaderboard.c.user_id == user_id))
+        conn.execute(delete(chat_messages).where(chat_messages.c.user_id == user_id))
+        conn.execute(delete(device_daily).where(device_daily.c.user_id == user_id))
+        conn.execute(delete(device_accounts).where(device_accounts.c.user_id == user_id))
+        conn.execute(delete(challenge_weeks).where(challenge_weeks.c.user_id == user_id))
+    events.publish("user_deleted", user_id=user_id)
 
+@perf.traced
 def export_logs_csv(user_id: str) -> str:
     df = get_logs(user_id, "1900-01-01", "2999-12-31")
     path = f"{user_id}_logs.csv"
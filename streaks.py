@@ -0,0 +1,145 @@
+# streaks.py
+"""Workout streaks from distinct activity dates.
+
+An activity date is a day with a daily check-in or at least one completed
+set (``storage.get_activity_dates``). A streak is a run of consecutive
+activity dates; ``current`` is the run that ends on the latest one and
+``longest`` the longest run so far.
+
+The result is stored per user in the ``streaks`` table and kept up to date
+from the write events ``storage`` publishes (``events.py``): a new latest
+date only needs the stored row, so ``record`` is O(1). A date older than the
+latest one (an edited or backfilled log) falls back to ``recompute``, which
+runs ``compute`` over all of the user's dates with NumPy.
+
+``get`` reports the streak as of today: a run that ended before yesterday is
+broken, so ``current`` shows 0 while ``longest`` keeps it.
+"""
+from __future__ import annotations
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+import events
+
+# storage (SQLAlchemy) is imported on first use, so compute() and as_of()
+# also work where storage is unavailable.
+
+_lock = threading.Lock()
+_cache: Dict[str, Dict] = {}  # user -> stored row, so record() skips the read
+
+
+def empty() -> Dict:
+    return {"current": 0, "longest": 0, "last_date": None, "active_days": 0}
+
+
+def compute(dates: Iterable[str]) -> Dict:
+    """Streak state for ISO ``dates`` (any order, duplicates allowed)."""
+    import numpy as np
+    days = np.unique(np.asarray(list(dates), dtype="datetime64[D]"))
+    if days.size == 0:
+        return empty()
+    breaks = np.flatnonzero(np.diff(days) != np.timedelta64(1, "D")) + 1
+    runs = np.diff(np.concatenate(([0], breaks, [days.size])))
+    return {
+        "current": int(runs[-1]),
+        "longest": int(runs.max()),
+        "last_date": str(days[-1]),
+        "active_days": int(days.size),
+    }
+
+
+def advance(state: Dict, day: str) -> Optional[Dict]:
+    """State after activity on ``day``, or None when ``day`` predates the latest date."""
+    last = state["last_date"]
+    if last is None:
+        return {"current": 1, "longest": max(state["longest"], 1), "last_date": day, "active_days": 1}
+    if day <= last:  # ISO dates compare in date order
+        return dict(state) if day == last else None
+    gap = (date.fromisoformat(day) - date.fromisoformat(last)).days
+    current = state["current"] + 1 if gap == 1 else 1
+    return {
+        "current": current,
+        "longest": max(state["longest"], current),
+        "last_date": day,
+        "active_days": state["active_days"] + 1,
+    }
+
+
+def _stored(user_id: str) -> Optional[Dict]:
+    import storage
+    state = _cache.get(user_id)
+    if state is None:
+        row = storage.get_streak(user_id)
+        if row is not None:
+            state = {k: row[k] for k in ("current", "longest", "last_date", "active_days")}
+            _cache[user_id] = state
+    return state
+
+
+def _save(user_id: str, state: Dict):
+    import storage
+    storage.save_streak(user_id, **state)
+    _cache[user_id] = state
+
+
+def recompute(user_id: str) -> Dict:
+    """Rebuild the user's stored streak from all activity dates."""
+    import storage
+    with _lock:
+        state = compute(storage.get_activity_dates(user_id))
+        _save(user_id, state)
+        return dict(state)
+
+
+def record(user_id: str, day: str) -> Dict:
+    """Count activity on ``day``; O(1) unless ``day`` is older than the latest date."""
+    with _lock:
+        state = _stored(user_id)
+        updated = advance(state, day) if state is not None else None
+        if updated is not None:
+            if updated != state:
+                _save(user_id, updated)
+            return dict(updated)
+    return recompute(user_id)  # first sight of this user, or a backfilled date
+
+
+def get(user_id: str, today: Optional[str] = None) -> Dict:
+    """The user's streak as of ``today`` (built from their history the first time)."""
+    import storage
+    storage.init_storage()
+    with _lock:
+        state = _stored(user_id)
+    state = dict(state) if state is not None else recompute(user_id)
+    return as_of(state, today)
+
+
+def as_of(state: Dict, today: Optional[str] = None) -> Dict:
+    """``state`` with ``current`` zeroed when the run ended before yesterday."""
+    today = today or date.today().isoformat()
+    yesterday = (date.fromisoformat(today) - timedelta(days=1)).isoformat()
+    state = dict(state)
+    if state["last_date"] is None or state["last_date"] < yesterday:
+        state["current"] = 0
+    return state
+
+
+def forget(user_id: str):
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def reset():
+    """Drop every cached streak, e.g. after switching databases."""
+    with _lock:
+        _cache.clear()
+
+
+def _on_activity(user_id: str, date: str, completed: bool = True, **_):
+    if completed:
+        record(user_id, date)
+
+
+events.subscribe("daily_log", _on_activity)
+events.subscribe("workout_set", _on_activity)
+events.subscribe("user_deleted", lambda user_id, **_: forget(user_id))
@@ -0,0 +1,69 @@
+# tests/activity.py
+"""Random activity written through ``storage``, for checking the event-driven engines.
+
+The engines update from the events ``storage`` publishes, as in the app.
+``replay`` calls ``check`` every ``CHECK_EVERY`` writes (a backfill rebuilds
+state, so only checking at the end would miss drift that happened before
+it). The activity includes backfilled dates, same-day re-saves and a
+deleted user who keeps logging afterwards.
+"""
+from __future__ import annotations
+import random
+from datetime import date, timedelta
+
+import leaderboard
+import storage
+
+START = date(2026, 1, 5)
+USERS = ("ana", "bea", "cam", "dee")
+DELETED = "cam"  # all of their data is removed halfway through the replay
+EXERCISES = (("hip_thrust", "Hip Thrust"), ("rdls_romanian_deadlifts", "RDLs (Romanian Deadlifts)"),
+             ("kickbacks", "Glute Kickbacks"), ("leg_press", "Leg Press"), ("plank", "Plank"),
+             ("bicycle_crunch", "Bicycle Crunch"), ("overhead_press", "Overhead Press"))
+SEEDS = (1, 2)
+CHECK_EVERY = 20
+
+
+def replay(seed: int, check, steps: int = 400):
+    """Write random sets, check-ins and step totals, calling ``check(weeks touched so far)`` along the way."""
+    rng = random.Random(seed)
+    latest = {}
+    weeks = set()
+    for n in range(steps):
+        if n and n % CHECK_EVERY == 0:
+            check(weeks)
+        if n == steps // 2 + CHECK_EVERY // 2:  # between checks, while every engine has the user cached
+            storage.delete_all_user_data(DELETED)  # they carry on from the same date with no history
+            check(weeks)
+        user = rng.choice(USERS)
+        last = latest.get(user)
+        roll = rng.random()
+        if last is None:
+            day = START + timedelta(days=rng.randrange(7))
+        elif roll < 0.15:
+            day = last - timedelta(days=rng.randrange(1, 20))  # backfilled
+        elif roll < 0.45:
+            day = last  # the same day again: another set or a re-saved check-in
+        else:
+            day = last + timedelta(days=rng.choice((1, 1, 1, 2, 3)))
+        latest[user] = max(day, last or day)
+        iso = day.isoformat()
+        kind = rng.random()
+        if kind < 0.55:
+            exercise_id, name = rng.choice(EXERCISES)
+            storage.save_workout_set(
+                user, iso, exercise_id, name, 1, rng.randint(1, 15),
+                0.0 if exercise_id == "plank" else 2.5 * rng.randint(4, 60), rng.random() < 0.9,
+                f"{iso}T{rng.randrange(5, 22):02d}:{rng.randrange(60):02d}:00")
+        elif kind < 0.9:
+            storage.save_daily_log(
+                user, iso, 70 + rng.gauss(0, 1) - 0.02 * (day - START).days, rng.choice((1.0, 1.5, 2.0, 2.5, 3.0)),
+                rng.randrange(1400, 2400, 10), 300, None, None, None, "", "", "OK")
+        else:
+            days = [day - timedelta(days=k) for k in range(rng.randint(1, 3))]
+            storage.save_device_daily([
+                {"user_id": user, "date": d.isoformat(), "metric": "steps", "value": float(rng.randrange(3000, 14000)),
+                 "source": "test"} for d in days])
+            weeks.update(leaderboard.week_of(d.isoformat()) for d in days)
+        weeks.add(leaderboard.week_of(iso))
+    check(weeks)
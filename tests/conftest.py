@@ -0,0 +1,35 @@
+# tests/conftest.py
+"""Shared fixtures: a fresh SQLite database per test and empty engine caches."""
+from __future__ import annotations
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import badges  # noqa: E402
+import challenges  # noqa: E402
+import forecast  # noqa: E402
+import leaderboard  # noqa: E402
+import lift_analytics  # noqa: E402
+import storage  # noqa: E402
+import streaks  # noqa: E402
+
+_ENGINES = (badges, challenges, forecast, leaderboard, lift_analytics, streaks)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """``storage`` on an empty database in ``tmp_path``, with every engine's in-memory state cleared."""
+    if storage.engine is not None:
+        storage.engine.dispose()
+    monkeypatch.setattr(storage, "engine", None)
+    monkeypatch.setattr(storage, "_DB_PATH", str(tmp_path / "test.db"))
+    storage.init_storage()
+    for engine in _ENGINES:
+        engine.reset()
+    yield storage
+    storage.engine.dispose()
+    for engine in _ENGINES:
+        engine.reset()
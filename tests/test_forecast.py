@@ -0,0 +1,19 @@
+# tests/test_forecast.py
+"""Forecast states advanced by events must match a recompute from all logs."""
+from __future__ import annotations
+
+import pytest
+
+import forecast
+from activity import SEEDS, USERS, replay
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_forecast_matches_recompute(db, seed):
+    def check(weeks):
+        for user in USERS:
+            kept = forecast.get(user)
+            forecast.recompute(user)
+            assert kept == pytest.approx(forecast.get(user), rel=1e-9, nan_ok=True), user
+
+    replay(seed, check)
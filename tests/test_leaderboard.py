@@ -0,0 +1,37 @@
+# tests/test_leaderboard.py
+"""Scores and ranks moved by events must match a rebuild from history."""
+from __future__ import annotations
+from datetime import timedelta
+
+import pytest
+
+import leaderboard
+import storage
+from activity import DELETED, SEEDS, START, USERS, replay
+
+CHALLENGE = "3 workouts"
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_leaderboard_matches_rebuild(db, seed):
+    board = leaderboard.join("ana", "Ana", CHALLENGE, (START + timedelta(days=14)).isoformat())
+    leaderboard.join("dee", "Dee", CHALLENGE, (START + timedelta(days=14)).isoformat())
+
+    def check(weeks):
+        for user in USERS:
+            rows = {r["board"]: r["score"] for r in storage.get_leaderboard_rows(user)}
+            assert rows == (leaderboard.history_points(user, rows)[0] if rows else {}), user
+        for name in (leaderboard.ALL, board):
+            scores = storage.get_board_scores(name)
+            ranked = {r["user_id"]: r for r in leaderboard.top(name, k=len(USERS))}
+            for user in USERS:
+                row = ranked.get(user)
+                expected = row and {"rank": 1 + sum(s > row["score"] for s in scores), "score": row["score"],
+                                    "members": len(scores)}
+                assert leaderboard.rank(name, user) == expected, (name, user)
+                assert row is None or row["rank"] == expected["rank"], (name, user)
+
+    for name in (leaderboard.ALL, board):  # load the rank indexes, so the events move them from the start
+        leaderboard.top(name)
+    replay(seed, check)
+    assert board not in {r["board"] for r in storage.get_leaderboard_rows(DELETED)}
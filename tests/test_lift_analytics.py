@@ -0,0 +1,23 @@
+# tests/test_lift_analytics.py
+"""Lift analytics updated by events must match a recompute from all sets."""
+from __future__ import annotations
+import json
+
+import pytest
+
+import lift_analytics
+from activity import SEEDS, USERS, replay
+
+
+def same(a, b) -> bool:
+    return json.dumps(a, sort_keys=True, default=float) == json.dumps(b, sort_keys=True, default=float)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_lift_analytics_match_recompute(db, seed):
+    def check(weeks):
+        for user in USERS:
+            kept = lift_analytics.get(user)
+            assert same(kept, lift_analytics.recompute(user)), user
+
+    replay(seed, check)
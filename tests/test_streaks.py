@@ -0,0 +1,22 @@
+# tests/test_streaks.py
+"""Streaks advanced by events must match a recompute from the activity dates."""
+from __future__ import annotations
+
+import pytest
+
+import storage
+import streaks
+from activity import SEEDS, START, USERS, replay
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_streaks_match_recompute(db, seed):
+    def check(weeks):
+        for user in USERS:
+            expected = streaks.compute(storage.get_activity_dates(user))
+            today = expected["last_date"] or START.isoformat()
+            assert streaks.get(user, today) == streaks.as_of(expected, today), user
+            stored = storage.get_streak(user)
+            assert {k: stored[k] for k in expected} == expected, user
+
+    replay(seed, check)
@@ -0,0 +1,243 @@
+# theme.py
+"""Compiled, content-hashed stylesheets.
+
+The base theme and the accessibility variants (font scale, high contrast,
+reduced motion) are written once per process to ``static/css/`` under
+content-hashed names. Streamlit serves that folder at ``app/static/`` when
+``server.enableStaticServing`` is on (see ``.streamlit/config.toml``).
+
+Pages do not send CSS through ``st.markdown`` any more. ``loader_html``
+returns a short snippet that fetches the sheets into ``<style>`` tags in the
+parent document's ``<head>``. Those tags survive reruns, and because the file
+names are hashed each browser fetches a sheet only once. ``fetch`` is used
+instead of ``<link>`` because Streamlit serves ``.css`` as ``text/plain``.
+
+Build everything ahead of time with ``python theme.py``.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, NamedTuple, Tuple
+
+STATIC_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+CSS_DIR = os.path.join(STATIC_ROOT, "css")
+URL_PREFIX = "app/static/css/"
+
+SCALES = (1.0, 1.1, 1.2, 1.3, 1.4)  # the sidebar slider's steps
+THEMES = ("auto", "dark", "high-contrast")
+
+BASE_CSS = """
+.main {
+    background: linear-gradient(135deg, #ffeef8 0%, #fff5f8 50%, #f0f8ff 100%);
+}
+.main-header {
+    font-size: 3rem;
+    font-weight: 800;
+    text-align: center;
+    background: linear-gradient(45deg, #FF1493, #FF69B4, #DA70D6);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
+    margin-bottom: .5rem;
+}
+.sub-header {
+    font-size: 1.1rem;
+    text-align: center;
+    color: #666;
+    margin-bottom: 1rem;
+    font-weight: 300;
+}
+.hero-section {
+    text-align: center;
+    padding: 2rem;
+    background: linear-gradient(135deg, rgba(255,20,147,.15), rgba(255,105,180,.15), rgba(218,112,214,.15));
+    border-radius: 18px;
+    margin-bottom: 20px;
+    backdrop-filter: blur(10px);
+    box-shadow: 0 8px 32px rgba(0,0,0,.08);
+    border: 1px solid rgba(255,255,255,.35);
+}
+.nav-button {
+    background: linear-gradient(135deg, #FF69B4, #DA70D6);
+    color: white;
+    padding: 1.5rem;
+    border-radius: 15px;
+    text-align: center;
+    font-size: 1.2rem;
+    font-weight: 600;
+    box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+    transition: transform 0.2s;
+    cursor: pointer;
+}
+.nav-button:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 6px 20px rgba(0,0,0,0.15);
+}
+.info-card {
+    background: white;
+    padding: 1.5rem;
+    border-radius: 12px;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+    margin-bottom: 1rem;
+}
+.weekly-box {
+    background: rgba(255,255,255,.96);
+    padding: 12px;
+    border-radius: 14px;
+    margin: 8px 0 14px 0;
+    box-shadow: 0 4px 15px rgba(0,0,0,.08);
+    border-left: 5px solid #FF1493;
+}
+.category-header {
+    background: linear-gradient(45deg,#FF69B4,#DA70D6);
+    color:#fff;
+    padding: 10px;
+    border-radius: 10px;
+    text-align:center;
+    font-weight:700;
+    margin: 12px 0 8px 0;
+}
+.exercise-card {
+    background: rgba(255,255,255,.98);
+    padding: 12px;
+    border-radius: 12px;
+    box-shadow: 0 4px 15px rgba(0,0,0,.08);
+    margin: 8px 0;
+    border-left: 5px solid #FF1493;
+}
+.completed-card {
+    background: rgba(232,245,232,.95);
+    border-left: 5px solid #4CAF50;
+}
+.badge {
+    display:inline-block;
+    padding:6px 10px;
+    border-radius:12px;
+    color:#fff;
+    font-weight:700;
+    margin:6px 0;
+}
+"""
+
+HIGH_CONTRAST_CSS = """
+.main {
+    background: #000 !important;
+    color: #fff !important;
+}
+.stButton button {
+    background: #fff !important;
+    color: #000 !important;
+    border: 2px solid #fff !important;
+}
+"""
+
+REDUCED_MOTION_CSS = """
+* {
+    animation-duration: 0.01ms !important;
+    transition-duration: 0.01ms !important;
+}
+"""
+
+
+def scale_css(scale: float) -> str:
+    return f"""
+:root {{
+    --uifx-scale: {scale};
+}}
+.main * {{
+    font-size: calc(1rem * var(--uifx-scale));
+}}
+"""
+
+
+class Sheet(NamedTuple):
+    slot: str       # one sheet per slot is active at a time
+    name: str       # e.g. "base.3f2a9c01d4e5.css"
+    url: str
+    css: str
+
+
+_lock = threading.Lock()
+_sheets: Dict[Tuple[str, str], Sheet] = {}
+
+
+def _compile(slot: str, variant: str, css: str) -> Sheet:
+    key = (slot, variant)
+    sheet = _sheets.get(key)
+    if sheet is not None:
+        return sheet
+    css = css.strip() + "\n"
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    name = f"{slot}{'-' + variant if variant else ''}.{digest}.css"
+    path = os.path.join(CSS_DIR, name)
+    if not os.path.exists(path):
+        os.makedirs(CSS_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(css)
+        os.replace(tmp, path)
+    sheet = Sheet(slot, name, URL_PREFIX + name, css)
+    with _lock:
+        return _sheets.setdefault(key, sheet)
+
+
+def stylesheets(scale: float = 1.0, theme: str = "auto", reduced_motion: bool = False) -> Tuple[Sheet, ...]:
+    """Return the compiled sheets for one set of accessibility preferences."""
+    scale = round(float(scale), 2)
+    sheets = [
+        _compile("base", "", BASE_CSS),
+        _compile("scale", f"{scale:g}", scale_css(scale)),
+    ]
+    if theme == "high-contrast":
+        sheets.append(_compile("contrast", "high", HIGH_CONTRAST_CSS))
+    if reduced_motion:
+        sheets.append(_compile("motion", "reduced", REDUCED_MOTION_CSS))
+    return tuple(sheets)
+
+
+def build_all() -> Tuple[Sheet, ...]:
+    """Compile every variant the settings panel can select."""
+    built = {}
+    for scale in SCALES:
+        for theme in THEMES:
+            for reduced in (False, True):
+                for sheet in stylesheets(scale, theme, reduced):
+                    built[sheet.name] = sheet
+    return tuple(built.values())
+
+
+# Sheets are passed by file name; the slot is the part before the first
+# "." or "-" (see _compile).
+_LOADER = """<script>
+(function(){
+var P=%s,N=%s,d=parent.document,w={};
+function slot(n){return n.split(/[.-]/)[0];}
+function has(n){return d.querySelector('style[data-hg="'+n+'"]');}
+N.forEach(function(n){w[slot(n)]=n;});
+d.querySelectorAll("style[data-hg]").forEach(function(e){
+if(w[slot(e.dataset.hg)]!==e.dataset.hg){e.remove();}
+});
+N.forEach(function(n){
+if(has(n)){return;}
+fetch(new URL(P+n,d.baseURI)).then(function(r){return r.ok?r.text():Promise.reject(r.status);})
+.then(function(c){
+if(has(n)){return;}
+var e=d.createElement("style");e.dataset.hg=n;e.textContent=c;d.head.appendChild(e);
+}).catch(function(x){console.warn("theme: could not load "+n,x);});
+});
+})();
+</script>"""
+_LOADER = "".join(line.strip() for line in _LOADER.splitlines())
+
+
+def loader_html(sheets: Tuple[Sheet, ...]) -> str:
+    """HTML for a zero-height component that attaches ``sheets`` to the page."""
+    names = [s.name for s in sheets]
+    return _LOADER % (json.dumps(URL_PREFIX), json.dumps(names, separators=(",", ":")))
+
+
+if __name__ == "__main__":
+    for sheet in build_all():
+        print(os.path.join(CSS_DIR, sheet.name))
@@ -0,0 +1,243 @@
+# timeseries.py
+"""Local time-series store for wearable samples (heart rate, steps, ...).
+
+Samples are kept per user and metric in Parquet files under ``ROOT``, at
+three resolutions:
+
+* ``minute``: one value per minute (samples within a minute are summed for
+  ``SUM_METRICS`` and averaged otherwise), one file per month;
+* ``hour`` and ``day``: count, sum, min and max of the minute values, one
+  file per year and one overall.
+
+Timestamps are UTC epoch seconds stored with ``DELTA_BINARY_PACKED``, so a
+regular minute series costs a few bits a point; integral values (heart
+rate, steps) are delta-encoded too and anything else uses
+``BYTE_STREAM_SPLIT``, all zstd-compressed.
+
+``write`` merges new samples into the month files they fall in (a minute
+written again replaces the earlier value) and recomputes only the hours and
+days they touch. ``query`` picks the finest tier that returns at most
+``max_points`` points for the range (the chart's width in pixels), so a
+year-long chart reads the day tier instead of half a million minutes.
+Decoded files are cached by modification time.
+"""
+from __future__ import annotations
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import events
+
+if TYPE_CHECKING:
+    import numpy as np
+
+ROOT = os.path.join("user_data", "timeseries")
+TIERS: Tuple[Tuple[str, int], ...] = (("minute", 60), ("hour", 3600), ("day", 86400))
+SUM_METRICS = {"steps", "calories", "active_minutes"}
+MAX_POINTS = 1000
+CACHE_FILES = 64
+
+_locks_lock = threading.Lock()
+_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_cache_lock = threading.Lock()
+_cache: "OrderedDict[str, Tuple[Tuple[int, int], object]]" = OrderedDict()  # path -> (stamp, pandas frame)
+
+
+def _lock_for(user_id: str, metric: str) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault((user_id, metric), threading.Lock())
+
+
+def _seconds(ts) -> np.ndarray:
+    """Epoch seconds from ints, datetimes, ISO strings or datetime64 (naive values are UTC)."""
+    import numpy as np
+    import pandas as pd
+    ts = np.asarray(ts)
+    if ts.dtype.kind in "iu":
+        return ts.astype(np.int64)
+    return pd.to_datetime(ts, utc=True).as_unit("s").asi8
+
+
+def _keys(tier: str, ts: np.ndarray) -> np.ndarray:
+    import numpy as np
+    if tier == "minute":
+        return ts.astype("datetime64[s]").astype("datetime64[M]").astype(str)
+    if tier == "hour":
+        return ts.astype("datetime64[s]").astype("datetime64[Y]").astype(str)
+    return np.full(len(ts), "all")
+
+
+def _path(user_id: str, metric: str, tier: str, key: str) -> str:
+    return os.path.join(ROOT, quote(user_id, safe=""), quote(metric, safe=""), tier, f"{key}.parquet")
+
+
+def _read(path: str):
+    """The file at ``path`` as a pandas frame (None when missing), decoded once per modification."""
+    import numpy as np
+    import pyarrow.parquet as pq
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            _cache.move_to_end(path)
+            return cached[1]
+    frame = pq.read_table(path).to_pandas()
+    frame["ts"] = frame["ts"].astype(np.int64)
+    with _cache_lock:
+        _cache[path] = (stamp, frame)
+        while len(_cache) > CACHE_FILES:
+            _cache.popitem(last=False)
+    return frame
+
+
+def _write(path: str, frame):
+    """Replace the file at ``path`` with ``frame`` (ts plus value, or count/sum/min/max columns)."""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    columns, encoding = {}, {}
+    for name in frame.columns:
+        values = frame[name].to_numpy()
+        if name in ("ts", "count") or np.array_equal(values, np.round(values)):
+            columns[name] = pa.array(values.astype(np.int64))
+            encoding[name] = "DELTA_BINARY_PACKED"
+        else:
+            columns[name] = pa.array(values.astype(np.float64))
+            encoding[name] = "BYTE_STREAM_SPLIT"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{threading.get_ident()}"
+    pq.write_table(pa.table(columns), tmp, compression="zstd", use_dictionary=False, column_encoding=encoding)
+    os.replace(tmp, path)
+
+
+def _rollup(minutes, resolution: int):
+    """count/sum/min/max per ``resolution`` bucket of a minute frame (ts, value)."""
+    import pandas as pd
+    bucket = minutes["ts"].to_numpy() // resolution * resolution
+    grouped = minutes["value"].groupby(bucket)
+    return pd.DataFrame({"count": grouped.count(), "sum": grouped.sum(), "min": grouped.min(),
+                         "max": grouped.max()}).rename_axis("ts").reset_index()
+
+
+def _merge(old, new, keys: np.ndarray):
+    """``old`` without the rows whose ts is in ``keys``, plus ``new``, sorted by ts."""
+    import numpy as np
+    import pandas as pd
+    if old is None:
+        return new.sort_values("ts", ignore_index=True)
+    kept = old[~np.isin(old["ts"].to_numpy(), keys)]
+    return pd.concat([kept, new], ignore_index=True).sort_values("ts", ignore_index=True)
+
+
+def write(user_id: str, metric: str, ts, values) -> int:
+    """Store samples (timestamps and values of equal length); returns the minutes written."""
+    import numpy as np
+    import pandas as pd
+    seconds = _seconds(ts)
+    frame = pd.DataFrame({"ts": seconds - seconds % 60, "value": np.asarray(values, dtype=np.float64)})
+    how = "sum" if metric in SUM_METRICS else "mean"
+    minutes = frame.groupby("ts")["value"].agg(how).reset_index()
+    if minutes.empty:
+        return 0
+    with _lock_for(user_id, metric):
+        rollups: Dict[str, List] = {"hour": [], "day": []}
+        month_keys = _keys("minute", minutes["ts"].to_numpy())
+        for key in np.unique(month_keys):
+            part = minutes[month_keys == key]
+            path = _path(user_id, metric, "minute", key)
+            merged = _merge(_read(path), part, part["ts"].to_numpy())
+            _write(path, merged)
+            # Hours and days never cross a month, so the merged month has everything they need
+            for tier, resolution in TIERS[1:]:
+                touched = np.unique(part["ts"].to_numpy() // resolution * resolution)
+                span = merged[np.isin(merged["ts"].to_numpy() // resolution * resolution, touched)]
+                rollups[tier].append(_rollup(span, resolution))
+        for tier, _ in TIERS[1:]:
+            fresh = pd.concat(rollups[tier], ignore_index=True)
+            tier_keys = _keys(tier, fresh["ts"].to_numpy())
+            for key in np.unique(tier_keys):
+                part = fresh[tier_keys == key]
+                path = _path(user_id, metric, tier, key)
+                _write(path, _merge(_read(path), part, part["ts"].to_numpy()))
+    return len(minutes)
+
+
+def tier_for(start: int, end: int, max_points: int = MAX_POINTS) -> Tuple[str, int]:
+    """The finest (tier, seconds) with at most ``max_points`` buckets between ``start`` and ``end``."""
+    for tier, resolution in TIERS:
+        if (end - start) / resolution <= max_points:
+            return tier, resolution
+    return TIERS[-1]
+
+
+def _partition_keys(tier: str, start: int, end: int) -> List[str]:
+    import numpy as np
+    if tier == "day":
+        return ["all"]
+    unit = "M" if tier == "minute" else "Y"
+    first, last = (np.datetime64(int(t), "s").astype(f"datetime64[{unit}]") for t in (start, end))
+    return [str(k) for k in np.arange(first, last + 1)]
+
+
+def query(user_id: str, metric: str, start, end, max_points: int = MAX_POINTS, tier: Optional[str] = None):
+    """Samples in [start, end) at the finest tier that fits ``max_points``.
+
+    Returns a frame of ts (UTC datetimes), value (sum for ``SUM_METRICS``,
+    otherwise the mean), min and max, with ``attrs["tier"]`` set.
+    """
+    import numpy as np
+    import pandas as pd
+    start, end = (int(_seconds([t])[0]) for t in (start, end))
+    tier, resolution = (tier, dict(TIERS)[tier]) if tier else tier_for(start, end, max_points)
+    start -= start % resolution
+    parts = []
+    for key in _partition_keys(tier, start, end):
+        frame = _read(_path(user_id, metric, tier, key))
+        if frame is not None:
+            ts = frame["ts"].to_numpy()
+            lo, hi = np.searchsorted(ts, start), np.searchsorted(ts, end)
+            if hi > lo:
+                parts.append(frame.iloc[lo:hi])
+    if not parts:
+        found = pd.DataFrame({"ts": pd.to_datetime([], utc=True), "value": [], "min": [], "max": []})
+    elif tier == "minute":
+        rows = pd.concat(parts, ignore_index=True)
+        value = rows["value"].astype(np.float64)
+        found = pd.DataFrame({"ts": pd.to_datetime(rows["ts"], unit="s", utc=True), "value": value,
+                              "min": value, "max": value})
+    else:
+        rows = pd.concat(parts, ignore_index=True)
+        total = rows["sum"].astype(np.float64)
+        found = pd.DataFrame({
+            "ts": pd.to_datetime(rows["ts"], unit="s", utc=True),
+            "value": total if metric in SUM_METRICS else total / rows["count"],
+            "min": rows["min"].astype(np.float64), "max": rows["max"].astype(np.float64),
+        })
+    found.attrs["tier"] = tier
+    return found
+
+
+def metrics(user_id: str) -> List[str]:
+    """Metrics stored for the user."""
+    from urllib.parse import unquote
+    folder = os.path.join(ROOT, quote(user_id, safe=""))
+    return sorted(unquote(name) for name in os.listdir(folder)) if os.path.isdir(folder) else []
+
+
+def forget(user_id: str):
+    """Delete all of the user's samples."""
+    folder = os.path.join(ROOT, quote(user_id, safe=""))
+    with _cache_lock:
+        for path in [p for p in _cache if p.startswith(folder + os.sep)]:
+            del _cache[path]
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+events.subscribe("user_deleted", lambda user_id, **_: forget(user_id))
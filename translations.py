@@ -0,0 +1,73 @@
+# translations.py
+"""Compiled translation catalogs.
+
+Message files live in ``locales/<lang>.json`` and may nest sections::
+
+    {"welcome": "...", "nav": {"home": "🏠 Home"}}
+
+Each file is compiled on first use into a flat, read-only table keyed by
+dotted path (``"nav.home"``) with the English entries merged in underneath,
+so a lookup is a single dict access and missing keys fall back to ``en``.
+Tables are shared by every session in the process.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+from types import MappingProxyType
+from typing import Dict, Mapping
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+DEFAULT_LANG = "en"
+
+_lock = threading.RLock()
+_catalogs: Dict[str, Mapping[str, str]] = {}
+
+
+def _flatten(tree: Dict, prefix: str = "", out: Dict[str, str] = None) -> Dict[str, str]:
+    out = {} if out is None else out
+    for key, value in tree.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            _flatten(value, path + ".", out)
+        else:
+            out[path] = str(value)
+    return out
+
+
+def _read(lang: str) -> Dict[str, str]:
+    path = os.path.join(LOCALES_DIR, f"{lang}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return _flatten(json.load(f))
+
+
+def available_languages():
+    return sorted(name[:-5] for name in os.listdir(LOCALES_DIR) if name.endswith(".json"))
+
+
+def catalog(lang: str = DEFAULT_LANG) -> Mapping[str, str]:
+    """Return the compiled, immutable table for ``lang``."""
+    table = _catalogs.get(lang)
+    if table is not None:
+        return table
+    with _lock:
+        table = _catalogs.get(lang)
+        if table is None:
+            messages = dict(catalog(DEFAULT_LANG)) if lang != DEFAULT_LANG else {}
+            messages.update(_read(lang))
+            table = _catalogs[lang] = MappingProxyType(messages)
+    return table
+
+
+def gettext(key: str, lang: str = DEFAULT_LANG, **params) -> str:
+    """Translate ``key``; unknown keys are returned unchanged."""
+    text = catalog(lang).get(key, key)
+    return text.format(**params) if params else text
+
+
+def reload():
+    """Forget compiled tables so edited message files are picked up."""
+    with _lock:
+        _catalogs.clear()
@@ -0,0 +1,197 @@
+# user_context.py
+"""Compact per-user context for Coach Jo prompts.
+
+Mirrors what the Supabase ``get_user_context`` function assembles (profile,
+recent training, body weight, macros) as a few short lines of plain text:
+
+    Profile: 34 F, 165 cm, goal 143.3 lb by 2026-03-01 (0.5 lb/wk), activity moderate
+    Weight: 150.2 lb (7d -0.8, 30d -2.6), intake ~1710 kcal/day, 6/7 days logged
+    Forecast: trend 150.9 lb, -0.6 lb/wk, TDEE ~2080 kcal; goal 143.3 lb ~2026-02-18 (on track)
+    Training (7d): 38 sets in 4 sessions, 21,450 lb volume; top Hip Thrust 7,200, ...
+    Lifts: Hip Thrust e1RM 185 lb (+15 in 8 wk), ...; PRs: Hip Thrust e1RM 185 lb 2026-02-02; stalled: ...
+    Macros: protein 30%, carbs 40%, fat 30%; target 1920 kcal (P 144 g, C 192 g, F 64 g)
+
+Each section is cached per user and day. ``storage`` publishes an event on
+every write (see ``events.py``) and only the sections that depend on the
+written table are rebuilt, so a snapshot after logging a set re-queries
+seven days of sets and nothing else.
+"""
+from __future__ import annotations
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+import events
+import forecast
+import lift_analytics
+import macros
+import storage
+
+KG_TO_LB = 2.20462
+
+_lock = threading.Lock()
+_cache: Dict[str, Dict[str, Tuple[str, str]]] = {}  # user -> section -> (day, text)
+_generation: Dict[str, int] = {}  # bumped on invalidation so a build racing a write is not stored
+
+
+def _day(today: str, days: int) -> str:
+    return (date.fromisoformat(today) - timedelta(days=days)).isoformat()
+
+
+def _profile(user_id: str, today: str) -> str:
+    p = storage.get_profile(user_id)
+    if not p:
+        return ""
+    return (
+        f"Profile: {p['age']} {p['sex']}, {p['height_cm']:.0f} cm, goal "
+        f"{p['goal_weight_kg'] * KG_TO_LB:.1f} lb by {p['goal_date']} "
+        f"({p['weekly_pace_lb']:g} lb/wk), activity {p['activity_level']}"
+    )
+
+
+def _weight(user_id: str, today: str) -> str:
+    rows = storage.get_log_series(user_id, _day(today, 40), today, ("weight_kg", "cal_in"))  # room for a 30d baseline
+    if not rows:
+        return ""
+    by_day = {d: (w * KG_TO_LB, cal) for d, w, cal in rows}
+    latest_day = max(by_day)
+    latest = by_day[latest_day][0]
+
+    def change(days):
+        older = [d for d in by_day if d <= _day(latest_day, days)]
+        return f"{latest - by_day[max(older)][0]:+.1f}" if older else "n/a"
+
+    week = [v for d, v in by_day.items() if d > _day(today, 7)]
+    intake = [cal for _, cal in week if cal]
+    text = f"Weight: {latest:.1f} lb (7d {change(7)}, 30d {change(30)})"
+    if intake:
+        text += f", intake ~{sum(intake) / len(intake):.0f} kcal/day"
+    return text + f", {len(week)}/7 days logged"
+
+
+def _forecast(user_id: str, today: str) -> str:
+    found = forecast.get(user_id)
+    if not found:
+        return ""
+    text = f"Forecast: trend {found['trend_kg'] * KG_TO_LB:.1f} lb, {found['rate_kg_week'] * KG_TO_LB:+.1f} lb/wk"
+    if found["tdee"]:
+        text += f", TDEE ~{found['tdee']:.0f} kcal"
+    if found.get("goal_weight_kg") is not None:
+        text += f"; goal {found['goal_weight_kg'] * KG_TO_LB:.1f} lb "
+        if found["projected_date"]:
+            text += f"~{found['projected_date']}"
+            if found["on_track"] is not None:
+                text += " (on track)" if found["on_track"] else f" (behind {found['goal_date']})"
+        elif found["logs"] < forecast.MIN_LOGS:
+            text += f"(projected after {forecast.MIN_LOGS} weigh-ins)"
+        else:
+            text += "not on pace"
+        if found["on_track"] is False and found["target_kcal"]:
+            text += f", ~{found['target_kcal']:.0f} kcal/day needed"
+    return text
+
+
+def _training(user_id: str, today: str) -> str:
+    sets = [s for s in storage.get_workout_sets(user_id, _day(today, 6), today) if s["completed"]]
+    if not sets:
+        return ""
+    volume = defaultdict(float)
+    for s in sets:
+        volume[s["exercise_name"]] += s["reps"] * s["weight"]
+    top = sorted(volume.items(), key=lambda kv: -kv[1])[:3]
+    sessions = len({s["date"] for s in sets})
+    return (
+        f"Training (7d): {len(sets)} sets in {sessions} sessions, {sum(volume.values()):,.0f} lb volume; "
+        "top " + ", ".join(f"{name} {v:,.0f}" for name, v in top)
+    )
+
+
+def _lifts(user_id: str, today: str) -> str:
+    found = lift_analytics.summary(user_id, today)
+    if not found["lifts"]:
+        return ""
+    weeks = lift_analytics.PROGRESS_DAYS // 7
+    parts = []
+    for lift in found["lifts"][:4]:
+        text = f"{lift['name']} e1RM {lift['e1rm']:.0f} lb"
+        if lift["change"] is not None:
+            text += f" ({lift['change']:+.0f} in {weeks} wk)"
+        parts.append(text)
+    text = "Lifts: " + ", ".join(parts)
+    prs = [pr for pr in found["prs"] if pr["kind"] == "e1rm"][:2]
+    if prs:
+        text += "; PRs: " + ", ".join(f"{pr['name']} e1RM {pr['value']:.0f} lb {pr['date']}" for pr in prs)
+    stalled = [lift for lift in found["lifts"] if lift["stalled"]][:2]
+    if stalled:
+        text += "; stalled: " + ", ".join(f"{lift['name']} ({lift['since_pr']} sessions)" for lift in stalled)
+    return text
+
+
+def _macros(user_id: str, today: str) -> str:
+    split = storage.get_settings(user_id)
+    goal = macros.for_user(user_id)
+    parts = [", ".join(f"{k} {v}" for k, v in split.items())] if split else []
+    if goal:
+        parts.append(f"target {goal['calories']:.0f} kcal (P {goal['protein_g']:.0f} g, "
+                     f"C {goal['carbs_g']:.0f} g, F {goal['fat_g']:.0f} g)")
+    return "Macros: " + "; ".join(parts) if parts else ""
+
+
+SECTIONS: Dict[str, Callable[[str, str], str]] = {
+    "profile": _profile,
+    "weight": _weight,
+    "forecast": _forecast,
+    "training": _training,
+    "lifts": _lifts,
+    "macros": _macros,
+}
+
+_AFFECTS = {
+    "profile": ("profile", "macros", "forecast"),
+    "settings": ("macros",),
+    "daily_log": ("weight", "forecast"),
+    "workout_set": ("training", "lifts"),
+    "user_deleted": tuple(SECTIONS),
+}
+
+
+def snapshot(user_id: str, today: Optional[str] = None) -> str:
+    """The user's context lines; sections are rebuilt only when stale."""
+    today = today or date.today().isoformat()
+    storage.init_storage()
+    with _lock:
+        cached = dict(_cache.get(user_id, {}))
+        generation = _generation.get(user_id, 0)
+    lines = []
+    for name, build in SECTIONS.items():
+        entry = cached.get(name)
+        if entry is None or entry[0] != today:
+            entry = (today, build(user_id, today))
+            with _lock:
+                if _generation.get(user_id, 0) == generation:
+                    _cache.setdefault(user_id, {})[name] = entry
+        if entry[1]:
+            lines.append(entry[1])
+    return "\n".join(lines)
+
+
+def invalidate(user_id: str, *sections: str):
+    """Drop cached sections for ``user_id`` (all of them when none are given)."""
+    with _lock:
+        _generation[user_id] = _generation.get(user_id, 0) + 1
+        cached = _cache.get(user_id)
+        if cached is None:
+            return
+        for name in sections or tuple(cached):
+            cached.pop(name, None)
+
+
+def _on_write(topic: str):
+    def handler(user_id: str, **_):
+        invalidate(user_id, *_AFFECTS[topic])
+    return handler
+
+
+for _topic in _AFFECTS:
+    events.subscribe(_topic, _on_write(_topic))
@@ -0,0 +1,94 @@
+# warmup.py
+"""Warm the server process before traffic arrives.
+
+Run the app through this launcher instead of ``streamlit run`` so heavy
+imports, the storage engine and the process-wide caches are built before the
+first session connects::
+
+    python warmup.py                 # warm up, then start the server
+    python warmup.py --warm-only     # warm up and exit (image build step)
+
+Extra arguments after ``--`` are passed to Streamlit, e.g.
+``python warmup.py -- --server.port 8080``.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from typing import Dict
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+def warm_up() -> Dict[str, float]:
+    """Pre-build caches; returns the seconds spent on each step."""
+    timings = {}
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:  # warm-up must never keep the server down
+            print(f"warm-up: {name} failed: {e}", file=sys.stderr)
+        timings[name] = time.perf_counter() - t0
+
+    def heavy_imports():
+        import numpy  # noqa: F401
+        import pandas  # noqa: F401
+
+    def storage_engine():
+        import storage
+        storage.init_storage()
+        with storage.engine.connect():
+            pass
+
+    def app_caches():
+        # Importing app outside a script run only defines functions and
+        # constants; main() is not called.
+        import app
+        import appcache
+        app.get_all_exercises()
+        app.coach_index()
+        app.load_videos_json()
+        app.load_videos_db()
+        appcache.load_json(app.USER_PROGRESS_JSON, {})
+
+    def stylesheets():
+        import theme
+        theme.build_all()
+
+    def translation_catalogs():
+        import translations
+        for lang in translations.available_languages():
+            translations.catalog(lang)
+
+    step("heavy_imports", heavy_imports)
+    step("storage_engine", storage_engine)
+    step("app_caches", app_caches)
+    step("stylesheets", stylesheets)
+    step("translation_catalogs", translation_catalogs)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--warm-only", action="store_true", help="warm up and exit")
+    parser.add_argument("streamlit_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    os.chdir(os.path.dirname(APP_PATH))
+    timings = warm_up()
+    for name, secs in timings.items():
+        print(f"warm-up: {name:<16} {secs * 1000:8.1f} ms")
+    if args.warm_only:
+        return 0
+
+    from streamlit.web import cli as stcli
+    extra = [a for a in args.streamlit_args if a != "--"]
+    sys.argv = ["streamlit", "run", APP_PATH] + extra
+    return stcli.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())